@@ -9,11 +9,11 @@ class WidgetInline(admin.TabularInline):
 
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
-    list_display = ['name', 'report_type', 'start_date', 'end_date', 'file_format', 'generated_by', 'created_at']
-    list_filter = ['report_type', 'file_format', 'created_at']
+    list_display = ['name', 'report_type', 'status', 'start_date', 'end_date', 'file_format', 'generated_by', 'created_at']
+    list_filter = ['report_type', 'status', 'file_format', 'created_at']
     search_fields = ['name', 'description']
     date_hierarchy = 'created_at'
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'completed_at']
     
     fieldsets = (
         ('Información del Reporte', {
@@ -28,6 +28,9 @@ class ReportAdmin(admin.ModelAdmin):
         ('Configuración', {
             'fields': ('filters', 'parameters')
         }),
+        ('Generación', {
+            'fields': ('status', 'data_version', 'error_message', 'completed_at')
+        }),
         ('Metadata', {
             'fields': ('generated_by', 'created_at')
         }),
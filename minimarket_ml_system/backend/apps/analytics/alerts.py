@@ -0,0 +1,273 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/alerts.py
+
+import logging
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from apps.monitoring.tracing import span
+from apps.products.models import Product
+from apps.sales.models import SaleItem, business_date_range
+from apps.inventory.lots import ExpirationScanner
+from apps.ml_models.models import DemandPrediction
+from .models import Alert
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+# Reglas que dependen solo del stock (las que se reevalúan desde señales)
+STOCK_RULES = ['LOW_STOCK', 'OVERSTOCK']
+
+DEFAULT_ALERTS = {
+    'EXPIRY_DAYS': 7,            # Anticipación para alertar vencimientos
+    'OVERSTOCK_CRITICAL': 1.5,   # Múltiplo de max_stock a partir del cual es advertencia
+    'ANOMALY_WINDOW_DAYS': 28,   # Historia para la línea base de ventas diarias
+    'ANOMALY_Z': 3.0,            # Desvíos para considerar anómalo el día
+    'ANOMALY_MIN_UNITS': 5,      # Diferencia mínima en unidades para alertar
+    'SIGNALS': False,            # Reevaluar reglas de stock al guardar un producto
+}
+
+
+def alert_settings():
+    return {**DEFAULT_ALERTS, **getattr(settings, 'ALERT_ENGINE', {})}
+
+
+class AlertEngine:
+    """Genera alertas evaluando cada regla como una consulta sobre todo el catálogo
+
+    Cada regla retorna {product_id: Alert sin guardar}. run() compara contra las
+    alertas abiertas del mismo tipo (índice parcial alert_type/product), crea las
+    nuevas con bulk_create, actualiza las que cambiaron de severidad y resuelve
+    las que ya no se cumplen. Con product_ids evalúa solo esos productos.
+    """
+
+    def __init__(self, **overrides):
+        config = alert_settings()
+        config.update({key.upper(): value for key, value in overrides.items() if value is not None})
+        self.config = config
+        self.rules = {
+            'LOW_STOCK': self.low_stock_rule,
+            'OVERSTOCK': self.overstock_rule,
+            'EXPIRATION': self.expiration_rule,
+            'PREDICTION': self.prediction_rule,
+        }
+
+    def products(self, product_ids=None):
+        products = Product.objects.filter(is_active=True)
+        if product_ids is not None:
+            products = products.filter(id__in=product_ids)
+        return products
+
+    def low_stock_rule(self, product_ids=None):
+        """Stock en o bajo el punto de reorden"""
+        alerts = {}
+        rows = self.products(product_ids).filter(
+            current_stock__lte=F('reorder_point')
+        ).values_list('id', 'name', 'current_stock', 'min_stock', 'reorder_point')
+
+        for product_id, name, stock, min_stock, reorder_point in rows:
+            if stock <= 0:
+                severity, title = 'CRITICAL', f'Sin stock: {name}'
+            elif stock <= min_stock:
+                severity, title = 'WARNING', f'Stock bajo: {name}'
+            else:
+                severity, title = 'INFO', f'Punto de reorden: {name}'
+            alerts[product_id] = Alert(
+                alert_type='LOW_STOCK',
+                severity=severity,
+                title=title,
+                message=f'Stock actual {stock} (mínimo {min_stock}, punto de reorden {reorder_point})',
+                product_id=product_id,
+                data={'current_stock': stock, 'min_stock': min_stock, 'reorder_point': reorder_point}
+            )
+        return alerts
+
+    def overstock_rule(self, product_ids=None):
+        """Stock por encima del máximo"""
+        alerts = {}
+        rows = self.products(product_ids).filter(
+            max_stock__gt=0, current_stock__gt=F('max_stock')
+        ).values_list('id', 'name', 'current_stock', 'max_stock')
+
+        for product_id, name, stock, max_stock in rows:
+            severity = 'WARNING' if stock >= max_stock * self.config['OVERSTOCK_CRITICAL'] else 'INFO'
+            alerts[product_id] = Alert(
+                alert_type='OVERSTOCK',
+                severity=severity,
+                title=f'Sobrestock: {name}',
+                message=f'Stock actual {stock} supera el máximo de {max_stock}',
+                product_id=product_id,
+                data={'current_stock': stock, 'max_stock': max_stock, 'excess': stock - max_stock}
+            )
+        return alerts
+
+    def expiration_rule(self, product_ids=None):
+        """Lotes vencidos o por vencer (una consulta agrupada por producto)"""
+        scanner = ExpirationScanner(days=self.config['EXPIRY_DAYS'])
+        alerts = {}
+        for product_id, row in scanner.at_risk(product_ids).items():
+            days_left = (row['next_expiration'] - scanner.today).days
+            expired = days_left < 0
+            alerts[product_id] = Alert(
+                alert_type='EXPIRATION',
+                severity='CRITICAL' if expired or days_left <= 1 else 'WARNING',
+                title=f"{'Lote vencido' if expired else 'Producto por vencer'}: {row['product__name']}",
+                message=(
+                    f"{row['units']} unidades en {row['lots']} lote(s); "
+                    f"{'venció' if expired else 'vence'} el {row['next_expiration']:%d/%m/%Y}"
+                ),
+                product_id=product_id,
+                data={
+                    'lots': row['lots'],
+                    'units': row['units'],
+                    'next_expiration': row['next_expiration'].isoformat(),
+                    'days_to_expiry': days_left,
+                }
+            )
+        return alerts
+
+    def daily_sales_matrix(self, product_ids=None, on_date=None):
+        """Ventas diarias (productos x días) de la ventana de referencia más el día evaluado"""
+        on_date = on_date or timezone.localdate() - timedelta(days=1)
+        start = on_date - timedelta(days=self.config['ANOMALY_WINDOW_DAYS'])
+
+        items = SaleItem.objects.filter(
+            business_date_range(start, on_date, prefix='sale__'),
+            sale__status='COMPLETED',
+            product__is_active=True
+        )
+        if product_ids is not None:
+            items = items.filter(product_id__in=product_ids)
+
+        daily = pd.DataFrame.from_records(
+            list(
+                items.values('product_id', 'sale__business_date')
+                .annotate(units=Sum('quantity'))
+                .values_list('product_id', 'sale__business_date', 'units')
+            ),
+            columns=['product_id', 'date', 'units']
+        )
+        dates = pd.date_range(start, on_date, freq='D').date
+        if daily.empty:
+            return pd.DataFrame(columns=dates, dtype=float), on_date
+        return daily.pivot_table(
+            index='product_id', columns='date', values='units', aggfunc='sum', fill_value=0
+        ).reindex(columns=dates, fill_value=0).astype(float), on_date
+
+    def prediction_rule(self, product_ids=None):
+        """Ventas de ayer fuera de lo esperado
+
+        Si existe una DemandPrediction diaria para el día se usan sus límites;
+        si no, la media ± ANOMALY_Z desvíos de la ventana previa.
+        """
+        matrix, on_date = self.daily_sales_matrix(product_ids)
+        if matrix.empty:
+            return {}
+
+        history = matrix.iloc[:, :-1].to_numpy()
+        actual = matrix.iloc[:, -1].to_numpy()
+        expected = history.mean(axis=1)
+        spread = self.config['ANOMALY_Z'] * history.std(axis=1)
+        lower = np.maximum(expected - spread, 0)
+        upper = expected + spread
+
+        # Límites del modelo donde hay predicción guardada para el día
+        stored = DemandPrediction.objects.filter(
+            prediction_date=on_date, prediction_period='DAILY', product_id__in=matrix.index.tolist()
+        ).values_list('product_id', 'predicted_quantity', 'lower_bound', 'upper_bound')
+        position = {product_id: i for i, product_id in enumerate(matrix.index)}
+        for product_id, predicted, low, high in stored:
+            i = position[product_id]
+            expected[i] = float(predicted)
+            lower[i] = float(low) if low is not None else lower[i]
+            upper[i] = float(high) if high is not None else upper[i]
+
+        deviation = actual - expected
+        anomalous = (
+            ((actual > upper) | (actual < lower)) &
+            (np.abs(deviation) >= self.config['ANOMALY_MIN_UNITS'])
+        )
+        if not anomalous.any():
+            return {}
+
+        names = dict(Product.objects.filter(id__in=matrix.index[anomalous].tolist()).values_list('id', 'name'))
+        alerts = {}
+        for i in np.flatnonzero(anomalous):
+            product_id = int(matrix.index[i])
+            spike = deviation[i] > 0
+            alerts[product_id] = Alert(
+                alert_type='PREDICTION',
+                severity='WARNING' if spike else 'INFO',
+                title=f"{'Demanda inusualmente alta' if spike else 'Demanda inusualmente baja'}: {names.get(product_id, product_id)}",
+                message=f'Vendió {actual[i]:.0f} unidades el {on_date:%d/%m/%Y}; se esperaban {expected[i]:.1f}',
+                product_id=product_id,
+                data={
+                    'date': on_date.isoformat(),
+                    'actual': float(actual[i]),
+                    'expected': round(float(expected[i]), 2),
+                    'lower_bound': round(float(lower[i]), 2),
+                    'upper_bound': round(float(upper[i]), 2),
+                }
+            )
+        return alerts
+
+    @span('alerts.run')
+    def run(self, rules=None, product_ids=None, dry_run=False):
+        """Evalúa las reglas y sincroniza las alertas abiertas
+
+        Retorna {regla: {'active', 'created', 'updated', 'resolved'}}.
+        """
+        rules = rules or list(self.rules)
+        unknown = set(rules) - set(self.rules)
+        if unknown:
+            raise ValueError(f"Reglas no disponibles: {sorted(unknown)}")
+
+        summary = {}
+        for rule in rules:
+            with span(f'alerts.rule.{rule}'):
+                candidates = self.rules[rule](product_ids)
+            summary[rule] = self.sync(rule, candidates, product_ids, dry_run=dry_run)
+
+        logger.info("Alertas generadas", extra={'summary': summary, 'incremental': product_ids is not None})
+        return summary
+
+    def sync(self, rule, candidates, product_ids=None, dry_run=False):
+        """Crea, actualiza y resuelve las alertas de una regla"""
+        now = timezone.now()
+        open_alerts = Alert.objects.filter(alert_type=rule, is_resolved=False, product__isnull=False)
+        if product_ids is not None:
+            open_alerts = open_alerts.filter(product_id__in=product_ids)
+
+        existing = {
+            product_id: (alert_id, severity)
+            for alert_id, product_id, severity in open_alerts.values_list('id', 'product_id', 'severity')
+        }
+        cleared = [alert_id for product_id, (alert_id, _) in existing.items() if product_id not in candidates]
+        new_alerts = [alert for product_id, alert in candidates.items() if product_id not in existing]
+
+        # Alertas que siguen abiertas pero cambiaron de severidad
+        changed = []
+        for product_id, alert in candidates.items():
+            if product_id in existing and existing[product_id][1] != alert.severity:
+                alert.id = existing[product_id][0]
+                alert.updated_at = now
+                changed.append(alert)
+
+        if not dry_run:
+            with transaction.atomic():
+                Alert.objects.bulk_create(new_alerts, batch_size=BATCH_SIZE)
+                Alert.objects.bulk_update(
+                    changed, ['severity', 'title', 'message', 'data', 'updated_at'], batch_size=BATCH_SIZE
+                )
+                Alert.objects.filter(id__in=cleared).update(is_resolved=True, resolved_at=now, updated_at=now)
+
+        return {
+            'active': len(candidates),
+            'created': len(new_alerts),
+            'updated': len(changed),
+            'resolved': len(cleared),
+        }
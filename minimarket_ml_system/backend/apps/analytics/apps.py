@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.analytics'
\ No newline at end of file
+    name = 'apps.analytics'
+
+    def ready(self):
+        from . import signals
+
+        # KPIs REALTIME de inventario a partir de los movimientos de stock
+        signals.connect_kpis()
+
+        # Alertas incrementales de stock (opcional; por defecto solo el comando programado)
+        if getattr(settings, 'ALERT_ENGINE', {}).get('SIGNALS'):
+            signals.connect()
@@ -0,0 +1,225 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/basket.py
+
+import logging
+import os
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from apps.monitoring.tracing import span
+from apps.products.models import Product
+from apps.sales.models import Sale, SaleItem
+from .models import ProductAssociation
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+MIN_PAIR_COUNT = 3  # Ventas mínimas con ambos productos para generar una regla
+TOP_K = 10          # Reglas guardadas por producto
+
+STATE_FILE = 'market_basket_state.npz'
+
+
+def sale_pairs(items):
+    """Arreglo (n, 2) de (sale_id, product_id) de un queryset de SaleItem"""
+    return np.array(list(items.values_list('sale_id', 'product_id')), dtype=np.int64).reshape(-1, 2)
+
+
+def basket_matrix(pairs, n_products):
+    """Matriz dispersa CSR ventas x productos (1 si la venta incluye el producto)
+
+    pairs: arreglo (n, 2) de (sale_id, product_id), ver sale_pairs.
+    """
+    if not len(pairs):
+        return sparse.csr_matrix((0, n_products), dtype=np.int32)
+
+    _, rows = np.unique(pairs[:, 0], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.int32), (rows, pairs[:, 1])),
+        shape=(rows.max() + 1, n_products)
+    )
+    # Un producto repetido en la misma venta cuenta una vez
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+class MarketBasketAnalyzer:
+    """Análisis de canasta: co-ocurrencias de productos y reglas de asociación
+
+    La matriz de co-ocurrencias C = Xᵀ·X (X: ventas x productos, CSR) se guarda
+    en disco junto con la última venta procesada y los ids de las ventas que
+    suma; cada actualización solo suma la contribución de las ventas nuevas y
+    resta, una sola vez, la de las ventas contadas que ya no están completadas.
+    La diagonal de C es la cantidad de ventas por producto.
+    De C se derivan soporte, confianza y lift, y se guardan las TOP_K reglas
+    por producto en ProductAssociation.
+    """
+
+    def __init__(self, state_dir=None, min_pair_count=MIN_PAIR_COUNT, top_k=TOP_K):
+        self.state_path = os.path.join(state_dir or settings.PROCESSED_DATA_PATH, STATE_FILE)
+        self.min_pair_count = min_pair_count
+        self.top_k = top_k
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return None
+        with np.load(self.state_path) as state:
+            if 'counted' not in state.files:
+                # Estado de una versión anterior (sin ventas contadas): se reconstruye
+                logger.info("Estado de canasta sin ventas contadas: se reconstruye")
+                return None
+            cooccurrence = sparse.csr_matrix(
+                (state['data'], state['indices'], state['indptr']), shape=tuple(state['shape'])
+            )
+            baskets, last_sale_id, updated_at = state['meta']
+            counted = state['counted']
+        return {
+            'cooccurrence': cooccurrence,
+            'baskets': int(baskets),
+            'last_sale_id': int(last_sale_id),
+            'counted': counted,
+            'updated_at': datetime.fromtimestamp(float(updated_at), tz=dt_timezone.utc),
+        }
+
+    def save_state(self, cooccurrence, baskets, last_sale_id, counted, updated_at):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = f'{self.state_path}.tmp.npz'
+        np.savez(
+            tmp_path,
+            data=cooccurrence.data,
+            indices=cooccurrence.indices,
+            indptr=cooccurrence.indptr,
+            shape=np.array(cooccurrence.shape),
+            counted=counted,
+            meta=np.array([baskets, last_sale_id, updated_at.timestamp()])
+        )
+        os.replace(tmp_path, self.state_path)
+
+    @span('basket.update')
+    def update(self, rebuild=False):
+        """Actualiza la matriz de co-ocurrencias y regenera las reglas
+
+        Retorna un dict con las ventas agregadas/restadas y las reglas guardadas.
+        """
+        state = None if rebuild else self.load_state()
+        now = timezone.now()
+        n_products = (Product.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        last_sale_id = Sale.objects.aggregate(last=Max('id'))['last'] or 0
+
+        if state is None:
+            cooccurrence = sparse.csr_matrix((n_products, n_products), dtype=np.int64)
+            baskets, previous_id, counted = 0, 0, np.zeros(0, dtype=np.int64)
+        else:
+            cooccurrence = state['cooccurrence']
+            baskets, previous_id, counted = state['baskets'], state['last_sale_id'], state['counted']
+            if cooccurrence.shape[0] < n_products:
+                cooccurrence.resize((n_products, n_products))
+
+        # Ventas contadas que ya no están completadas (anuladas/devueltas): se restan una vez
+        removed = sparse.csr_matrix((0, n_products), dtype=np.int32)
+        if previous_id:
+            pairs = sale_pairs(
+                SaleItem.objects.filter(sale_id__lte=previous_id).exclude(sale__status='COMPLETED')
+            )
+            pairs = pairs[np.isin(pairs[:, 0], counted)]
+            removed = basket_matrix(pairs, n_products)
+            cooccurrence = cooccurrence - (removed.T @ removed).astype(np.int64)
+            baskets -= removed.shape[0]
+            counted = np.setdiff1d(counted, pairs[:, 0])
+
+        # Ventas nuevas desde la última corrida
+        pairs = sale_pairs(
+            SaleItem.objects.filter(
+                sale__status='COMPLETED', sale_id__gt=previous_id, sale_id__lte=last_sale_id
+            )
+        )
+        added = basket_matrix(pairs, n_products)
+        cooccurrence = cooccurrence + (added.T @ added).astype(np.int64)
+        baskets += added.shape[0]
+        counted = np.union1d(counted, pairs[:, 0])
+
+        cooccurrence = cooccurrence.tocsr()
+        cooccurrence.eliminate_zeros()
+        self.save_state(cooccurrence, baskets, last_sale_id, counted, now)
+
+        rules = self.derive_rules(cooccurrence, baskets)
+        saved = self.write(rules, now)
+
+        summary = {
+            'baskets': baskets,
+            'added_sales': added.shape[0],
+            'removed_sales': removed.shape[0],
+            'pairs': int((cooccurrence.nnz - np.count_nonzero(cooccurrence.diagonal())) / 2),
+            'rules': saved,
+            'incremental': state is not None,
+        }
+        logger.info("Análisis de canasta actualizado", extra=summary)
+        return summary
+
+    def derive_rules(self, cooccurrence, baskets):
+        """Reglas product -> associated_product con soporte, confianza y lift (vectorizado)
+
+        Retorna un DataFrame con las TOP_K reglas de mayor lift por producto.
+        """
+        columns = ['product_id', 'associated_product_id', 'pair_count', 'support', 'confidence', 'lift']
+        if baskets <= 0:
+            return pd.DataFrame(columns=columns)
+
+        counts = cooccurrence.diagonal().astype(np.float64)
+        pairs = cooccurrence.tocoo()
+        mask = (pairs.row != pairs.col) & (pairs.data >= self.min_pair_count)
+        antecedent, consequent, together = pairs.row[mask], pairs.col[mask], pairs.data[mask]
+        if not len(together):
+            return pd.DataFrame(columns=columns)
+
+        support = together / baskets
+        confidence = together / counts[antecedent]
+        lift = confidence / (counts[consequent] / baskets)
+
+        # Orden: producto, lift desc, confianza desc; luego posición dentro de cada producto
+        order = np.lexsort((-confidence, -lift, antecedent))
+        antecedent, consequent, together = antecedent[order], consequent[order], together[order]
+        support, confidence, lift = support[order], confidence[order], lift[order]
+        starts = np.flatnonzero(np.r_[True, antecedent[1:] != antecedent[:-1]])
+        rank = np.arange(len(antecedent)) - np.repeat(starts, np.diff(np.r_[starts, len(antecedent)]))
+        keep = rank < self.top_k
+
+        return pd.DataFrame({
+            'product_id': antecedent[keep],
+            'associated_product_id': consequent[keep],
+            'pair_count': together[keep],
+            'support': support[keep],
+            'confidence': confidence[keep],
+            'lift': lift[keep],
+        })
+
+    def write(self, rules, computed_at):
+        """Reemplaza las reglas guardadas (productos eliminados se omiten)"""
+        existing = np.array(list(Product.objects.values_list('id', flat=True)), dtype=np.int64)
+        rules = rules[rules['product_id'].isin(existing) & rules['associated_product_id'].isin(existing)]
+
+        with transaction.atomic():
+            ProductAssociation.objects.all().delete()
+            ProductAssociation.objects.bulk_create(
+                [
+                    ProductAssociation(
+                        product_id=int(row.product_id),
+                        associated_product_id=int(row.associated_product_id),
+                        pair_count=int(row.pair_count),
+                        support=Decimal(f'{row.support:.6f}'),
+                        confidence=Decimal(f'{row.confidence:.6f}'),
+                        lift=Decimal(f'{row.lift:.4f}'),
+                        computed_at=computed_at
+                    )
+                    for row in rules.itertuples(index=False)
+                ],
+                batch_size=BATCH_SIZE
+            )
+        return len(rules)
@@ -0,0 +1,145 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/charts.py
+
+"""Gráficos del análisis exploratorio
+
+Funciones puras sobre datos ya agregados (dicts y listas): no importan Django,
+así se pueden ejecutar en procesos del pool sin configurar el ORM. Usan el
+backend Agg (sin interfaz gráfica).
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+STOCK_COLORS = {'SIN_STOCK': 'red', 'STOCK_BAJO': 'orange', 'NORMAL': 'green', 'SOBRESTOCK': 'blue'}
+
+
+def setup_matplotlib():
+    """Configura matplotlib para mejores gráficos"""
+    plt.style.use('seaborn-v0_8-darkgrid')
+    plt.rcParams['figure.figsize'] = (12, 6)
+    plt.rcParams['font.size'] = 10
+    plt.rcParams['axes.titlesize'] = 14
+    plt.rcParams['axes.labelsize'] = 12
+    plt.rcParams['xtick.labelsize'] = 10
+    plt.rcParams['ytick.labelsize'] = 10
+
+
+def sales_by_weekday(data, path):
+    plt.figure(figsize=(10, 6))
+    pd.Series(data).reindex(DAY_ORDER).plot(kind='bar', color='skyblue')
+    plt.title('Distribución de Ventas por Día de la Semana')
+    plt.xlabel('Día de la Semana')
+    plt.ylabel('Número de Ventas')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def sales_by_hour(data, path):
+    plt.figure(figsize=(12, 6))
+    hours = pd.Series({int(hour): count for hour, count in data.items()}).sort_index()
+    hours.plot(kind='line', marker='o', color='darkblue')
+    plt.title('Distribución de Ventas por Hora del Día')
+    plt.xlabel('Hora del Día')
+    plt.ylabel('Número de Ventas')
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def monthly_trend(data, path):
+    df_monthly = pd.DataFrame(data)
+    df_monthly['period'] = pd.to_datetime(df_monthly['period'])
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+
+    # Gráfico de ventas totales
+    ax1.plot(df_monthly['period'], df_monthly['total'].astype(float), marker='o', linewidth=2)
+    ax1.set_title('Tendencia de Ventas Mensuales - Monto Total')
+    ax1.set_xlabel('Mes')
+    ax1.set_ylabel('Ventas Totales (S/.)')
+    ax1.grid(True, alpha=0.3)
+
+    # Gráfico de cantidad de ventas
+    ax2.plot(df_monthly['period'], df_monthly['count'], marker='s', linewidth=2, color='green')
+    ax2.set_title('Tendencia de Ventas Mensuales - Cantidad')
+    ax2.set_xlabel('Mes')
+    ax2.set_ylabel('Cantidad de Ventas')
+    ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close(fig)
+
+
+def top_products(data, path):
+    df_top = pd.DataFrame(data)
+    plt.figure(figsize=(12, 8))
+    plt.barh(df_top['product__name'], df_top['total_quantity'])
+    plt.xlabel('Cantidad Vendida')
+    plt.title('Top 20 Productos Más Vendidos')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def revenue_by_category(data, path):
+    df_category = pd.DataFrame(data)
+    plt.figure(figsize=(10, 8))
+    plt.pie(df_category['total_revenue'].astype(float),
+            labels=df_category['product__category__name'],
+            autopct='%1.1f%%',
+            startangle=90)
+    plt.title('Distribución de Ingresos por Categoría')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def stock_status(data, path):
+    counts = pd.Series(data)
+    plt.figure(figsize=(10, 6))
+    counts.plot(kind='bar', color=[STOCK_COLORS.get(x, 'gray') for x in counts.index])
+    plt.title('Distribución de Estados de Stock')
+    plt.xlabel('Estado de Stock')
+    plt.ylabel('Cantidad de Productos')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def seasonal_products(data, path):
+    plt.figure(figsize=(12, 6))
+    pd.Series(data).plot(kind='bar')
+    plt.title('Productos con Mayor Estacionalidad (Coeficiente de Variación)')
+    plt.xlabel('Producto')
+    plt.ylabel('Coeficiente de Variación')
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+RENDERERS = {
+    'sales_by_weekday': sales_by_weekday,
+    'sales_by_hour': sales_by_hour,
+    'monthly_trend': monthly_trend,
+    'top_products': top_products,
+    'revenue_by_category': revenue_by_category,
+    'stock_status': stock_status,
+    'seasonal_products': seasonal_products,
+}
+
+
+def render(name, data, path):
+    """Punto de entrada de los procesos del pool: dibuja un gráfico y retorna su ruta"""
+    setup_matplotlib()
+    RENDERERS[name](data, path)
+    return path
@@ -1,254 +1,257 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from django.db.models import Sum, Count, Avg, F, Q
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import Sum, Count, Avg, F, Q, Max, Min
+from django.db.models.functions import ExtractMonth, ExtractWeekDay, TruncMonth
+from django.utils import timezone
+from apps.monitoring.tracing import span
 from apps.products.models import Product, Category
-from apps.sales.models import Sale, SaleItem, DailySummary
+from apps.sales.models import Sale, SaleItem
 from apps.inventory.models import StockMovement
+from . import charts
+from .models import Report
+import hashlib
+import json
+import logging
+import multiprocessing
 import os
+import shutil
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar los análisis o los gráficos: invalida los resultados guardados
+ANALYSIS_VERSION = 3
+
+REPORTS_DIR = os.path.join(settings.DATA_PATH, 'analysis_reports')
+SUMMARY_FILE = 'reporte_resumen.txt'
+RESULTS_FILE = 'resultados.json'
+
+# Segundos tras los cuales un reporte PENDING/RUNNING se da por perdido (p. ej. reinicio del servidor)
+REPORT_TIMEOUT = getattr(settings, 'ANALYSIS_REPORT_TIMEOUT', 30 * 60)
+
+# ExtractWeekDay -> nombre usado en los resultados y gráficos
+WEEKDAYS = [
+    (2, 'Monday'), (3, 'Tuesday'), (4, 'Wednesday'), (5, 'Thursday'),
+    (6, 'Friday'), (7, 'Saturday'), (1, 'Sunday'),
+]
+
+# Un solo hilo de fondo: los reportes se generan de a uno (cada uno usa su pool de procesos)
+_report_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analysis-report')
+
+
+def analysis_data_version():
+    """Huella de los datos que usa el análisis: cambia con ventas, productos o movimientos nuevos o modificados"""
+    sales = Sale.objects.aggregate(rows=Count('id'), last_id=Max('id'), last_update=Max('updated_at'))
+    items = SaleItem.objects.aggregate(rows=Count('id'), last_id=Max('id'))
+    products = Product.objects.aggregate(rows=Count('id'), last_update=Max('updated_at'))
+    movements = StockMovement.objects.aggregate(rows=Count('id'), last_id=Max('id'))
+    raw = '|'.join(
+        str(value) for stats in (sales, items, products, movements) for value in stats.values()
+    )
+    return hashlib.md5(f'{ANALYSIS_VERSION}|{raw}'.encode('utf-8')).hexdigest()[:12]
+
 
 class DataAnalyzer:
-    """Clase para realizar análisis exploratorio de datos del minimarket"""
-    
-    def __init__(self):
-        self.setup_matplotlib()
-        self.output_dir = 'data/analysis_reports'
+    """Clase para realizar análisis exploratorio de datos del minimarket
+
+    Los métodos analyze_* solo calculan datos; los gráficos se dibujan después
+    en un pool de procesos (apps.analytics.charts, backend Agg). Los resultados
+    se guardan en una carpeta por versión de datos: si los datos no cambiaron,
+    run() retorna lo ya generado sin consultar ni dibujar de nuevo.
+    """
+
+    def __init__(self, output_dir=None, max_workers=None):
+        self.output_dir = output_dir or REPORTS_DIR
+        self.max_workers = max_workers
         os.makedirs(self.output_dir, exist_ok=True)
-    
-    def setup_matplotlib(self):
-        """Configura matplotlib para mejores gráficos"""
-        plt.style.use('seaborn-v0_8-darkgrid')
-        plt.rcParams['figure.figsize'] = (12, 6)
-        plt.rcParams['font.size'] = 10
-        plt.rcParams['axes.titlesize'] = 14
-        plt.rcParams['axes.labelsize'] = 12
-        plt.rcParams['xtick.labelsize'] = 10
-        plt.rcParams['ytick.labelsize'] = 10
-    
+
     def analyze_sales_patterns(self):
-        """Analiza patrones de ventas"""
-        print("=== ANÁLISIS DE PATRONES DE VENTAS ===")
-        
-        # 1. Ventas por día de la semana
-        sales_data = Sale.objects.filter(status='COMPLETED').values('sale_date')
-        df_sales = pd.DataFrame(sales_data)
-        df_sales['day_of_week'] = pd.to_datetime(df_sales['sale_date']).dt.day_name()
-        df_sales['hour'] = pd.to_datetime(df_sales['sale_date']).dt.hour
-        
-        # Gráfico de ventas por día de la semana
-        plt.figure(figsize=(10, 6))
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_counts = df_sales['day_of_week'].value_counts().reindex(day_order)
-        day_counts.plot(kind='bar', color='skyblue')
-        plt.title('Distribución de Ventas por Día de la Semana')
-        plt.xlabel('Día de la Semana')
-        plt.ylabel('Número de Ventas')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/ventas_por_dia_semana.png')
-        plt.close()
-        
-        # 2. Ventas por hora del día
-        plt.figure(figsize=(12, 6))
-        hour_counts = df_sales['hour'].value_counts().sort_index()
-        hour_counts.plot(kind='line', marker='o', color='darkblue')
-        plt.title('Distribución de Ventas por Hora del Día')
-        plt.xlabel('Hora del Día')
-        plt.ylabel('Número de Ventas')
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/ventas_por_hora.png')
-        plt.close()
-        
+        """Analiza patrones de ventas
+
+        Los histogramas se agrupan en la base de datos sobre las columnas locales
+        business_date/business_hour: la memoria no depende de la cantidad de ventas.
+        """
+        logger.info("Análisis de patrones de ventas")
+        sales = Sale.objects.filter(status='COMPLETED')
+
+        # 1. Ventas por día de la semana (ExtractWeekDay: 1 = domingo ... 7 = sábado)
+        by_weekday = dict(
+            sales.annotate(weekday=ExtractWeekDay('business_date'))
+            .values('weekday').annotate(count=Count('id'))
+            .values_list('weekday', 'count')
+        )
+        day_counts = {day: by_weekday.get(weekday, 0) for weekday, day in WEEKDAYS}
+
+        # 2. Ventas por hora del día (hora local)
+        hour_counts = dict(
+            sales.exclude(business_hour__isnull=True)
+            .values('business_hour').annotate(count=Count('id'))
+            .order_by('business_hour')
+            .values_list('business_hour', 'count')
+        )
+
         # 3. Tendencia de ventas mensuales
-        monthly_sales = DailySummary.objects.values('date__year', 'date__month').annotate(
-            total=Sum('total_sales'),
-            count=Sum('sale_count')
-        ).order_by('date__year', 'date__month')
-        
-        df_monthly = pd.DataFrame(monthly_sales)
-        if not df_monthly.empty:
-            df_monthly['period'] = pd.to_datetime(
-                df_monthly['date__year'].astype(str) + '-' + 
-                df_monthly['date__month'].astype(str) + '-01'
-            )
-            
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
-            
-            # Gráfico de ventas totales
-            ax1.plot(df_monthly['period'], df_monthly['total'], marker='o', linewidth=2)
-            ax1.set_title('Tendencia de Ventas Mensuales - Monto Total')
-            ax1.set_xlabel('Mes')
-            ax1.set_ylabel('Ventas Totales (S/.)')
-            ax1.grid(True, alpha=0.3)
-            
-            # Gráfico de cantidad de ventas
-            ax2.plot(df_monthly['period'], df_monthly['count'], marker='s', linewidth=2, color='green')
-            ax2.set_title('Tendencia de Ventas Mensuales - Cantidad')
-            ax2.set_xlabel('Mes')
-            ax2.set_ylabel('Cantidad de Ventas')
-            ax2.grid(True, alpha=0.3)
-            
-            plt.tight_layout()
-            plt.savefig(f'{self.output_dir}/tendencia_ventas_mensuales.png')
-            plt.close()
-        
+        monthly_sales = sales.annotate(period=TruncMonth('business_date')).values('period').annotate(
+            total=Sum('total'),
+            count=Count('id')
+        ).order_by('period')
+
         return {
-            'ventas_por_dia': day_counts.to_dict(),
-            'ventas_por_hora': hour_counts.to_dict(),
-            'tendencia_mensual': df_monthly.to_dict('records') if not df_monthly.empty else []
+            'ventas_por_dia': day_counts,
+            'ventas_por_hora': hour_counts,
+            'tendencia_mensual': [
+                {
+                    'date__year': row['period'].year,
+                    'date__month': row['period'].month,
+                    'total': row['total'],
+                    'count': row['count'],
+                    'period': row['period']
+                }
+                for row in monthly_sales
+            ]
         }
-    
+
     def analyze_product_performance(self):
         """Analiza el rendimiento de productos"""
-        print("=== ANÁLISIS DE RENDIMIENTO DE PRODUCTOS ===")
-        
+        logger.info("Análisis de rendimiento de productos")
+        items = SaleItem.objects.filter(sale__status='COMPLETED')
+
         # Top 20 productos más vendidos
-        top_products = SaleItem.objects.values(
+        top_products = items.values(
             'product__name', 'product__category__name'
         ).annotate(
             total_quantity=Sum('quantity'),
             total_revenue=Sum('total_price')
         ).order_by('-total_quantity')[:20]
-        
-        df_top = pd.DataFrame(top_products)
-        
-        if not df_top.empty:
-            # Gráfico de productos más vendidos
-            plt.figure(figsize=(12, 8))
-            plt.barh(df_top['product__name'], df_top['total_quantity'])
-            plt.xlabel('Cantidad Vendida')
-            plt.title('Top 20 Productos Más Vendidos')
-            plt.tight_layout()
-            plt.savefig(f'{self.output_dir}/top_productos_vendidos.png')
-            plt.close()
-            
-            # Análisis por categoría
-            category_sales = SaleItem.objects.values(
-                'product__category__name'
-            ).annotate(
-                total_quantity=Sum('quantity'),
-                total_revenue=Sum('total_price')
-            ).order_by('-total_revenue')
-            
-            df_category = pd.DataFrame(category_sales)
-            
-            # Gráfico circular de ventas por categoría
-            plt.figure(figsize=(10, 8))
-            plt.pie(df_category['total_revenue'], 
-                   labels=df_category['product__category__name'],
-                   autopct='%1.1f%%',
-                   startangle=90)
-            plt.title('Distribución de Ingresos por Categoría')
-            plt.tight_layout()
-            plt.savefig(f'{self.output_dir}/ventas_por_categoria.png')
-            plt.close()
-        
+
+        # Análisis por categoría
+        category_sales = items.values(
+            'product__category__name'
+        ).annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum('total_price')
+        ).order_by('-total_revenue')
+
         return {
-            'top_productos': df_top.to_dict('records') if not df_top.empty else [],
-            'ventas_categoria': df_category.to_dict('records') if 'df_category' in locals() else []
+            'top_productos': list(top_products),
+            'ventas_categoria': list(category_sales)
         }
-    
+
     def analyze_inventory_metrics(self):
-        """Analiza métricas de inventario"""
-        print("=== ANÁLISIS DE MÉTRICAS DE INVENTARIO ===")
-        
+        """Analiza métricas de inventario
+
+        Los estados de stock (mismas reglas que Product.stock_status) se cuentan
+        con agregaciones condicionales en una sola consulta.
+        """
+        logger.info("Análisis de métricas de inventario")
         products = Product.objects.all()
-        inventory_data = []
-        
-        for product in products:
-            inventory_data.append({
-                'producto': product.name,
-                'categoria': product.category.name,
-                'stock_actual': product.current_stock,
-                'stock_minimo': product.min_stock,
-                'stock_maximo': product.max_stock,
-                'punto_reorden': product.reorder_point,
-                'estado_stock': product.stock_status,
-                'necesita_reorden': product.needs_reorder
-            })
-        
-        df_inventory = pd.DataFrame(inventory_data)
-        
-        # Análisis de estado de stock
-        stock_status_counts = df_inventory['estado_stock'].value_counts()
-        
-        plt.figure(figsize=(10, 6))
-        colors = {'SIN_STOCK': 'red', 'STOCK_BAJO': 'orange', 'NORMAL': 'green', 'SOBRESTOCK': 'blue'}
-        stock_status_counts.plot(kind='bar', color=[colors.get(x, 'gray') for x in stock_status_counts.index])
-        plt.title('Distribución de Estados de Stock')
-        plt.xlabel('Estado de Stock')
-        plt.ylabel('Cantidad de Productos')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/estado_stock.png')
-        plt.close()
-        
-        # Productos que necesitan reorden
-        reorder_needed = df_inventory[df_inventory['necesita_reorden'] == True]
-        
+
+        counts = products.aggregate(
+            SIN_STOCK=Count('id', filter=Q(current_stock__lte=0)),
+            STOCK_BAJO=Count('id', filter=Q(current_stock__gt=0, current_stock__lte=F('min_stock'))),
+            SOBRESTOCK=Count('id', filter=Q(current_stock__gt=F('min_stock'), current_stock__gte=F('max_stock'))),
+            NORMAL=Count('id', filter=Q(current_stock__gt=F('min_stock'), current_stock__lt=F('max_stock'))),
+        )
+        stock_status_counts = {
+            status: count for status, count in sorted(counts.items(), key=lambda x: -x[1]) if count
+        }
+
+        # Productos que necesitan reorden (Product.needs_reorder); la categoría en el mismo JOIN
+        reorder_needed = products.filter(
+            current_stock__lte=F('reorder_point')
+        ).order_by('current_stock').values_list('name', 'category__name', 'current_stock', 'reorder_point')
+
+        lista_reorden = [
+            {'producto': name, 'categoria': category, 'stock_actual': stock, 'punto_reorden': reorder_point}
+            for name, category, stock, reorder_point in reorder_needed
+        ]
         return {
-            'estado_stock': stock_status_counts.to_dict(),
-            'productos_reorden': len(reorder_needed),
-            'lista_reorden': reorder_needed[['producto', 'stock_actual', 'punto_reorden']].to_dict('records')
+            'estado_stock': stock_status_counts,
+            'productos_reorden': len(lista_reorden),
+            'lista_reorden': lista_reorden
         }
-    
+
     def identify_demand_patterns(self):
         """Identifica patrones de demanda por producto"""
-        print("=== IDENTIFICACIÓN DE PATRONES DE DEMANDA ===")
-        
-        # Análisis de estacionalidad
-        seasonal_data = []
-        
-        # Obtener ventas por mes para cada producto
-        product_monthly_sales = SaleItem.objects.values(
-            'product__name',
-            'sale__sale_date__month'
-        ).annotate(
+        logger.info("Identificación de patrones de demanda")
+
+        # Ventas por mes para cada producto (agregadas en la base de datos)
+        product_monthly_sales = SaleItem.objects.filter(sale__status='COMPLETED').annotate(
+            month=ExtractMonth('sale__business_date')
+        ).values('product__name', 'month').annotate(
             total_quantity=Sum('quantity')
-        ).order_by('product__name', 'sale__sale_date__month')
-        
-        # Convertir a DataFrame para análisis
-        df_seasonal = pd.DataFrame(product_monthly_sales)
-        
+        ).values_list('product__name', 'month', 'total_quantity')
+
+        # Solo productos x meses: el tamaño no depende de la cantidad de ventas
+        df_seasonal = pd.DataFrame.from_records(
+            list(product_monthly_sales), columns=['product__name', 'month', 'total_quantity']
+        )
+
+        high_seasonality = pd.DataFrame()
         if not df_seasonal.empty:
             # Calcular coeficiente de variación por producto
             cv_by_product = df_seasonal.groupby('product__name')['total_quantity'].agg(['mean', 'std'])
             cv_by_product['cv'] = cv_by_product['std'] / cv_by_product['mean']
             cv_by_product = cv_by_product.sort_values('cv', ascending=False)
-            
+
             # Productos con mayor estacionalidad (CV alto)
             high_seasonality = cv_by_product[cv_by_product['cv'] > 0.5].head(10)
-            
-            # Gráfico de productos con alta estacionalidad
-            if not high_seasonality.empty:
-                plt.figure(figsize=(12, 6))
-                high_seasonality['cv'].plot(kind='bar')
-                plt.title('Productos con Mayor Estacionalidad (Coeficiente de Variación)')
-                plt.xlabel('Producto')
-                plt.ylabel('Coeficiente de Variación')
-                plt.xticks(rotation=45, ha='right')
-                plt.tight_layout()
-                plt.savefig(f'{self.output_dir}/productos_estacionales.png')
-                plt.close()
-        
+
         return {
-            'productos_estacionales': high_seasonality.to_dict() if 'high_seasonality' in locals() and not high_seasonality.empty else {}
+            'productos_estacionales': high_seasonality.to_dict() if not high_seasonality.empty else {}
         }
-    
-    def generate_summary_report(self):
-        """Genera un reporte resumen del análisis"""
-        print("\n=== GENERANDO REPORTE RESUMEN ===")
-        
-        # Recopilar todos los análisis
-        sales_patterns = self.analyze_sales_patterns()
-        product_performance = self.analyze_product_performance()
-        inventory_metrics = self.analyze_inventory_metrics()
-        demand_patterns = self.identify_demand_patterns()
-        
-        # Crear reporte en texto
+
+    def collect(self):
+        """Recopila todos los análisis (solo datos, sin gráficos)"""
+        with span('analysis.collect'):
+            return {
+                'sales_patterns': self.analyze_sales_patterns(),
+                'product_performance': self.analyze_product_performance(),
+                'inventory_metrics': self.analyze_inventory_metrics(),
+                'demand_patterns': self.identify_demand_patterns()
+            }
+
+    def chart_jobs(self, results):
+        """Gráficos a dibujar: (renderer de charts, archivo, datos); se omiten los que no tienen datos"""
+        sales = results['sales_patterns']
+        products = results['product_performance']
+        seasonal = results['demand_patterns']['productos_estacionales']
+        jobs = [
+            ('sales_by_weekday', 'ventas_por_dia_semana.png', sales['ventas_por_dia']),
+            ('sales_by_hour', 'ventas_por_hora.png', sales['ventas_por_hora']),
+            ('monthly_trend', 'tendencia_ventas_mensuales.png', sales['tendencia_mensual']),
+            ('top_products', 'top_productos_vendidos.png', products['top_productos']),
+            ('revenue_by_category', 'ventas_por_categoria.png', products['ventas_categoria']),
+            ('stock_status', 'estado_stock.png', results['inventory_metrics']['estado_stock']),
+            ('seasonal_products', 'productos_estacionales.png', seasonal.get('cv', {})),
+        ]
+        return [job for job in jobs if job[2]]
+
+    def render_charts(self, results, output_dir):
+        """Dibuja los gráficos en paralelo (procesos spawn: no heredan el estado del servidor)"""
+        jobs = self.chart_jobs(results)
+        if not jobs:
+            return []
+
+        workers = self.max_workers or min(len(jobs), os.cpu_count() or 1)
+        with span('analysis.render_charts'):
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = [
+                    pool.submit(charts.render, name, data, os.path.join(output_dir, filename))
+                    for name, filename, data in jobs
+                ]
+                return [os.path.basename(future.result()) for future in futures]
+
+    def build_summary(self, results):
+        """Reporte resumen en texto"""
+        sales_patterns = results['sales_patterns']
+        product_performance = results['product_performance']
+        inventory_metrics = results['inventory_metrics']
+
         report = f"""
 REPORTE DE ANÁLISIS EXPLORATORIO DE DATOS
 Minimarket - Sistema de Gestión Logística
@@ -263,10 +266,10 @@ Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 ----------------
 Top 3 productos más vendidos:
 """
-        
+
         for i, product in enumerate(product_performance['top_productos'][:3], 1):
             report += f"{i}. {product['product__name']} - {product['total_quantity']} unidades\n"
-        
+
         report += f"""
 3. ESTADO DE INVENTARIO
 ----------------------
@@ -280,23 +283,172 @@ Top 3 productos más vendidos:
 - Existe estacionalidad en ciertos productos
 - Se recomienda ajustar niveles de reorden basados en patrones históricos
 """
-        
-        # Guardar reporte
-        with open(f'{self.output_dir}/reporte_resumen.txt', 'w', encoding='utf-8') as f:
-            f.write(report)
-        
-        print(f"\nReporte guardado en: {self.output_dir}/reporte_resumen.txt")
-        print("Gráficos generados en:", self.output_dir)
-        
-        return {
-            'sales_patterns': sales_patterns,
-            'product_performance': product_performance,
-            'inventory_metrics': inventory_metrics,
-            'demand_patterns': demand_patterns
+        return report
+
+    def run(self, refresh=False):
+        """Genera (o reutiliza) el análisis de la versión de datos actual
+
+        Retorna un dict con data_version, cached, output_dir, artifacts y results.
+        La última versión generada se copia además a output_dir.
+        """
+        version = analysis_data_version()
+        version_dir = os.path.join(self.output_dir, version)
+        manifest_path = os.path.join(version_dir, RESULTS_FILE)
+
+        if not refresh and os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            logger.info("Análisis reutilizado", extra={'data_version': version})
+            return {**manifest, 'cached': True}
+
+        results = self.collect()
+        # Normalizar a JSON (Decimal, fechas, tipos de NumPy) antes de dibujar y guardar
+        results = json.loads(json.dumps(results, cls=DjangoJSONEncoder, default=str))
+
+        os.makedirs(version_dir, exist_ok=True)
+        artifacts = self.render_charts(results, version_dir)
+        with open(os.path.join(version_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+            f.write(self.build_summary(results))
+        artifacts.append(SUMMARY_FILE)
+
+        manifest = {
+            'data_version': version,
+            'output_dir': version_dir,
+            'artifacts': artifacts,
+            'generated_at': timezone.now().isoformat(),
+            'results': results
         }
+        # El manifiesto se escribe al final: su existencia marca la versión como completa
+        tmp_path = f'{manifest_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, manifest_path)
+
+        for filename in artifacts:
+            shutil.copyfile(os.path.join(version_dir, filename), os.path.join(self.output_dir, filename))
+
+        logger.info(
+            "Reporte guardado",
+            extra={'data_version': version, 'charts_dir': version_dir, 'artifacts': len(artifacts)}
+        )
+        return {**manifest, 'cached': False}
+
+    def generate_summary_report(self, refresh=False):
+        """Genera el análisis completo y retorna sus resultados"""
+        return self.run(refresh=refresh)['results']
+
+
+def load_report_results(report):
+    """Resultados guardados de un Report de análisis (None si no están disponibles)"""
+    output_dir = report.parameters.get('output_dir')
+    if report.status != 'COMPLETED' or not output_dir:
+        return None
+    manifest_path = os.path.join(output_dir, RESULTS_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def create_analysis_report(version, user=None, refresh=False):
+    """Fila Report PENDING para un análisis (periodo: primera y última venta completada)"""
+    today = timezone.localdate()
+    period = Sale.objects.filter(status='COMPLETED').aggregate(first=Min('business_date'), last=Max('business_date'))
+    return Report.objects.create(
+        name=f'Análisis exploratorio de datos ({version})',
+        report_type='ANALYSIS',
+        description='Patrones de ventas, rendimiento de productos, inventario y estacionalidad',
+        start_date=period['first'] or today,
+        end_date=period['last'] or today,
+        file_format='JSON',
+        parameters={'refresh': refresh},
+        generated_by=user,
+        status='PENDING',
+        data_version=version
+    )
+
+
+def expire_stale_reports():
+    """Marca FAILED los análisis PENDING/RUNNING con más de REPORT_TIMEOUT segundos
+
+    El hilo de fondo no sobrevive a un reinicio: sin esto la versión de datos
+    quedaría tomada por un reporte que nunca termina. Retorna cuántos marcó.
+    """
+    now = timezone.now()
+    expired = Report.objects.filter(
+        report_type='ANALYSIS', status__in=['PENDING', 'RUNNING'],
+        created_at__lt=now - timedelta(seconds=REPORT_TIMEOUT)
+    ).update(
+        status='FAILED',
+        error_message=f'Sin terminar después de {REPORT_TIMEOUT} segundos (proceso interrumpido)',
+        completed_at=now
+    )
+    if expired:
+        logger.warning("Reportes de análisis vencidos marcados como fallidos", extra={'reports': expired})
+    return expired
+
+
+def request_analysis_report(user=None, refresh=False):
+    """Crea el Report del análisis y lo genera en segundo plano
+
+    Si ya existe un reporte para la versión de datos actual (en curso o
+    completado con sus archivos) lo reutiliza; uno en curso con más de
+    REPORT_TIMEOUT segundos se da por fallido y se vuelve a generar.
+    Retorna (report, cached).
+    """
+    expire_stale_reports()
+    version = analysis_data_version()
+    if not refresh:
+        existing = Report.objects.filter(
+            report_type='ANALYSIS', data_version=version, status__in=['PENDING', 'RUNNING', 'COMPLETED']
+        ).first()
+        if existing and existing.status != 'COMPLETED':
+            return existing, False
+        if existing and load_report_results(existing) is not None:
+            return existing, True
+
+    report = create_analysis_report(version, user=user, refresh=refresh)
+    transaction.on_commit(lambda: _report_executor.submit(_run_in_background, report.pk, refresh))
+    return report, False
+
+
+def run_analysis_report(report_id, refresh=False):
+    """Genera el análisis de un Report y registra el resultado en la fila"""
+    Report.objects.filter(pk=report_id).update(status='RUNNING')
+    try:
+        run = DataAnalyzer().run(refresh=refresh)
+    except Exception as e:
+        logger.exception("Error generando el análisis", extra={'report': report_id})
+        Report.objects.filter(pk=report_id).update(
+            status='FAILED', error_message=str(e), completed_at=timezone.now()
+        )
+        raise
+
+    Report.objects.filter(pk=report_id).update(
+        status='COMPLETED',
+        data_version=run['data_version'],
+        parameters={
+            'refresh': refresh,
+            'cached': run['cached'],
+            'output_dir': run['output_dir'],
+            'artifacts': run['artifacts']
+        },
+        completed_at=timezone.now()
+    )
+    return run
+
+
+def _run_in_background(report_id, refresh):
+    try:
+        run_analysis_report(report_id, refresh=refresh)
+    except Exception:
+        pass  # Ya registrado en el Report y en el log
+    finally:
+        connections.close_all()
+
 
 # Función para ejecutar el análisis
 def run_analysis():
     analyzer = DataAnalyzer()
     results = analyzer.generate_summary_report()
-    return results
\ No newline at end of file
+    return results
@@ -0,0 +1,325 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/kpis.py
+
+import logging
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.utils import timezone
+from apps.monitoring.tracing import span
+from apps.products.models import Product
+from apps.sales.models import Sale, SaleItem, business_date_range
+from .models import KPI, Alert
+
+logger = logging.getLogger(__name__)
+
+# Métrica registrada: KPI.formula guarda su nombre.
+#   source: consulta base donde se agrega (una sola consulta por fuente y periodo)
+#   aggregate: expresión de agregación, o None si es derivada
+#   derive: función sobre los valores ya agregados (métricas derivadas)
+#   incremental: se puede actualizar con deltas de eventos (solo métricas aditivas)
+Metric = namedtuple('Metric', 'name source aggregate derive requires unit category description incremental')
+
+METRICS = {}
+
+
+def register_metric(name, source, aggregate=None, derive=None, requires=(), unit='', category='SALES',
+                    description='', incremental=False):
+    METRICS[name] = Metric(name, source, aggregate, derive, tuple(requires), unit, category, description, incremental)
+
+
+def _ratio(numerator, denominator, scale=1):
+    def derive(values):
+        if not values.get(denominator):
+            return 0
+        return values[numerator] / values[denominator] * scale
+    return derive
+
+
+register_metric('sales_total', 'sales', Sum('total'), unit='S/', description='Ventas totales', incremental=True)
+register_metric('transactions', 'sales', Count('id'), unit='ventas', description='Cantidad de ventas', incremental=True)
+register_metric('discount_total', 'sales', Sum('discount_amount'), unit='S/', description='Descuentos otorgados', incremental=True)
+register_metric('active_customers', 'sales', Count('customer', distinct=True), unit='clientes',
+                category='CUSTOMER', description='Clientes con compras en el periodo')
+register_metric('average_ticket', 'derived', derive=_ratio('sales_total', 'transactions'),
+                requires=['sales_total', 'transactions'], unit='S/', description='Ticket promedio')
+register_metric('units_sold', 'items', Sum('quantity'), unit='unidades', description='Unidades vendidas', incremental=True)
+register_metric('items_revenue', 'items', Sum('total_price'), unit='S/', category='FINANCIAL',
+                description='Ingresos por items (antes de descuento global)', incremental=True)
+register_metric('gross_profit', 'items', Sum('profit'), unit='S/', category='FINANCIAL',
+                description='Utilidad bruta', incremental=True)
+register_metric('gross_margin_pct', 'derived', derive=_ratio('gross_profit', 'items_revenue', 100),
+                requires=['gross_profit', 'items_revenue'], unit='%', category='FINANCIAL',
+                description='Margen bruto')
+register_metric('inventory_value', 'inventory',
+                Sum(F('current_stock') * F('cost_price'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+                unit='S/', category='INVENTORY', description='Valor del inventario al costo', incremental=True)
+register_metric('inventory_units', 'inventory', Sum('current_stock'), unit='unidades', category='INVENTORY',
+                description='Unidades en inventario', incremental=True)
+register_metric('low_stock_products', 'inventory', Count('id', filter=Q(current_stock__lte=F('reorder_point'))),
+                unit='productos', category='INVENTORY', description='Productos en punto de reorden')
+register_metric('out_of_stock_products', 'inventory', Count('id', filter=Q(current_stock__lte=0)),
+                unit='productos', category='INVENTORY', description='Productos sin stock')
+register_metric('open_alerts', 'alerts', Count('id'), unit='alertas', category='OPERATIONAL',
+                description='Alertas abiertas')
+
+# Días del periodo según la frecuencia (REALTIME, HOURLY y DAILY: el día en curso)
+PERIOD_DAYS = {
+    'REALTIME': 0,
+    'HOURLY': 0,
+    'DAILY': 0,
+    'WEEKLY': 6,
+    'MONTHLY': 29,
+}
+
+TREND_TOLERANCE = Decimal('0.01')  # Variación relativa que se considera estable
+
+# Fuentes agregadas por rango de fechas: su periodo anterior se puede consultar.
+# inventory y alerts son el estado actual y no tienen historia que recorrer.
+WINDOWED_SOURCES = {'sales', 'items'}
+
+TWO_PLACES = Decimal('0.01')
+
+
+def _to_decimal(value):
+    return Decimal(str(value or 0)).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def trend_for(previous, current):
+    """UP / DOWN / STABLE con una tolerancia relativa"""
+    if previous is None:
+        return 'STABLE'
+    change = current - previous
+    threshold = abs(previous) * TREND_TOLERANCE
+    if change > threshold:
+        return 'UP'
+    if change < -threshold:
+        return 'DOWN'
+    return 'STABLE'
+
+
+def is_windowed(name):
+    """La métrica (o todas las que usa, si es derivada) se agrega por rango de fechas"""
+    metric = METRICS[name]
+    if metric.source == 'derived':
+        return all(is_windowed(required) for required in metric.requires)
+    return metric.source in WINDOWED_SOURCES
+
+
+class KPIEngine:
+    """Calcula los KPIs definidos en el modelo KPI a partir de métricas registradas
+
+    Agrupa los KPIs por frecuencia; para cada frecuencia resuelve las métricas
+    necesarias (incluidas las dependencias de las derivadas) y ejecuta una sola
+    consulta aggregate() por fuente. Guarda current/previous/trend con un
+    bulk_update. Los KPIs REALTIME se actualizan además con deltas desde los
+    eventos de venta y stock (apply_deltas), sin volver a recorrer las tablas.
+
+    previous_value es el valor del periodo anterior, no el del último cálculo:
+    las métricas de ventas se evalúan en la ventana previa de igual duración
+    (ayer para los KPIs del día) en la misma pasada; las de inventario y
+    alertas guardan el último valor calculado en el periodo anterior.
+    """
+
+    def period_start(self, frequency, today=None):
+        today = today or timezone.localdate()
+        return today - timedelta(days=PERIOD_DAYS.get(frequency, 0))
+
+    def previous_period(self, start, frequency):
+        """(inicio, fin) del periodo anterior, de la misma cantidad de días"""
+        days = PERIOD_DAYS.get(frequency, 0) + 1
+        return start - timedelta(days=days), start - timedelta(days=1)
+
+    def source_queryset(self, source, start, end=None):
+        if source == 'sales':
+            return Sale.objects.filter(business_date_range(start, end), status='COMPLETED')
+        if source == 'items':
+            return SaleItem.objects.filter(business_date_range(start, end, prefix='sale__'), sale__status='COMPLETED')
+        if source == 'inventory':
+            return Product.objects.filter(is_active=True)
+        if source == 'alerts':
+            return Alert.objects.filter(is_resolved=False)
+        raise ValueError(f"Fuente desconocida: {source}")
+
+    def resolve(self, names):
+        """Métricas a agregar (con dependencias) y métricas derivadas, en orden"""
+        aggregated, derived = {}, []
+        pending = list(names)
+        while pending:
+            metric = METRICS[pending.pop()]
+            if metric.source == 'derived':
+                if metric.name not in derived:
+                    derived.append(metric.name)
+                    pending.extend(metric.requires)
+            else:
+                aggregated[metric.name] = metric
+        return aggregated, derived
+
+    def evaluate(self, names, frequency='DAILY', start=None, end=None):
+        """Valores de las métricas para el periodo de la frecuencia (o de start a end)
+
+        Retorna {nombre: Decimal}. Ejecuta una consulta por fuente involucrada;
+        end solo aplica a las fuentes por rango de fechas.
+        """
+        start = start or self.period_start(frequency)
+        aggregated, derived = self.resolve(names)
+
+        by_source = {}
+        for metric in aggregated.values():
+            by_source.setdefault(metric.source, {})[metric.name] = metric.aggregate
+
+        values = {}
+        for source, aggregates in by_source.items():
+            with span(f'kpis.aggregate.{source}'):
+                values.update(self.source_queryset(source, start, end).aggregate(**aggregates))
+
+        values = {name: Decimal(str(value or 0)) for name, value in values.items()}
+        for name in reversed(derived):
+            values[name] = Decimal(str(METRICS[name].derive(values)))
+        return {name: _to_decimal(value) for name, value in values.items()}
+
+    @span('kpis.compute')
+    def compute(self, frequencies=None):
+        """Recalcula los KPIs activos agrupados por frecuencia
+
+        Retorna {frecuencia: KPIs actualizados}. Los KPIs cuya fórmula no es una
+        métrica registrada se omiten (se registra una advertencia).
+        """
+        kpis = KPI.objects.filter(is_active=True)
+        if frequencies:
+            kpis = kpis.filter(update_frequency__in=frequencies)
+
+        groups = {}
+        for kpi in kpis.only('id', 'formula', 'update_frequency', 'current_value', 'previous_value', 'last_calculated'):
+            formula = kpi.formula.strip()
+            if formula not in METRICS:
+                logger.warning("KPI con fórmula no registrada", extra={'kpi': kpi.pk, 'formula': formula})
+                continue
+            groups.setdefault(kpi.update_frequency, []).append(kpi)
+
+        # Frecuencias con el mismo periodo (p. ej. REALTIME, HOURLY y DAILY) comparten consultas
+        by_period = {}
+        for frequency, group in groups.items():
+            names = by_period.setdefault(self.period_start(frequency), (frequency, set()))[1]
+            names.update(kpi.formula.strip() for kpi in group)
+        values_by_period, previous_by_period = {}, {}
+        for start, (frequency, names) in by_period.items():
+            values_by_period[start] = self.evaluate(names, start=start)
+            windowed = [name for name in names if is_windowed(name)]
+            if windowed:
+                previous_start, previous_end = self.previous_period(start, frequency)
+                previous_by_period[start] = self.evaluate(windowed, start=previous_start, end=previous_end)
+
+        now = timezone.now()
+        summary = {}
+        for frequency, group in groups.items():
+            start = self.period_start(frequency)
+            values = values_by_period[start]
+            previous_values = previous_by_period.get(start, {})
+            for kpi in group:
+                name = kpi.formula.strip()
+                value = values[name]
+                if name in previous_values:
+                    kpi.previous_value = previous_values[name]
+                elif kpi.last_calculated is None:
+                    kpi.previous_value = None
+                elif timezone.localtime(kpi.last_calculated).date() < start:
+                    # Primer cálculo del periodo: el último valor del anterior
+                    kpi.previous_value = kpi.current_value
+                kpi.trend = trend_for(kpi.previous_value, value)
+                kpi.current_value = value
+                kpi.last_calculated = now
+                kpi.updated_at = now
+            summary[frequency] = len(group)
+
+        with transaction.atomic():
+            KPI.objects.bulk_update(
+                [kpi for group in groups.values() for kpi in group],
+                ['previous_value', 'current_value', 'trend', 'last_calculated', 'updated_at'],
+                batch_size=500
+            )
+
+        logger.info("KPIs calculados", extra={'by_frequency': summary})
+        return summary
+
+    def apply_deltas(self, deltas):
+        """Suma deltas a los KPIs REALTIME de métricas aditivas con un único UPDATE
+
+        deltas: {nombre de métrica: cambio}. Retorna la cantidad de KPIs afectados.
+        previous_value, trend y last_calculated (comparación con el periodo
+        anterior) solo los cambia compute().
+        """
+        deltas = {
+            name: _to_decimal(delta) for name, delta in deltas.items()
+            if delta and name in METRICS and METRICS[name].incremental
+        }
+        if not deltas:
+            return 0
+
+        amount = Case(
+            *[When(formula=name, then=Value(delta)) for name, delta in deltas.items()],
+            default=Value(Decimal('0')),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+        return KPI.objects.filter(
+            is_active=True, update_frequency='REALTIME', formula__in=list(deltas)
+        ).update(
+            current_value=F('current_value') + amount,
+            updated_at=timezone.now()
+        )
+
+    def record_sale(self, sale, sign=1):
+        """Deltas de una venta completada (sign=-1 al anularla)
+
+        Los KPIs REALTIME cubren el día en curso: ventas de otros días se ignoran.
+        """
+        if sale.business_date and sale.business_date != timezone.localdate():
+            return 0
+
+        items = sale.items.aggregate(
+            units_sold=Sum('quantity'), items_revenue=Sum('total_price'), gross_profit=Sum('profit')
+        )
+        deltas = {
+            'sales_total': sale.total,
+            'transactions': 1,
+            'discount_total': sale.discount_amount,
+            **items,
+        }
+        return self.apply_deltas({name: (value or 0) * sign for name, value in deltas.items()})
+
+    def record_stock_changes(self, changes):
+        """Deltas de inventario para cambios de stock [(product_id, unidades)]"""
+        units = {}
+        for product_id, delta in changes:
+            units[product_id] = units.get(product_id, 0) + delta
+        units = {product_id: delta for product_id, delta in units.items() if delta}
+        if not units:
+            return 0
+
+        costs = dict(Product.objects.filter(id__in=list(units), is_active=True).values_list('id', 'cost_price'))
+        return self.apply_deltas({
+            'inventory_units': sum(units[product_id] for product_id in costs),
+            'inventory_value': sum(cost * units[product_id] for product_id, cost in costs.items()),
+        })
+
+
+def seed_default_kpis():
+    """Crea un KPI DAILY por cada métrica registrada que todavía no tenga uno
+
+    Retorna la cantidad de KPIs creados.
+    """
+    existing = set(KPI.objects.values_list('formula', flat=True))
+    kpis = [
+        KPI(
+            name=metric.description,
+            description=f'Métrica {metric.name}',
+            category=metric.category,
+            formula=metric.name,
+            unit=metric.unit,
+            update_frequency='DAILY'
+        )
+        for metric in METRICS.values() if metric.name not in existing
+    ]
+    KPI.objects.bulk_create(kpis)
+    return len(kpis)
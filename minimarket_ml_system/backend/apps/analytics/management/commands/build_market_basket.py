@@ -0,0 +1,47 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/management/commands/build_market_basket.py
+
+import time
+from django.core.management.base import BaseCommand
+from apps.analytics.basket import MarketBasketAnalyzer, MIN_PAIR_COUNT, TOP_K
+
+class Command(BaseCommand):
+    help = 'Análisis de canasta: actualiza co-ocurrencias con las ventas nuevas y regenera las reglas de asociación'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Descartar la matriz guardada y procesar todas las ventas'
+        )
+        parser.add_argument(
+            '--min-count',
+            type=int,
+            default=MIN_PAIR_COUNT,
+            help=f'Ventas mínimas con ambos productos para generar una regla (default: {MIN_PAIR_COUNT})'
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=TOP_K,
+            help=f'Reglas a guardar por producto (default: {TOP_K})'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== ANÁLISIS DE CANASTA ===')
+        )
+
+        analyzer = MarketBasketAnalyzer(min_pair_count=options['min_count'], top_k=options['top_k'])
+        start = time.perf_counter()
+        result = analyzer.update(rebuild=options['rebuild'])
+
+        mode = 'incremental' if result['incremental'] else 'completo'
+        self.stdout.write(
+            f'✓ Cálculo {mode}: +{result["added_sales"]} ventas, -{result["removed_sales"]} anuladas '
+            f'({result["baskets"]} canastas, {result["pairs"]} pares)'
+        )
+        self.stdout.write(f'✓ {result["rules"]} reglas guardadas en {time.perf_counter() - start:.2f}s')
+
+        self.stdout.write(
+            self.style.SUCCESS('\n¡Análisis de canasta actualizado!')
+        )
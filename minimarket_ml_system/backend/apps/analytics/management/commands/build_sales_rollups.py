@@ -0,0 +1,56 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/management/commands/build_sales_rollups.py
+
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from apps.analytics.rollups import SalesRollupBuilder, REFRESH_OVERLAP_DAYS
+
+class Command(BaseCommand):
+    help = 'Actualiza las tablas de ventas pre-agregadas que consultan los widgets del dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=str,
+            help=f'Primer día a recalcular, YYYY-MM-DD (default: último día agregado - {REFRESH_OVERLAP_DAYS})'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Días hacia atrás a cubrir si todavía no hay agregados (default: 365)'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Borrar todos los agregados y generarlos de nuevo'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== AGREGADOS DE VENTAS PARA DASHBOARDS ===')
+        )
+
+        since = None
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Formato de fecha inválido en --since. Use YYYY-MM-DD')
+
+        builder = SalesRollupBuilder()
+        if options['rebuild']:
+            self.stdout.write(self.style.WARNING('Se borrarán los agregados existentes'))
+        elif since is None and builder.last_date():
+            self.stdout.write(f'Último día agregado: {builder.last_date()}')
+
+        start = time.perf_counter()
+        result = builder.build(date_from=since, days=options['days'], rebuild=options['rebuild'])
+
+        self.stdout.write(
+            f'✓ {result["sales_rows"]} filas de ventas y {result["category_rows"]} por categoría '
+            f'({result["date_from"]} a {result["date_to"]}) en {time.perf_counter() - start:.2f}s'
+        )
+        self.stdout.write(
+            self.style.SUCCESS('\n¡Agregados de ventas actualizados!')
+        )
@@ -0,0 +1,54 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/management/commands/compute_kpis.py
+
+import time
+from django.core.management.base import BaseCommand
+from apps.analytics.kpis import KPIEngine, METRICS, seed_default_kpis
+from apps.analytics.models import KPI
+
+FREQUENCIES = ['REALTIME', 'HOURLY', 'DAILY', 'WEEKLY', 'MONTHLY']
+
+class Command(BaseCommand):
+    help = 'Recalcula los KPIs por frecuencia (programar con cron: cada hora HOURLY, cada noche el resto)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--frequency',
+            nargs='+',
+            choices=FREQUENCIES,
+            help='Frecuencias a recalcular (default: todas)'
+        )
+        parser.add_argument(
+            '--seed',
+            action='store_true',
+            help='Crear un KPI diario por cada métrica registrada que no tenga uno'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== CÁLCULO DE KPIs ===')
+        )
+
+        if options['seed']:
+            created = seed_default_kpis()
+            self.stdout.write(f'✓ {created} KPIs creados ({len(METRICS)} métricas registradas)')
+
+        start = time.perf_counter()
+        summary = KPIEngine().compute(frequencies=options['frequency'])
+        elapsed = time.perf_counter() - start
+
+        if not summary:
+            self.stdout.write(self.style.WARNING('No hay KPIs activos con métricas registradas'))
+            return
+
+        for frequency, count in summary.items():
+            self.stdout.write(f'  {frequency}: {count} KPIs')
+
+        kpis = KPI.objects.filter(
+            is_active=True, update_frequency__in=list(summary), formula__in=list(METRICS)
+        ).order_by('category', 'name')
+        for kpi in kpis:
+            self.stdout.write(f'  {kpi.name}: {kpi.current_value} {kpi.unit} ({kpi.trend})')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\n¡KPIs calculados en {elapsed:.2f}s!')
+        )
@@ -0,0 +1,45 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/management/commands/generate_alerts.py
+
+import time
+from django.core.management.base import BaseCommand
+from apps.analytics.alerts import AlertEngine
+
+RULES = ['LOW_STOCK', 'OVERSTOCK', 'EXPIRATION', 'PREDICTION']
+
+class Command(BaseCommand):
+    help = 'Evalúa las reglas de alertas sobre todo el catálogo (programar con cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rules',
+            nargs='+',
+            choices=RULES,
+            help='Reglas a evaluar (default: todas)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Calcular sin crear ni resolver alertas'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== GENERACIÓN DE ALERTAS ===')
+        )
+
+        start = time.perf_counter()
+        summary = AlertEngine().run(rules=options['rules'], dry_run=options['dry_run'])
+        elapsed = time.perf_counter() - start
+
+        for rule, counts in summary.items():
+            self.stdout.write(
+                f'  {rule}: {counts["active"]} activas, {counts["created"]} nuevas, '
+                f'{counts["updated"]} actualizadas, {counts["resolved"]} resueltas'
+            )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Modo dry-run: no se guardaron cambios'))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\n¡Alertas evaluadas en {elapsed:.2f}s!')
+        )
@@ -0,0 +1,38 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/management/commands/run_analysis_report.py
+
+import time
+from django.core.management.base import BaseCommand
+from apps.analytics.data_analysis import analysis_data_version, create_analysis_report, run_analysis_report
+
+class Command(BaseCommand):
+    help = 'Genera el análisis exploratorio (gráficos y resumen) y lo registra como Report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help='Regenerar aunque ya exista un análisis para la versión de datos actual'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== ANÁLISIS EXPLORATORIO DE DATOS ===')
+        )
+
+        version = analysis_data_version()
+        self.stdout.write(f'Versión de datos: {version}')
+        report = create_analysis_report(version, refresh=options['refresh'])
+
+        start = time.perf_counter()
+        run = run_analysis_report(report.pk, refresh=options['refresh'])
+        elapsed = time.perf_counter() - start
+
+        if run['cached']:
+            self.stdout.write(f'✓ Datos sin cambios: se reutilizó el análisis guardado ({elapsed:.2f}s)')
+        else:
+            self.stdout.write(f'✓ {len(run["artifacts"])} archivos generados en {elapsed:.2f}s')
+        self.stdout.write(f'  Reporte #{report.pk}: {run["output_dir"]}')
+
+        self.stdout.write(
+            self.style.SUCCESS('\n¡Análisis completado!')
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('is_resolved', False)), fields=['alert_type', 'product'], name='analytics_alert_open_idx'),
+        ),
+    ]
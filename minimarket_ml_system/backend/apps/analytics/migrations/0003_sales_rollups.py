@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('analytics', '0002_alert_open_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField(verbose_name='Fecha comercial')),
+                ('business_hour', models.PositiveSmallIntegerField(verbose_name='Hora comercial')),
+                ('payment_method', models.CharField(max_length=20, verbose_name='Método de pago')),
+                ('transactions', models.PositiveIntegerField(default=0, verbose_name='Transacciones')),
+                ('sales_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total vendido')),
+                ('discount_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Descuentos')),
+            ],
+            options={
+                'verbose_name': 'Agregado de ventas',
+                'verbose_name_plural': 'Agregados de ventas',
+                'ordering': ['-business_date', 'business_hour', 'payment_method'],
+                'unique_together': {('business_date', 'business_hour', 'payment_method')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CategorySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField(verbose_name='Fecha comercial')),
+                ('business_hour', models.PositiveSmallIntegerField(verbose_name='Hora comercial')),
+                ('payment_method', models.CharField(max_length=20, verbose_name='Método de pago')),
+                ('transactions', models.PositiveIntegerField(default=0, verbose_name='Ventas con la categoría')),
+                ('items', models.PositiveIntegerField(default=0, verbose_name='Líneas de venta')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Unidades')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos')),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Costo')),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ganancia')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='products.category', verbose_name='Categoría')),
+            ],
+            options={
+                'verbose_name': 'Agregado de ventas por categoría',
+                'verbose_name_plural': 'Agregados de ventas por categoría',
+                'ordering': ['-business_date', 'business_hour', 'payment_method', 'category'],
+                'unique_together': {('business_date', 'business_hour', 'payment_method', 'category')},
+            },
+        ),
+    ]
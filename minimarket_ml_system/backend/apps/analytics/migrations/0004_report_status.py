@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fecha de finalización'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='data_version',
+            field=models.CharField(blank=True, max_length=32, verbose_name='Versión de datos'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='error_message',
+            field=models.TextField(blank=True, verbose_name='Error'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pendiente'), ('RUNNING', 'En proceso'), ('COMPLETED', 'Completado'), ('FAILED', 'Fallido')], default='COMPLETED', max_length=10, verbose_name='Estado'),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='report_type',
+            field=models.CharField(choices=[('SALES', 'Reporte de Ventas'), ('INVENTORY', 'Reporte de Inventario'), ('PREDICTION', 'Reporte de Predicciones'), ('PERFORMANCE', 'Reporte de Rendimiento'), ('FINANCIAL', 'Reporte Financiero'), ('CUSTOMER', 'Reporte de Clientes'), ('ANALYSIS', 'Análisis Exploratorio')], max_length=20, verbose_name='Tipo de reporte'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['report_type', 'data_version'], name='analytics_report_version_idx'),
+        ),
+    ]
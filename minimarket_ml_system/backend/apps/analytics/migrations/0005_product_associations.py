@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('analytics', '0004_report_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAssociation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pair_count', models.PositiveIntegerField(verbose_name='Ventas con ambos productos')),
+                ('support', models.DecimalField(decimal_places=6, max_digits=8, verbose_name='Soporte')),
+                ('confidence', models.DecimalField(decimal_places=6, max_digits=8, verbose_name='Confianza')),
+                ('lift', models.DecimalField(decimal_places=4, max_digits=10, verbose_name='Lift')),
+                ('computed_at', models.DateTimeField(verbose_name='Fecha de cálculo')),
+                ('associated_product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product', verbose_name='Producto asociado')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='associations', to='products.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Asociación de productos',
+                'verbose_name_plural': 'Asociaciones de productos',
+                'ordering': ['product', '-lift'],
+                'indexes': [models.Index(fields=['product', '-lift'], name='analytics_assoc_lift_idx')],
+                'unique_together': {('product', 'associated_product')},
+            },
+        ),
+    ]
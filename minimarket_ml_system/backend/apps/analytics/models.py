@@ -13,6 +13,14 @@ class Report(models.Model):
         ('PERFORMANCE', 'Reporte de Rendimiento'),
         ('FINANCIAL', 'Reporte Financiero'),
         ('CUSTOMER', 'Reporte de Clientes'),
+        ('ANALYSIS', 'Análisis Exploratorio'),
+    ]
+    
+    REPORT_STATUS = [
+        ('PENDING', 'Pendiente'),
+        ('RUNNING', 'En proceso'),
+        ('COMPLETED', 'Completado'),
+        ('FAILED', 'Fallido'),
     ]
     
     REPORT_FORMATS = [
@@ -42,6 +50,12 @@ class Report(models.Model):
     # Usuario
     generated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name="Generado por")
     
+    # Generación en segundo plano
+    status = models.CharField(max_length=10, choices=REPORT_STATUS, default='COMPLETED', verbose_name="Estado")
+    data_version = models.CharField(max_length=32, blank=True, verbose_name="Versión de datos")
+    error_message = models.TextField(blank=True, verbose_name="Error")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de finalización")
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de generación")
     
@@ -49,6 +63,10 @@ class Report(models.Model):
         verbose_name = "Reporte"
         verbose_name_plural = "Reportes"
         ordering = ['-created_at']
+        indexes = [
+            # Reutilización de reportes ya generados para la misma versión de datos
+            models.Index(fields=['report_type', 'data_version'], name='analytics_report_version_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.get_report_type_display()}"
@@ -173,6 +191,13 @@ class Alert(models.Model):
         verbose_name = "Alerta"
         verbose_name_plural = "Alertas"
         ordering = ['-created_at']
+        indexes = [
+            # Deduplicación del motor de alertas: alertas abiertas por tipo y producto
+            models.Index(
+                fields=['alert_type', 'product'], name='analytics_alert_open_idx',
+                condition=models.Q(is_resolved=False)
+            ),
+        ]
     
     def __str__(self):
         return f"{self.get_alert_type_display()} - {self.title}"
@@ -243,4 +268,81 @@ class KPI(models.Model):
         """Calcula la variación porcentual respecto al valor anterior"""
         if self.previous_value and self.previous_value > 0:
             return ((self.current_value - self.previous_value) / self.previous_value) * 100
-        return 0
\ No newline at end of file
+        return 0
+
+class SalesRollup(models.Model):
+    """Ventas completadas pre-agregadas por día, hora y método de pago
+
+    La llena el comando build_sales_rollups; los widgets con medidas a nivel de
+    venta (total, transacciones, descuentos) se resuelven sobre esta tabla en
+    lugar de recorrer Sale.
+    """
+    business_date = models.DateField(verbose_name="Fecha comercial")
+    business_hour = models.PositiveSmallIntegerField(verbose_name="Hora comercial")
+    payment_method = models.CharField(max_length=20, verbose_name="Método de pago")
+    transactions = models.PositiveIntegerField(default=0, verbose_name="Transacciones")
+    sales_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total vendido")
+    discount_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Descuentos")
+    
+    class Meta:
+        verbose_name = "Agregado de ventas"
+        verbose_name_plural = "Agregados de ventas"
+        ordering = ['-business_date', 'business_hour', 'payment_method']
+        unique_together = ['business_date', 'business_hour', 'payment_method']
+    
+    def __str__(self):
+        return f"{self.business_date} {self.business_hour:02d}h {self.payment_method}: {self.sales_total}"
+
+class CategorySalesRollup(models.Model):
+    """Items vendidos pre-agregados por día, hora, método de pago y categoría
+
+    transactions cuenta las ventas que incluyen la categoría: se puede sumar
+    entre días, horas y métodos de pago, pero no entre categorías.
+    """
+    business_date = models.DateField(verbose_name="Fecha comercial")
+    business_hour = models.PositiveSmallIntegerField(verbose_name="Hora comercial")
+    payment_method = models.CharField(max_length=20, verbose_name="Método de pago")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='sales_rollups', verbose_name="Categoría")
+    transactions = models.PositiveIntegerField(default=0, verbose_name="Ventas con la categoría")
+    items = models.PositiveIntegerField(default=0, verbose_name="Líneas de venta")
+    units = models.PositiveIntegerField(default=0, verbose_name="Unidades")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Ingresos")
+    cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Costo")
+    profit = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Ganancia")
+    
+    class Meta:
+        verbose_name = "Agregado de ventas por categoría"
+        verbose_name_plural = "Agregados de ventas por categoría"
+        ordering = ['-business_date', 'business_hour', 'payment_method', 'category']
+        unique_together = ['business_date', 'business_hour', 'payment_method', 'category']
+    
+    def __str__(self):
+        return f"{self.business_date} {self.business_hour:02d}h {self.category_id}: {self.revenue}"
+
+class ProductAssociation(models.Model):
+    """Regla de asociación entre productos (análisis de canasta)
+
+    product -> associated_product: de las ventas que incluyen product, la
+    proporción que también incluye associated_product (confidence) y cuánto
+    más frecuente es que por azar (lift). La genera MarketBasketAnalyzer.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='associations', verbose_name="Producto")
+    associated_product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+', verbose_name="Producto asociado")
+    pair_count = models.PositiveIntegerField(verbose_name="Ventas con ambos productos")
+    support = models.DecimalField(max_digits=8, decimal_places=6, verbose_name="Soporte")
+    confidence = models.DecimalField(max_digits=8, decimal_places=6, verbose_name="Confianza")
+    lift = models.DecimalField(max_digits=10, decimal_places=4, verbose_name="Lift")
+    computed_at = models.DateTimeField(verbose_name="Fecha de cálculo")
+    
+    class Meta:
+        verbose_name = "Asociación de productos"
+        verbose_name_plural = "Asociaciones de productos"
+        ordering = ['product', '-lift']
+        unique_together = ['product', 'associated_product']
+        indexes = [
+            # "Se compra junto con": reglas de un producto ordenadas por lift
+            models.Index(fields=['product', '-lift'], name='analytics_assoc_lift_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} -> {self.associated_product_id} (lift {self.lift})"
@@ -0,0 +1,122 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/rollups.py
+
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Max, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.monitoring.tracing import span
+from apps.sales.models import Sale, SaleItem, business_date_range
+from .models import SalesRollup, CategorySalesRollup
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+# Días ya agregados que se vuelven a calcular en cada corrida (ventas anuladas tarde)
+REFRESH_OVERLAP_DAYS = 3
+
+
+class SalesRollupBuilder:
+    """Construye las tablas pre-agregadas de ventas que consultan los widgets
+
+    Cada corrida reemplaza una ventana de días con dos consultas GROUP BY (una
+    sobre Sale y otra sobre SaleItem) y un bulk_create por tabla. Sin fechas
+    explícitas la ventana empieza REFRESH_OVERLAP_DAYS antes del último día
+    agregado, de modo que programado cada pocos minutos solo recorre los
+    últimos días.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+
+    @staticmethod
+    def last_date():
+        return SalesRollup.objects.aggregate(last=Max('business_date'))['last']
+
+    def window(self, date_from=None, through=None, days=365):
+        through = through or timezone.localdate()
+        if date_from is None:
+            last = self.last_date()
+            date_from = last - timedelta(days=REFRESH_OVERLAP_DAYS) if last else through - timedelta(days=days)
+        return date_from, through
+
+    def sales_rows(self, date_from, through):
+        rows = (
+            Sale.objects.filter(business_date_range(date_from, through), status='COMPLETED')
+            .annotate(hour=Coalesce('business_hour', Value(0)))
+            .values('business_date', 'hour', 'payment_method')
+            .annotate(transactions=Count('id'), sales_total=Sum('total'), discount_total=Sum('discount_amount'))
+        )
+        return [
+            SalesRollup(
+                business_date=row['business_date'],
+                business_hour=row['hour'],
+                payment_method=row['payment_method'],
+                transactions=row['transactions'],
+                sales_total=row['sales_total'] or 0,
+                discount_total=row['discount_total'] or 0,
+            )
+            for row in rows
+        ]
+
+    def item_rows(self, date_from, through):
+        rows = (
+            SaleItem.objects.filter(business_date_range(date_from, through, prefix='sale__'), sale__status='COMPLETED')
+            .annotate(hour=Coalesce('sale__business_hour', Value(0)))
+            .values('sale__business_date', 'hour', 'sale__payment_method', 'product__category_id')
+            .annotate(
+                transactions=Count('sale', distinct=True),
+                items=Count('id'),
+                units=Sum('quantity'),
+                revenue=Sum('total_price'),
+                cost=Sum('total_cost'),
+                profit=Sum('profit'),
+            )
+        )
+        return [
+            CategorySalesRollup(
+                business_date=row['sale__business_date'],
+                business_hour=row['hour'],
+                payment_method=row['sale__payment_method'],
+                category_id=row['product__category_id'],
+                transactions=row['transactions'],
+                items=row['items'],
+                units=row['units'] or 0,
+                revenue=row['revenue'] or 0,
+                cost=row['cost'] or 0,
+                profit=row['profit'] or 0,
+            )
+            for row in rows
+        ]
+
+    @span('rollups.build')
+    def build(self, date_from=None, through=None, days=365, rebuild=False):
+        """Recalcula los agregados de [date_from, through]
+
+        days: cuántos días hacia atrás cubrir cuando todavía no hay agregados.
+        Retorna un dict con el rango y las filas creadas por tabla.
+        """
+        with transaction.atomic():
+            if rebuild:
+                SalesRollup.objects.all().delete()
+                CategorySalesRollup.objects.all().delete()
+
+            date_from, through = self.window(date_from, through, days)
+            sales = self.sales_rows(date_from, through)
+            items = self.item_rows(date_from, through)
+
+            for model in (SalesRollup, CategorySalesRollup):
+                model.objects.filter(business_date__gte=date_from, business_date__lte=through).delete()
+            SalesRollup.objects.bulk_create(sales, batch_size=self.batch_size)
+            CategorySalesRollup.objects.bulk_create(items, batch_size=self.batch_size)
+
+        result = {
+            'date_from': date_from,
+            'date_to': through,
+            'sales_rows': len(sales),
+            'category_rows': len(items),
+        }
+        logger.info("Agregados de ventas actualizados", extra=result)
+        return result
@@ -0,0 +1,99 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/serializers.py
+
+from rest_framework import serializers
+from .models import Alert, KPI, Dashboard, Widget, Report, ProductAssociation
+from .widgets import WidgetQueryEngine
+
+class AlertSerializer(serializers.ModelSerializer):
+    """Serializer para alertas"""
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    alert_type_display = serializers.CharField(source='get_alert_type_display', read_only=True)
+    severity_display = serializers.CharField(source='get_severity_display', read_only=True)
+    
+    class Meta:
+        model = Alert
+        fields = [
+            'id', 'alert_type', 'alert_type_display', 'severity', 'severity_display',
+            'title', 'message', 'product', 'product_name', 'is_read', 'is_resolved',
+            'resolved_by', 'resolved_at', 'data', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+class KPISerializer(serializers.ModelSerializer):
+    """Serializer para KPIs (valores precalculados)"""
+    achievement_percentage = serializers.DecimalField(max_digits=8, decimal_places=2, read_only=True)
+    variation_percentage = serializers.DecimalField(max_digits=8, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = KPI
+        fields = [
+            'id', 'name', 'description', 'category', 'formula', 'unit', 'target_value',
+            'current_value', 'previous_value', 'trend', 'achievement_percentage',
+            'variation_percentage', 'is_active', 'update_frequency', 'last_calculated'
+        ]
+        read_only_fields = ['current_value', 'previous_value', 'trend', 'last_calculated']
+
+class WidgetSerializer(serializers.ModelSerializer):
+    """Serializer para widgets; valida query_config contra la fuente de datos"""
+    
+    class Meta:
+        model = Widget
+        fields = [
+            'id', 'dashboard', 'title', 'widget_type', 'data_source', 'query_config',
+            'display_config', 'position_x', 'position_y', 'width', 'height',
+            'is_active', 'refresh_interval', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+    
+    def validate(self, attrs):
+        data_source = attrs.get('data_source', getattr(self.instance, 'data_source', None))
+        query_config = attrs.get('query_config', getattr(self.instance, 'query_config', None))
+        try:
+            WidgetQueryEngine().plan(data_source, query_config)
+        except ValueError as e:
+            raise serializers.ValidationError({'query_config': str(e)})
+        return attrs
+
+class DashboardSerializer(serializers.ModelSerializer):
+    """Serializer para dashboards con sus widgets"""
+    widgets = WidgetSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Dashboard
+        fields = [
+            'id', 'name', 'description', 'user', 'is_default', 'is_public',
+            'layout', 'widgets', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+class ReportSerializer(serializers.ModelSerializer):
+    """Serializer para reportes (incluye el estado de la generación en segundo plano)"""
+    report_type_display = serializers.CharField(source='get_report_type_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = Report
+        fields = [
+            'id', 'name', 'report_type', 'report_type_display', 'description', 'start_date',
+            'end_date', 'file_format', 'parameters', 'status', 'status_display', 'data_version',
+            'error_message', 'generated_by', 'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+class ProductAssociationSerializer(serializers.ModelSerializer):
+    """Serializer para reglas de asociación (análisis de canasta)"""
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    associated_product_name = serializers.CharField(source='associated_product.name', read_only=True)
+    associated_product_code = serializers.CharField(source='associated_product.code', read_only=True)
+    associated_product_price = serializers.DecimalField(
+        source='associated_product.sale_price', max_digits=10, decimal_places=2, read_only=True
+    )
+    
+    class Meta:
+        model = ProductAssociation
+        fields = [
+            'id', 'product', 'product_name', 'associated_product', 'associated_product_name',
+            'associated_product_code', 'associated_product_price', 'pair_count', 'support',
+            'confidence', 'lift', 'computed_at'
+        ]
+        read_only_fields = fields
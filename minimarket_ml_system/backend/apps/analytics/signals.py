@@ -0,0 +1,63 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/signals.py
+
+import logging
+import threading
+from django.db import transaction
+from django.db.models.signals import post_save
+from apps.products.models import Product
+from apps.inventory.models import StockMovement
+
+logger = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+
+def evaluate_pending_products():
+    """Reevalúa las reglas de stock para los productos guardados en la transacción
+
+    Cada guardado registra este callback; el primero que corre al confirmar
+    toma todos los productos pendientes y los demás no tienen nada que hacer.
+    """
+    product_ids = getattr(_pending, 'product_ids', None)
+    _pending.product_ids = set()
+    if not product_ids:
+        return
+
+    from .alerts import AlertEngine, STOCK_RULES
+    try:
+        AlertEngine().run(STOCK_RULES, product_ids=sorted(product_ids))
+    except Exception:
+        # Una falla al generar alertas no debe afectar la operación de stock
+        logger.exception("Error al evaluar alertas incrementales", extra={'products': len(product_ids)})
+
+
+def queue_stock_alerts(sender, instance, **kwargs):
+    """Agrupa los productos modificados y evalúa una vez al confirmar la transacción
+
+    El callback se registra en cada guardado: si la transacción se revierte
+    Django descarta sus callbacks, y un pendiente que quedó de ella se evalúa
+    con la siguiente transacción confirmada en lugar de bloquear las alertas.
+    """
+    product_ids = getattr(_pending, 'product_ids', None)
+    if product_ids is None:
+        product_ids = _pending.product_ids = set()
+    product_ids.add(instance.pk)
+    transaction.on_commit(evaluate_pending_products)
+
+
+def record_stock_movement(sender, instance, created, **kwargs):
+    """Actualiza los KPIs REALTIME de inventario con el delta del movimiento"""
+    if not created or instance.stock_after == instance.stock_before:
+        return
+
+    from .kpis import KPIEngine
+    change = (instance.product_id, instance.stock_after - instance.stock_before)
+    transaction.on_commit(lambda: KPIEngine().record_stock_changes([change]))
+
+
+def connect():
+    post_save.connect(queue_stock_alerts, sender=Product, dispatch_uid='analytics_stock_alerts')
+
+
+def connect_kpis():
+    post_save.connect(record_stock_movement, sender=StockMovement, dispatch_uid='analytics_kpi_stock')
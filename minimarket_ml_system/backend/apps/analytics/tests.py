@@ -1,3 +1,555 @@
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
 from django.test import TestCase
+from django.utils import timezone
+from apps.products.models import Category, Product
+from apps.sales.models import Sale, SaleItem
+from . import signals
+from .alerts import AlertEngine, STOCK_RULES
+from .basket import MarketBasketAnalyzer
+from .kpis import KPIEngine, trend_for
+from .models import KPI, Alert, CategorySalesRollup, Dashboard, ProductAssociation, SalesRollup, Widget
+from .rollups import SalesRollupBuilder
+from .widgets import WidgetQueryEngine
 
-# Create your tests here.
+
+def create_product(code, current_stock=0, cost_price='2.00', sale_price='3.00', **kwargs):
+    category, _ = Category.objects.get_or_create(name='Abarrotes')
+    return Product.objects.create(
+        code=code, name=f'Producto {code}', category=category,
+        cost_price=Decimal(cost_price), sale_price=Decimal(sale_price),
+        current_stock=current_stock, **kwargs
+    )
+
+
+def create_sale(number, items, sale_date=None, customer=None):
+    """Venta COMPLETED con items [(producto, cantidad)] y totales calculados"""
+    sale = Sale.objects.create(
+        sale_number=number, payment_method='CASH', customer=customer,
+        sale_date=sale_date or timezone.now()
+    )
+    for product, quantity in items:
+        SaleItem.objects.create(sale=sale, product=product, quantity=quantity, unit_price=product.sale_price)
+    sale.calculate_totals()
+    sale.save()
+    return sale
+
+
+def set_stock(product, stock):
+    Product.objects.filter(pk=product.pk).update(current_stock=stock)
+
+
+class AlertEngineTests(TestCase):
+    """Sincronización de alertas: sin duplicados, cambio de severidad y resolución"""
+
+    def setUp(self):
+        # reorder_point 20, min_stock 10, max_stock 100 (valores por defecto)
+        self.empty = create_product('VACIO', current_stock=0)
+        self.low = create_product('BAJO', current_stock=8)
+        self.normal = create_product('NORMAL', current_stock=50)
+        self.engine = AlertEngine()
+
+    def open_alerts(self, rule='LOW_STOCK'):
+        return dict(
+            Alert.objects.filter(alert_type=rule, is_resolved=False).values_list('product_id', 'severity')
+        )
+
+    def test_low_stock_creates_one_alert_per_product(self):
+        summary = self.engine.run(['LOW_STOCK'])
+
+        self.assertEqual(summary['LOW_STOCK'], {'active': 2, 'created': 2, 'updated': 0, 'resolved': 0})
+        self.assertEqual(self.open_alerts(), {self.empty.pk: 'CRITICAL', self.low.pk: 'WARNING'})
+
+    def test_rerun_does_not_duplicate_open_alerts(self):
+        self.engine.run(['LOW_STOCK'])
+        summary = self.engine.run(['LOW_STOCK'])
+
+        self.assertEqual(summary['LOW_STOCK'], {'active': 2, 'created': 0, 'updated': 0, 'resolved': 0})
+        self.assertEqual(Alert.objects.count(), 2)
+
+    def test_severity_change_updates_the_open_alert(self):
+        self.engine.run(['LOW_STOCK'])
+        alert_id = Alert.objects.get(product=self.low).pk
+        set_stock(self.low, 0)
+
+        summary = self.engine.run(['LOW_STOCK'])
+
+        self.assertEqual(summary['LOW_STOCK']['updated'], 1)
+        alert = Alert.objects.get(product=self.low)
+        self.assertEqual((alert.pk, alert.severity), (alert_id, 'CRITICAL'))
+
+    def test_cleared_condition_resolves_the_alert(self):
+        self.engine.run(['LOW_STOCK'])
+        set_stock(self.empty, 60)
+
+        summary = self.engine.run(['LOW_STOCK'])
+
+        self.assertEqual(summary['LOW_STOCK']['resolved'], 1)
+        self.assertEqual(self.open_alerts(), {self.low.pk: 'WARNING'})
+        resolved = Alert.objects.get(product=self.empty)
+        self.assertTrue(resolved.is_resolved)
+        self.assertIsNotNone(resolved.resolved_at)
+
+        # Si vuelve a quebrar se abre una alerta nueva
+        set_stock(self.empty, 0)
+        self.assertEqual(self.engine.run(['LOW_STOCK'])['LOW_STOCK']['created'], 1)
+
+    def test_incremental_run_only_touches_given_products(self):
+        self.engine.run(['LOW_STOCK'])
+        set_stock(self.empty, 60)
+        set_stock(self.low, 60)
+
+        summary = self.engine.run(['LOW_STOCK'], product_ids=[self.low.pk])
+
+        self.assertEqual(summary['LOW_STOCK']['resolved'], 1)
+        self.assertEqual(self.open_alerts(), {self.empty.pk: 'CRITICAL'})
+
+    def test_overstock_severity_and_dry_run(self):
+        set_stock(self.normal, 160)
+
+        summary = self.engine.run(['OVERSTOCK'], dry_run=True)
+        self.assertEqual(summary['OVERSTOCK']['created'], 1)
+        self.assertFalse(Alert.objects.exists())
+
+        self.engine.run(['OVERSTOCK'])
+        self.assertEqual(self.open_alerts('OVERSTOCK'), {self.normal.pk: 'WARNING'})
+
+    def test_unknown_rule(self):
+        with self.assertRaises(ValueError):
+            self.engine.run(['NO_EXISTE'])
+
+
+class StockAlertSignalTests(TestCase):
+    """Reevaluación de alertas de stock al guardar productos"""
+
+    def setUp(self):
+        signals.connect()
+        self.addCleanup(post_save.disconnect, sender=Product, dispatch_uid='analytics_stock_alerts')
+        self.addCleanup(setattr, signals._pending, 'product_ids', set())
+        self.product = create_product('SENAL', current_stock=50)
+        self.other = create_product('OTRO', current_stock=50)
+
+    def save_stock(self, product, stock):
+        product.current_stock = stock
+        product.save()
+
+    def test_saves_are_evaluated_once_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.save_stock(self.product, 0)
+            self.save_stock(self.other, 5)
+
+        self.assertEqual(
+            set(Alert.objects.filter(alert_type__in=STOCK_RULES).values_list('product_id', flat=True)),
+            {self.product.pk, self.other.pk}
+        )
+        self.assertEqual(signals._pending.product_ids, set())
+
+    def test_rolled_back_save_does_not_block_later_alerts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.save_stock(self.product, 0)
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+            self.save_stock(self.other, 0)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, 50)
+        self.assertEqual(
+            list(Alert.objects.values_list('product_id', flat=True)), [self.other.pk]
+        )
+
+
+class KPIEngineTests(TestCase):
+    """Los deltas en tiempo real deben coincidir con el recálculo completo"""
+
+    METRICS = ['sales_total', 'transactions', 'units_sold', 'gross_profit', 'inventory_units', 'inventory_value',
+               'average_ticket']
+
+    def setUp(self):
+        self.rice = create_product('ARROZ', current_stock=40)
+        self.oil = create_product('ACEITE', current_stock=10, cost_price='5.00', sale_price='8.00')
+        for formula in self.METRICS:
+            KPI.objects.create(name=formula, category='SALES', formula=formula, unit='', update_frequency='REALTIME')
+        self.daily = KPI.objects.create(name='Diario', category='SALES', formula='sales_total', unit='S/',
+                                        update_frequency='DAILY')
+        self.engine = KPIEngine()
+        create_sale('V-1', [(self.rice, 2)])
+        self.engine.compute(['REALTIME'])
+
+    def values(self):
+        return dict(KPI.objects.filter(update_frequency='REALTIME').values_list('formula', 'current_value'))
+
+    def recomputed(self):
+        return self.engine.evaluate(self.METRICS, frequency='REALTIME')
+
+    def test_compute_evaluates_registered_metrics(self):
+        values = self.values()
+        # 2 x 3.00 + IGV 18%
+        self.assertEqual(values['sales_total'], Decimal('7.08'))
+        self.assertEqual(values['transactions'], 1)
+        self.assertEqual(values['units_sold'], 2)
+        self.assertEqual(values['gross_profit'], Decimal('2.00'))
+        self.assertEqual(values['inventory_units'], 50)
+        self.assertEqual(values['inventory_value'], Decimal('130.00'))
+        self.assertEqual(values['average_ticket'], Decimal('7.08'))
+
+    def test_sale_and_cancel_deltas_match_recompute(self):
+        sale = create_sale('V-2', [(self.rice, 1), (self.oil, 3)])
+        self.assertEqual(self.engine.record_sale(sale), 4)
+
+        values = self.values()
+        for name in ['sales_total', 'transactions', 'units_sold', 'gross_profit']:
+            self.assertEqual(values[name], self.recomputed()[name], name)
+        # Los deltas no tocan la comparación con el periodo anterior
+        kpi = KPI.objects.get(update_frequency='REALTIME', formula='sales_total')
+        self.assertEqual((kpi.previous_value, kpi.trend), (Decimal('0.00'), 'UP'))
+
+        Sale.objects.filter(pk=sale.pk).update(status='CANCELLED')
+        self.engine.record_sale(sale, sign=-1)
+
+        values = self.values()
+        for name in ['sales_total', 'transactions', 'units_sold', 'gross_profit']:
+            self.assertEqual(values[name], self.recomputed()[name], name)
+
+    def test_stock_changes_match_recompute(self):
+        Product.objects.filter(pk=self.rice.pk).update(current_stock=35)
+        Product.objects.filter(pk=self.oil.pk).update(current_stock=14)
+        self.engine.record_stock_changes([(self.rice.pk, -3), (self.rice.pk, -2), (self.oil.pk, 4)])
+
+        values = self.values()
+        self.assertEqual(values['inventory_units'], self.recomputed()['inventory_units'])
+        self.assertEqual(values['inventory_value'], self.recomputed()['inventory_value'])
+
+    def test_deltas_only_touch_realtime_additive_metrics(self):
+        before = self.values()
+        self.assertEqual(self.engine.apply_deltas({'average_ticket': 100, 'sales_total': 0}), 0)
+        self.assertEqual(self.values(), before)
+
+        self.assertEqual(self.engine.apply_deltas({'sales_total': 10}), 1)
+        self.daily.refresh_from_db()
+        self.assertEqual(self.daily.current_value, 0)
+
+    def test_sale_from_another_day_is_ignored(self):
+        sale = create_sale('V-OLD', [(self.rice, 5)], sale_date=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(self.engine.record_sale(sale), 0)
+        self.assertEqual(self.values()['units_sold'], 2)
+
+    def test_previous_value_is_the_previous_period(self):
+        create_sale('V-AYER', [(self.rice, 5)], sale_date=timezone.now() - timedelta(days=1))
+        self.engine.compute(['REALTIME'])
+        self.engine.compute(['REALTIME'])
+
+        sales = KPI.objects.get(update_frequency='REALTIME', formula='sales_total')
+        # Ayer 5 x 3.00 + IGV; hoy 2 x 3.00 + IGV
+        self.assertEqual((sales.previous_value, sales.current_value, sales.trend),
+                         (Decimal('17.70'), Decimal('7.08'), 'DOWN'))
+
+        # Inventario: sin historia por fechas, queda el último valor del periodo anterior
+        inventory = KPI.objects.get(update_frequency='REALTIME', formula='inventory_units')
+        self.assertEqual((inventory.previous_value, inventory.trend), (None, 'STABLE'))
+        KPI.objects.filter(pk=inventory.pk).update(
+            current_value=80, last_calculated=timezone.now() - timedelta(days=1)
+        )
+        self.engine.compute(['REALTIME'])
+        self.engine.compute(['REALTIME'])
+        inventory.refresh_from_db()
+        self.assertEqual((inventory.previous_value, inventory.current_value, inventory.trend),
+                         (Decimal('80.00'), Decimal('50.00'), 'DOWN'))
+
+    def test_trend_tolerance(self):
+        self.assertEqual(trend_for(None, Decimal('5')), 'STABLE')
+        self.assertEqual(trend_for(Decimal('100'), Decimal('100.5')), 'STABLE')
+        self.assertEqual(trend_for(Decimal('100'), Decimal('102')), 'UP')
+        self.assertEqual(trend_for(Decimal('100'), Decimal('98')), 'DOWN')
+
+
+class MarketBasketAnalyzerTests(TestCase):
+    """Co-ocurrencias incrementales: deben coincidir con una reconstrucción completa"""
+
+    def setUp(self):
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        self.state_dir = state_dir.name
+        self.bread = create_product('PAN')
+        self.butter = create_product('MANTEQUILLA')
+        self.milk = create_product('LECHE')
+        self.sales = 0
+
+    def analyzer(self):
+        return MarketBasketAnalyzer(state_dir=self.state_dir, min_pair_count=2)
+
+    def sell(self, *products):
+        self.sales += 1
+        return create_sale(f'V-{self.sales}', [(product, 1) for product in products])
+
+    def cancel(self, sale):
+        Sale.objects.filter(pk=sale.pk).update(status='CANCELLED')
+
+    def state(self):
+        state = self.analyzer().load_state()
+        return state['cooccurrence'].toarray(), state['baskets']
+
+    def assert_matches_rebuild(self):
+        incremental_matrix, incremental_baskets = self.state()
+        rules = set(ProductAssociation.objects.values_list('product_id', 'associated_product_id', 'pair_count'))
+
+        summary = self.analyzer().update(rebuild=True)
+        self.assertFalse(summary['incremental'])
+        matrix, baskets = self.state()
+        np.testing.assert_array_equal(incremental_matrix, matrix)
+        self.assertEqual(incremental_baskets, baskets)
+        self.assertEqual(
+            rules, set(ProductAssociation.objects.values_list('product_id', 'associated_product_id', 'pair_count'))
+        )
+
+    def test_rules_support_confidence_and_lift(self):
+        for _ in range(3):
+            self.sell(self.bread, self.butter)
+        self.sell(self.bread, self.bread, self.milk)
+
+        summary = self.analyzer().update()
+
+        self.assertEqual(summary['baskets'], 4)
+        matrix, _ = self.state()
+        self.assertEqual(matrix[self.bread.pk, self.bread.pk], 4)
+        self.assertEqual(matrix[self.bread.pk, self.butter.pk], 3)
+        rule = ProductAssociation.objects.get(product=self.bread, associated_product=self.butter)
+        self.assertEqual(rule.pair_count, 3)
+        self.assertEqual(rule.support, Decimal('0.75'))
+        self.assertEqual(rule.confidence, Decimal('0.75'))
+        self.assertEqual(rule.lift, Decimal('1'))
+        # PAN-LECHE aparece una sola vez: no llega a min_pair_count
+        self.assertFalse(ProductAssociation.objects.filter(associated_product=self.milk).exists())
+
+    def test_incremental_update_adds_new_and_subtracts_cancelled_once(self):
+        first = self.sell(self.bread, self.butter)
+        self.sell(self.bread, self.butter)
+        self.analyzer().update()
+
+        self.sell(self.bread, self.milk)
+        self.cancel(first)
+        summary = self.analyzer().update()
+        self.assertTrue(summary['incremental'])
+        self.assertEqual((summary['added_sales'], summary['removed_sales']), (1, 1))
+
+        # La venta anulada ya se restó: no se vuelve a restar
+        summary = self.analyzer().update()
+        self.assertEqual((summary['added_sales'], summary['removed_sales']), (0, 0))
+        self.assert_matches_rebuild()
+
+    def test_sale_cancelled_before_being_counted_is_not_subtracted(self):
+        self.sell(self.bread, self.butter)
+        self.analyzer().update()
+
+        late = self.sell(self.bread, self.butter)
+        self.cancel(late)
+        summary = self.analyzer().update()
+
+        self.assertEqual((summary['added_sales'], summary['removed_sales']), (0, 0))
+        self.assert_matches_rebuild()
+
+    def test_state_without_counted_sales_is_rebuilt(self):
+        self.sell(self.bread, self.butter)
+        analyzer = self.analyzer()
+        analyzer.update()
+        np.savez(analyzer.state_path, meta=np.array([1, 1, 0]))
+
+        self.assertIsNone(analyzer.load_state())
+        self.assertFalse(analyzer.update()['incremental'])
+
+
+class SalesRollupBuilderTests(TestCase):
+    """Cada corrida reemplaza su ventana de días sin tocar los días anteriores"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.rice = create_product('ARROZ')
+        self.old = create_sale('V-1', [(self.rice, 2)], sale_date=timezone.now() - timedelta(days=10))
+        create_sale('V-2', [(self.rice, 1)])
+
+    def sales_by_date(self):
+        return dict(SalesRollup.objects.values_list('business_date', 'sales_total'))
+
+    def test_build_aggregates_sales_and_items(self):
+        result = SalesRollupBuilder().build(days=30)
+
+        self.assertEqual((result['sales_rows'], result['category_rows']), (2, 2))
+        self.assertEqual(self.sales_by_date(), {
+            self.today - timedelta(days=10): Decimal('7.08'), self.today: Decimal('3.54')
+        })
+        units = dict(CategorySalesRollup.objects.values_list('business_date', 'units'))
+        self.assertEqual(units, {self.today - timedelta(days=10): 2, self.today: 1})
+
+    def test_incremental_build_replaces_only_the_overlap_window(self):
+        builder = SalesRollupBuilder()
+        builder.build(days=30)
+
+        # Anulada fuera de la ventana de solapamiento: el agregado de ese día se mantiene
+        Sale.objects.filter(pk=self.old.pk).update(status='CANCELLED')
+        create_sale('V-3', [(self.rice, 3)])
+        result = builder.build()
+
+        self.assertEqual(result['date_from'], self.today - timedelta(days=3))
+        self.assertEqual(self.sales_by_date(), {
+            self.today - timedelta(days=10): Decimal('7.08'), self.today: Decimal('14.16')
+        })
+        self.assertEqual(SalesRollup.objects.filter(business_date=self.today).count(), 1)
+        self.assertEqual(CategorySalesRollup.objects.get(business_date=self.today).units, 4)
+
+    def test_explicit_window_drops_days_without_sales(self):
+        builder = SalesRollupBuilder()
+        builder.build(days=30)
+
+        Sale.objects.filter(pk=self.old.pk).update(status='CANCELLED')
+        builder.build(date_from=self.today - timedelta(days=30))
+
+        self.assertEqual(self.sales_by_date(), {self.today: Decimal('3.54')})
+        self.assertFalse(CategorySalesRollup.objects.filter(business_date__lt=self.today).exists())
+
+
+class WidgetQueryEngineTests(TestCase):
+    """query_config de los widgets: validación, consultas compartidas, derivadas y caché"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.today = timezone.localdate()
+        self.rice = create_product('ARROZ')
+        self.oil = create_product('ACEITE', cost_price='5.00', sale_price='8.00')
+        self.oils = Category.objects.create(name='Aceites')
+        Product.objects.filter(pk=self.oil.pk).update(category=self.oils)
+        self.oil.refresh_from_db()
+
+        # Subtotales 6.00, 11.00 y 16.00 (+ IGV 18%)
+        create_sale('V-1', [(self.rice, 2)], sale_date=timezone.now() - timedelta(days=10))
+        card = create_sale('V-2', [(self.rice, 1), (self.oil, 1)])
+        Sale.objects.filter(pk=card.pk).update(payment_method='CARD')
+        create_sale('V-3', [(self.oil, 2)])
+        SalesRollupBuilder().build(days=30)
+
+        self.engine = WidgetQueryEngine()
+        self.dashboard = Dashboard.objects.create(name='Ventas', user=User.objects.create_user('gerente'))
+
+    def create_widget(self, query_config, refresh_interval=300, data_source='SALES'):
+        return Widget.objects.create(
+            dashboard=self.dashboard, title='Widget', widget_type='TABLE', data_source=data_source,
+            query_config=query_config, refresh_interval=refresh_interval
+        )
+
+    def run_config(self, config, data_source='SALES'):
+        return self.engine.execute({'w': self.engine.plan(data_source, config)})['w']
+
+    def test_invalid_configs_raise_value_error(self):
+        cases = [
+            ('WEATHER', {'measures': ['sales_total']}, 'Fuente de datos no soportada'),
+            ('SALES', {}, 'measures es obligatorio'),
+            ('SALES', {'measures': ['stock_units']}, 'Medida no disponible'),
+            ('SALES', {'measures': ['sales_total'], 'dimensions': ['category']}, 'La dimensión category'),
+            ('SALES', {'measures': ['sales_total'], 'filters': {'category': [1]}}, 'El filtro category'),
+            ('SALES', {'measures': ['sales_total'], 'time_grain': 'year'}, 'time_grain inválido'),
+            ('SALES', {'measures': ['sales_total'], 'date_range': {'from': '2024-13-01'}}, 'date_range.from'),
+            ('SALES', {'measures': ['sales_total'], 'date_range': {'from': '2024-06-30', 'to': '2024-06-01'}},
+             'posterior'),
+            ('SALES', {'measures': ['sales_total'], 'order_by': '-revenue'}, 'order_by'),
+            ('SALES', {'measures': ['sales_total'], 'limit': 0}, 'limit'),
+        ]
+        for data_source, config, message in cases:
+            with self.subTest(config=config):
+                with self.assertRaisesMessage(ValueError, message):
+                    self.engine.plan(data_source, config)
+
+    def test_non_temporal_source_ignores_date_range(self):
+        plan = self.engine.plan('INVENTORY', {'measures': ['products'], 'date_range': {'from': 'x'}})
+        self.assertIsNone(plan['date_range'])
+
+    def test_widgets_with_same_grouping_share_one_query(self):
+        plans = {
+            'total': self.engine.plan('SALES', {'measures': ['sales_total'], 'dimensions': ['date']}),
+            'ticket': self.engine.plan('SALES', {'measures': ['average_ticket'], 'dimensions': ['date']}),
+            'profit': self.engine.plan('SALES', {'measures': ['profit'], 'dimensions': ['date']}),
+        }
+        # Un GROUP BY por cubo: ventas (sales_total + transactions) e items (profit)
+        with self.assertNumQueries(2):
+            results = self.engine.execute(plans)
+
+        self.assertEqual(results['total']['columns'], ['date', 'sales_total'])
+        self.assertEqual(results['total']['rows'], [
+            {'date': (self.today - timedelta(days=10)).isoformat(), 'sales_total': 7.08},
+            {'date': self.today.isoformat(), 'sales_total': 31.86},
+        ])
+        self.assertEqual([row['profit'] for row in results['profit']['rows']], [2.0, 10.0])
+
+    def test_different_filters_run_separate_queries(self):
+        plans = {
+            'cash': self.engine.plan('SALES', {'measures': ['sales_total'], 'filters': {'payment_method': 'CASH'}}),
+            'card': self.engine.plan('SALES', {'measures': ['sales_total'], 'filters': {'payment_method': ['CARD']}}),
+        }
+        with self.assertNumQueries(2):
+            results = self.engine.execute(plans)
+
+        self.assertEqual(results['cash']['rows'], [{'sales_total': 25.96}])
+        self.assertEqual(results['card']['rows'], [{'sales_total': 12.98}])
+
+    def test_derived_measures(self):
+        result = self.run_config({'measures': ['average_ticket', 'margin_pct']})
+        # 38.94 / 3 ventas; 12.00 de ganancia sobre 33.00 de ingresos
+        self.assertEqual(result['rows'], [{'average_ticket': 12.98, 'margin_pct': 36.36}])
+
+        by_category = self.run_config({'measures': ['margin_pct'], 'dimensions': ['category']})
+        self.assertEqual(by_category['rows'], [
+            {'category': 'Aceites', 'margin_pct': 37.5},
+            {'category': 'Abarrotes', 'margin_pct': 33.33},
+        ])
+
+    def test_derived_measure_without_denominator_is_zero(self):
+        result = self.run_config({'measures': ['average_ticket'], 'filters': {'payment_method': 'TRANSFER'}})
+        self.assertEqual(result['rows'], [{'average_ticket': 0}])
+
+    def test_order_by_and_limit(self):
+        result = self.run_config({
+            'measures': ['revenue'], 'dimensions': ['category'], 'order_by': 'revenue', 'limit': 1
+        })
+        self.assertEqual(result['rows'], [{'category': 'Abarrotes', 'revenue': 9.0}])
+
+    def test_fetch_caches_per_refresh_interval(self):
+        minute = self.create_widget({'measures': ['sales_total']}, refresh_interval=60)
+        hourly = self.create_widget({'measures': ['transactions']}, refresh_interval=3600)
+        live = self.create_widget({'measures': ['discount_total']}, refresh_interval=0)
+        invalid = self.create_widget({'measures': ['stock_units']})
+
+        with mock.patch('apps.analytics.widgets.cache.set_many', wraps=cache.set_many) as set_many:
+            first = self.engine.fetch([minute, hourly, live, invalid])
+        timeouts = {call.kwargs['timeout']: set(call.args[0]) for call in set_many.call_args_list}
+        self.assertEqual(timeouts, {
+            60: {self.engine.cache_key(minute)}, 3600: {self.engine.cache_key(hourly)}
+        })
+        self.assertFalse(any(first[widget.pk].get('cached') for widget in (minute, hourly, live)))
+        self.assertIn('error', first[invalid.pk])
+
+        # Solo el widget sin caché se vuelve a consultar (una consulta agrupada)
+        with self.assertNumQueries(1):
+            second = self.engine.fetch([minute, hourly, live, invalid])
+        self.assertTrue(second[minute.pk]['cached'] and second[hourly.pk]['cached'])
+        self.assertFalse(second[live.pk]['cached'])
+        self.assertEqual(second[minute.pk]['rows'], first[minute.pk]['rows'])
+        self.assertIn('error', second[invalid.pk])
+
+    def test_editing_widget_changes_cache_key(self):
+        widget = self.create_widget({'measures': ['sales_total']})
+        self.engine.fetch([widget])
+
+        widget.query_config = {'measures': ['transactions']}
+        widget.updated_at = widget.updated_at + timedelta(seconds=5)
+        self.assertFalse(self.engine.fetch([widget])[widget.pk]['cached'])
+        self.assertTrue(self.engine.fetch([widget])[widget.pk]['cached'])
+        self.assertFalse(self.engine.fetch([widget], use_cache=False)[widget.pk]['cached'])
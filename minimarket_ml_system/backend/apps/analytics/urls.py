@@ -5,27 +5,63 @@ from rest_framework.routers import DefaultRouter
 from django.http import JsonResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from apps.analytics.data_analysis import run_analysis
+from rest_framework import status
+from apps.analytics.data_analysis import request_analysis_report, load_report_results
+from .views import (
+    AlertViewSet, KPIViewSet, DashboardViewSet, WidgetViewSet, ReportViewSet,
+    ProductAssociationViewSet
+)
+from .serializers import ReportSerializer
+from .models import KPI
 
 def analytics_test(request):
     return JsonResponse({
         'message': 'Analytics API funcionando',
         'endpoints': {
             'run_analysis': '/api/analytics/run_analysis/',
-            'dashboard_overview': '/api/analytics/dashboard_overview/'
+            'dashboard_overview': '/api/analytics/dashboard_overview/',
+            'alerts': '/api/analytics/alerts/',
+            'alerts_summary': '/api/analytics/alerts/summary/',
+            'generate_alerts': '/api/analytics/alerts/generate/',
+            'kpis': '/api/analytics/kpis/',
+            'kpi_metrics': '/api/analytics/kpis/metrics/',
+            'compute_kpis': '/api/analytics/kpis/compute/',
+            'dashboards': '/api/analytics/dashboards/',
+            'dashboard_data': '/api/analytics/dashboards/{id}/data/',
+            'widgets': '/api/analytics/widgets/',
+            'widget_data': '/api/analytics/widgets/{id}/data/',
+            'widget_options': '/api/analytics/widgets/options/',
+            'reports': '/api/analytics/reports/',
+            'associations': '/api/analytics/associations/',
+            'frequently_bought_with': '/api/analytics/associations/frequently_bought_with/?product={id}',
+            'top_pairs': '/api/analytics/associations/top_pairs/'
         }
     })
 
 @api_view(['POST'])
 def run_data_analysis(request):
-    """Ejecuta análisis exploratorio de datos"""
+    """Solicita el análisis exploratorio de datos
+    
+    Si ya hay un análisis de la versión de datos actual retorna sus resultados;
+    si no, lo genera en segundo plano y responde 202 con el reporte a consultar.
+    """
     try:
-        results = run_analysis()
+        refresh = str(request.data.get('refresh', False)).lower() in ('1', 'true', 'yes')
+        user = request.user if request.user.is_authenticated else None
+        report, cached = request_analysis_report(user=user, refresh=refresh)
+        if cached:
+            return Response({
+                'success': True,
+                'message': 'Análisis sin cambios en los datos: se retornan los resultados guardados',
+                'report': ReportSerializer(report).data,
+                'results': load_report_results(report)
+            })
         return Response({
             'success': True,
-            'message': 'Análisis completado exitosamente',
-            'results': results
-        })
+            'message': 'Análisis en proceso',
+            'report': ReportSerializer(report).data,
+            'status_url': f'/api/analytics/reports/{report.pk}/'
+        }, status=status.HTTP_202_ACCEPTED)
     except Exception as e:
         return Response({
             'success': False,
@@ -36,20 +72,20 @@ def run_data_analysis(request):
 def dashboard_overview(request):
     """Vista general para dashboard"""
     from apps.products.models import Product
-    from apps.sales.models import Sale, SaleItem
+    from apps.sales.models import Sale, SaleItem, business_date_range
     from datetime import datetime, timedelta
-    from django.db.models import Sum, Count, Avg
+    from django.db.models import Sum, Count, Avg, F
     
     today = datetime.now().date()
     last_30_days = today - timedelta(days=30)
     
     # Estadísticas generales
     total_products = Product.objects.filter(is_active=True).count()
-    low_stock_count = len([p for p in Product.objects.filter(is_active=True) if p.needs_reorder])
+    low_stock_count = Product.objects.filter(is_active=True, current_stock__lte=F('reorder_point')).count()
     
     # Ventas del mes
     month_sales = Sale.objects.filter(
-        sale_date__date__gte=last_30_days,
+        business_date_range(last_30_days),
         status='COMPLETED'
     ).aggregate(
         total=Sum('total'),
@@ -58,7 +94,7 @@ def dashboard_overview(request):
     
     # Top productos vendidos
     top_products = SaleItem.objects.filter(
-        sale__sale_date__date__gte=last_30_days,
+        business_date_range(last_30_days, prefix='sale__'),
         sale__status='COMPLETED'
     ).values(
         'product__name'
@@ -75,12 +111,22 @@ def dashboard_overview(request):
             'month_sales_total': float(month_sales['total'] or 0),
             'month_sales_count': month_sales['count'] or 0
         },
-        'top_products': list(top_products)
+        'top_products': list(top_products),
+        # KPIs precalculados por KPIEngine (sin recalcular en la petición)
+        'kpis': list(KPI.objects.filter(is_active=True).values(
+            'name', 'category', 'unit', 'current_value', 'previous_value', 'trend', 'last_calculated'
+        ))
     })
 
 app_name = 'analytics'
 
 router = DefaultRouter()
+router.register(r'alerts', AlertViewSet)
+router.register(r'kpis', KPIViewSet)
+router.register(r'dashboards', DashboardViewSet)
+router.register(r'widgets', WidgetViewSet)
+router.register(r'reports', ReportViewSet)
+router.register(r'associations', ProductAssociationViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,3 +1,296 @@
-from django.shortcuts import render
+# Archivo: minimarket_ml_system/backend/apps/analytics/views.py
 
-# Create your views here.
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from django.db.models import Count, F, Prefetch
+from django.utils import timezone
+import logging
+
+from .models import Alert, KPI, Dashboard, Widget, Report, ProductAssociation
+from .serializers import (
+    AlertSerializer, KPISerializer, DashboardSerializer, WidgetSerializer, ReportSerializer,
+    ProductAssociationSerializer
+)
+from .alerts import AlertEngine
+from .kpis import KPIEngine, METRICS
+from .widgets import WidgetQueryEngine, SOURCES, DERIVED_MEASURES, TIME_GRAINS
+from .data_analysis import load_report_results
+from .basket import MarketBasketAnalyzer
+
+logger = logging.getLogger(__name__)
+
+class AlertViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para alertas generadas por el motor de alertas"""
+    queryset = Alert.objects.select_related('product')
+    serializer_class = AlertSerializer
+    permission_classes = []
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        
+        # Filtros opcionales (por defecto solo abiertas)
+        alert_type = self.request.query_params.get('alert_type')
+        severity = self.request.query_params.get('severity')
+        product = self.request.query_params.get('product')
+        resolved = self.request.query_params.get('resolved', 'false').lower()
+        
+        if alert_type:
+            queryset = queryset.filter(alert_type=alert_type.upper())
+        
+        if severity:
+            queryset = queryset.filter(severity=severity.upper())
+        
+        if product:
+            queryset = queryset.filter(product_id=product)
+        
+        if resolved in ('false', '0', 'no'):
+            queryset = queryset.filter(is_resolved=False)
+        elif resolved in ('true', '1', 'yes'):
+            queryset = queryset.filter(is_resolved=True)
+        
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Alertas abiertas por tipo y severidad"""
+        counts = Alert.objects.filter(is_resolved=False).values(
+            'alert_type', 'severity'
+        ).annotate(count=Count('id')).order_by('alert_type', 'severity')
+        
+        return Response({
+            'open_alerts': sum(row['count'] for row in counts),
+            'by_type': list(counts)
+        })
+    
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """Ejecuta el motor de alertas (rules opcional: lista de tipos)"""
+        rules = request.data.get('rules') or None
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        
+        try:
+            summary = AlertEngine().run(rules=rules, dry_run=dry_run)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({'success': True, 'dry_run': dry_run, 'rules': summary})
+    
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        """Marca la alerta como leída"""
+        alert = self.get_object()
+        alert.is_read = True
+        alert.save(update_fields=['is_read', 'updated_at'])
+        return Response(AlertSerializer(alert).data)
+    
+    @action(detail=True, methods=['post'])
+    def resolve(self, request, pk=None):
+        """Resuelve manualmente una alerta"""
+        alert = self.get_object()
+        if alert.is_resolved:
+            return Response(
+                {'error': 'La alerta ya está resuelta'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        alert.is_resolved = True
+        alert.resolved_at = timezone.now()
+        alert.resolved_by = request.user if request.user.is_authenticated else None
+        alert.save(update_fields=['is_resolved', 'resolved_at', 'resolved_by', 'updated_at'])
+        return Response(AlertSerializer(alert).data)
+
+class KPIViewSet(viewsets.ModelViewSet):
+    """ViewSet para KPIs; los valores se leen precalculados por KPIEngine"""
+    queryset = KPI.objects.all()
+    serializer_class = KPISerializer
+    permission_classes = []
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        category = self.request.query_params.get('category')
+        frequency = self.request.query_params.get('frequency')
+        
+        if category:
+            queryset = queryset.filter(category=category.upper())
+        
+        if frequency:
+            queryset = queryset.filter(update_frequency=frequency.upper())
+        
+        return queryset
+    
+    def perform_create(self, serializer):
+        formula = serializer.validated_data['formula'].strip()
+        if formula not in METRICS:
+            raise ValidationError({'formula': f'Métrica no registrada. Opciones: {sorted(METRICS)}'})
+        serializer.save(formula=formula)
+    
+    @action(detail=False, methods=['get'])
+    def metrics(self, request):
+        """Métricas registradas disponibles para la fórmula de un KPI"""
+        return Response([
+            {
+                'name': metric.name,
+                'description': metric.description,
+                'unit': metric.unit,
+                'category': metric.category,
+                'incremental': metric.incremental
+            }
+            for metric in METRICS.values()
+        ])
+    
+    @action(detail=False, methods=['post'])
+    def compute(self, request):
+        """Recalcula los KPIs (frequencies opcional)"""
+        frequencies = request.data.get('frequencies') or None
+        summary = KPIEngine().compute(frequencies=frequencies)
+        return Response({'success': True, 'by_frequency': summary})
+
+class DashboardViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para dashboards; data resuelve todos sus widgets en una petición"""
+    queryset = Dashboard.objects.prefetch_related(
+        Prefetch('widgets', queryset=Widget.objects.filter(is_active=True))
+    )
+    serializer_class = DashboardSerializer
+    permission_classes = []
+    
+    @action(detail=True, methods=['get'])
+    def data(self, request, pk=None):
+        """Datos de los widgets activos (refresh=1 ignora la caché)"""
+        dashboard = self.get_object()
+        use_cache = request.query_params.get('refresh', '0').lower() not in ('1', 'true', 'yes')
+        data = WidgetQueryEngine().fetch(dashboard.widgets.all(), use_cache=use_cache)
+        return Response({
+            'dashboard': dashboard.pk,
+            'widgets': [data[widget.pk] for widget in dashboard.widgets.all()]
+        })
+
+class WidgetViewSet(viewsets.ModelViewSet):
+    """ViewSet para widgets de dashboard"""
+    queryset = Widget.objects.all()
+    serializer_class = WidgetSerializer
+    permission_classes = []
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        dashboard = self.request.query_params.get('dashboard')
+        if dashboard:
+            queryset = queryset.filter(dashboard_id=dashboard)
+        return queryset
+    
+    @action(detail=True, methods=['get'])
+    def data(self, request, pk=None):
+        """Datos de un widget (refresh=1 ignora la caché)"""
+        widget = self.get_object()
+        use_cache = request.query_params.get('refresh', '0').lower() not in ('1', 'true', 'yes')
+        result = WidgetQueryEngine().fetch([widget], use_cache=use_cache)[widget.pk]
+        if 'error' in result:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+    
+    @action(detail=False, methods=['get'], url_path='options')
+    def query_options(self, request):
+        """Medidas, dimensiones y filtros disponibles por fuente de datos"""
+        return Response({
+            'time_grains': TIME_GRAINS,
+            'sources': {
+                source: {
+                    'measures': [name for cube in cubes for name in cube.measures] + [
+                        name for name, (numerator, denominator, _) in DERIVED_MEASURES.items()
+                        if any(numerator in cube.measures for cube in cubes)
+                        and any(denominator in cube.measures for cube in cubes)
+                    ],
+                    'dimensions': sorted(
+                        {name for cube in cubes for name in cube.dimensions} |
+                        ({'date', 'weekday'} if any(cube.date_field for cube in cubes) else set())
+                    ),
+                    'filters': sorted({name for cube in cubes for name in cube.filters}),
+                }
+                for source, cubes in SOURCES.items()
+            }
+        })
+
+class ReportViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para reportes; el detalle incluye los resultados del análisis si ya terminó"""
+    queryset = Report.objects.all()
+    serializer_class = ReportSerializer
+    permission_classes = []
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        report_type = self.request.query_params.get('report_type')
+        report_status = self.request.query_params.get('status')
+        
+        if report_type:
+            queryset = queryset.filter(report_type=report_type.upper())
+        
+        if report_status:
+            queryset = queryset.filter(status=report_status.upper())
+        
+        return queryset
+    
+    def retrieve(self, request, *args, **kwargs):
+        report = self.get_object()
+        data = ReportSerializer(report).data
+        if report.report_type == 'ANALYSIS':
+            data['results'] = load_report_results(report)
+        return Response(data)
+
+class ProductAssociationViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para reglas de asociación entre productos (análisis de canasta)"""
+    queryset = ProductAssociation.objects.select_related('product', 'associated_product')
+    serializer_class = ProductAssociationSerializer
+    permission_classes = []
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        product = self.request.query_params.get('product')
+        min_lift = self.request.query_params.get('min_lift')
+        
+        if product:
+            queryset = queryset.filter(product_id=product)
+        
+        if min_lift:
+            queryset = queryset.filter(lift__gte=min_lift)
+        
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def frequently_bought_with(self, request):
+        """Productos que se compran junto con ?product= (por lift; limit opcional)"""
+        product = request.query_params.get('product')
+        if not product:
+            return Response(
+                {'error': 'El parámetro product es obligatorio'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = int(request.query_params.get('limit', 5))
+        
+        rules = self.get_queryset().filter(
+            product_id=product, associated_product__is_active=True
+        ).order_by('-lift', '-confidence')[:limit]
+        return Response({
+            'product': int(product),
+            'items': ProductAssociationSerializer(rules, many=True).data
+        })
+    
+    @action(detail=False, methods=['get'])
+    def top_pairs(self, request):
+        """Pares con mayor lift (cada par una vez), para ubicación en góndola"""
+        limit = int(request.query_params.get('limit', 20))
+        pairs = self.get_queryset().filter(
+            product_id__lt=F('associated_product_id')
+        ).order_by('-lift', '-pair_count')[:limit]
+        return Response(ProductAssociationSerializer(pairs, many=True).data)
+    
+    @action(detail=False, methods=['post'])
+    def compute(self, request):
+        """Actualiza el análisis de canasta (rebuild opcional)"""
+        rebuild = str(request.data.get('rebuild', False)).lower() in ('1', 'true', 'yes')
+        summary = MarketBasketAnalyzer().update(rebuild=rebuild)
+        return Response({'success': True, **summary})
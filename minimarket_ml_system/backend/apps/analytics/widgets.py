@@ -0,0 +1,386 @@
+# Archivo: minimarket_ml_system/backend/apps/analytics/widgets.py
+
+import logging
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Avg, Count, DateField, DecimalField, F, Q, Sum
+from django.db.models.functions import ExtractIsoWeekDay, Trunc
+from django.utils import timezone
+from apps.monitoring.tracing import span
+from apps.products.models import Product
+from apps.sales.models import Customer
+from apps.ml_models.models import DemandPrediction
+from .models import SalesRollup, CategorySalesRollup
+
+logger = logging.getLogger(__name__)
+
+# Tabla sobre la que se resuelven las medidas de un widget
+#   queryset: función que retorna la consulta base
+#   dimensions: {nombre: ruta} ('date' y 'weekday' se derivan de date_field)
+#   filters: {nombre: ruta que se filtra con __in}
+#   measures: {nombre: agregación}
+#   date_field: columna para date_range y time_grain (None si la fuente no es temporal)
+Cube = namedtuple('Cube', 'name queryset dimensions filters measures date_field')
+
+SALES_CUBES = [
+    Cube(
+        'sales',
+        lambda: SalesRollup.objects.all(),
+        {'hour': 'business_hour', 'payment_method': 'payment_method'},
+        {'hour': 'business_hour', 'payment_method': 'payment_method'},
+        {
+            'sales_total': Sum('sales_total'),
+            'transactions': Sum('transactions'),
+            'discount_total': Sum('discount_total'),
+        },
+        'business_date'
+    ),
+    Cube(
+        'items',
+        lambda: CategorySalesRollup.objects.all(),
+        {'hour': 'business_hour', 'payment_method': 'payment_method', 'category': 'category__name'},
+        {'hour': 'business_hour', 'payment_method': 'payment_method', 'category': 'category_id'},
+        {
+            'items': Sum('items'),
+            'units': Sum('units'),
+            'revenue': Sum('revenue'),
+            'cost': Sum('cost'),
+            'profit': Sum('profit'),
+        },
+        'business_date'
+    ),
+]
+
+SOURCES = {
+    'SALES': SALES_CUBES,
+    'INVENTORY': [
+        Cube(
+            'inventory',
+            lambda: Product.objects.filter(is_active=True),
+            {'category': 'category__name', 'supplier': 'supplier__name'},
+            {'category': 'category_id', 'supplier': 'supplier_id'},
+            {
+                'products': Count('id'),
+                'stock_units': Sum('current_stock'),
+                'stock_value': Sum(F('current_stock') * F('cost_price'),
+                                   output_field=DecimalField(max_digits=14, decimal_places=2)),
+                'low_stock_products': Count('id', filter=Q(current_stock__lte=F('reorder_point'))),
+                'out_of_stock_products': Count('id', filter=Q(current_stock__lte=0)),
+            },
+            None
+        ),
+    ],
+    'PREDICTIONS': [
+        Cube(
+            'predictions',
+            lambda: DemandPrediction.objects.filter(prediction_period='DAILY'),
+            {'product': 'product__name', 'category': 'product__category__name'},
+            {'product': 'product_id', 'category': 'product__category_id'},
+            {
+                'predicted_quantity': Sum('predicted_quantity'),
+                'actual_quantity': Sum('actual_quantity'),
+                'lower_bound': Sum('lower_bound'),
+                'upper_bound': Sum('upper_bound'),
+            },
+            'prediction_date'
+        ),
+    ],
+    'CUSTOMERS': [
+        Cube(
+            'customers',
+            lambda: Customer.objects.filter(is_active=True),
+            {'customer_type': 'customer_type'},
+            {'customer_type': 'customer_type'},
+            {
+                'customers': Count('id'),
+                'total_purchases': Sum('total_purchases'),
+                'purchase_count': Sum('purchase_count'),
+                'current_debt': Sum('current_debt'),
+            },
+            None
+        ),
+    ],
+    'PRODUCTS': [
+        Cube(
+            'products',
+            lambda: Product.objects.filter(is_active=True),
+            {'category': 'category__name', 'supplier': 'supplier__name', 'brand': 'brand'},
+            {'category': 'category_id', 'supplier': 'supplier_id', 'brand': 'brand'},
+            {
+                'products': Count('id'),
+                'perishable_products': Count('id', filter=Q(is_perishable=True)),
+                'average_price': Avg('sale_price'),
+            },
+            None
+        ),
+    ],
+}
+
+# Medidas derivadas: (numerador, denominador, escala), calculadas sobre las filas ya agregadas
+DERIVED_MEASURES = {
+    'average_ticket': ('sales_total', 'transactions', 1),
+    'margin_pct': ('profit', 'revenue', 100),
+}
+
+TIME_GRAINS = ['day', 'week', 'month']
+
+DEFAULT_LAST_DAYS = 30
+
+CACHE_PREFIX = 'analytics:widget'
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _parse_date(value, field):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f"Fecha inválida en date_range.{field}. Use YYYY-MM-DD")
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return round(float(value), 2)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class WidgetQueryEngine:
+    """Ejecuta el query_config de los widgets sobre las tablas pre-agregadas
+
+    query_config es declarativo:
+        {"measures": ["revenue", "margin_pct"], "dimensions": ["date", "category"],
+         "filters": {"payment_method": ["CASH"]}, "time_grain": "week",
+         "date_range": {"last_days": 90}, "order_by": "-revenue", "limit": 10}
+
+    plan() traduce la configuración a las tablas (cubos) que tienen cada medida;
+    execute() agrupa los widgets que comparten dimensiones, filtros y rango y
+    resuelve cada grupo con un único values().annotate() con la unión de sus
+    medidas. fetch() agrega la caché por widget con refresh_interval como TTL.
+    """
+
+    def plan(self, data_source, config):
+        """Valida query_config y lo normaliza; lanza ValueError si no es válido"""
+        cubes = SOURCES.get(data_source)
+        if cubes is None:
+            raise ValueError(f"Fuente de datos no soportada: {data_source}")
+        config = config or {}
+
+        measures = _as_list(config.get('measures') or [])
+        if not measures:
+            raise ValueError("query_config.measures es obligatorio")
+        dimensions = _as_list(config.get('dimensions') or [])
+        filters = {
+            name: tuple(sorted(_as_list(value), key=str))
+            for name, value in (config.get('filters') or {}).items()
+        }
+
+        time_grain = config.get('time_grain', 'day')
+        if time_grain not in TIME_GRAINS:
+            raise ValueError(f"time_grain inválido. Opciones: {TIME_GRAINS}")
+
+        # Medidas base por cubo (las derivadas agregan sus dependencias)
+        by_cube = {}
+        for measure in measures:
+            required = DERIVED_MEASURES[measure][:2] if measure in DERIVED_MEASURES else [measure]
+            for name in required:
+                cube = next((cube for cube in cubes if name in cube.measures), None)
+                if cube is None:
+                    available = [name for cube in cubes for name in cube.measures] + list(DERIVED_MEASURES)
+                    raise ValueError(f"Medida no disponible en {data_source}: {name}. Opciones: {available}")
+                by_cube.setdefault(cube.name, set()).add(name)
+
+        temporal = all(cube.date_field for cube in cubes if cube.name in by_cube)
+        for cube in cubes:
+            if cube.name not in by_cube:
+                continue
+            for name in dimensions:
+                if name in ('date', 'weekday') and cube.date_field:
+                    continue
+                if name not in cube.dimensions:
+                    raise ValueError(f"La dimensión {name} no aplica a {', '.join(sorted(by_cube[cube.name]))}")
+            for name in filters:
+                if name not in cube.filters:
+                    raise ValueError(f"El filtro {name} no aplica a {', '.join(sorted(by_cube[cube.name]))}")
+
+        date_range = None
+        if temporal:
+            date_range = self.date_range(config.get('date_range') or {})
+
+        order_by = config.get('order_by')
+        if order_by and order_by.lstrip('-') not in measures + dimensions:
+            raise ValueError("order_by debe ser una de las medidas o dimensiones del widget")
+        limit = config.get('limit')
+        if limit is not None and (not isinstance(limit, int) or limit <= 0):
+            raise ValueError("limit debe ser un entero positivo")
+
+        return {
+            'source': data_source,
+            'measures': measures,
+            'dimensions': dimensions,
+            'filters': filters,
+            'time_grain': time_grain,
+            'date_range': date_range,
+            'cubes': {name: tuple(sorted(names)) for name, names in by_cube.items()},
+            'order_by': order_by,
+            'limit': limit,
+        }
+
+    def date_range(self, config):
+        today = timezone.localdate()
+        if 'from' in config:
+            start = _parse_date(config['from'], 'from')
+            end = _parse_date(config['to'], 'to') if config.get('to') else today
+        else:
+            last_days = int(config.get('last_days', DEFAULT_LAST_DAYS))
+            start, end = today - timedelta(days=last_days - 1), today
+        if start > end:
+            raise ValueError("date_range.from es posterior a date_range.to")
+        return start, end
+
+    def run_group(self, cube, dimensions, filters, time_grain, date_range, measures):
+        """Una consulta GROUP BY sobre el cubo; retorna {valores de dimensiones: {medida: valor}}"""
+        queryset = cube.queryset()
+        if date_range:
+            queryset = queryset.filter(**{
+                f'{cube.date_field}__gte': date_range[0], f'{cube.date_field}__lte': date_range[1]
+            })
+        for name, values in filters:
+            queryset = queryset.filter(**{f'{cube.filters[name]}__in': values})
+
+        # Alias con prefijo: evitan chocar con columnas del modelo (units, category...)
+        annotations = {}
+        for name in dimensions:
+            if name == 'date':
+                annotations['dim_date'] = (
+                    F(cube.date_field) if time_grain == 'day'
+                    else Trunc(cube.date_field, time_grain, output_field=DateField())
+                )
+            elif name == 'weekday':
+                annotations['dim_weekday'] = ExtractIsoWeekDay(cube.date_field)
+            else:
+                annotations[f'dim_{name}'] = F(cube.dimensions[name])
+
+        aggregates = {f'm_{name}': cube.measures[name] for name in measures}
+        with span(f'widgets.query.{cube.name}'):
+            if dimensions:
+                rows = queryset.annotate(**annotations).values(*annotations).annotate(**aggregates)
+            else:
+                rows = [queryset.aggregate(**aggregates)]
+
+        return {
+            tuple(row[f'dim_{name}'] for name in dimensions): {name: row[f'm_{name}'] for name in measures}
+            for row in rows
+        }
+
+    @span('widgets.execute')
+    def execute(self, plans):
+        """Resuelve varios planes compartiendo consultas
+
+        plans: {clave: plan}. Retorna {clave: {'columns', 'rows'}}.
+        """
+        groups = {}
+        for plan in plans.values():
+            for cube_name, measures in plan['cubes'].items():
+                signature = self.signature(plan, cube_name)
+                groups.setdefault(signature, set()).update(measures)
+
+        cubes = {cube.name: cube for cubes in SOURCES.values() for cube in cubes}
+        results = {
+            signature: self.run_group(cubes[signature[1]], *signature[2:], sorted(measures))
+            for signature, measures in groups.items()
+        }
+
+        return {key: self.assemble(plan, results) for key, plan in plans.items()}
+
+    @staticmethod
+    def signature(plan, cube_name):
+        temporal = 'date' in plan['dimensions']
+        return (
+            plan['source'],
+            cube_name,
+            tuple(plan['dimensions']),
+            tuple(sorted(plan['filters'].items())),
+            plan['time_grain'] if temporal else 'day',
+            plan['date_range'],
+        )
+
+    def assemble(self, plan, results):
+        """Une los cubos del plan, calcula derivadas y aplica orden y límite"""
+        rows = {}
+        for cube_name, measures in plan['cubes'].items():
+            for key, values in results[self.signature(plan, cube_name)].items():
+                row = rows.setdefault(key, {})
+                row.update({name: values[name] for name in measures})
+
+        output = []
+        for key, values in rows.items():
+            row = dict(zip(plan['dimensions'], key))
+            for measure in plan['measures']:
+                if measure in DERIVED_MEASURES:
+                    numerator, denominator, scale = DERIVED_MEASURES[measure]
+                    den = values.get(denominator) or 0
+                    row[measure] = Decimal(str(values.get(numerator) or 0)) / Decimal(str(den)) * scale if den else 0
+                else:
+                    row[measure] = values.get(measure) or 0
+            output.append({name: _json_value(value) for name, value in row.items()})
+
+        order_by = plan['order_by']
+        if order_by is None and 'date' in plan['dimensions']:
+            order_by = 'date'
+        elif order_by is None and plan['dimensions']:
+            order_by = f"-{plan['measures'][0]}"
+        if order_by:
+            field = order_by.lstrip('-')
+            output.sort(key=lambda row: (row[field] is None, row[field]), reverse=order_by.startswith('-'))
+        if plan['limit']:
+            output = output[:plan['limit']]
+
+        return {'columns': plan['dimensions'] + plan['measures'], 'rows': output}
+
+    @staticmethod
+    def cache_key(widget):
+        return f'{CACHE_PREFIX}:{widget.pk}:{widget.updated_at.timestamp():.0f}'
+
+    def fetch(self, widgets, use_cache=True):
+        """Datos de varios widgets: caché por widget y una consulta por grupo compartido
+
+        Retorna {widget_id: datos}; los widgets con query_config inválido
+        retornan {'error': mensaje} (no se guardan en caché).
+        """
+        widgets = {widget.pk: widget for widget in widgets}
+        keys = {widget_id: self.cache_key(widget) for widget_id, widget in widgets.items()}
+        cached = cache.get_many(keys.values()) if use_cache else {}
+
+        data, plans = {}, {}
+        for widget in widgets.values():
+            if keys[widget.pk] in cached:
+                data[widget.pk] = {**cached[keys[widget.pk]], 'cached': True}
+                continue
+            try:
+                plans[widget.pk] = self.plan(widget.data_source, widget.query_config)
+            except ValueError as e:
+                data[widget.pk] = {'widget': widget.pk, 'error': str(e)}
+
+        if plans:
+            generated_at = timezone.now().isoformat()
+            by_timeout = {}
+            for widget_id, result in self.execute(plans).items():
+                widget = widgets[widget_id]
+                payload = {'widget': widget_id, **result, 'generated_at': generated_at}
+                data[widget_id] = {**payload, 'cached': False}
+                if widget.refresh_interval > 0:
+                    by_timeout.setdefault(widget.refresh_interval, {})[keys[widget_id]] = payload
+            for timeout, entries in by_timeout.items():
+                cache.set_many(entries, timeout=timeout)
+
+        logger.info(
+            "Widgets resueltos",
+            extra={'widgets': len(widgets), 'cached': len(cached), 'computed': len(plans)}
+        )
+        return data
@@ -0,0 +1,135 @@
+# Archivo: minimarket_ml_system/backend/apps/benchmarks/management/commands/compare_benchmarks.py
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.benchmarks.suite import load_history, compare_runs
+
+class Command(BaseCommand):
+    help = 'Compara dos corridas de benchmarks y marca las regresiones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--baseline',
+            help='run_id de referencia (default: corrida anterior de la misma escala)'
+        )
+        parser.add_argument(
+            '--current',
+            help='run_id a evaluar (default: última corrida)'
+        )
+        parser.add_argument(
+            '--time-threshold',
+            type=float,
+            default=0.20,
+            help='Aumento relativo de tiempo considerado regresión (default: 0.20)'
+        )
+        parser.add_argument(
+            '--memory-threshold',
+            type=float,
+            default=0.20,
+            help='Aumento relativo de memoria pico considerado regresión (default: 0.20)'
+        )
+        parser.add_argument(
+            '--query-threshold',
+            type=int,
+            default=0,
+            help='Consultas SQL adicionales toleradas (default: 0)'
+        )
+        parser.add_argument(
+            '--min-time',
+            type=float,
+            default=0.005,
+            help='Diferencia mínima en segundos para considerar un cambio de tiempo (default: 0.005)'
+        )
+        parser.add_argument(
+            '--history',
+            help='Archivo JSON de historial (default: data/benchmarks/history.json)'
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Terminar con error si hay regresiones (para CI)'
+        )
+
+    def handle(self, *args, **options):
+        history = load_history(options['history'])
+        if len(history) < 2:
+            raise CommandError('Se necesitan al menos dos corridas en el historial')
+
+        runs = {run['run_id']: run for run in history}
+
+        if options['current']:
+            current = runs.get(options['current'])
+            if current is None:
+                raise CommandError(f'No existe la corrida {options["current"]}')
+        else:
+            current = history[-1]
+
+        if options['baseline']:
+            baseline = runs.get(options['baseline'])
+            if baseline is None:
+                raise CommandError(f'No existe la corrida {options["baseline"]}')
+        else:
+            previous = [
+                run for run in history
+                if run['scale'] == current['scale'] and run['timestamp'] < current['timestamp']
+            ]
+            if not previous:
+                raise CommandError(f'No hay corridas previas con escala {current["scale"]}')
+            baseline = previous[-1]
+
+        if baseline['scale'] != current['scale']:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Las corridas usan escalas distintas ({baseline["scale"]} vs {current["scale"]})'
+                )
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'=== COMPARACIÓN {baseline["run_id"]} ({baseline.get("git_commit")}) -> '
+                f'{current["run_id"]} ({current.get("git_commit")}) ==='
+            )
+        )
+
+        rows = compare_runs(
+            baseline, current,
+            time_threshold=options['time_threshold'],
+            memory_threshold=options['memory_threshold'],
+            query_threshold=options['query_threshold'],
+            min_time=options['min_time']
+        )
+
+        self.stdout.write(
+            f"{'Caso':<45} {'Base (s)':>10} {'Actual (s)':>11} {'Δ tiempo':>9} "
+            f"{'Δ consultas':>12} {'Δ memoria':>10}  Estado"
+        )
+        self.stdout.write('-' * 115)
+
+        regressions = 0
+        for row in rows:
+            current_time = row['current']['wall_time']
+            if row['baseline'] is None:
+                self.stdout.write(f"{row['name']:<45} {'-':>10} {current_time:>11.4f} {'':>9} {'':>12} {'':>10}  NUEVO")
+                continue
+
+            memory_text = f"{row['memory_delta']:+.0%}" if row['memory_delta'] is not None else '-'
+            time_text = f"{row['time_delta']:+.0%}" if row['time_delta'] is not None else '-'
+            line = (
+                f"{row['name']:<45} {row['baseline']['wall_time']:>10.4f} {current_time:>11.4f} "
+                f"{time_text:>9} {row['query_delta']:>+12d} {memory_text:>10}  {row['status']}"
+            )
+
+            if row['status'] == 'REGRESIÓN':
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"{line} ({', '.join(row['reasons'])})"))
+            elif row['status'] == 'MEJORA':
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            message = f'\n{regressions} caso(s) con regresión'
+            if options['fail_on_regression']:
+                raise CommandError(message.strip())
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('\nSin regresiones'))
@@ -0,0 +1,90 @@
+# Archivo: minimarket_ml_system/backend/apps/benchmarks/management/commands/run_benchmarks.py
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db import connection
+from apps.benchmarks.suite import BenchmarkSuite, SCALES, GROUPS, append_history
+import os
+
+class Command(BaseCommand):
+    help = 'Ejecuta los benchmarks de datos, ML y API sobre un dataset sintético fijo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=list(SCALES.keys()),
+            default='small',
+            help='Tamaño del dataset sintético (default: small)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Repeticiones por caso, se reporta la mediana (default: 3)'
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=GROUPS,
+            help='Grupos a ejecutar (default: todos)'
+        )
+        parser.add_argument(
+            '--no-memory',
+            action='store_true',
+            help='No medir memoria pico (evita la corrida extra con tracemalloc)'
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Conservar la base de benchmark y su dataset entre ejecuciones'
+        )
+        parser.add_argument(
+            '--label',
+            default='',
+            help='Etiqueta descriptiva de la corrida'
+        )
+        parser.add_argument(
+            '--history',
+            help='Archivo JSON de historial (default: data/benchmarks/history.json)'
+        )
+        parser.add_argument(
+            '--verbose-output',
+            action='store_true',
+            help='Mostrar la salida de las rutas medidas'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS(f'=== BENCHMARKS ({options["scale"]}) ===')
+        )
+
+        # Base de datos aislada: nunca se mide sobre los datos reales
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                settings.BENCHMARKS_PATH, f'benchmark_{options["scale"]}.sqlite3'
+            )
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=options['keepdb']
+        )
+
+        try:
+            suite = BenchmarkSuite(
+                scale=options['scale'],
+                repeat=options['repeat'],
+                measure_memory=not options['no_memory'],
+                groups=options['only'],
+                verbose=options['verbose_output'],
+                stdout=self.stdout
+            )
+            run = suite.run()
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+
+        run['label'] = options['label']
+        path = append_history(run, options['history'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\n¡Benchmarks completados! Corrida {run["run_id"]} guardada en {path}')
+        )
@@ -0,0 +1,403 @@
+# Archivo: minimarket_ml_system/backend/apps/benchmarks/suite.py
+
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+# Datasets sintéticos fijos (misma semilla en cada ejecución)
+SCALES = {
+    'small': {'products': 100, 'customers': 300, 'days': 120, 'tickets_per_day': 150},
+    'medium': {'products': 500, 'customers': 2000, 'days': 365, 'tickets_per_day': 600},
+    'large': {'products': 2000, 'customers': 10000, 'days': 730, 'tickets_per_day': 2000},
+}
+
+DATASET_SEED = 2024
+
+DATA_STAGES = [
+    'create_time_series_features',
+    'create_lag_features',
+    'create_product_features',
+    'create_seasonal_features',
+    'encode_categorical_features',
+    'clean_data',
+]
+
+GROUPS = ['data', 'ml', 'api']
+
+
+def history_path():
+    return os.path.join(settings.BENCHMARKS_PATH, 'history.json')
+
+
+def load_history(path=None):
+    """Carga el historial de ejecuciones (lista de corridas)"""
+    path = path or history_path()
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def append_history(run, path=None):
+    """Agrega una corrida al historial"""
+    path = path or history_path()
+    history = load_history(path)
+    history.append(run)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def git_commit():
+    """Commit actual del repositorio (si está disponible)"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def environment_info():
+    import django
+    import numpy
+    import pandas
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'django': django.get_version(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'sklearn': sklearn.__version__,
+        'database': connection.vendor,
+    }
+
+
+def compare_runs(baseline, current, time_threshold=0.2, memory_threshold=0.2,
+                 query_threshold=0, min_time=0.005):
+    """Compara dos corridas y marca regresiones por caso
+
+    Retorna una lista de filas con los deltas y el estado de cada caso.
+    """
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            rows.append({'name': name, 'status': 'NUEVO', 'current': result, 'baseline': None})
+            continue
+
+        time_delta = _relative(result['wall_time'], base['wall_time'])
+        memory_delta = _relative(result.get('peak_memory_mb'), base.get('peak_memory_mb'))
+        query_delta = result['queries'] - base['queries']
+        time_diff = result['wall_time'] - base['wall_time']
+
+        reasons = []
+        if time_delta is not None and time_delta > time_threshold and time_diff > min_time:
+            reasons.append(f'tiempo {time_delta:+.0%}')
+        if memory_delta is not None and memory_delta > memory_threshold:
+            reasons.append(f'memoria {memory_delta:+.0%}')
+        if query_delta > query_threshold:
+            reasons.append(f'consultas {query_delta:+d}')
+
+        if reasons:
+            status = 'REGRESIÓN'
+        elif time_delta is not None and time_delta < -time_threshold and -time_diff > min_time:
+            status = 'MEJORA'
+        else:
+            status = 'OK'
+
+        rows.append({
+            'name': name,
+            'status': status,
+            'reasons': reasons,
+            'time_delta': time_delta,
+            'memory_delta': memory_delta,
+            'query_delta': query_delta,
+            'current': result,
+            'baseline': base,
+        })
+
+    return rows
+
+
+def _relative(current, baseline):
+    if current is None or not baseline:
+        return None
+    return (current - baseline) / baseline
+
+
+class BenchmarkSuite:
+    """Mide tiempo, consultas SQL y memoria pico de las rutas críticas
+
+    Se ejecuta sobre una base de datos de prueba con un dataset sintético
+    fijo por escala (ver SCALES), nunca sobre la base de datos real.
+    """
+
+    def __init__(self, scale='small', repeat=3, measure_memory=True, groups=None,
+                 verbose=False, stdout=None):
+        if scale not in SCALES:
+            raise ValueError(f"Escala no soportada: {scale}")
+
+        self.scale = scale
+        self.repeat = max(1, repeat)
+        self.measure_memory = measure_memory
+        self.groups = groups or GROUPS
+        self.verbose = verbose
+        self.stdout = stdout
+        self.results = {}
+        self.trainer = None
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def _call(self, func):
+        """Ejecuta la función silenciando la salida y los logs de las rutas medidas"""
+        if self.verbose:
+            return func()
+        logging.disable(logging.WARNING)
+        try:
+            with redirect_stdout(io.StringIO()):
+                return func()
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def measure(self, name, func, rollback=False):
+        """Mide una función: mediana de tiempo, consultas y memoria pico"""
+        def run():
+            if not rollback:
+                return self._call(func)
+            with transaction.atomic():
+                result = self._call(func)
+                transaction.set_rollback(True)
+            return result
+
+        wall_times = []
+        queries = 0
+        result = None
+
+        for i in range(self.repeat):
+            gc.collect()
+            if i == 0:
+                with CaptureQueriesContext(connection) as context:
+                    start = time.perf_counter()
+                    result = run()
+                    wall_times.append(time.perf_counter() - start)
+                queries = len(context.captured_queries)
+            else:
+                start = time.perf_counter()
+                result = run()
+                wall_times.append(time.perf_counter() - start)
+
+        peak_memory = None
+        if self.measure_memory:
+            # Corrida aparte para que tracemalloc no afecte los tiempos
+            gc.collect()
+            tracemalloc.start()
+            try:
+                result = run()
+                peak_memory = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 3)
+            finally:
+                tracemalloc.stop()
+
+        self.results[name] = {
+            'wall_time': round(statistics.median(wall_times), 6),
+            'wall_times': [round(t, 6) for t in wall_times],
+            'queries': queries,
+            'peak_memory_mb': peak_memory,
+        }
+
+        memory_text = f', {peak_memory:.1f} MB' if peak_memory is not None else ''
+        self.log(
+            f'  {name:<45} {self.results[name]["wall_time"]:>9.4f}s '
+            f'{queries:>6} consultas{memory_text}'
+        )
+        return result
+
+    # ------------------------------------------------------------------ datos
+
+    def seed_dataset(self):
+        """Genera el dataset fijo de la escala si la base de prueba está vacía"""
+        from django.core.management import call_command
+        from apps.sales.models import Sale
+
+        if Sale.objects.exists():
+            self.log('✓ Dataset de benchmark existente reutilizado')
+            return
+
+        params = SCALES[self.scale]
+        self.log(f'Generando dataset "{self.scale}" (semilla {DATASET_SEED})...')
+        self._call(lambda: call_command(
+            'generate_bulk_data',
+            products=params['products'],
+            customers=params['customers'],
+            days=params['days'],
+            tickets_per_day=params['tickets_per_day'],
+            seed=DATASET_SEED,
+            stdout=io.StringIO()
+        ))
+
+    def dataset_info(self):
+        from apps.products.models import Product
+        from apps.sales.models import Customer, Sale, SaleItem
+        return {
+            'products': Product.objects.count(),
+            'customers': Customer.objects.count(),
+            'sales': Sale.objects.count(),
+            'sale_items': SaleItem.objects.count(),
+            'days': SCALES[self.scale]['days'],
+        }
+
+    # ------------------------------------------------------------- benchmarks
+
+    def run_data(self):
+        """DataProcessor.process_complete_dataset etapa por etapa y completo"""
+        from apps.ml_models.data_processor import DataProcessor
+
+        days = SCALES[self.scale]['days']
+        processor = DataProcessor()
+
+        df = self.measure(
+            'data.extract_sales_data', lambda: processor.extract_sales_data(days)
+        )
+        for stage in DATA_STAGES:
+            stage_input = df
+            df = self.measure(
+                f'data.{stage}',
+                lambda: getattr(processor, stage)(stage_input.copy())
+            )
+
+        self.measure(
+            'data.process_complete_dataset',
+            lambda: DataProcessor().process_complete_dataset(days_back=days)
+        )
+        return df
+
+    def run_ml(self, df=None):
+        """Entrenamiento de todos los modelos y recomendaciones en lote"""
+        from apps.ml_models.data_processor import DataProcessor
+        from apps.ml_models.trainer import MLTrainer
+
+        processor = DataProcessor()
+        if df is None:
+            df = self._call(
+                lambda: processor.process_complete_dataset(days_back=SCALES[self.scale]['days'])
+            )
+        X, y = self._call(lambda: processor.prepare_features_target(df))
+
+        def train():
+            trainer = MLTrainer(processor)
+            trainer.train_all_models(X, y)
+            return trainer
+
+        self.trainer = self.measure('ml.train_all_models', train)
+        self.measure('ml.batch_reorder_recommendations', self.batch_recommendations)
+
+    def build_predictor(self):
+        """Predictor con el modelo entrenado en memoria (sin leer data/models)"""
+        from apps.ml_models.predictor import DemandPredictor
+
+        predictor = DemandPredictor()
+        if self.trainer is not None:
+            predictor.model = self.trainer.best_model
+            predictor.model_name = self.trainer.best_model_name
+            predictor.feature_names = self.trainer.feature_names
+        return predictor
+
+    def batch_recommendations(self):
+        return self.build_predictor().batch_reorder_recommendations()
+
+    def run_api(self):
+        """Endpoints REST más usados"""
+        from rest_framework.test import APIClient
+        from apps.products.models import Category, Product
+        from apps.sales.models import Customer
+
+        client = APIClient()
+        products = list(Product.objects.filter(is_active=True).order_by('id')[:3])
+        customer = Customer.objects.order_by('id').first()
+        category = Category.objects.order_by('id').first()
+
+        sale_payload = {
+            'customer': customer.id if customer else None,
+            'payment_method': 'CASH',
+            'discount_percentage': '0',
+            'items': [
+                {'product': p.id, 'quantity': 1, 'unit_price': str(p.sale_price)}
+                for p in products
+            ],
+        }
+
+        def request(method, url, data=None):
+            response = getattr(client, method)(url, data, format='json')
+            if response.status_code >= 400:
+                raise RuntimeError(f'{url} respondió {response.status_code}')
+            return response
+
+        self.measure(
+            'api.sales_create',
+            lambda: request('post', '/api/sales/sales/', sale_payload),
+            rollback=True
+        )
+        self.measure(
+            'api.products_list_filtered',
+            lambda: request(
+                'get',
+                f'/api/products/products/?category={category.id if category else ""}'
+                f'&is_active=true&search=Producto&needs_reorder=true'
+            )
+        )
+        self.measure(
+            'api.products_dashboard_stats',
+            lambda: request('get', '/api/products/products/dashboard_stats/')
+        )
+        self.measure(
+            'api.sales_dashboard_stats',
+            lambda: request('get', '/api/sales/sales/dashboard_stats/')
+        )
+        self.measure(
+            'api.analytics_dashboard_overview',
+            lambda: request('get', '/api/analytics/dashboard_overview/')
+        )
+
+    def run(self):
+        """Ejecuta los grupos seleccionados y arma el registro para el historial"""
+        started = datetime.now()
+        self.seed_dataset()
+
+        df = None
+        if 'data' in self.groups:
+            self.log('\n[data] DataProcessor')
+            df = self.run_data()
+        if 'ml' in self.groups:
+            self.log('\n[ml] Entrenamiento y predicción')
+            self.run_ml(df)
+        if 'api' in self.groups:
+            self.log('\n[api] Endpoints REST')
+            self.run_api()
+
+        return {
+            'run_id': started.strftime('%Y%m%d_%H%M%S'),
+            'timestamp': started.isoformat(timespec='seconds'),
+            'scale': self.scale,
+            'repeat': self.repeat,
+            'git_commit': git_commit(),
+            'environment': environment_info(),
+            'dataset': self.dataset_info(),
+            'results': self.results,
+        }
@@ -0,0 +1,248 @@
+# Archivo: minimarket_ml_system/backend/apps/common/fieldsets.py
+
+"""Campos parciales (?fields=, ?expand=) para los ViewSets
+
+Con ?fields=id,code,name la respuesta solo trae esos campos y la consulta solo
+lee las columnas que necesitan (only/select_related/prefetch_related). Los
+campos anidados pesados (Meta.expandable_fields del serializer, p. ej. items
+de una venta) se agregan con ?expand=items. Sin ?fields= la respuesta no
+cambia, pero las FK y relaciones que usa el serializer se cargan en bloque.
+Las propiedades del modelo declaran en Meta.field_dependencies las columnas
+que leen; si un campo no se puede resolver se cargan todas las columnas.
+
+Si en un listado todos los campos pedidos son columnas (del modelo o de una
+FK, p. ej. category.name), se arma con values() sin instanciar modelos ni
+recorrer los campos de DRF fila por fila: solo las columnas Decimal y de
+fecha pasan por to_representation para mantener el mismo formato.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Columnas cuyo valor de values() se formatea con el campo del serializer
+CONVERTED_FIELDS = (
+    models.DecimalField, models.DateTimeField, models.DateField,
+    models.TimeField, models.DurationField, models.UUIDField,
+)
+
+SPARSE_ACTIONS = ('list', 'retrieve')
+
+
+def parse_list(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class QueryPlan:
+    """Columnas y relaciones que necesita un conjunto de campos del serializer"""
+
+    def __init__(self, model):
+        self.model = model
+        self.only = {model._meta.pk.name}
+        self.related = {}       # fk -> columnas del modelo relacionado (None: todas)
+        self.prefetch = {}      # relación -> lookup o Prefetch con su propio plan
+        self.values = {}        # nombre del campo -> (lookup de values(), fk a validar)
+        self.restrict = True    # False: algún campo necesita el objeto completo
+        self.flat = True        # False: algún campo no sale de values()
+
+    def add_dependency(self, name):
+        """Dependencia declarada en Meta.field_dependencies (columna, fk o relación inversa)"""
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            self.restrict = False
+            return
+        if field.is_relation and (field.one_to_many or field.many_to_many):
+            self.prefetch.setdefault(name, name)
+        elif field.is_relation:
+            self.only.add(name)
+            self.related[name] = None
+        elif field.concrete:
+            self.only.add(name)
+
+    def add(self, name, field, dependencies):
+        """Agrega un campo del serializer al plan"""
+        if isinstance(field, serializers.BaseSerializer) or field.source == '*':
+            self.flat = False
+            if field.source == '*':
+                self.restrict = False
+            else:
+                self.add_nested(field)
+            return
+
+        if name in dependencies or isinstance(field, serializers.SerializerMethodField):
+            self.flat = False
+            if name not in dependencies:
+                self.restrict = False
+            for dependency in dependencies.get(name, ()):
+                self.add_dependency(dependency)
+            return
+
+        attrs = field.source_attrs
+        first = attrs[0]
+        try:
+            model_field = self.model._meta.get_field(first)
+        except FieldDoesNotExist:
+            # Propiedad o método: get_<campo>_display depende de <campo>
+            self.flat = False
+            if first.startswith('get_') and first.endswith('_display'):
+                self.add_dependency(first[4:-8])
+            else:
+                self.restrict = False
+            return
+
+        if not model_field.concrete:
+            self.flat = False
+            self.add_dependency(first)
+            return
+
+        self.only.add(first)
+        if len(attrs) == 1:
+            self.values[name] = (first, None, model_field)
+            return
+
+        # Campo a través de una FK (p. ej. category.name)
+        related_model = model_field.related_model
+        if len(attrs) > 2 or related_model is None:
+            self.flat = False
+            self.related[first] = None
+            return
+        try:
+            target = related_model._meta.get_field(attrs[1])
+            concrete = target.concrete and not target.is_relation
+        except FieldDoesNotExist:
+            target, concrete = None, False
+
+        if not concrete:
+            self.flat = False
+            self.related[first] = None
+            return
+        columns = self.related.setdefault(first, set())
+        if columns is not None:
+            columns.add(attrs[1])
+        self.values[name] = (f'{first}__{attrs[1]}', first, target)
+
+    def add_nested(self, field):
+        """Serializer anidado: la relación se precarga con las FK que usa el hijo"""
+        name = field.source_attrs[0]
+        self.add_dependency(name)
+        if name not in self.prefetch:
+            return
+        child = field.child if isinstance(field, serializers.ListSerializer) else field
+        related_model = self.model._meta.get_field(name).related_model
+        plan = QueryPlan(related_model)
+        dependencies = getattr(getattr(child, 'Meta', None), 'field_dependencies', {})
+        for child_name, child_field in child.fields.items():
+            plan.add(child_name, child_field, dependencies)
+        plan.restrict = False
+        self.prefetch[name] = Prefetch(name, queryset=plan.apply(related_model._default_manager.all()))
+
+    def apply(self, queryset):
+        if self.related:
+            queryset = queryset.select_related(*self.related)
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*self.prefetch.values())
+        if self.restrict:
+            columns = set(self.only)
+            for fk, related_columns in self.related.items():
+                if related_columns is not None:
+                    columns.update(f'{fk}__{column}' for column in related_columns)
+            queryset = queryset.only(*columns)
+        return queryset
+
+
+class SparseFieldsetMixin:
+    """Mixin de ViewSet: ?fields= y ?expand= en list/retrieve (ver docstring del módulo)"""
+
+    def sparse_serializer_class(self):
+        serializer_class = self.get_serializer_class()
+        meta = getattr(serializer_class, 'Meta', None)
+        return serializer_class, getattr(meta, 'expandable_fields', ()), getattr(meta, 'field_dependencies', {})
+
+    def requested_fields(self):
+        """Nombres de campo pedidos (None: todos)"""
+        if getattr(self, 'action', None) not in SPARSE_ACTIONS:
+            return None
+        if hasattr(self, '_requested_fields'):
+            return self._requested_fields
+
+        requested = parse_list(self.request.query_params.get('fields'))
+        selected = None
+        if requested:
+            serializer_class, expandable, _ = self.sparse_serializer_class()
+            available = serializer_class(context=self.get_serializer_context()).fields
+            expand = [name for name in parse_list(self.request.query_params.get('expand')) if name in expandable]
+            requested = [name for name in requested if name not in expandable]
+            selected = [name for name in dict.fromkeys(requested + expand) if name in available]
+            selected = selected or None
+        self._requested_fields = selected
+        return selected
+
+    def query_plan(self, fields):
+        serializer_class, _, dependencies = self.sparse_serializer_class()
+        serializer_fields = serializer_class(context=self.get_serializer_context()).fields
+        plan = QueryPlan(serializer_class.Meta.model)
+        for name in fields or serializer_fields:
+            plan.add(name, serializer_fields[name], dependencies)
+        return plan, serializer_fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.requested_fields()
+        if fields is not None:
+            target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, 'action', None) not in SPARSE_ACTIONS:
+            return queryset
+
+        # Sin ?fields= solo se agregan select_related/prefetch_related (sin only)
+        fields = self.requested_fields()
+        plan, _ = self.query_plan(fields)
+        if fields is None:
+            plan.restrict = False
+        return plan.apply(queryset)
+
+    def list(self, request, *args, **kwargs):
+        fields = self.requested_fields()
+        if fields is None:
+            return super().list(request, *args, **kwargs)
+
+        plan, serializer_fields = self.query_plan(fields)
+        if not plan.flat:
+            return super().list(request, *args, **kwargs)
+
+        # Camino rápido: dicts de values() sin pasar por el serializer
+        lookups = {lookup for lookup, _, _ in plan.values.values()}
+        lookups.update(fk for _, fk, _ in plan.values.values() if fk)
+        queryset = super().filter_queryset(self.get_queryset()).values(*lookups)
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+
+        columns = []
+        for name in fields:
+            lookup, fk, model_field = plan.values[name]
+            convert = serializer_fields[name].to_representation if isinstance(model_field, CONVERTED_FIELDS) else None
+            columns.append((name, lookup, fk, convert))
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, lookup, fk, convert in columns:
+                # Igual que DRF: un campo a través de una FK nula se omite
+                if fk is not None and row[fk] is None:
+                    continue
+                value = row[lookup]
+                item[name] = convert(value) if convert is not None and value is not None else value
+            data.append(item)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,140 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from apps.products.models import Category, Supplier, Product
+from apps.sales.models import Sale, SaleItem
+from .renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """La salida de orjson debe ser idéntica byte a byte a la del renderer de DRF"""
+
+    def assert_same_output(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_same_bytes_as_drf(self):
+        self.assert_same_output({
+            'id': 1,
+            'name': 'Leche Gloria 1L – ñandú',
+            'price': Decimal('4.20'),
+            'ratio': 0.1 + 0.2,
+            'active': True,
+            'supplier': None,
+            'date': datetime.date(2024, 6, 30),
+            'time': datetime.time(13, 45, 10, 123456),
+            'created_at': datetime.datetime(2024, 6, 30, 13, 45, 10, 123456, tzinfo=datetime.timezone.utc),
+            'local': timezone.localtime(datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy('Activo'),
+            'forecast': np.array([1.5, 2.0]),
+            'units': np.int64(7),
+            'items': [{'quantity': 2, 'total': Decimal('8.40')}, ()],
+            10: 'clave numérica',
+        })
+
+    def test_list_payload(self):
+        self.assert_same_output([
+            {'id': i, 'code': f'P{i}', 'sale_price': Decimal(i) / 4, 'stock': None} for i in range(50)
+        ])
+
+    def test_non_finite_values_raise_like_drf(self):
+        for data in ({'value': float('nan')}, [1, [float('inf')]], {'value': np.float32('nan')},
+                     {'values': np.array([1.0, -np.inf])}):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(data)
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render(data)
+
+    def test_none_and_indent_use_drf(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        self.assertEqual(
+            FastJSONRenderer().render({'a': 1}, 'application/json; indent=2'),
+            JSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        )
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= y ?expand=: subconjunto exacto de la respuesta completa con consultas fijas"""
+
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(name='Lácteos')
+        supplier = Supplier.objects.create(name='Gloria S.A.', ruc='20100190797')
+        self.products = [
+            Product.objects.create(
+                code=f'P{i}', name=f'Producto {i}', category=category, supplier=supplier if i % 2 else None,
+                cost_price=Decimal('2.10') + i, sale_price=Decimal('3.25') + i, weight=Decimal('0.500'),
+                current_stock=i
+            )
+            for i in range(5)
+        ]
+
+    def create_sales(self, count):
+        start = Sale.objects.count()
+        for n in range(start, start + count):
+            sale = Sale.objects.create(sale_number=f'V{n:06d}', payment_method='CASH')
+            for product in self.products[:1 + n % 3]:
+                SaleItem.objects.create(sale=sale, product=product, quantity=2, unit_price=product.sale_price)
+            sale.calculate_totals()
+            sale.save()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return json.loads(response.content)
+
+    def assert_subset_of_full(self, url, fields):
+        full = self.get(url)['results']
+        partial = self.get(f'{url}?fields={",".join(fields)}')['results']
+        self.assertEqual(partial, [
+            {name: item[name] for name in fields if name in item} for item in full
+        ])
+        return partial
+
+    def test_fields_returns_subset_of_full_response(self):
+        partial = self.assert_subset_of_full(
+            '/api/products/products/', ['id', 'code', 'profit_margin', 'stock_status', 'category_name']
+        )
+        self.assertEqual(set(partial[0]), {'id', 'code', 'profit_margin', 'stock_status', 'category_name'})
+
+    def test_values_fast_path_formats_like_serializer(self):
+        # Solo columnas y FK: se arma con values() (decimales, fechas y FK nula como el serializer)
+        fields = ['id', 'sale_price', 'weight', 'created_at', 'category_name', 'supplier_name']
+        with self.assertNumQueries(2):
+            self.client.get(f'/api/products/products/?fields={",".join(fields)}')
+
+        partial = self.assert_subset_of_full('/api/products/products/', fields)
+        first = next(item for item in partial if item['id'] == self.products[0].pk)
+        self.assertEqual((first['sale_price'], first['weight']), ('3.25', '0.500'))
+        self.assertNotIn('supplier_name', first)
+
+    def test_expand_items(self):
+        self.create_sales(3)
+        full = self.get('/api/sales/sales/')['results']
+
+        partial = self.get('/api/sales/sales/?fields=id,total,items_count')['results']
+        self.assertNotIn('items', partial[0])
+
+        expanded = self.get('/api/sales/sales/?fields=id,total,items_count&expand=items')['results']
+        self.assertEqual(expanded, [
+            {name: item[name] for name in ('id', 'total', 'items_count', 'items')} for item in full
+        ])
+        self.assertTrue(all(item['items'] for item in expanded))
+
+    def test_sales_page_uses_fixed_number_of_queries(self):
+        # Conteo, ventas con cliente y vendedor, items con su producto
+        self.create_sales(5)
+        with self.assertNumQueries(3):
+            self.client.get('/api/sales/sales/')
+
+        self.create_sales(25)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/sales/sales/')
+        self.assertEqual(len(json.loads(response.content)['results']), 20)
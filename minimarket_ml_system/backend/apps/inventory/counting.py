@@ -0,0 +1,215 @@
+# Archivo: minimarket_ml_system/backend/apps/inventory/counting.py
+
+import csv
+import io
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from apps.analytics.kpis import KPIEngine
+from apps.products.models import Product
+from .models import InventoryCountItem, StockMovement
+
+BATCH_SIZE = 1000
+
+
+class InventoryCountError(Exception):
+    """Operación no válida para el estado actual del conteo"""
+
+
+def parse_count_file(uploaded_file):
+    """Lee un CSV de conteo (columnas product_id, code o barcode + counted_quantity, notes opcional)"""
+    content = uploaded_file.read()
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+
+    sample = content[:2048]
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    return list(csv.DictReader(io.StringIO(content), dialect=dialect))
+
+
+class InventoryCountService:
+    """Ciclo de vida de un conteo de inventario con operaciones por conjunto
+
+    Iniciar toma una foto de las cantidades del sistema con un bulk_create;
+    los conteos se registran en bloque (archivo o lista) con bulk_update; y la
+    conciliación actualiza productos y crea movimientos en una sola transacción.
+    """
+
+    def __init__(self, inventory_count, user=None):
+        self.count = inventory_count
+        self.user = user
+
+    def start(self, product_filter=None):
+        """Crea los items del conteo con el stock actual de los productos activos
+
+        Retorna la cantidad de items creados.
+        """
+        if self.count.status != 'PLANNED':
+            raise InventoryCountError('Solo se pueden iniciar conteos planificados')
+
+        products = Product.objects.filter(is_active=True)
+        if product_filter is not None:
+            products = products.filter(product_filter)
+
+        with transaction.atomic():
+            items = InventoryCountItem.objects.bulk_create(
+                [
+                    InventoryCountItem(
+                        inventory_count_id=self.count.pk,
+                        product_id=product_id,
+                        system_quantity=current_stock
+                    )
+                    for product_id, current_stock in products.values_list('id', 'current_stock').iterator()
+                ],
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True
+            )
+
+            self.count.status = 'IN_PROGRESS'
+            self.count.start_date = timezone.now()
+            self.count.save(update_fields=['status', 'start_date', 'updated_at'])
+
+        return len(items)
+
+    def resolve_products(self, entries):
+        """Mapea cada fila a un product_id usando product_id, code o barcode (tres consultas como máximo)"""
+        codes = {str(e['code']).strip() for e in entries if e.get('code') and not e.get('product_id')}
+        barcodes = {
+            str(e['barcode']).strip() for e in entries
+            if e.get('barcode') and not e.get('product_id') and not e.get('code')
+        }
+
+        by_code, by_barcode = {}, {}
+        if codes or barcodes:
+            lookup = Product.objects.filter(Q(code__in=codes) | Q(barcode__in=barcodes))
+            for product_id, code, barcode in lookup.values_list('id', 'code', 'barcode'):
+                by_code[code] = product_id
+                if barcode:
+                    by_barcode[barcode] = product_id
+
+        resolved = []
+        for entry in entries:
+            if entry.get('product_id'):
+                try:
+                    resolved.append(int(entry['product_id']))
+                except (TypeError, ValueError):
+                    resolved.append(None)
+            elif entry.get('code'):
+                resolved.append(by_code.get(str(entry['code']).strip()))
+            elif entry.get('barcode'):
+                resolved.append(by_barcode.get(str(entry['barcode']).strip()))
+            else:
+                resolved.append(None)
+        return resolved
+
+    def submit(self, entries):
+        """Registra cantidades contadas en bloque
+
+        entries: lista de dicts con product_id/code/barcode, counted_quantity y notes
+        opcional. Si un producto se repite gana la última fila. Retorna un resumen
+        con las filas actualizadas y los errores por fila (número de fila desde 1).
+        """
+        if self.count.status != 'IN_PROGRESS':
+            raise InventoryCountError('El conteo debe estar en progreso')
+
+        errors = []
+        counted = {}
+        for row_number, (entry, product_id) in enumerate(zip(entries, self.resolve_products(entries)), 1):
+            if product_id is None:
+                errors.append({'row': row_number, 'error': 'Producto no encontrado'})
+                continue
+            try:
+                quantity = int(str(entry.get('counted_quantity', '')).strip())
+            except ValueError:
+                errors.append({'row': row_number, 'product_id': product_id, 'error': 'Cantidad inválida'})
+                continue
+            if quantity < 0:
+                errors.append({'row': row_number, 'product_id': product_id, 'error': 'Cantidad negativa'})
+                continue
+            counted[product_id] = (row_number, quantity, (entry.get('notes') or '').strip())
+
+        items = list(
+            self.count.items.filter(product_id__in=counted.keys())
+            .only('id', 'product_id', 'system_quantity', 'notes')
+        )
+        now = timezone.now()
+        for item in items:
+            _, quantity, notes = counted.pop(item.product_id)
+            item.counted_quantity = quantity
+            item.difference = quantity - item.system_quantity
+            item.counted_by = self.user
+            item.counted_at = now
+            if notes:
+                item.notes = notes
+
+        # Los que quedan en counted no forman parte del conteo
+        for product_id, (row_number, _, _) in counted.items():
+            errors.append({'row': row_number, 'product_id': product_id, 'error': 'Producto no incluido en el conteo'})
+
+        with transaction.atomic():
+            InventoryCountItem.objects.bulk_update(
+                items,
+                ['counted_quantity', 'difference', 'counted_by', 'counted_at', 'notes'],
+                batch_size=BATCH_SIZE
+            )
+
+        return {
+            'updated': len(items),
+            'errors': sorted(errors, key=lambda error: error['row']),
+            'pending': self.count.items.filter(counted_quantity__isnull=True).count()
+        }
+
+    def complete(self):
+        """Concilia el stock con lo contado y cierra el conteo
+
+        El stock del producto pasa a ser la cantidad contada; el movimiento registra
+        la diferencia respecto al stock al momento de cerrar, de modo que
+        stock_before/stock_after sean consistentes. Retorna la cantidad de ajustes.
+        """
+        if self.count.status != 'IN_PROGRESS':
+            raise InventoryCountError('El conteo debe estar en progreso')
+
+        with transaction.atomic():
+            rows = list(
+                self.count.items.filter(counted_quantity__isnull=False)
+                .exclude(counted_quantity=F('product__current_stock'))
+                .select_for_update()
+                .values_list('product_id', 'counted_quantity', 'product__current_stock')
+            )
+
+            now = timezone.now()
+            reference = self.count.count_number
+            products = []
+            movements = []
+            for product_id, counted_quantity, stock_before in rows:
+                difference = counted_quantity - stock_before
+                products.append(Product(id=product_id, current_stock=counted_quantity, updated_at=now))
+                movements.append(StockMovement(
+                    product_id=product_id,
+                    movement_type='IN' if difference > 0 else 'OUT',
+                    reason='INVENTORY_ADJUST',
+                    quantity=abs(difference),
+                    stock_before=stock_before,
+                    stock_after=counted_quantity,
+                    notes=f'Ajuste por conteo {reference}',
+                    reference_document=reference,
+                    movement_date=now,
+                    user=self.user
+                ))
+
+            Product.objects.bulk_update(products, ['current_stock', 'updated_at'], batch_size=BATCH_SIZE)
+            StockMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+
+            # bulk_create no emite señales: KPIs de inventario con los deltas del conteo
+            changes = [(movement.product_id, movement.stock_after - movement.stock_before) for movement in movements]
+            transaction.on_commit(lambda: KPIEngine().record_stock_changes(changes))
+
+            self.count.status = 'COMPLETED'
+            self.count.end_date = now
+            self.count.save(update_fields=['status', 'end_date', 'updated_at'])
+
+        return len(rows)
@@ -0,0 +1,90 @@
+# Archivo: minimarket_ml_system/backend/apps/inventory/ledger.py
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from apps.analytics.kpis import KPIEngine
+from apps.products.models import Product
+from .models import StockMovement
+
+
+def _units_by_product(queryset, field):
+    return {
+        product_id: units
+        for product_id, units in queryset.values('product_id').annotate(units=Sum(field)).values_list('product_id', 'units')
+        if units
+    }
+
+
+def _apply_movements(units, movement_type, reason, sign, sale, notes, user):
+    """Mueve el stock de cada producto y registra un movimiento por producto
+
+    Los productos se guardan con save() para que las señales (alertas,
+    búsqueda del punto de venta) vean el cambio. Retorna las unidades movidas.
+    """
+    if not units:
+        return 0
+
+    now = timezone.now()
+    movements = []
+    with transaction.atomic():
+        products = Product.objects.select_for_update().in_bulk(list(units))
+        for product_id, quantity in units.items():
+            product = products.get(product_id)
+            if product is None:
+                continue
+            stock_before = product.current_stock
+            # Una salida no deja el stock negativo: el movimiento registra lo que realmente salió
+            stock_after = stock_before + sign * quantity if sign > 0 else max(stock_before - quantity, 0)
+            if stock_after == stock_before:
+                continue
+            product.current_stock = stock_after
+            product.save(update_fields=['current_stock', 'updated_at'])
+            movements.append(StockMovement(
+                product_id=product_id,
+                movement_type=movement_type,
+                reason=reason,
+                quantity=abs(stock_after - stock_before),
+                stock_before=stock_before,
+                stock_after=stock_after,
+                notes=notes,
+                user=user,
+                reference_document=sale.sale_number,
+                movement_date=now
+            ))
+
+        # bulk_create no emite post_save: el delta de KPIs se aplica aquí
+        StockMovement.objects.bulk_create(movements)
+        changes = [(movement.product_id, movement.stock_after - movement.stock_before) for movement in movements]
+        transaction.on_commit(lambda: KPIEngine().record_stock_changes(changes))
+
+    return sum(movement.quantity for movement in movements)
+
+
+def record_sale_stock(sale, user=None):
+    """Descuenta las unidades vendidas con un movimiento OUT/SALE por producto
+
+    Así StockMovement es el registro completo de entradas y salidas (las
+    fotos diarias de stock se reconstruyen desde él). Retorna las unidades
+    descontadas.
+    """
+    units = _units_by_product(sale.items.all(), 'quantity')
+    return _apply_movements(
+        units, 'OUT', 'SALE', -1, sale, f'Venta {sale.sale_number}', user or sale.seller
+    )
+
+
+def release_sale_stock(sale, user=None):
+    """Devuelve al stock lo que descontaron los movimientos SALE de la venta (IN/RETURN_CUSTOMER)
+
+    Las ventas registradas sin movimiento de salida (anteriores al registro
+    de ventas en StockMovement) no devuelven unidades: su venta nunca las
+    descontó. Retorna las unidades devueltas.
+    """
+    units = _units_by_product(
+        StockMovement.objects.filter(reference_document=sale.sale_number, reason='SALE', movement_type='OUT'),
+        'quantity'
+    )
+    return _apply_movements(
+        units, 'IN', 'RETURN_CUSTOMER', 1, sale, f'Cancelación de venta {sale.sale_number}', user
+    )
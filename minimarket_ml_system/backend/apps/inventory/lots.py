@@ -0,0 +1,227 @@
+# Archivo: minimarket_ml_system/backend/apps/inventory/lots.py
+
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F, Min, Sum, Count
+from django.utils import timezone
+from apps.analytics.kpis import KPIEngine
+from apps.products.models import Product
+from .models import StockLot, LotConsumption, StockMovement
+
+BATCH_SIZE = 1000
+
+EXPIRY_WARNING_DAYS = 7  # Días de anticipación para alertar un vencimiento
+
+
+def default_expiration_date(product, received=None):
+    """Vencimiento estimado con expiration_days del producto (None si no es perecedero)"""
+    if not product.is_perishable or not product.expiration_days:
+        return None
+    received = received or timezone.localdate()
+    return received + timedelta(days=product.expiration_days)
+
+
+def fefo_order():
+    """Orden de consumo: primero el que vence antes; sin vencimiento al final"""
+    return [F('expiration_date').asc(nulls_last=True), 'received_date', 'id']
+
+
+def expiring_lots(days=EXPIRY_WARNING_DAYS, include_expired=False, on_date=None):
+    """Lotes con saldo que vencen en los próximos days días (consulta por rango)"""
+    today = on_date or timezone.localdate()
+    lots = StockLot.objects.filter(quantity__gt=0, expiration_date__lte=today + timedelta(days=days))
+    if not include_expired:
+        lots = lots.filter(expiration_date__gte=today)
+    return lots
+
+
+class LotAllocator:
+    """Consume y devuelve unidades de los lotes en bloque (FEFO)
+
+    Carga los lotes disponibles de todos los productos en una consulta, reparte
+    la demanda con sumas acumuladas por producto (pandas) y guarda los saldos
+    con un bulk_update. Los lotes vencidos no se venden.
+    """
+
+    def allocate(self, demand, on_date=None):
+        """Reparte la demanda entre lotes sin guardar
+
+        demand: iterable de (product_id, cantidad); un producto puede repetirse.
+        Retorna (DataFrame lot_id/product_id/take, {product_id: unidades sin lote}).
+        """
+        demand = pd.DataFrame(list(demand), columns=['product_id', 'quantity'])
+        if demand.empty:
+            return pd.DataFrame(columns=['lot_id', 'product_id', 'take']), {}
+        demand = demand.groupby('product_id')['quantity'].sum()
+
+        today = on_date or timezone.localdate()
+        lots = pd.DataFrame.from_records(
+            list(
+                StockLot.objects.select_for_update()
+                .filter(product_id__in=demand.index.tolist(), quantity__gt=0)
+                .exclude(expiration_date__lt=today)
+                .order_by('product_id', *fefo_order())
+                .values_list('id', 'product_id', 'quantity')
+            ),
+            columns=['lot_id', 'product_id', 'quantity']
+        )
+
+        if lots.empty:
+            return pd.DataFrame(columns=['lot_id', 'product_id', 'take']), {
+                int(product_id): int(quantity) for product_id, quantity in demand.items()
+            }
+
+        need = lots['product_id'].map(demand).to_numpy(dtype=np.int64)
+        available = lots['quantity'].to_numpy(dtype=np.int64)
+        consumed_before = lots.groupby('product_id')['quantity'].cumsum().to_numpy(dtype=np.int64) - available
+        lots['take'] = np.clip(need - consumed_before, 0, available)
+
+        taken = lots.groupby('product_id')['take'].sum().reindex(demand.index, fill_value=0)
+        shortfall = {
+            int(product_id): int(missing)
+            for product_id, missing in (demand - taken).items() if missing > 0
+        }
+        return lots.loc[lots['take'] > 0, ['lot_id', 'product_id', 'take']], shortfall
+
+    def consume(self, demand, sale=None):
+        """Descuenta la demanda de los lotes y, si hay venta, registra los consumos
+
+        Retorna {product_id: unidades sin lote} (stock no registrado en lotes).
+        """
+        with transaction.atomic():
+            allocation, shortfall = self.allocate(demand)
+            if allocation.empty:
+                return shortfall
+
+            StockLot.objects.bulk_update(
+                [
+                    StockLot(id=int(lot_id), quantity=F('quantity') - int(take))
+                    for lot_id, take in allocation[['lot_id', 'take']].itertuples(index=False)
+                ],
+                ['quantity'],
+                batch_size=BATCH_SIZE
+            )
+
+            if sale is not None:
+                LotConsumption.objects.bulk_create(
+                    [
+                        LotConsumption(lot_id=int(lot_id), sale_id=sale.pk, quantity=int(take))
+                        for lot_id, take in allocation[['lot_id', 'take']].itertuples(index=False)
+                    ],
+                    batch_size=BATCH_SIZE
+                )
+
+        return shortfall
+
+    def consume_sale(self, sale):
+        """Consume los lotes de los productos de una venta"""
+        return self.consume(sale.items.values_list('product_id', 'quantity'), sale=sale)
+
+    def release_sale(self, sale):
+        """Devuelve a sus lotes las unidades consumidas por una venta anulada
+
+        Retorna la cantidad de unidades devueltas.
+        """
+        with transaction.atomic():
+            consumptions = list(
+                LotConsumption.objects.filter(sale=sale)
+                .values('lot_id').annotate(units=Sum('quantity'))
+                .values_list('lot_id', 'units')
+            )
+            if not consumptions:
+                return 0
+
+            StockLot.objects.bulk_update(
+                [StockLot(id=lot_id, quantity=F('quantity') + units) for lot_id, units in consumptions],
+                ['quantity'],
+                batch_size=BATCH_SIZE
+            )
+            LotConsumption.objects.filter(sale=sale).delete()
+
+        return sum(units for _, units in consumptions)
+
+
+class ExpirationScanner:
+    """Revisión nocturna de vencimientos como operaciones por conjunto
+
+    Agrupa por producto los lotes vencidos o por vencer en una consulta (la
+    regla EXPIRATION de AlertEngine) y da de baja en bloque los lotes vencidos.
+    """
+
+    def __init__(self, days=EXPIRY_WARNING_DAYS, on_date=None):
+        self.days = days
+        self.today = on_date or timezone.localdate()
+
+    def at_risk(self, product_ids=None):
+        """Unidades, lotes y próximo vencimiento por producto (vencidos incluidos)"""
+        lots = expiring_lots(self.days, include_expired=True, on_date=self.today)
+        if product_ids is not None:
+            lots = lots.filter(product_id__in=product_ids)
+        return {
+            row['product_id']: row
+            for row in lots.values('product_id', 'product__name')
+            .annotate(lots=Count('id'), units=Sum('quantity'), next_expiration=Min('expiration_date'))
+        }
+
+    def scan(self):
+        """Sincroniza las alertas EXPIRATION con el motor de alertas
+
+        Retorna {'active', 'created', 'updated', 'resolved'}.
+        """
+        from apps.analytics.alerts import AlertEngine
+        return AlertEngine(expiry_days=self.days).run(['EXPIRATION'])['EXPIRATION']
+
+    def write_off_expired(self, user=None):
+        """Da de baja los lotes vencidos: saldo a cero, stock del producto y movimiento EXPIRED
+
+        Retorna la cantidad de unidades dadas de baja.
+        """
+        with transaction.atomic():
+            lots = list(
+                StockLot.objects.select_for_update()
+                .filter(quantity__gt=0, expiration_date__lt=self.today)
+                .values_list('id', 'product_id', 'quantity', 'unit_cost')
+            )
+            if not lots:
+                return 0
+
+            expired = pd.DataFrame.from_records(lots, columns=['lot_id', 'product_id', 'quantity', 'unit_cost'])
+            by_product = expired.groupby('product_id')['quantity'].sum()
+            stock = dict(
+                Product.objects.select_for_update()
+                .filter(id__in=by_product.index.tolist())
+                .values_list('id', 'current_stock')
+            )
+
+            now = timezone.now()
+            products = []
+            movements = []
+            for product_id, units in by_product.items():
+                stock_before = stock[product_id]
+                # No dejar stock negativo si el lote no estaba reflejado en current_stock
+                units = int(min(units, max(stock_before, 0)))
+                if units == 0:
+                    continue
+                products.append(Product(id=product_id, current_stock=stock_before - units, updated_at=now))
+                movements.append(StockMovement(
+                    product_id=product_id,
+                    movement_type='EXPIRED',
+                    reason='EXPIRED_PRODUCT',
+                    quantity=units,
+                    stock_before=stock_before,
+                    stock_after=stock_before - units,
+                    notes='Baja automática de lotes vencidos',
+                    movement_date=now,
+                    user=user
+                ))
+
+            StockLot.objects.filter(id__in=expired['lot_id'].tolist()).update(quantity=0, updated_at=now)
+            Product.objects.bulk_update(products, ['current_stock', 'updated_at'], batch_size=BATCH_SIZE)
+            StockMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+
+            changes = [(movement.product_id, -movement.quantity) for movement in movements]
+            transaction.on_commit(lambda: KPIEngine().record_stock_changes(changes))
+
+        return int(sum(movement.quantity for movement in movements))
@@ -0,0 +1,64 @@
+# Archivo: minimarket_ml_system/backend/apps/inventory/management/commands/build_stock_snapshots.py
+
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from apps.inventory.snapshots import StockSnapshotBuilder
+
+class Command(BaseCommand):
+    help = 'Genera las fotos diarias de stock por producto desde el último cierre guardado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Días hacia atrás a cubrir si todavía no hay fotos (default: 365)'
+        )
+        parser.add_argument(
+            '--through',
+            type=str,
+            help='Último día a generar, YYYY-MM-DD (default: ayer)'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Borrar las fotos existentes y generarlas de nuevo'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== FOTOS DIARIAS DE STOCK ===')
+        )
+
+        through = None
+        if options['through']:
+            try:
+                through = datetime.strptime(options['through'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Formato de fecha inválido en --through. Use YYYY-MM-DD')
+
+        builder = StockSnapshotBuilder()
+        checkpoint = builder.last_checkpoint()
+        if options['rebuild']:
+            self.stdout.write(self.style.WARNING('Se borrarán las fotos existentes'))
+        elif checkpoint:
+            self.stdout.write(f'Último cierre guardado: {checkpoint}')
+        else:
+            self.stdout.write(f'Sin fotos previas: se cubrirán {options["days"]} días')
+
+        start = time.perf_counter()
+        result = builder.build(through=through, days=options['days'], rebuild=options['rebuild'])
+        elapsed = time.perf_counter() - start
+
+        if not result['created']:
+            self.stdout.write(f'Las fotos ya están al día (hasta {result["date_to"]})')
+            return
+
+        self.stdout.write(
+            f'✓ {result["created"]} fotos ({result["products"]} productos, '
+            f'{result["date_from"]} a {result["date_to"]}) en {elapsed:.2f}s'
+        )
+        self.stdout.write(
+            self.style.SUCCESS('\n¡Fotos de stock actualizadas!')
+        )
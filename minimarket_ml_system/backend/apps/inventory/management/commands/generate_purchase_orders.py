@@ -0,0 +1,79 @@
+# Archivo: minimarket_ml_system/backend/apps/inventory/management/commands/generate_purchase_orders.py
+
+import time
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from apps.inventory.replenishment import PurchaseOrderGenerator
+from apps.ml_models.predictor import DemandPredictor
+
+class Command(BaseCommand):
+    help = 'Genera órdenes de compra en borrador agrupadas por proveedor a partir del pronóstico'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days-ahead',
+            type=int,
+            default=30,
+            help='Horizonte de pronóstico en días (default: 30)'
+        )
+        parser.add_argument(
+            '--priorities',
+            nargs='+',
+            choices=['CRITICAL', 'HIGH', 'MEDIUM', 'LOW'],
+            help='Solo productos con estas prioridades (default: todas)'
+        )
+        parser.add_argument(
+            '--include-open-orders',
+            action='store_true',
+            help='Incluir productos que ya tienen una orden de compra abierta'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar las órdenes sin crearlas'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== GENERACIÓN AUTOMÁTICA DE ÓRDENES DE COMPRA ===')
+        )
+
+        # 1. Pronóstico y política de reposición
+        self.stdout.write('PASO 1: Calculando recomendaciones de reorden...')
+        start = time.perf_counter()
+        policy = DemandPredictor().reorder_policy(days_ahead=options['days_ahead'])
+        self.stdout.write(f'✓ {len(policy)} productos evaluados en {time.perf_counter() - start:.2f}s')
+
+        # 2. Órdenes por proveedor
+        self.stdout.write('PASO 2: Agrupando por proveedor...')
+        start = time.perf_counter()
+        generator = PurchaseOrderGenerator(skip_open_orders=not options['include_open_orders'])
+        result = generator.generate(
+            policy,
+            user=User.objects.filter(is_superuser=True).first(),
+            priorities=options['priorities'],
+            dry_run=options['dry_run'],
+            notes=f'Generada automáticamente (pronóstico {options["days_ahead"]} días)'
+        )
+        elapsed = time.perf_counter() - start
+
+        for reason, product_ids in result['skipped'].items():
+            self.stdout.write(self.style.WARNING(f'  Omitidos ({reason}): {len(product_ids)} productos'))
+
+        if not result['orders']:
+            self.stdout.write(self.style.WARNING('No hay productos para reordenar'))
+            return
+
+        for order in result['orders']:
+            self.stdout.write(
+                f"  {order['order_number'] or '(borrador)'} proveedor {order['supplier_id']}: "
+                f"{order['items']} items, {order['units']} unidades, total S/ {order['total']:.2f}"
+            )
+
+        action = 'calculadas' if options['dry_run'] else 'creadas'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\n¡{len(result['orders'])} órdenes {action} ({result['items']} items, "
+                f"S/ {result['total']:.2f}) en {elapsed:.2f}s!"
+            )
+        )
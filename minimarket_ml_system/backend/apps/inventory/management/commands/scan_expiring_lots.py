@@ -0,0 +1,50 @@
+# Archivo: minimarket_ml_system/backend/apps/inventory/management/commands/scan_expiring_lots.py
+
+import time
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from apps.inventory.lots import ExpirationScanner, EXPIRY_WARNING_DAYS
+
+class Command(BaseCommand):
+    help = 'Revisión nocturna de lotes: alertas de vencimiento y baja opcional de lotes vencidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=EXPIRY_WARNING_DAYS,
+            help=f'Días de anticipación para alertar (default: {EXPIRY_WARNING_DAYS})'
+        )
+        parser.add_argument(
+            '--write-off',
+            action='store_true',
+            help='Dar de baja los lotes vencidos (descuenta stock y registra movimiento EXPIRED)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== REVISIÓN DE VENCIMIENTOS ===')
+        )
+
+        scanner = ExpirationScanner(days=options['days'])
+        start = time.perf_counter()
+
+        # 1. Baja de lotes vencidos
+        if options['write_off']:
+            self.stdout.write('PASO 1: Dando de baja lotes vencidos...')
+            user = User.objects.filter(is_superuser=True).first()
+            units = scanner.write_off_expired(user=user)
+            self.stdout.write(f'✓ {units} unidades dadas de baja')
+
+        # 2. Alertas
+        self.stdout.write(f'PASO 2: Buscando lotes que vencen en {options["days"]} días...')
+        result = scanner.scan()
+        self.stdout.write(
+            f'✓ {result["active"]} productos en riesgo: '
+            f'{result["created"]} alertas nuevas, {result["resolved"]} resueltas '
+            f'({time.perf_counter() - start:.2f}s)'
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS('\n¡Revisión de vencimientos completada!')
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField(verbose_name='Fecha')),
+                ('closing_stock', models.IntegerField(verbose_name='Stock al cierre')),
+                ('units_in', models.PositiveIntegerField(default=0, verbose_name='Unidades ingresadas')),
+                ('units_out', models.PositiveIntegerField(default=0, verbose_name='Unidades retiradas')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='products.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Foto diaria de stock',
+                'verbose_name_plural': 'Fotos diarias de stock',
+                'ordering': ['-snapshot_date', 'product'],
+                'indexes': [models.Index(fields=['snapshot_date', 'closing_stock'], name='inventory_s_snapsho_7622bd_idx')],
+                'unique_together': {('product', 'snapshot_date')},
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('sales', '0002_sale_business_date'),
+        ('inventory', '0002_stock_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot_number', models.CharField(blank=True, max_length=50, verbose_name='Número de lote')),
+                ('expiration_date', models.DateField(blank=True, null=True, verbose_name='Fecha de vencimiento')),
+                ('received_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de ingreso')),
+                ('initial_quantity', models.PositiveIntegerField(verbose_name='Cantidad inicial')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Cantidad disponible')),
+                ('unit_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Costo unitario')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='products.product', verbose_name='Producto')),
+                ('purchase_order_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lots', to='inventory.purchaseorderitem', verbose_name='Item de orden de compra')),
+            ],
+            options={
+                'verbose_name': 'Lote',
+                'verbose_name_plural': 'Lotes',
+                'ordering': ['expiration_date', 'received_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LotConsumption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Cantidad')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('lot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumptions', to='inventory.stocklot', verbose_name='Lote')),
+                ('sale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lot_consumptions', to='sales.sale', verbose_name='Venta')),
+            ],
+            options={
+                'verbose_name': 'Consumo de lote',
+                'verbose_name_plural': 'Consumos de lote',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stocklot',
+            index=models.Index(fields=['product', 'expiration_date', 'received_date'], name='inventory_lot_fefo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocklot',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['expiration_date'], name='inventory_lot_expiry_idx'),
+        ),
+    ]
@@ -209,4 +209,83 @@ class InventoryCountItem(models.Model):
         # Calcular diferencia
         if self.counted_quantity is not None:
             self.difference = self.counted_quantity - self.system_quantity
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class StockSnapshot(models.Model):
+    """Stock al cierre de cada día por producto
+
+    Lo llena el comando build_stock_snapshots a partir de StockMovement (último
+    cierre guardado + movimientos posteriores); permite consultar el stock en
+    cualquier fecha pasada sin recorrer los movimientos.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots', verbose_name="Producto")
+    snapshot_date = models.DateField(verbose_name="Fecha")
+    closing_stock = models.IntegerField(verbose_name="Stock al cierre")
+    units_in = models.PositiveIntegerField(default=0, verbose_name="Unidades ingresadas")
+    units_out = models.PositiveIntegerField(default=0, verbose_name="Unidades retiradas")
+    
+    class Meta:
+        verbose_name = "Foto diaria de stock"
+        verbose_name_plural = "Fotos diarias de stock"
+        ordering = ['-snapshot_date', 'product']
+        unique_together = ['product', 'snapshot_date']
+        indexes = [
+            models.Index(fields=['snapshot_date', 'closing_stock']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} - {self.snapshot_date}: {self.closing_stock}"
+
+class StockLot(models.Model):
+    """Lote de un producto con su fecha de vencimiento
+    
+    Se crea al recibir una orden de compra (o al registrar el stock existente).
+    Las ventas consumen los lotes en orden FEFO (primero el que vence antes).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='lots', verbose_name="Producto")
+    purchase_order_item = models.ForeignKey(
+        'PurchaseOrderItem', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='lots', verbose_name="Item de orden de compra"
+    )
+    
+    lot_number = models.CharField(max_length=50, blank=True, verbose_name="Número de lote")
+    expiration_date = models.DateField(null=True, blank=True, verbose_name="Fecha de vencimiento")
+    received_date = models.DateTimeField(default=timezone.now, verbose_name="Fecha de ingreso")
+    
+    initial_quantity = models.PositiveIntegerField(verbose_name="Cantidad inicial")
+    quantity = models.PositiveIntegerField(verbose_name="Cantidad disponible")
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Costo unitario")
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
+    
+    class Meta:
+        verbose_name = "Lote"
+        verbose_name_plural = "Lotes"
+        ordering = ['expiration_date', 'received_date']
+        indexes = [
+            # Orden FEFO dentro de cada producto
+            models.Index(fields=['product', 'expiration_date', 'received_date'], name='inventory_lot_fefo_idx'),
+            # Reporte de vencimientos: rango de fechas sobre lotes con saldo
+            models.Index(
+                fields=['expiration_date'], name='inventory_lot_expiry_idx',
+                condition=models.Q(quantity__gt=0)
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.name} - Lote {self.lot_number or self.pk} ({self.expiration_date or 'sin vencimiento'})"
+
+class LotConsumption(models.Model):
+    """Unidades de un lote consumidas por una venta (permite revertir al anular)"""
+    lot = models.ForeignKey(StockLot, on_delete=models.CASCADE, related_name='consumptions', verbose_name="Lote")
+    sale = models.ForeignKey('sales.Sale', on_delete=models.CASCADE, related_name='lot_consumptions', verbose_name="Venta")
+    quantity = models.PositiveIntegerField(verbose_name="Cantidad")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+    
+    class Meta:
+        verbose_name = "Consumo de lote"
+        verbose_name_plural = "Consumos de lote"
+    
+    def __str__(self):
+        return f"{self.sale_id} - Lote {self.lot_id}: {self.quantity}"
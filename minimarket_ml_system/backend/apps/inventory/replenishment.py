@@ -0,0 +1,196 @@
+# Archivo: minimarket_ml_system/backend/apps/inventory/replenishment.py
+
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.products.models import Product
+from .models import PurchaseOrder, PurchaseOrderItem
+
+# Estados en los que una orden todavía no ingresó al stock
+OPEN_ORDER_STATUSES = ['DRAFT', 'PENDING', 'APPROVED', 'ORDERED', 'PARTIAL']
+
+TAX_RATE = Decimal('0.18')  # IGV
+
+
+def _cents_to_decimal(cents):
+    return Decimal(int(cents)) / 100
+
+
+class PurchaseOrderGenerator:
+    """Convierte recomendaciones de reorden en órdenes de compra en borrador
+
+    Agrupa las cantidades por proveedor, las redondea a cajas completas
+    (units_per_box) y crea todas las órdenes e items con bulk_create en una sola
+    transacción. Los montos se calculan en céntimos con NumPy.
+    """
+
+    def __init__(self, skip_open_orders=True, lead_time_days=None):
+        self.skip_open_orders = skip_open_orders
+        if lead_time_days is None:
+            lead_time_days = getattr(settings, 'REORDER_POLICY', {}).get('LEAD_TIME_DAYS', 3)
+        self.lead_time_days = lead_time_days
+
+    def build_lines(self, recommendations, priorities=None):
+        """Líneas de compra (un producto por fila) a partir de las recomendaciones
+
+        recommendations: DataFrame de DemandPredictor.reorder_policy o lista de dicts
+        de batch_reorder_recommendations. Retorna (líneas, productos omitidos).
+        """
+        recs = pd.DataFrame(recommendations)
+        skipped = {}
+        if recs.empty:
+            return pd.DataFrame(), skipped
+
+        recs = recs[recs['needs_reorder'].astype(bool) & (recs['suggested_order_quantity'] > 0)]
+        if priorities:
+            recs = recs[recs['priority'].isin([p.upper() for p in priorities])]
+        if recs.empty:
+            return pd.DataFrame(), skipped
+
+        products = pd.DataFrame.from_records(
+            Product.objects.filter(
+                id__in=recs['product_id'].tolist(), is_active=True
+            ).values_list('id', 'supplier_id', 'units_per_box', 'cost_price'),
+            columns=['product_id', 'supplier_id', 'units_per_box', 'cost_price']
+        )
+        lines = recs[['product_id', 'suggested_order_quantity', 'priority']].merge(products, on='product_id')
+
+        without_supplier = lines['supplier_id'].isna()
+        if without_supplier.any():
+            skipped['sin_proveedor'] = lines.loc[without_supplier, 'product_id'].tolist()
+            lines = lines[~without_supplier]
+
+        if self.skip_open_orders and not lines.empty:
+            open_ids = set(
+                PurchaseOrderItem.objects.filter(
+                    purchase_order__status__in=OPEN_ORDER_STATUSES,
+                    product_id__in=lines['product_id'].tolist(),
+                    is_received=False
+                ).values_list('product_id', flat=True)
+            )
+            in_open_order = lines['product_id'].isin(open_ids)
+            if in_open_order.any():
+                skipped['orden_abierta'] = lines.loc[in_open_order, 'product_id'].tolist()
+                lines = lines[~in_open_order]
+
+        if lines.empty:
+            return pd.DataFrame(), skipped
+
+        # Redondear a cajas completas y calcular montos en céntimos
+        units_per_box = lines['units_per_box'].clip(lower=1).to_numpy(dtype=np.int64)
+        quantity = np.ceil(lines['suggested_order_quantity'].to_numpy(dtype=float) / units_per_box)
+        quantity = quantity.astype(np.int64) * units_per_box
+        unit_cents = np.array([int(price * 100) for price in lines['cost_price']], dtype=np.int64)
+
+        lines = lines.assign(
+            supplier_id=lines['supplier_id'].astype(np.int64),
+            boxes=quantity // units_per_box,
+            quantity=quantity,
+            unit_cents=unit_cents,
+            total_cents=quantity * unit_cents
+        )
+        return lines.sort_values(['supplier_id', 'product_id']).reset_index(drop=True), skipped
+
+    def summarize(self, lines):
+        """Subtotal, IGV y total por proveedor (en céntimos)"""
+        orders = lines.groupby('supplier_id', sort=True).agg(
+            items=('product_id', 'size'),
+            units=('quantity', 'sum'),
+            subtotal_cents=('total_cents', 'sum')
+        ).reset_index()
+        orders['tax_cents'] = np.round(orders['subtotal_cents'] * float(TAX_RATE)).astype(np.int64)
+        orders['total_cents'] = orders['subtotal_cents'] + orders['tax_cents']
+        return orders
+
+    def next_order_numbers(self, count):
+        """Números de orden consecutivos con el mismo formato que PurchaseOrderViewSet"""
+        last_order = PurchaseOrder.objects.order_by('-id').only('order_number').first()
+        start = int(last_order.order_number[2:]) + 1 if last_order else 1
+        return [f"PO{str(number).zfill(6)}" for number in range(start, start + count)]
+
+    def create_orders(self, lines, user=None, notes=''):
+        """Crea las órdenes (estado DRAFT) y sus items en una sola transacción
+
+        Retorna la lista de PurchaseOrder creadas.
+        """
+        if lines.empty:
+            return []
+
+        orders = self.summarize(lines)
+        now = timezone.now()
+        expected_date = (now + timedelta(days=self.lead_time_days)).date()
+
+        with transaction.atomic():
+            numbers = self.next_order_numbers(len(orders))
+            purchase_orders = PurchaseOrder.objects.bulk_create([
+                PurchaseOrder(
+                    order_number=number,
+                    supplier_id=int(row.supplier_id),
+                    status='DRAFT',
+                    order_date=now,
+                    expected_date=expected_date,
+                    subtotal=_cents_to_decimal(row.subtotal_cents),
+                    tax=_cents_to_decimal(row.tax_cents),
+                    total=_cents_to_decimal(row.total_cents),
+                    notes=notes,
+                    created_by=user
+                )
+                for number, row in zip(numbers, orders.itertuples(index=False))
+            ])
+
+            # bulk_create no siempre retorna IDs (p. ej. SQLite < 3.35)
+            if purchase_orders and purchase_orders[0].pk is None:
+                purchase_orders = list(PurchaseOrder.objects.filter(order_number__in=numbers).order_by('order_number'))
+
+            order_ids = {order.supplier_id: order.pk for order in purchase_orders}
+
+            PurchaseOrderItem.objects.bulk_create([
+                PurchaseOrderItem(
+                    purchase_order_id=order_ids[int(line.supplier_id)],
+                    product_id=int(line.product_id),
+                    quantity_ordered=int(line.quantity),
+                    unit_price=_cents_to_decimal(line.unit_cents),
+                    total_price=_cents_to_decimal(line.total_cents)
+                )
+                for line in lines.itertuples(index=False)
+            ], batch_size=1000)
+
+        return purchase_orders
+
+    def generate(self, recommendations, user=None, priorities=None, dry_run=False, notes=''):
+        """Construye las líneas y (salvo dry_run) crea las órdenes
+
+        Retorna un resumen serializable con las órdenes por proveedor.
+        """
+        lines, skipped = self.build_lines(recommendations, priorities=priorities)
+        if lines.empty:
+            return {'orders_created': 0, 'items': 0, 'orders': [], 'skipped': skipped, 'dry_run': dry_run}
+
+        orders = self.summarize(lines)
+        created = [] if dry_run else self.create_orders(lines, user=user, notes=notes)
+        numbers = {order.supplier_id: order.order_number for order in created}
+
+        return {
+            'orders_created': len(created),
+            'items': len(lines),
+            'units': int(lines['quantity'].sum()),
+            'total': float(_cents_to_decimal(orders['total_cents'].sum())),
+            'orders': [
+                {
+                    'supplier_id': int(row.supplier_id),
+                    'order_number': numbers.get(int(row.supplier_id)),
+                    'items': int(row.items),
+                    'units': int(row.units),
+                    'subtotal': float(_cents_to_decimal(row.subtotal_cents)),
+                    'tax': float(_cents_to_decimal(row.tax_cents)),
+                    'total': float(_cents_to_decimal(row.total_cents)),
+                }
+                for row in orders.itertuples(index=False)
+            ],
+            'skipped': skipped,
+            'dry_run': dry_run,
+        }
@@ -1,7 +1,8 @@
 # Archivo: minimarket_ml_system/backend/apps/inventory/serializers.py
 
 from rest_framework import serializers
-from .models import StockMovement, PurchaseOrder, PurchaseOrderItem, InventoryCount, InventoryCountItem
+from .models import StockMovement, PurchaseOrder, PurchaseOrderItem, InventoryCount, InventoryCountItem, StockSnapshot, StockLot
+from .lots import default_expiration_date
 
 class StockMovementSerializer(serializers.ModelSerializer):
     """Serializer para movimientos de stock"""
@@ -22,6 +23,39 @@ class StockMovementSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
 
+class StockSnapshotSerializer(serializers.ModelSerializer):
+    """Serializer para fotos diarias de stock"""
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_code = serializers.CharField(source='product.code', read_only=True)
+    
+    class Meta:
+        model = StockSnapshot
+        fields = [
+            'id', 'product', 'product_name', 'product_code', 'snapshot_date',
+            'closing_stock', 'units_in', 'units_out'
+        ]
+        read_only_fields = fields
+
+class StockLotSerializer(serializers.ModelSerializer):
+    """Serializer para lotes"""
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_code = serializers.CharField(source='product.code', read_only=True)
+    
+    class Meta:
+        model = StockLot
+        fields = [
+            'id', 'product', 'product_name', 'product_code', 'purchase_order_item',
+            'lot_number', 'expiration_date', 'received_date', 'initial_quantity',
+            'quantity', 'unit_cost', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'purchase_order_item', 'quantity', 'created_at', 'updated_at']
+    
+    def create(self, validated_data):
+        validated_data['quantity'] = validated_data['initial_quantity']
+        if 'expiration_date' not in validated_data:
+            validated_data['expiration_date'] = default_expiration_date(validated_data['product'])
+        return super().create(validated_data)
+
 class PurchaseOrderItemSerializer(serializers.ModelSerializer):
     """Serializer para items de orden de compra"""
     product_name = serializers.CharField(source='product.name', read_only=True)
@@ -0,0 +1,176 @@
+# Archivo: minimarket_ml_system/backend/apps/inventory/snapshots.py
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Sum, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.products.models import Product
+from .models import StockMovement, StockSnapshot
+
+BATCH_SIZE = 5000
+
+
+def day_start(day):
+    """Inicio del día en la zona horaria local (aware)"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def movement_deltas(date_from, product_ids=None):
+    """Ingresos, salidas y variación neta por producto y día desde date_from
+
+    La variación se toma de stock_after - stock_before, de modo que los ajustes
+    quedan con su signo real. Retorna un DataFrame con product_id, day,
+    units_in, units_out y net.
+    """
+    movements = StockMovement.objects.filter(movement_date__gte=day_start(date_from))
+    if product_ids is not None:
+        movements = movements.filter(product_id__in=product_ids)
+
+    delta = F('stock_after') - F('stock_before')
+    rows = (
+        movements.annotate(day=TruncDate('movement_date'))
+        .values('product_id', 'day')
+        .annotate(
+            units_in=Sum(Case(When(stock_after__gt=F('stock_before'), then=delta), default=0, output_field=IntegerField())),
+            units_out=Sum(Case(When(stock_after__lt=F('stock_before'), then=-delta), default=0, output_field=IntegerField())),
+        )
+        .values_list('product_id', 'day', 'units_in', 'units_out')
+    )
+
+    deltas = pd.DataFrame.from_records(list(rows), columns=['product_id', 'day', 'units_in', 'units_out'])
+    deltas['net'] = deltas['units_in'] - deltas['units_out']
+    return deltas
+
+
+class StockSnapshotBuilder:
+    """Construye las fotos diarias de stock a partir del último cierre guardado
+
+    Punto de control + delta: toma el stock de cierre del último día con foto y
+    le suma acumulativamente (NumPy) las variaciones diarias de StockMovement
+    hasta la fecha pedida. Los productos sin foto previa parten del stock actual
+    descontando los movimientos posteriores.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+
+    @staticmethod
+    def last_checkpoint():
+        return StockSnapshot.objects.aggregate(last=Max('snapshot_date'))['last']
+
+    def build(self, through=None, days=365, rebuild=False):
+        """Crea las fotos faltantes hasta through (por defecto, ayer)
+
+        days: cuántos días hacia atrás cubrir cuando todavía no hay fotos.
+        Retorna un dict con el rango construido y la cantidad de filas creadas.
+        """
+        if through is None:
+            through = timezone.localdate() - timedelta(days=1)
+
+        with transaction.atomic():
+            if rebuild:
+                StockSnapshot.objects.all().delete()
+
+            checkpoint = self.last_checkpoint()
+            if checkpoint is not None and checkpoint >= through:
+                return {'date_from': None, 'date_to': checkpoint, 'products': 0, 'created': 0}
+
+            date_from = checkpoint + timedelta(days=1) if checkpoint else through - timedelta(days=days - 1)
+            dates = pd.date_range(date_from, through, freq='D').date
+
+            products = pd.DataFrame.from_records(
+                list(Product.objects.values_list('id', 'current_stock')),
+                columns=['product_id', 'current_stock']
+            )
+            if products.empty:
+                return {'date_from': date_from, 'date_to': through, 'products': 0, 'created': 0}
+
+            deltas = movement_deltas(date_from)
+            opening = self.opening_stock(products, deltas, checkpoint)
+
+            # Matrices productos x días con los movimientos dentro del rango
+            in_range = deltas[deltas['day'] <= through]
+            row = pd.Index(products['product_id']).get_indexer(in_range['product_id'])
+            col = np.array([(day - date_from).days for day in in_range['day']], dtype=np.int64)
+            valid = row >= 0
+
+            shape = (len(products), len(dates))
+            units_in = np.zeros(shape, dtype=np.int64)
+            units_out = np.zeros(shape, dtype=np.int64)
+            np.add.at(units_in, (row[valid], col[valid]), in_range['units_in'].to_numpy(dtype=np.int64)[valid])
+            np.add.at(units_out, (row[valid], col[valid]), in_range['units_out'].to_numpy(dtype=np.int64)[valid])
+
+            closing = opening[:, None] + np.cumsum(units_in - units_out, axis=1)
+
+            created = self.write(products['product_id'].to_numpy(), dates, closing, units_in, units_out)
+
+        return {'date_from': date_from, 'date_to': through, 'products': len(products), 'created': created}
+
+    def opening_stock(self, products, deltas, checkpoint):
+        """Stock al cierre del día anterior al rango, por producto (vector)"""
+        # Hacia atrás: stock actual menos todo lo que se movió desde el inicio del rango
+        net_since = deltas.groupby('product_id')['net'].sum()
+        opening = (
+            products['current_stock']
+            - products['product_id'].map(net_since).fillna(0)
+        ).to_numpy(dtype=np.int64)
+
+        if checkpoint is not None:
+            previous = dict(
+                StockSnapshot.objects.filter(snapshot_date=checkpoint)
+                .values_list('product_id', 'closing_stock')
+            )
+            from_checkpoint = products['product_id'].map(previous)
+            has_checkpoint = from_checkpoint.notna().to_numpy()
+            opening[has_checkpoint] = from_checkpoint[has_checkpoint].to_numpy(dtype=np.int64)
+
+        return opening
+
+    def write(self, product_ids, dates, closing, units_in, units_out):
+        """bulk_create por bloques de días; retorna la cantidad de filas"""
+        days_per_batch = max(1, self.batch_size // max(len(product_ids), 1))
+        created = 0
+        for start in range(0, len(dates), days_per_batch):
+            stop = min(start + days_per_batch, len(dates))
+            snapshots = [
+                StockSnapshot(
+                    product_id=int(product_ids[i]),
+                    snapshot_date=dates[j],
+                    closing_stock=int(closing[i, j]),
+                    units_in=int(units_in[i, j]),
+                    units_out=int(units_out[i, j])
+                )
+                for j in range(start, stop)
+                for i in range(len(product_ids))
+            ]
+            StockSnapshot.objects.bulk_create(snapshots, batch_size=self.batch_size)
+            created += len(snapshots)
+        return created
+
+
+def stock_as_of(on_date, products=None):
+    """Fotos del último día con cierre <= on_date
+
+    Retorna (fecha de la foto, queryset); la fecha es None si no hay fotos.
+    """
+    snapshot_date = StockSnapshot.objects.filter(
+        snapshot_date__lte=on_date
+    ).aggregate(last=Max('snapshot_date'))['last']
+
+    snapshots = StockSnapshot.objects.filter(snapshot_date=snapshot_date)
+    if products is not None:
+        snapshots = snapshots.filter(product__in=products)
+    return snapshot_date, snapshots
+
+
+def stock_series(product_id, date_from=None, date_to=None):
+    """Serie diaria de cierre de un producto, en orden cronológico"""
+    snapshots = StockSnapshot.objects.filter(product_id=product_id)
+    if date_from:
+        snapshots = snapshots.filter(snapshot_date__gte=date_from)
+    if date_to:
+        snapshots = snapshots.filter(snapshot_date__lte=date_to)
+    return snapshots.order_by('snapshot_date')
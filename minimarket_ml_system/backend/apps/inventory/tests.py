@@ -1,3 +1,419 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db.models import Q
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.products.models import Category, Product, Supplier
+from apps.sales.models import Sale, SaleItem
+from .counting import InventoryCountError, InventoryCountService
+from .ledger import record_sale_stock, release_sale_stock
+from .lots import ExpirationScanner, LotAllocator
+from .replenishment import PurchaseOrderGenerator
+from .models import InventoryCount, LotConsumption, PurchaseOrder, PurchaseOrderItem, StockLot, StockMovement, StockSnapshot
+from .snapshots import StockSnapshotBuilder, day_start, stock_as_of, stock_series
 
-# Create your tests here.
+
+def create_product(code, current_stock=0, **kwargs):
+    category, _ = Category.objects.get_or_create(name='Abarrotes')
+    return Product.objects.create(
+        code=code, name=f'Producto {code}', category=category,
+        cost_price=Decimal('2.00'), sale_price=Decimal('3.00'),
+        current_stock=current_stock, **kwargs
+    )
+
+
+def create_sale(number, items, seller=None):
+    """Venta COMPLETED con items [(producto, cantidad)]"""
+    sale = Sale.objects.create(sale_number=number, payment_method='CASH', seller=seller)
+    for product, quantity in items:
+        SaleItem.objects.create(sale=sale, product=product, quantity=quantity, unit_price=product.sale_price)
+    return sale
+
+
+class StockSnapshotBuilderTests(TestCase):
+    """Reconstrucción de las fotos diarias desde StockMovement"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.product = create_product('SNAP', current_stock=40)
+        # Stock al cierre de cada día: hace 3 días 50, hace 2 días 42, ayer 35; hoy 40
+        self.move(3, 'IN', 30, 50)
+        self.move(2, 'OUT', 50, 45)
+        self.move(2, 'ADJUST', 45, 42, hour=15)
+        self.move(1, 'OUT', 42, 35)
+        StockMovement.objects.create(
+            product=self.product, movement_type='IN', reason='PURCHASE', quantity=5,
+            stock_before=35, stock_after=40, movement_date=timezone.now()
+        )
+
+    def move(self, days_ago, movement_type, stock_before, stock_after, hour=12):
+        movement_date = day_start(self.today - timedelta(days=days_ago)) + timedelta(hours=hour)
+        StockMovement.objects.create(
+            product=self.product, movement_type=movement_type, reason='INVENTORY_ADJUST',
+            quantity=abs(stock_after - stock_before), stock_before=stock_before,
+            stock_after=stock_after, movement_date=movement_date
+        )
+
+    def closing(self):
+        return {
+            snapshot.snapshot_date: (snapshot.closing_stock, snapshot.units_in, snapshot.units_out)
+            for snapshot in StockSnapshot.objects.filter(product=self.product)
+        }
+
+    def day(self, days_ago):
+        return self.today - timedelta(days=days_ago)
+
+    def test_build_reconstructs_closing_stock_backwards_from_current_stock(self):
+        result = StockSnapshotBuilder().build(days=4)
+
+        self.assertEqual(result['date_from'], self.day(4))
+        self.assertEqual(result['date_to'], self.day(1))
+        self.assertEqual(result['created'], 4)
+        self.assertEqual(self.closing(), {
+            self.day(4): (30, 0, 0),
+            self.day(3): (50, 20, 0),
+            self.day(2): (42, 0, 8),
+            self.day(1): (35, 0, 7),
+        })
+
+    def test_incremental_build_continues_from_checkpoint(self):
+        builder = StockSnapshotBuilder()
+        builder.build(through=self.day(2), days=3)
+        # Un cambio en current_stock no altera lo ya fotografiado: se parte del último cierre
+        Product.objects.filter(pk=self.product.pk).update(current_stock=1000)
+        result = builder.build(through=self.day(1))
+
+        self.assertEqual(result['date_from'], self.day(1))
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(self.closing()[self.day(1)], (35, 0, 7))
+
+        self.assertEqual(builder.build(through=self.day(1))['created'], 0)
+
+    def test_incremental_build_matches_full_rebuild(self):
+        builder = StockSnapshotBuilder(batch_size=1)
+        builder.build(through=self.day(3), days=2)
+        builder.build(through=self.day(1))
+        incremental = self.closing()
+
+        builder.build(through=self.day(1), days=4, rebuild=True)
+        self.assertEqual(self.closing(), incremental)
+
+    def test_stock_as_of_uses_last_snapshot_on_or_before_date(self):
+        StockSnapshotBuilder().build(through=self.day(2), days=2)
+
+        snapshot_date, snapshots = stock_as_of(self.today)
+        self.assertEqual(snapshot_date, self.day(2))
+        self.assertEqual(snapshots.get(product=self.product).closing_stock, 42)
+
+        dates = list(stock_series(self.product.pk).values_list('snapshot_date', flat=True))
+        self.assertEqual(dates, [self.day(3), self.day(2)])
+
+
+class SaleStockLedgerTests(TestCase):
+    """Movimientos de stock de ventas y anulaciones"""
+
+    def setUp(self):
+        self.seller = User.objects.create_user('cajero')
+        self.milk = create_product('LECHE', current_stock=10)
+        self.bread = create_product('PAN', current_stock=1)
+
+    def test_sale_records_out_movement_per_product(self):
+        sale = create_sale('V-1', [(self.milk, 3), (self.milk, 2), (self.bread, 1)], seller=self.seller)
+
+        self.assertEqual(record_sale_stock(sale), 6)
+
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.current_stock, 5)
+        movement = StockMovement.objects.get(product=self.milk, reference_document='V-1')
+        self.assertEqual((movement.movement_type, movement.reason), ('OUT', 'SALE'))
+        self.assertEqual((movement.quantity, movement.stock_before, movement.stock_after), (5, 10, 5))
+        self.assertEqual(movement.user, self.seller)
+
+    def test_sale_never_leaves_negative_stock(self):
+        sale = create_sale('V-2', [(self.bread, 4)])
+
+        self.assertEqual(record_sale_stock(sale), 1)
+
+        self.bread.refresh_from_db()
+        self.assertEqual(self.bread.current_stock, 0)
+        self.assertEqual(StockMovement.objects.get(reference_document='V-2').quantity, 1)
+
+    def test_release_returns_only_what_the_sale_took(self):
+        sale = create_sale('V-3', [(self.milk, 4), (self.bread, 3)])
+        record_sale_stock(sale)
+
+        self.assertEqual(release_sale_stock(sale), 5)
+
+        self.milk.refresh_from_db()
+        self.bread.refresh_from_db()
+        self.assertEqual((self.milk.current_stock, self.bread.current_stock), (10, 1))
+        returns = StockMovement.objects.filter(reference_document='V-3', reason='RETURN_CUSTOMER')
+        self.assertEqual(set(returns.values_list('movement_type', flat=True)), {'IN'})
+
+    def test_release_without_sale_movements_returns_nothing(self):
+        sale = create_sale('V-4', [(self.milk, 4)])
+
+        self.assertEqual(release_sale_stock(sale), 0)
+
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.current_stock, 10)
+
+
+class LotAllocatorTests(TestCase):
+    """Consumo FEFO de lotes y devolución al anular"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.product = create_product('YOGURT', current_stock=30, is_perishable=True)
+        self.expired = self.lot(5, -1)
+        self.late = self.lot(10, 10)
+        self.soon = self.lot(10, 2)
+        self.undated = self.lot(5, None)
+
+    def lot(self, quantity, expires_in, product=None):
+        return StockLot.objects.create(
+            product=product or self.product, initial_quantity=quantity, quantity=quantity,
+            expiration_date=self.today + timedelta(days=expires_in) if expires_in is not None else None
+        )
+
+    def quantities(self):
+        return {lot.pk: lot.quantity for lot in StockLot.objects.all()}
+
+    def test_allocate_takes_earliest_expiration_first_and_skips_expired(self):
+        allocation, shortfall = LotAllocator().allocate([(self.product.pk, 8), (self.product.pk, 7)])
+
+        taken = dict(zip(allocation['lot_id'], allocation['take']))
+        self.assertEqual(taken, {self.soon.pk: 10, self.late.pk: 5})
+        self.assertEqual(shortfall, {})
+
+    def test_undated_lots_are_consumed_last_and_shortfall_is_reported(self):
+        other = create_product('SIN-LOTES')
+        allocation, shortfall = LotAllocator().allocate([(self.product.pk, 27), (other.pk, 3)])
+
+        taken = dict(zip(allocation['lot_id'], allocation['take']))
+        self.assertEqual(taken, {self.soon.pk: 10, self.late.pk: 10, self.undated.pk: 5})
+        self.assertEqual(shortfall, {self.product.pk: 2, other.pk: 3})
+
+    def test_consume_sale_and_release_restore_lot_balances(self):
+        before = self.quantities()
+        sale = create_sale('V-LOT', [(self.product, 12)])
+
+        self.assertEqual(LotAllocator().consume_sale(sale), {})
+        after = self.quantities()
+        self.assertEqual((after[self.soon.pk], after[self.late.pk]), (0, 8))
+        self.assertEqual(after[self.expired.pk], 5)
+        self.assertEqual(sum(LotConsumption.objects.filter(sale=sale).values_list('quantity', flat=True)), 12)
+
+        self.assertEqual(LotAllocator().release_sale(sale), 12)
+        self.assertEqual(self.quantities(), before)
+        self.assertFalse(LotConsumption.objects.filter(sale=sale).exists())
+        self.assertEqual(LotAllocator().release_sale(sale), 0)
+
+    def test_write_off_expired_zeroes_lots_and_records_movement(self):
+        units = ExpirationScanner().write_off_expired()
+
+        self.assertEqual(units, 5)
+        self.expired.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(self.expired.quantity, 0)
+        self.assertEqual(self.product.current_stock, 25)
+        movement = StockMovement.objects.get(product=self.product, movement_type='EXPIRED')
+        self.assertEqual((movement.stock_before, movement.stock_after), (30, 25))
+        self.assertEqual(ExpirationScanner().write_off_expired(), 0)
+
+
+class PurchaseOrderReceiveTests(TestCase):
+    """Recepción de órdenes de compra: lotes, stock y validación de vencimientos"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@minimarket.com', 'admin123'))
+        self.product = create_product('ATUN', current_stock=5)
+        supplier = Supplier.objects.create(name='Distribuidora Lima', ruc='20123456789')
+        self.order = PurchaseOrder.objects.create(order_number='OC-1', supplier=supplier, status='APPROVED')
+        self.item = PurchaseOrderItem.objects.create(
+            purchase_order=self.order, product=self.product, quantity_ordered=10, unit_price=Decimal('2.00')
+        )
+
+    def receive(self, **item):
+        return self.client.post(f'/api/inventory/purchase-orders/{self.order.pk}/receive/', {
+            'items': [{'item_id': self.item.pk, 'received_quantity': 10, **item}],
+        }, format='json')
+
+    def test_receive_creates_lot_and_updates_stock(self):
+        response = self.receive(expiration_date='2030-01-31', lot_number='L-7')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['order_status'], 'RECEIVED')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, 15)
+        lot = StockLot.objects.get(purchase_order_item=self.item)
+        self.assertEqual((lot.lot_number, lot.quantity, str(lot.expiration_date)), ('L-7', 10, '2030-01-31'))
+
+    def test_malformed_expiration_date_rejects_the_whole_receipt(self):
+        for value in ('31/01/2030', '2030-02-30', 20300131):
+            with self.assertLogs('django.request', level='WARNING'):
+                response = self.receive(expiration_date=value)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data['items'], [{'item_id': self.item.pk, 'expiration_date': value}])
+
+        self.product.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual((self.product.current_stock, self.order.status), (5, 'APPROVED'))
+        self.assertFalse(StockLot.objects.exists())
+
+
+class InventoryCountServiceTests(TestCase):
+    """Conteo de inventario: inicio, registro por filas y conciliación"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('almacen')
+        self.rice = create_product('ARROZ', current_stock=20, barcode='7750000000101')
+        self.sugar = create_product('AZUCAR', current_stock=8)
+        self.salt = create_product('SAL', current_stock=5)
+        create_product('INACTIVO', current_stock=3, is_active=False)
+        self.count = InventoryCount.objects.create(
+            count_number='CI-1', description='Conteo general', scheduled_date=timezone.localdate()
+        )
+        self.service = InventoryCountService(self.count, user=self.user)
+
+    def test_start_snapshots_active_products_only_once(self):
+        self.assertEqual(self.service.start(), 3)
+
+        self.assertEqual(self.count.status, 'IN_PROGRESS')
+        self.assertEqual(
+            dict(self.count.items.values_list('product__code', 'system_quantity')),
+            {'ARROZ': 20, 'AZUCAR': 8, 'SAL': 5}
+        )
+        with self.assertRaises(InventoryCountError):
+            self.service.start()
+
+    def test_submit_requires_a_started_count(self):
+        with self.assertRaises(InventoryCountError):
+            self.service.submit([{'code': 'ARROZ', 'counted_quantity': '18'}])
+
+    def test_submit_reports_errors_per_row(self):
+        self.service.start(product_filter=~Q(code='SAL'))
+
+        result = self.service.submit([
+            {'code': 'ARROZ', 'counted_quantity': '25'},
+            {'code': 'NO-EXISTE', 'counted_quantity': '1'},
+            {'barcode': '7750000000101', 'counted_quantity': 'diez'},
+            {'product_id': self.sugar.pk, 'counted_quantity': '-2'},
+            {'code': 'SAL', 'counted_quantity': '5'},
+            {'code': 'ARROZ', 'counted_quantity': '18', 'notes': 'recontado'},
+        ])
+
+        self.assertEqual((result['updated'], result['pending']), (1, 1))
+        self.assertEqual([(error['row'], error['error']) for error in result['errors']], [
+            (2, 'Producto no encontrado'),
+            (3, 'Cantidad inválida'),
+            (4, 'Cantidad negativa'),
+            (5, 'Producto no incluido en el conteo'),
+        ])
+        item = self.count.items.get(product=self.rice)
+        self.assertEqual((item.counted_quantity, item.difference, item.notes), (18, -2, 'recontado'))
+        self.assertEqual(item.counted_by, self.user)
+
+    def test_complete_adjusts_from_stock_at_closing_and_skips_matches(self):
+        self.service.start()
+        self.service.submit([
+            {'code': 'ARROZ', 'counted_quantity': '18'},
+            {'code': 'AZUCAR', 'counted_quantity': '10'},
+            {'code': 'SAL', 'counted_quantity': '5'},
+        ])
+        # Venta durante el conteo: el ajuste parte del stock al cerrar, no del inicial
+        Product.objects.filter(pk=self.sugar.pk).update(current_stock=7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.service.complete(), 2)
+
+        self.count.refresh_from_db()
+        self.assertEqual(self.count.status, 'COMPLETED')
+        stock = dict(Product.objects.values_list('code', 'current_stock'))
+        self.assertEqual((stock['ARROZ'], stock['AZUCAR'], stock['SAL']), (18, 10, 5))
+        movements = {
+            movement.product.code: (movement.movement_type, movement.quantity, movement.stock_before, movement.stock_after)
+            for movement in StockMovement.objects.filter(reference_document='CI-1').select_related('product')
+        }
+        self.assertEqual(movements, {'ARROZ': ('OUT', 2, 20, 18), 'AZUCAR': ('IN', 3, 7, 10)})
+
+        with self.assertRaises(InventoryCountError):
+            self.service.complete()
+
+
+class PurchaseOrderGeneratorTests(TestCase):
+    """Órdenes de compra desde recomendaciones: cajas, proveedores y montos en céntimos"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('compras')
+        self.gloria = Supplier.objects.create(name='Gloria S.A.', ruc='20100190797')
+        self.alicorp = Supplier.objects.create(name='Alicorp', ruc='20100055237')
+        self.milk = self.product('LECHE', self.gloria, 12, '2.35')
+        self.candy = self.product('CARAMELO', self.gloria, 1, '0.10')
+        self.oil = self.product('ACEITE', self.alicorp, 6, '10.00')
+        self.loose = self.product('SUELTO', None, 1, '1.00')
+        self.pending = self.product('PENDIENTE', self.alicorp, 1, '3.00')
+        order = PurchaseOrder.objects.create(order_number='PO000007', supplier=self.alicorp, status='APPROVED')
+        PurchaseOrderItem.objects.create(
+            purchase_order=order, product=self.pending, quantity_ordered=5, unit_price=Decimal('3.00')
+        )
+
+    @staticmethod
+    def product(code, supplier, units_per_box, cost_price):
+        product = create_product(code, supplier=supplier, units_per_box=units_per_box)
+        Product.objects.filter(pk=product.pk).update(cost_price=Decimal(cost_price))
+        return product
+
+    def recommendations(self):
+        return [
+            {'product_id': product.pk, 'needs_reorder': needs, 'suggested_order_quantity': quantity,
+             'priority': priority}
+            for product, needs, quantity, priority in [
+                (self.milk, True, 13, 'HIGH'),
+                (self.candy, True, 7, 'LOW'),
+                (self.oil, True, 1, 'HIGH'),
+                (self.loose, True, 5, 'HIGH'),
+                (self.pending, True, 3, 'HIGH'),
+                (create_product('SOBRA'), False, 9, 'HIGH'),
+            ]
+        ]
+
+    def test_generate_groups_by_supplier_rounding_to_boxes(self):
+        result = PurchaseOrderGenerator().generate(self.recommendations(), user=self.user)
+
+        self.assertEqual((result['orders_created'], result['items'], result['units']), (2, 3, 37))
+        self.assertEqual(result['skipped'], {'sin_proveedor': [self.loose.pk], 'orden_abierta': [self.pending.pk]})
+        # 24 x 2.35 + 7 x 0.10 = 57.10; IGV 18% de 5710 céntimos = 1027.8 -> 10.28
+        self.assertEqual(result['orders'][0], {
+            'supplier_id': self.gloria.pk, 'order_number': 'PO000008', 'items': 2, 'units': 31,
+            'subtotal': 57.10, 'tax': 10.28, 'total': 67.38,
+        })
+        self.assertEqual(result['total'], 138.18)
+
+        order = PurchaseOrder.objects.get(order_number='PO000009')
+        self.assertEqual((order.supplier, order.status, order.created_by), (self.alicorp, 'DRAFT', self.user))
+        self.assertEqual((order.subtotal, order.tax, order.total), (Decimal('60.00'), Decimal('10.80'), Decimal('70.80')))
+        items = {
+            item.product_id: (item.quantity_ordered, item.unit_price, item.total_price)
+            for item in PurchaseOrderItem.objects.filter(purchase_order__order_number='PO000008')
+        }
+        self.assertEqual(items, {
+            self.milk.pk: (24, Decimal('2.35'), Decimal('56.40')),
+            self.candy.pk: (7, Decimal('0.10'), Decimal('0.70')),
+        })
+
+    def test_priorities_and_dry_run(self):
+        result = PurchaseOrderGenerator().generate(self.recommendations(), priorities=['low'], dry_run=True)
+
+        self.assertEqual((result['orders_created'], result['items']), (0, 1))
+        self.assertIsNone(result['orders'][0]['order_number'])
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+    def test_open_orders_can_be_included(self):
+        lines, skipped = PurchaseOrderGenerator(skip_open_orders=False).build_lines(self.recommendations())
+
+        self.assertIn(self.pending.pk, set(lines['product_id']))
+        self.assertNotIn('orden_abierta', skipped)
@@ -5,7 +5,7 @@ from rest_framework.routers import DefaultRouter
 from django.http import JsonResponse
 from .views import (
     StockMovementViewSet, PurchaseOrderViewSet, 
-    InventoryCountViewSet, InventoryReportsViewSet
+    InventoryCountViewSet, InventoryReportsViewSet, StockSnapshotViewSet, StockLotViewSet
 )
 
 def inventory_test(request):
@@ -13,10 +13,16 @@ def inventory_test(request):
         'message': 'Inventory API funcionando',
         'endpoints': {
             'stock_movements': '/api/inventory/stock-movements/',
+            'stock_snapshots': '/api/inventory/stock-snapshots/',
+            'stock_as_of': '/api/inventory/stock-snapshots/as_of/?date=YYYY-MM-DD',
+            'stock_series': '/api/inventory/stock-snapshots/series/?product=ID',
+            'stock_lots': '/api/inventory/stock-lots/',
             'purchase_orders': '/api/inventory/purchase-orders/',
+            'auto_purchase_orders': '/api/inventory/purchase-orders/auto_generate/',
             'inventory_counts': '/api/inventory/inventory-counts/',
             'reports': '/api/inventory/reports/',
             'low_stock_report': '/api/inventory/reports/low_stock/',
+            'expiring_report': '/api/inventory/reports/expiring_products/?days=7',
             'bulk_adjust': '/api/inventory/reports/bulk_adjust_stock/'
         }
     })
@@ -25,6 +31,8 @@ app_name = 'inventory'
 
 router = DefaultRouter()
 router.register(r'stock-movements', StockMovementViewSet)
+router.register(r'stock-snapshots', StockSnapshotViewSet)
+router.register(r'stock-lots', StockLotViewSet)
 router.register(r'purchase-orders', PurchaseOrderViewSet)
 router.register(r'inventory-counts', InventoryCountViewSet)
 router.register(r'reports', InventoryReportsViewSet, basename='reports')
@@ -5,17 +5,29 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q, Sum, Count
+from django.utils import timezone
 from datetime import datetime, timedelta
+import logging
 
-from .models import StockMovement, PurchaseOrder, PurchaseOrderItem, InventoryCount, InventoryCountItem
+from apps.common.fieldsets import SparseFieldsetMixin
+from .models import (
+    StockMovement, PurchaseOrder, PurchaseOrderItem, InventoryCount, InventoryCountItem,
+    StockSnapshot, StockLot
+)
 from .serializers import (
     StockMovementSerializer, PurchaseOrderSerializer, PurchaseOrderItemSerializer,
     InventoryCountSerializer, InventoryCountItemSerializer, StockAdjustmentSerializer,
-    LowStockReportSerializer
+    LowStockReportSerializer, StockSnapshotSerializer, StockLotSerializer
 )
+from .replenishment import PurchaseOrderGenerator
+from .counting import InventoryCountService, InventoryCountError, parse_count_file
+from .snapshots import stock_as_of, stock_series
+from .lots import default_expiration_date, expiring_lots, fefo_order, EXPIRY_WARNING_DAYS
 from apps.products.models import Product
 
-class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
+logger = logging.getLogger(__name__)
+
+class StockMovementViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet para movimientos de stock"""
     queryset = StockMovement.objects.all()
     serializer_class = StockMovementSerializer
@@ -45,18 +57,16 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
                 from datetime import datetime
                 date_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
                 queryset = queryset.filter(movement_date__date__gte=date_obj)
-                print(f"  ✅ Filtrado movimientos desde: {date_obj}")
             except ValueError:
-                print(f"  ❌ Fecha inválida date_from: {date_from}")
+                logger.debug('Fecha inválida', extra={'date_from': date_from})
 
         if date_to and date_to.strip():
             try:
                 from datetime import datetime
                 date_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
                 queryset = queryset.filter(movement_date__date__lte=date_obj)
-                print(f"  ✅ Filtrado movimientos hasta: {date_obj}")
             except ValueError:
-                print(f"  ❌ Fecha inválida date_to: {date_to}")
+                logger.debug('Fecha inválida', extra={'date_to': date_to})
         
         return queryset.order_by('-movement_date')
     
@@ -87,6 +97,130 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
             'by_reason': list(by_reason)
         })
 
+class StockSnapshotViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet para el stock histórico (fotos diarias al cierre)"""
+    queryset = StockSnapshot.objects.select_related('product')
+    serializer_class = StockSnapshotSerializer
+    permission_classes = []
+    
+    def parse_date(self, value, param):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            raise ValueError(f'Parámetro {param} inválido. Use YYYY-MM-DD')
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        product = self.request.query_params.get('product')
+        snapshot_date = self.request.query_params.get('date')
+        
+        if product:
+            queryset = queryset.filter(product_id=product)
+        
+        if snapshot_date:
+            try:
+                queryset = queryset.filter(snapshot_date=self.parse_date(snapshot_date, 'date'))
+            except ValueError:
+                logger.debug('Fecha inválida', extra={'date': snapshot_date})
+        
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def as_of(self, request):
+        """Stock de los productos al cierre de una fecha (?date=YYYY-MM-DD)
+        
+        Usa la última foto disponible en o antes de la fecha. Filtros opcionales:
+        product (id) y category (id).
+        """
+        try:
+            on_date = self.parse_date(request.query_params.get('date'), 'date')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        products = Product.objects.all()
+        product = request.query_params.get('product')
+        category = request.query_params.get('category')
+        if product:
+            products = products.filter(id=product)
+        if category:
+            products = products.filter(category_id=category)
+        
+        snapshot_date, snapshots = stock_as_of(
+            on_date, products if product or category else None
+        )
+        if snapshot_date is None:
+            return Response(
+                {'error': 'No hay fotos de stock para esa fecha'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        snapshots = snapshots.select_related('product').order_by('product_id')
+        return Response({
+            'requested_date': on_date,
+            'snapshot_date': snapshot_date,
+            'products': snapshots.count(),
+            'total_units': snapshots.aggregate(total=Sum('closing_stock'))['total'] or 0,
+            'out_of_stock': snapshots.filter(closing_stock__lte=0).count(),
+            'results': StockSnapshotSerializer(snapshots, many=True).data
+        })
+    
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """Serie diaria de stock de un producto (?product=&date_from=&date_to=)"""
+        product = request.query_params.get('product')
+        if not product:
+            return Response(
+                {'error': 'Se requiere el parámetro product'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            product = int(product)
+        except ValueError:
+            return Response({'error': 'Parámetro product inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            date_from = request.query_params.get('date_from')
+            date_to = request.query_params.get('date_to')
+            date_from = self.parse_date(date_from, 'date_from') if date_from else None
+            date_to = self.parse_date(date_to, 'date_to') if date_to else None
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        series = stock_series(product, date_from, date_to).values(
+            'snapshot_date', 'closing_stock', 'units_in', 'units_out'
+        )
+        series = list(series)
+        
+        return Response({
+            'product_id': product,
+            'date_from': series[0]['snapshot_date'] if series else date_from,
+            'date_to': series[-1]['snapshot_date'] if series else date_to,
+            'days_out_of_stock': sum(1 for day in series if day['closing_stock'] <= 0),
+            'series': series
+        })
+
+class StockLotViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    """ViewSet para lotes (vencimientos); al crear, la cantidad disponible es la inicial"""
+    queryset = StockLot.objects.select_related('product')
+    serializer_class = StockLotSerializer
+    permission_classes = []
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        product = self.request.query_params.get('product')
+        available = self.request.query_params.get('available')
+        
+        if product:
+            queryset = queryset.filter(product_id=product)
+        
+        if available and available.lower() in ('1', 'true', 'yes'):
+            queryset = queryset.filter(quantity__gt=0)
+        
+        return queryset.order_by('product_id', *fefo_order())
+
 class PurchaseOrderViewSet(viewsets.ModelViewSet):
     """ViewSet para órdenes de compra"""
     queryset = PurchaseOrder.objects.all()
@@ -124,6 +258,13 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         else:
             order_number = "PO000001"
         
+        serializer.save(
+            order_number=order_number,
+            created_by=self.get_order_user()
+        )
+    
+    def get_order_user(self):
+        """Usuario que figura como creador de la orden"""
         # CORRECCIÓN: Verificar si hay usuario autenticado
         created_by = None
         if hasattr(self.request, 'user') and self.request.user.is_authenticated:
@@ -149,9 +290,49 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
                     created_by.set_password('admin123')
                     created_by.save()
         
-        serializer.save(
-            order_number=order_number,
-            created_by=created_by
+        return created_by
+    
+    @action(detail=False, methods=['post'])
+    def auto_generate(self, request):
+        """Genera órdenes en borrador por proveedor a partir del pronóstico de demanda
+        
+        Parámetros: days_ahead (30), priorities (lista, opcional), dry_run (false),
+        include_open_orders (false: omite productos con una orden abierta).
+        """
+        from apps.ml_models.predictor import DemandPredictor
+        
+        try:
+            days_ahead = int(request.data.get('days_ahead', 30))
+            priorities = request.data.get('priorities') or None
+            dry_run = str(request.data.get('dry_run', False)).lower() in ('1', 'true', 'yes')
+            include_open = str(request.data.get('include_open_orders', False)).lower() in ('1', 'true', 'yes')
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'Parámetros inválidos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            policy = DemandPredictor().reorder_policy(days_ahead=days_ahead)
+            
+            generator = PurchaseOrderGenerator(skip_open_orders=not include_open)
+            result = generator.generate(
+                policy,
+                user=None if dry_run else self.get_order_user(),
+                priorities=priorities,
+                dry_run=dry_run,
+                notes=f'Generada automáticamente (pronóstico {days_ahead} días)'
+            )
+        except Exception as e:
+            logger.exception("Error generando órdenes de compra automáticas")
+            return Response(
+                {'error': f'Error generando órdenes: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return Response(
+            {'success': True, **result},
+            status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
         )
     
     @action(detail=True, methods=['post'])
@@ -187,6 +368,22 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         
         items_data = request.data.get('items', [])
         
+        # Vencimientos (YYYY-MM-DD) validados antes de recibir para no aplicar la orden a medias
+        invalid_dates = []
+        for item_data in items_data:
+            expiration_date = item_data.get('expiration_date')
+            if not expiration_date:
+                continue
+            try:
+                datetime.strptime(expiration_date, '%Y-%m-%d')
+            except (TypeError, ValueError):
+                invalid_dates.append({'item_id': item_data.get('item_id'), 'expiration_date': expiration_date})
+        if invalid_dates:
+            return Response(
+                {'error': 'Fecha de vencimiento inválida (formato YYYY-MM-DD)', 'items': invalid_dates},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         for item_data in items_data:
             try:
                 item = order.items.get(id=item_data['item_id'])
@@ -195,6 +392,13 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
                 if received_quantity > (item.quantity_ordered - item.quantity_received):
                     continue
                 
+                # Vencimiento del lote: informado (YYYY-MM-DD) o estimado con expiration_days
+                expiration_date = item_data.get('expiration_date')
+                expiration_date = (
+                    datetime.strptime(expiration_date, '%Y-%m-%d').date()
+                    if expiration_date else default_expiration_date(item.product)
+                )
+                
                 # Actualizar item
                 item.quantity_received += received_quantity
                 if item.quantity_received >= item.quantity_ordered:
@@ -208,6 +412,17 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
                 product.current_stock += received_quantity
                 product.save()
                 
+                # Registrar el lote recibido
+                StockLot.objects.create(
+                    product=product,
+                    purchase_order_item=item,
+                    lot_number=item_data.get('lot_number', ''),
+                    expiration_date=expiration_date,
+                    initial_quantity=received_quantity,
+                    quantity=received_quantity,
+                    unit_cost=item.unit_price
+                )
+                
                 # Crear movimiento de stock
                 StockMovement.objects.create(
                     product=product,
@@ -265,120 +480,93 @@ class InventoryCountViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-scheduled_date')
     
     def perform_create(self, serializer):
-        # Generar número de orden
-        last_order = PurchaseOrder.objects.order_by('-id').first()
-        if last_order:
-            order_number = f"PO{str(int(last_order.order_number[2:]) + 1).zfill(6)}"
+        # Generar número de conteo
+        last_count = InventoryCount.objects.order_by('-id').first()
+        if last_count and last_count.count_number[3:].isdigit():
+            count_number = f"CNT{str(int(last_count.count_number[3:]) + 1).zfill(6)}"
         else:
-            order_number = "PO000001"
+            count_number = f"CNT{str((last_count.id if last_count else 0) + 1).zfill(6)}"
         
-        # CORRECCIÓN: Verificar si hay usuario autenticado
-        created_by = None
-        if hasattr(self.request, 'user') and self.request.user.is_authenticated:
-            created_by = self.request.user
-        else:
-            # Si no hay usuario autenticado, usar el primer superusuario disponible
-            from django.contrib.auth.models import User
-            created_by = User.objects.filter(is_superuser=True).first()
-            
-            # Si no hay superusuarios, crear un usuario por defecto
-            if not created_by:
-                created_by, created = User.objects.get_or_create(
-                    username='admin',
-                    defaults={
-                        'email': 'admin@minimarket.com',
-                        'first_name': 'Admin',
-                        'last_name': 'Sistema',
-                        'is_superuser': True,
-                        'is_staff': True
-                    }
-                )
-                if created:
-                    created_by.set_password('admin123')
-                    created_by.save()
+        responsible = serializer.validated_data.get('responsible')
+        if responsible is None and hasattr(self.request, 'user') and self.request.user.is_authenticated:
+            responsible = self.request.user
         
         serializer.save(
-            order_number=order_number,
-            created_by=created_by
+            count_number=count_number,
+            responsible=responsible
         )
     
+    def get_request_user(self):
+        user = getattr(self.request, 'user', None)
+        return user if user is not None and user.is_authenticated else None
+    
     @action(detail=True, methods=['post'])
     def start_count(self, request, pk=None):
-        """Iniciar conteo de inventario"""
-        count = self.get_object()
+        """Iniciar conteo: foto de las cantidades del sistema de todos los productos activos
         
-        if count.status != 'PLANNED':
-            return Response(
-                {'error': 'Solo se pueden iniciar conteos planificados'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Crear items de conteo para todos los productos activos
-        products = Product.objects.filter(is_active=True)
+        Acepta category (ID) opcional para contar solo una categoría.
+        """
+        count = self.get_object()
         
-        for product in products:
-            InventoryCountItem.objects.create(
-                inventory_count=count,
-                product=product,
-                system_quantity=product.current_stock
-            )
+        product_filter = None
+        category = request.data.get('category')
+        if category:
+            product_filter = Q(category_id=category)
         
-        count.status = 'IN_PROGRESS'
-        count.start_date = datetime.now()
-        count.save()
+        try:
+            items_count = InventoryCountService(count, self.get_request_user()).start(product_filter)
+        except InventoryCountError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
             'success': True,
-            'message': f'Conteo {count.count_number} iniciado con {products.count()} productos',
-            'items_count': products.count()
+            'message': f'Conteo {count.count_number} iniciado con {items_count} productos',
+            'items_count': items_count
         })
     
     @action(detail=True, methods=['post'])
-    def complete_count(self, request, pk=None):
-        """Completar conteo y ajustar inventario"""
+    def submit_counts(self, request, pk=None):
+        """Registrar cantidades contadas en bloque
+        
+        Acepta un archivo CSV en 'file' (columnas product_id, code o barcode,
+        counted_quantity y notes opcional) o una lista JSON en 'items' con los
+        mismos campos.
+        """
         count = self.get_object()
         
-        if count.status != 'IN_PROGRESS':
+        if 'file' in request.FILES:
+            try:
+                entries = parse_count_file(request.FILES['file'])
+            except (UnicodeDecodeError, ValueError) as e:
+                return Response(
+                    {'error': f'No se pudo leer el archivo: {str(e)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            entries = request.data.get('items')
+        
+        if not isinstance(entries, list) or not entries:
             return Response(
-                {'error': 'El conteo debe estar en progreso'},
+                {'error': 'Se requiere un archivo (file) o una lista de items'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        adjustments_made = 0
+        try:
+            result = InventoryCountService(count, self.get_request_user()).submit(entries)
+        except InventoryCountError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Procesar diferencias
-        for item in count.items.all():
-            if item.counted_quantity is not None and item.difference != 0:
-                product = item.product
-                stock_before = product.current_stock
-                product.current_stock = item.counted_quantity
-                product.save()
-                
-                # Crear movimiento de stock
-                if item.difference > 0:
-                    movement_type = 'IN'
-                    quantity = item.difference
-                else:
-                    movement_type = 'OUT'
-                    quantity = abs(item.difference)
-                
-                StockMovement.objects.create(
-                    product=product,
-                    movement_type=movement_type,
-                    reason='INVENTORY_ADJUST',
-                    quantity=quantity,
-                    stock_before=stock_before,
-                    stock_after=product.current_stock,
-                    notes=f'Ajuste por conteo {count.count_number}',
-                    reference_document=count.count_number,
-                    user=request.user
-                )
-                
-                adjustments_made += 1
+        return Response({'success': True, **result})
+    
+    @action(detail=True, methods=['post'])
+    def complete_count(self, request, pk=None):
+        """Completar conteo y ajustar inventario (una sola transacción)"""
+        count = self.get_object()
         
-        count.status = 'COMPLETED'
-        count.end_date = datetime.now()
-        count.save()
+        try:
+            adjustments_made = InventoryCountService(count, self.get_request_user()).complete()
+        except InventoryCountError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
             'success': True,
@@ -447,6 +635,43 @@ class InventoryReportsViewSet(viewsets.ViewSet):
             'products': serializer.data
         })
     
+    @action(detail=False, methods=['get'])
+    def expiring_products(self, request):
+        """Lotes con saldo que vencen en los próximos días (?days=7&include_expired=true)
+        
+        Una sola consulta por rango sobre el índice de vencimientos.
+        """
+        try:
+            days = int(request.query_params.get('days', EXPIRY_WARNING_DAYS))
+        except ValueError:
+            return Response({'error': 'Parámetro days inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        include_expired = request.query_params.get('include_expired', '').lower() in ('1', 'true', 'yes')
+        
+        today = timezone.localdate()
+        lots = list(
+            expiring_lots(days, include_expired=include_expired, on_date=today)
+            .order_by('expiration_date', 'product_id')
+            .values(
+                'id', 'lot_number', 'expiration_date', 'quantity', 'unit_cost',
+                'product_id', 'product__code', 'product__name', 'product__category__name'
+            )
+        )
+        
+        for lot in lots:
+            lot['days_to_expiry'] = (lot['expiration_date'] - today).days
+            lot['value_at_cost'] = round(float(lot['unit_cost'] or 0) * lot['quantity'], 2)
+        
+        return Response({
+            'report_type': 'expiring_products',
+            'generated_at': timezone.now(),
+            'days': days,
+            'lots_count': len(lots),
+            'products_count': len({lot['product_id'] for lot in lots}),
+            'total_units': sum(lot['quantity'] for lot in lots),
+            'total_value_at_cost': round(sum(lot['value_at_cost'] for lot in lots), 2),
+            'lots': lots
+        })
+    
     @action(detail=False, methods=['post'])
     def bulk_adjust_stock(self, request):
         """Ajuste masivo de stock"""
@@ -0,0 +1,260 @@
+# Archivo: minimarket_ml_system/backend/apps/ml_models/backtesting.py
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from functools import partial
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+from joblib import Parallel, delayed
+from django.conf import settings
+from django.db.models import Count, Max
+from apps.sales.models import SaleItem
+from apps.inventory.models import StockSnapshot
+from .data_processor import DataProcessor, PRODUCT_STATS
+from .trainer import MLTrainer
+from .models import MLModel, ModelPerformance
+
+logger = logging.getLogger(__name__)
+
+# Cambia cuando cambia cómo se arma el panel (invalida los paneles en caché)
+PANEL_FORMAT = 2
+
+# Lags, promedios móviles y tendencia: dependen de las ventas de días anteriores
+HISTORY_FEATURE = re.compile(r'_(lag|ma|trend)_\d+$')
+
+
+class Backtester:
+    """Backtesting de origen móvil (rolling origin) para los modelos de demanda
+
+    El panel de características se construye una sola vez (y se guarda en disco
+    por versión de datos); cada origen filtra filas por fecha, entrena con el
+    pasado y evalúa el horizonte siguiente. Lo que el panel calcula con datos
+    posteriores al origen se rearma por origen (origin_features): estadísticas
+    por producto y lags del horizonte, que se congelan en el origen como en la
+    predicción real (MLTrainer.origin_features). Los orígenes se ejecutan en paralelo.
+    """
+
+    def __init__(self, data_processor=None, cache_dir=None):
+        self.data_processor = data_processor or DataProcessor()
+        self.cache_dir = cache_dir or settings.PROCESSED_DATA_PATH
+        self.panel = None
+        self.X = None
+        self.y = None
+        self.dates = None
+        self.results = []
+
+    def get_data_version(self, days_back):
+        """Huella de los datos de ventas y de stock: cambia cuando se registran o anulan ventas o se agregan fotos de stock"""
+        stats = SaleItem.objects.aggregate(
+            items=Count('id'),
+            last_item=Max('id'),
+            last_update=Max('sale__updated_at')
+        )
+        snapshots = StockSnapshot.objects.aggregate(rows=Count('id'), last_date=Max('snapshot_date'))
+        raw = (
+            f"{PANEL_FORMAT}|{days_back}|{datetime.now().date()}|{stats['items']}|{stats['last_item']}|{stats['last_update']}"
+            f"|{snapshots['rows']}|{snapshots['last_date']}"
+        )
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()[:12]
+
+    def load_feature_panel(self, days_back=730, refresh=False):
+        """Obtiene el panel de características desde caché o lo construye una vez"""
+        version = self.get_data_version(days_back)
+        cache_path = os.path.join(self.cache_dir, f'feature_panel_{days_back}_{version}.pkl')
+
+        if not refresh and os.path.exists(cache_path):
+            logger.info("Panel de características cargado desde caché: %s", cache_path)
+            df = pd.read_pickle(cache_path)
+        else:
+            df = self.data_processor.process_complete_dataset(days_back=days_back)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            df.to_pickle(cache_path)
+            logger.info("Panel de características guardado en caché: %s", cache_path)
+            self.prune_feature_panels(days_back, keep=cache_path)
+
+        X, y = self.data_processor.prepare_features_target(df)
+
+        self.panel = df
+        self.X = X
+        self.y = y
+        self.dates = pd.to_datetime(df.loc[X.index, 'date'])
+        return self.X, self.y
+
+    def prune_feature_panels(self, days_back, keep):
+        """Elimina los paneles de versiones anteriores (la versión incluye la fecha, cambia cada día)"""
+        pattern = os.path.join(self.cache_dir, f'feature_panel_{days_back}_*.pkl')
+        for path in glob.glob(pattern):
+            if os.path.abspath(path) == os.path.abspath(keep):
+                continue
+            try:
+                os.remove(path)
+                logger.info("Panel de características anterior eliminado: %s", path)
+            except OSError as e:
+                logger.warning("No se pudo eliminar el panel %s: %s", path, e)
+
+    def generate_cutoffs(self, n_cutoffs=52, step_days=7, horizon_days=7, min_train_days=60):
+        """Orígenes semanales (por defecto) retrocediendo desde el final del panel"""
+        if self.dates is None:
+            raise ValueError("Primero debe cargarse el panel de características")
+
+        first_date = self.dates.min().normalize()
+        last_cutoff = self.dates.max().normalize() - timedelta(days=horizon_days)
+        earliest = first_date + timedelta(days=min_train_days)
+
+        cutoffs = []
+        cutoff = last_cutoff
+        while cutoff >= earliest and len(cutoffs) < n_cutoffs:
+            cutoffs.append(cutoff)
+            cutoff -= timedelta(days=step_days)
+
+        return sorted(cutoffs)
+
+    def run(self, model_names=None, n_cutoffs=52, step_days=7, horizon_days=7,
+            min_train_days=60, n_jobs=-1):
+        """Ejecuta el backtesting para cada modelo y origen"""
+        if self.X is None:
+            self.load_feature_panel()
+
+        trainer = MLTrainer()
+        trainer.prepare_models()
+        model_names = model_names or list(trainer.models.keys())
+
+        unknown = set(model_names) - set(trainer.models.keys())
+        if unknown:
+            raise ValueError(f"Modelos no disponibles: {sorted(unknown)}")
+
+        cutoffs = self.generate_cutoffs(n_cutoffs, step_days, horizon_days, min_train_days)
+        if not cutoffs:
+            raise ValueError("No hay suficiente historia para generar orígenes de backtesting")
+
+        logger.info(
+            "Iniciando backtesting",
+            extra={'models': len(model_names), 'cutoffs': len(cutoffs), 'horizon_days': horizon_days}
+        )
+
+        # Arreglos numéricos compartidos por todos los orígenes (joblib los mapea en memoria)
+        X = self.X.to_numpy(dtype=float)
+        y = self.y.to_numpy(dtype=float)
+        origin = self.dates.min().normalize()
+        day_index = (self.dates - origin).dt.days.to_numpy()
+
+        rows = self.panel.loc[self.X.index]
+        columns = {name: index for index, name in enumerate(self.X.columns)}
+        features = partial(
+            MLTrainer.origin_features,
+            stats_spec=PRODUCT_STATS,
+            products=pd.factorize(rows['product_id'])[0],
+            stats_source=rows[list(PRODUCT_STATS)].to_numpy(dtype=float),
+            stats_columns={
+                f'{source}_{stat}': columns[f'{source}_{stat}']
+                for source, stats in PRODUCT_STATS.items() for stat in stats
+                if f'{source}_{stat}' in columns
+            },
+            history_columns=np.array(
+                [index for name, index in columns.items() if HISTORY_FEATURE.search(name)], dtype=int
+            ),
+        )
+
+        tasks = []
+        for model_name in model_names:
+            model = trainer.models[model_name]
+            # El paralelismo se aplica entre orígenes, no dentro de cada modelo
+            if 'regressor__n_jobs' in model.get_params():
+                model.set_params(regressor__n_jobs=1)
+
+            for cutoff in cutoffs:
+                tasks.append((model_name, cutoff, model))
+
+        outputs = Parallel(n_jobs=n_jobs)(
+            delayed(MLTrainer.evaluate_origin)(
+                model, X, y, day_index, (cutoff - origin).days, horizon_days, features
+            )
+            for model_name, cutoff, model in tasks
+        )
+
+        self.results = [
+            dict(metrics, model_name=model_name, cutoff=cutoff.date(), horizon_days=horizon_days)
+            for (model_name, cutoff, _), metrics in zip(tasks, outputs)
+            if metrics is not None
+        ]
+
+        logger.info("Evaluaciones completadas", extra={'evaluations': len(self.results)})
+        return self.results
+
+    def summarize(self):
+        """Resumen por modelo de las métricas de todos los orígenes"""
+        if not self.results:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(self.results)
+        summary = df.groupby('model_name').agg(
+            cutoffs=('cutoff', 'count'),
+            mae_mean=('MAE', 'mean'),
+            mae_std=('MAE', 'std'),
+            rmse_mean=('RMSE', 'mean'),
+            mape_mean=('MAPE', 'mean')
+        ).round(4).sort_values('mae_mean')
+
+        return summary
+
+    def save_results(self, ml_model=None, user=None):
+        """Guarda las métricas por origen en ModelPerformance
+
+        Si no se indica un modelo registrado, se crea un registro MLModel (inactivo)
+        por cada configuración evaluada para agrupar sus resultados.
+        """
+        if not self.results:
+            return []
+
+        df = pd.DataFrame(self.results)
+        period = 'WEEKLY' if df['horizon_days'].iloc[0] == 7 else 'DAILY'
+        performances = []
+
+        for model_name, group in df.groupby('model_name'):
+            target_model = ml_model
+            if target_model is None:
+                target_model = MLModel.objects.create(
+                    name=f"{model_name}_backtest",
+                    model_type=model_name.upper(),
+                    version=datetime.now().strftime("backtest-%Y%m%d-%H%M%S"),
+                    description=f"Backtesting de origen móvil con {len(group)} orígenes",
+                    parameters=json.dumps({
+                        'cutoffs': [c.isoformat() for c in group['cutoff']],
+                        'horizon_days': int(group['horizon_days'].iloc[0]),
+                        'training_samples': len(self.X)
+                    }),
+                    metrics=json.dumps({
+                        'MAE': round(float(group['MAE'].mean()), 4),
+                        'RMSE': round(float(group['RMSE'].mean()), 4),
+                        'MAPE': round(float(group['MAPE'].mean()), 2)
+                    }),
+                    training_data_size=len(self.X),
+                    is_active=False,
+                    is_default=False,
+                    created_by=user
+                )
+
+            for row in group.itertuples():
+                performances.append(ModelPerformance(
+                    model=target_model,
+                    evaluation_date=row.cutoff,
+                    evaluation_period=period,
+                    mae=row.MAE,
+                    rmse=row.RMSE,
+                    mape=min(row.MAPE, 999.99),
+                    r2_score=max(min(row.R2, 1), -9.9999),
+                    predictions_count=row.test_samples,
+                    notes=(
+                        f"Backtest {model_name}: origen {row.cutoff}, horizonte "
+                        f"{row.horizon_days} días, {row.train_samples} muestras de entrenamiento"
+                    )
+                ))
+
+        ModelPerformance.objects.bulk_create(performances, batch_size=500)
+        logger.info("Resultados guardados en ModelPerformance", extra={'rows': len(performances)})
+        return performances
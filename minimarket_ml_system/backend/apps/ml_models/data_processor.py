@@ -5,11 +5,35 @@ import numpy as np
 from datetime import datetime, timedelta
 from django.db.models import Sum, Count, Avg, F
 from apps.products.models import Product
-from apps.sales.models import Sale, SaleItem, DailySummary
+from apps.sales.models import Sale, SaleItem, DailySummary, business_date_range
+from apps.inventory.models import StockSnapshot
 import warnings
 from decimal import Decimal
+import logging
+from apps.monitoring.tracing import span
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
+# Feriados aproximados (mes, día) de la característica is_holiday
+HOLIDAYS = ((1, 1), (7, 28), (8, 30), (12, 24), (12, 25), (12, 31))
+HOLIDAY_KEYS = [month * 100 + day for month, day in HOLIDAYS]
+
+
+# Estadísticas por producto (create_product_features); el backtesting las
+# recalcula en cada origen solo con las filas de entrenamiento
+PRODUCT_STATS = {
+    'quantity_sold': ['mean', 'std', 'min', 'max'],
+    'revenue': ['mean', 'std'],
+    'transactions': ['mean', 'std'],
+}
+
+
+def holiday_flags(dates):
+    """Arreglo 0/1 de feriados para una Series, DatetimeIndex o lista de fechas"""
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    return np.isin(dates.month * 100 + dates.day, HOLIDAY_KEYS).astype(int)
+
 class DataProcessor:
     """Clase para procesar datos históricos y prepararlos para ML"""
     
@@ -18,9 +42,10 @@ class DataProcessor:
         self.features = None
         self.target = None
     
+    @span('data.extract_sales_data')
     def extract_sales_data(self, days_back=730):
         """Extrae datos de ventas de los últimos N días"""
-        print(f"Extrayendo datos de ventas de los últimos {days_back} días...")
+        logger.debug("Extrayendo datos de ventas de los últimos %s días", days_back)
         
         # Fecha límite
         end_date = datetime.now().date()
@@ -28,18 +53,18 @@ class DataProcessor:
         
         # Obtener ventas agrupadas por producto y fecha
         sales_data = SaleItem.objects.filter(
-            sale__sale_date__date__gte=start_date,
+            business_date_range(start_date, prefix='sale__'),
             sale__status='COMPLETED'
         ).values(
             'product__id',
             'product__name',
             'product__category__name',
-            'sale__sale_date__date'
+            'sale__business_date'
         ).annotate(
             quantity_sold=Sum('quantity'),
             revenue=Sum('total_price'),
             transactions=Count('sale__id', distinct=True)
-        ).order_by('product__id', 'sale__sale_date__date')
+        ).order_by('product__id', 'sale__business_date')
         
         # Convertir a DataFrame
         df = pd.DataFrame(sales_data)
@@ -59,12 +84,13 @@ class DataProcessor:
             if col in df.columns:
                 df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
         
-        print(f"✓ Datos extraídos: {len(df)} registros")
+        logger.info("Datos extraídos", extra={'rows': len(df), 'days_back': days_back})
         return df
     
+    @span('data.create_time_series_features')
     def create_time_series_features(self, df):
         """Crea características temporales para cada producto"""
-        print("Creando características temporales...")
+        logger.debug("Creando características temporales")
         
         # Crear rango completo de fechas
         date_range = pd.date_range(
@@ -114,12 +140,13 @@ class DataProcessor:
         merged_df['is_month_start'] = merged_df['date'].dt.is_month_start.astype(int)
         merged_df['is_month_end'] = merged_df['date'].dt.is_month_end.astype(int)
         
-        print(f"✓ Características temporales creadas: {len(merged_df)} registros")
+        logger.info("Características temporales creadas", extra={'rows': len(merged_df)})
         return merged_df
     
+    @span('data.create_lag_features')
     def create_lag_features(self, df, target_col='quantity_sold', lags=[1, 7, 14, 30]):
         """Crea características de lag (valores pasados)"""
-        print(f"Creando características de lag para {target_col}...")
+        logger.debug("Creando características de lag para %s", target_col)
         
         # Ordenar por producto y fecha
         df = df.sort_values(['product_id', 'date'])
@@ -135,19 +162,25 @@ class DataProcessor:
         for window in [7, 14, 30]:
             df[f'{target_col}_ma_{window}'] = df.groupby('product_id')[target_col].rolling(
                 window=window, min_periods=1
-            ).mean().reset_index(0, drop=True).fillna(0)
+            ).mean().reset_index(0, drop=True)
         
         # Crear características de tendencia
         df[f'{target_col}_trend_7'] = df.groupby('product_id')[target_col].rolling(
             window=7, min_periods=2
-        ).apply(lambda x: np.polyfit(range(len(x)), x, 1)[0] if len(x) > 1 else 0).reset_index(0, drop=True).fillna(0)
+        ).apply(lambda x: np.polyfit(range(len(x)), x, 1)[0] if len(x) > 1 else 0).reset_index(0, drop=True)
+        
+        # Las ventanas terminan el día anterior: la fila no ve su propio target
+        # (igual que el predictor, que las calcula con el historial conocido)
+        rolling_cols = [f'{target_col}_ma_{window}' for window in [7, 14, 30]] + [f'{target_col}_trend_7']
+        df[rolling_cols] = df.groupby('product_id')[rolling_cols].shift(1).fillna(0)
         
-        print(f"✓ Características de lag creadas con {len(lags)} lags")
+        logger.info("Características de lag creadas", extra={'lags': len(lags)})
         return df
     
+    @span('data.create_product_features')
     def create_product_features(self, df):
         """Crea características específicas del producto"""
-        print("Creando características del producto...")
+        logger.debug("Creando características del producto")
         
         # Obtener información de productos
         products_info = Product.objects.values(
@@ -165,11 +198,7 @@ class DataProcessor:
                 products_df[col] = products_df[col].apply(lambda x: float(x) if x is not None else 0.0)
         
         # Calcular características agregadas por producto
-        product_stats = df.groupby('product_id').agg({
-            'quantity_sold': ['mean', 'std', 'min', 'max'],
-            'revenue': ['mean', 'std'],
-            'transactions': ['mean', 'std']
-        }).round(2)
+        product_stats = df.groupby('product_id').agg(PRODUCT_STATS).round(2)
         
         # Aplanar nombres de columnas
         product_stats.columns = ['_'.join(col).strip() for col in product_stats.columns]
@@ -205,12 +234,13 @@ class DataProcessor:
         # Rellenar cualquier NaN restante
         df = df.fillna(0)
         
-        print("✓ Características del producto creadas")
+        logger.info("Características del producto creadas")
         return df
     
+    @span('data.create_seasonal_features')
     def create_seasonal_features(self, df):
         """Crea características estacionales"""
-        print("Creando características estacionales...")
+        logger.debug("Creando características estacionales")
         
         # Características trigonométricas para capturar ciclos
         df['sin_dayofyear'] = np.sin(2 * np.pi * df['dayofyear'] / 365.25)
@@ -234,19 +264,15 @@ class DataProcessor:
         df['season'] = df['month'].apply(get_season)
         
         # Características de feriados aproximados (simplificado)
-        df['is_holiday'] = df['date'].apply(
-            lambda x: 1 if x.month == 12 and x.day in [24, 25, 31] or 
-                           x.month == 1 and x.day == 1 or
-                           x.month == 7 and x.day == 28 or
-                           x.month == 8 and x.day == 30 else 0
-        )
+        df['is_holiday'] = holiday_flags(df['date'])
         
-        print("✓ Características estacionales creadas")
+        logger.info("Características estacionales creadas")
         return df
     
+    @span('data.encode_categorical_features')
     def encode_categorical_features(self, df):
         """Codifica características categóricas"""
-        print("Codificando características categóricas...")
+        logger.debug("Codificando características categóricas")
         
         # One-hot encoding para categorías
         if 'category' in df.columns:
@@ -258,14 +284,61 @@ class DataProcessor:
             season_dummies = pd.get_dummies(df['season'], prefix='season')
             df = pd.concat([df, season_dummies], axis=1)
         
-        print("✓ Características categóricas codificadas")
+        logger.info("Características categóricas codificadas")
         return df
     
+    @span('data.create_stock_features')
+    def create_stock_features(self, df):
+        """Marca con in_stock los días en que el producto tenía existencias
+        
+        Cruza el panel con las fotos diarias de stock (StockSnapshot) mediante un
+        as-of join: cada fila toma el último cierre conocido en o antes de su
+        fecha. Sin foto se asume disponible; un día con ventas nunca es quiebre.
+        """
+        logger.debug("Creando características de stock")
+        
+        snapshots = pd.DataFrame.from_records(
+            list(
+                StockSnapshot.objects.filter(
+                    product_id__in=df['product_id'].unique().tolist(),
+                    snapshot_date__lte=df['date'].max().date()
+                ).values_list('product_id', 'snapshot_date', 'closing_stock')
+            ),
+            columns=['product_id', 'date', 'closing_stock']
+        )
+        
+        if snapshots.empty:
+            df['in_stock'] = 1
+            logger.info("Sin fotos de stock: se asume disponibilidad total")
+            return df
+        
+        snapshots['date'] = pd.to_datetime(snapshots['date'])
+        snapshots['product_id'] = snapshots['product_id'].astype(df['product_id'].dtype)
+        
+        ordered = df[['product_id', 'date']].reset_index().sort_values('date', kind='stable')
+        joined = pd.merge_asof(
+            ordered,
+            snapshots.sort_values('date'),
+            on='date',
+            by='product_id',
+            direction='backward'
+        ).set_index('index')
+        closing_stock = joined['closing_stock'].reindex(df.index)
+        
+        df['in_stock'] = (
+            closing_stock.isna() | (closing_stock > 0) | (df['quantity_sold'] > 0)
+        ).astype(int)
+        
+        logger.info(
+            "Características de stock creadas",
+            extra={'stockout_days': int((df['in_stock'] == 0).sum())}
+        )
+        return df
+    
+    @span('data.process_complete_dataset')
     def process_complete_dataset(self, days_back=730):
         """Procesa el dataset completo para ML"""
-        print("=" * 50)
-        print("INICIANDO PROCESAMIENTO DE DATOS PARA ML")
-        print("=" * 50)
+        logger.info("Iniciando procesamiento de datos para ML", extra={'days_back': days_back})
         
         try:
             # 1. Extraer datos de ventas
@@ -274,6 +347,9 @@ class DataProcessor:
             # 2. Crear series temporales completas
             df = self.create_time_series_features(df)
             
+            # 2b. Marcar días sin stock (fotos diarias de inventario)
+            df = self.create_stock_features(df)
+            
             # 3. Crear características de lag
             df = self.create_lag_features(df)
             
@@ -290,20 +366,21 @@ class DataProcessor:
             df = self.clean_data(df)
             
             self.processed_data = df
-            print("=" * 50)
-            print("PROCESAMIENTO COMPLETADO EXITOSAMENTE")
-            print(f"Dataset final: {df.shape[0]} filas, {df.shape[1]} columnas")
-            print("=" * 50)
+            logger.info(
+                "Procesamiento completado",
+                extra={'rows': df.shape[0], 'columns': df.shape[1]}
+            )
             
             return df
             
         except Exception as e:
-            print(f"Error en procesamiento: {str(e)}")
+            logger.error("Error en procesamiento: %s", e)
             raise
     
+    @span('data.clean_data')
     def clean_data(self, df):
         """Limpia el dataset final"""
-        print("Limpiando datos...")
+        logger.debug("Limpiando datos")
         
         # Remover filas con valores faltantes en características críticas
         critical_cols = ['quantity_sold', 'product_id', 'date']
@@ -342,17 +419,25 @@ class DataProcessor:
         # Rellenar cualquier NaN restante con 0
         df = df.fillna(0)
         
-        print(f"✓ Datos limpiados: {len(df)} registros finales")
+        logger.info("Datos limpiados", extra={'rows': len(df)})
         return df
     
-    def prepare_features_target(self, df, target_col='quantity_sold', test_size=0.2):
-        """Prepara características y target para entrenamiento"""
-        print(f"Preparando características y target ({target_col})...")
+    @span('data.prepare_features_target')
+    def prepare_features_target(self, df, target_col='quantity_sold', test_size=0.2, mask_stockouts=False):
+        """Prepara características y target para entrenamiento
+        
+        Con mask_stockouts se descartan los días sin stock (in_stock == 0): vender
+        cero por falta de producto no es demanda cero. Está desactivado por
+        defecto: las ventas anteriores al registro de salidas por venta en
+        StockMovement no figuran en las fotos de stock, así que in_stock solo es
+        confiable para el período que cubre ese registro.
+        """
+        logger.debug("Preparando características y target (%s)", target_col)
         
         # Columnas a excluir de las características
         exclude_cols = [
             'product_id', 'product_name', 'date', 'category',
-            target_col, 'revenue', 'transactions'
+            target_col, 'revenue', 'transactions', 'in_stock'
         ]
         
         # Seleccionar características
@@ -366,6 +451,11 @@ class DataProcessor:
         
         # Remover filas donde el target es NaN
         mask = ~y.isnull()
+        if mask_stockouts and 'in_stock' in df.columns:
+            stockouts = mask & (df['in_stock'] == 0)
+            if stockouts.any():
+                logger.info("Días sin stock excluidos del entrenamiento", extra={'rows': int(stockouts.sum())})
+            mask &= df['in_stock'] != 0
         X = X[mask]
         y = y[mask]
         
@@ -373,8 +463,7 @@ class DataProcessor:
         for col in X.columns:
             X[col] = pd.to_numeric(X[col], errors='coerce').fillna(0)
         
-        print(f"✓ Características preparadas: {X.shape[1]} features")
-        print(f"✓ Target preparado: {len(y)} muestras")
+        logger.info("Características y target preparados", extra={'features': X.shape[1], 'samples': len(y)})
         
         self.features = X
         self.target = y
@@ -391,9 +480,9 @@ class DataProcessor:
         """Guarda los datos procesados"""
         if self.processed_data is not None:
             self.processed_data.to_csv(filepath, index=False)
-            print(f"✓ Datos guardados en: {filepath}")
+            logger.info("Datos guardados en %s", filepath)
         else:
-            print("No hay datos procesados para guardar")
+            logger.warning("No hay datos procesados para guardar")
     
     def get_data_summary(self):
         """Retorna un resumen de los datos procesados"""
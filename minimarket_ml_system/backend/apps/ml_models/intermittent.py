@@ -0,0 +1,177 @@
+# Archivo: minimarket_ml_system/backend/apps/ml_models/intermittent.py
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from django.db.models import Sum
+from apps.sales.models import SaleItem, business_date_range
+
+# Umbrales de Syntetos-Boylan para clasificar patrones de demanda
+ADI_CUTOFF = 1.32
+CV2_CUTOFF = 0.49
+
+DEMAND_CLASSES = ['SMOOTH', 'ERRATIC', 'INTERMITTENT', 'LUMPY', 'NO_DEMAND']
+
+# Clases que se pronostican con el modelo rápido en lugar del modelo ML
+FAST_PATH_CLASSES = {'INTERMITTENT', 'LUMPY', 'NO_DEMAND'}
+
+
+def build_demand_matrix(product_ids, days_back=90, end_date=None):
+    """Construye la matriz producto x día de unidades vendidas con una sola consulta
+
+    Retorna (matriz, lista de product_ids, rango de fechas).
+    """
+    if end_date is None:
+        end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=days_back)
+
+    product_ids = list(product_ids)
+    dates = pd.date_range(start=start_date, end=end_date, freq='D')
+    matrix = np.zeros((len(product_ids), len(dates)), dtype=float)
+
+    if not product_ids:
+        return matrix, product_ids, dates
+
+    sales_data = SaleItem.objects.filter(
+        business_date_range(start_date, end_date, prefix='sale__'),
+        product_id__in=product_ids,
+        sale__status='COMPLETED'
+    ).values_list(
+        'product_id', 'sale__business_date'
+    ).annotate(
+        quantity_sold=Sum('quantity')
+    )
+
+    rows = list(sales_data)
+    if rows:
+        df = pd.DataFrame(rows, columns=['product_id', 'date', 'quantity_sold'])
+        row_index = pd.Index(product_ids).get_indexer(df['product_id'])
+        col_index = (pd.to_datetime(df['date']) - dates[0]).dt.days.to_numpy()
+        matrix[row_index, col_index] = df['quantity_sold'].astype(float).to_numpy()
+
+    return matrix, product_ids, dates
+
+
+def classify_demand(matrix):
+    """Clasifica cada fila (producto) por ADI y CV² de forma vectorizada
+
+    Retorna un DataFrame con adi, cv2, mean_daily, std_daily y demand_class por fila.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    n_periods = matrix.shape[1]
+    has_demand = matrix > 0
+    occurrences = has_demand.sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Intervalo promedio entre demandas (ADI)
+        adi = np.where(occurrences > 0, n_periods / occurrences, np.inf)
+
+        # Variabilidad de los tamaños de demanda no nulos (CV²)
+        sizes = np.where(has_demand, matrix, np.nan)
+        size_mean = np.nanmean(sizes, axis=1)
+        size_std = np.nanstd(sizes, axis=1)
+        cv2 = np.where(occurrences > 1, (size_std / size_mean) ** 2, 0.0)
+
+    high_adi = adi >= ADI_CUTOFF
+    high_cv2 = cv2 >= CV2_CUTOFF
+
+    demand_class = np.select(
+        [occurrences == 0, high_adi & high_cv2, high_adi, high_cv2],
+        ['NO_DEMAND', 'LUMPY', 'INTERMITTENT', 'ERRATIC'],
+        default='SMOOTH'
+    )
+
+    return pd.DataFrame({
+        'adi': adi,
+        'cv2': np.nan_to_num(cv2),
+        'mean_daily': matrix.mean(axis=1),
+        'std_daily': matrix.std(axis=1),
+        'demand_class': demand_class
+    })
+
+
+class IntermittentDemandForecaster:
+    """Pronóstico de demanda intermitente (Croston, SBA, TSB) para muchos productos a la vez
+
+    Cada método recorre los días una sola vez y actualiza todos los productos
+    en paralelo como operaciones de NumPy.
+    """
+
+    METHODS = ['croston', 'sba', 'tsb']
+
+    def __init__(self, alpha=0.1, beta=0.1):
+        self.alpha = alpha
+        self.beta = beta
+
+    def _initial_state(self, matrix):
+        """Tamaño e intervalo iniciales a partir de la primera demanda de cada producto"""
+        has_demand = matrix > 0
+        first_idx = has_demand.argmax(axis=1)
+        rows = np.arange(matrix.shape[0])
+
+        size = matrix[rows, first_idx].astype(float)
+        interval = (first_idx + 1).astype(float)
+        return has_demand, size, interval
+
+    def croston(self, matrix, bias_correction=False):
+        """Croston (o SBA con bias_correction=True): demanda diaria esperada por producto"""
+        matrix = np.asarray(matrix, dtype=float)
+        has_demand, size, interval = self._initial_state(matrix)
+        periods_since = np.ones(matrix.shape[0])
+
+        for t in range(matrix.shape[1]):
+            demand = has_demand[:, t]
+            size = np.where(demand, size + self.alpha * (matrix[:, t] - size), size)
+            interval = np.where(demand, interval + self.alpha * (periods_since - interval), interval)
+            periods_since = np.where(demand, 1, periods_since + 1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(interval > 0, size / interval, 0.0)
+
+        if bias_correction:
+            rate = rate * (1 - self.alpha / 2)
+
+        # Productos sin ninguna demanda en la ventana
+        rate[~has_demand.any(axis=1)] = 0.0
+        return rate
+
+    def sba(self, matrix):
+        """Syntetos-Boylan Approximation (Croston con corrección de sesgo)"""
+        return self.croston(matrix, bias_correction=True)
+
+    def tsb(self, matrix):
+        """Teunter-Syntetos-Babai: actualiza la probabilidad de demanda cada día"""
+        matrix = np.asarray(matrix, dtype=float)
+        has_demand, size, _ = self._initial_state(matrix)
+        probability = has_demand.mean(axis=1)
+
+        for t in range(matrix.shape[1]):
+            demand = has_demand[:, t]
+            probability = probability + self.beta * (demand - probability)
+            size = np.where(demand, size + self.alpha * (matrix[:, t] - size), size)
+
+        rate = probability * size
+        rate[~has_demand.any(axis=1)] = 0.0
+        return rate
+
+    def forecast(self, matrix, demand_classes=None, method='auto'):
+        """Demanda diaria pronosticada por producto
+
+        Con method='auto' se usa SBA para demanda intermitente y TSB para demanda
+        irregular (LUMPY), que reacciona mejor a productos que dejan de venderse.
+        """
+        matrix = np.asarray(matrix, dtype=float)
+
+        if method in self.METHODS:
+            return getattr(self, method)(matrix)
+
+        if method != 'auto':
+            raise ValueError(f"Método no soportado: {method}")
+
+        rate = self.sba(matrix)
+        if demand_classes is not None:
+            lumpy = np.asarray(demand_classes) == 'LUMPY'
+            if lumpy.any():
+                rate[lumpy] = self.tsb(matrix[lumpy])
+
+        return rate
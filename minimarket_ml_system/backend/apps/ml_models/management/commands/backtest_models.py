@@ -0,0 +1,128 @@
+# Archivo: minimarket_ml_system/backend/apps/ml_models/management/commands/backtest_models.py
+
+from django.core.management.base import BaseCommand
+from apps.ml_models.backtesting import Backtester
+from apps.ml_models.models import MLModel
+from django.contrib.auth.models import User
+
+class Command(BaseCommand):
+    help = 'Backtesting de origen móvil: evalúa los modelos en múltiples fechas de corte'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days-back',
+            type=int,
+            default=730,
+            help='Días de datos históricos del panel de características (default: 730)'
+        )
+        parser.add_argument(
+            '--cutoffs',
+            type=int,
+            default=52,
+            help='Número de orígenes a evaluar (default: 52)'
+        )
+        parser.add_argument(
+            '--step-days',
+            type=int,
+            default=7,
+            help='Días entre orígenes consecutivos (default: 7)'
+        )
+        parser.add_argument(
+            '--horizon',
+            type=int,
+            default=7,
+            help='Días evaluados después de cada origen (default: 7)'
+        )
+        parser.add_argument(
+            '--min-train-days',
+            type=int,
+            default=60,
+            help='Historia mínima antes del primer origen (default: 60)'
+        )
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            help='Modelos a evaluar (default: todos)'
+        )
+        parser.add_argument(
+            '--n-jobs',
+            type=int,
+            default=-1,
+            help='Procesos paralelos (default: -1, todos los núcleos)'
+        )
+        parser.add_argument(
+            '--refresh-cache',
+            action='store_true',
+            help='Reconstruir el panel de características aunque exista en caché'
+        )
+        parser.add_argument(
+            '--model-id',
+            help='ID de un MLModel existente al que asociar los resultados'
+        )
+        parser.add_argument(
+            '--no-save',
+            action='store_true',
+            help='No guardar los resultados en la base de datos'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== BACKTESTING DE MODELOS ML ===')
+        )
+
+        ml_model = None
+        if options['model_id']:
+            try:
+                ml_model = MLModel.objects.get(id=options['model_id'])
+            except (MLModel.DoesNotExist, ValueError):
+                self.stdout.write(
+                    self.style.ERROR(f'No existe el modelo {options["model_id"]}')
+                )
+                return
+
+        try:
+            backtester = Backtester()
+
+            # 1. Panel de características (una sola vez)
+            self.stdout.write('PASO 1: Cargando panel de características...')
+            X, y = backtester.load_feature_panel(
+                days_back=options['days_back'],
+                refresh=options['refresh_cache']
+            )
+
+            if len(X) == 0:
+                self.stdout.write(
+                    self.style.ERROR('No hay datos suficientes para el backtesting')
+                )
+                return
+
+            # 2. Evaluación por origen
+            self.stdout.write('PASO 2: Evaluando orígenes en paralelo...')
+            backtester.run(
+                model_names=options['models'],
+                n_cutoffs=options['cutoffs'],
+                step_days=options['step_days'],
+                horizon_days=options['horizon'],
+                min_train_days=options['min_train_days'],
+                n_jobs=options['n_jobs']
+            )
+
+            # 3. Resumen
+            summary = backtester.summarize()
+            self.stdout.write('\n=== RESUMEN POR MODELO ===')
+            self.stdout.write(summary.to_string())
+
+            # 4. Guardar resultados
+            if not options['no_save']:
+                self.stdout.write('\nPASO 3: Guardando resultados...')
+                admin_user = User.objects.filter(is_superuser=True).first()
+                backtester.save_results(ml_model=ml_model, user=admin_user)
+
+            self.stdout.write(
+                self.style.SUCCESS('\n¡Backtesting completado!')
+            )
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error durante el backtesting: {str(e)}')
+            )
@@ -30,6 +30,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Guardar el mejor modelo entrenado'
         )
+        parser.add_argument(
+            '--mask-stockouts',
+            action='store_true',
+            help='Excluir del entrenamiento los días sin stock (in_stock == 0)'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(
@@ -52,7 +57,9 @@ class Command(BaseCommand):
             
             # 2. Preparar características y target
             self.stdout.write('PASO 2: Preparando características y target...')
-            X, y = data_processor.prepare_features_target(df)
+            X, y = data_processor.prepare_features_target(
+                df, mask_stockouts=options['mask_stockouts']
+            )
             
             if len(X) < 100:
                 self.stdout.write(
@@ -88,6 +95,7 @@ class Command(BaseCommand):
                         model_file=model_path,
                         parameters=json.dumps({
                             'test_size': options['test_size'],
+                            'mask_stockouts': options['mask_stockouts'],
                             'features_count': len(trainer.feature_names),
                             'training_samples': len(X)
                         }),
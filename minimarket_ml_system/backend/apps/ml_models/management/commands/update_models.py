@@ -0,0 +1,239 @@
+# Archivo: minimarket_ml_system/backend/apps/ml_models/management/commands/update_models.py
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from apps.ml_models.data_processor import DataProcessor
+from apps.ml_models.trainer import MLTrainer
+from apps.ml_models.predictor import DemandPredictor
+from apps.ml_models.models import MLModel, ModelPerformance
+from django.contrib.auth.models import User
+from datetime import datetime
+import os
+import json
+
+class Command(BaseCommand):
+    help = 'Actualización diaria incremental del modelo con reentrenamiento completo periódico'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days-back',
+            type=int,
+            default=730,
+            help='Días de datos históricos para el reentrenamiento completo (default: 730)'
+        )
+        parser.add_argument(
+            '--full-every',
+            type=int,
+            default=7,
+            help='Días entre reentrenamientos completos (default: 7)'
+        )
+        parser.add_argument(
+            '--new-trees',
+            type=int,
+            default=20,
+            help='Árboles añadidos al Random Forest en cada actualización (default: 20)'
+        )
+        parser.add_argument(
+            '--context-days',
+            type=int,
+            default=60,
+            help='Días previos usados para calcular lags y promedios móviles (default: 60)'
+        )
+        parser.add_argument(
+            '--drift-threshold',
+            type=float,
+            default=0.15,
+            help='Aumento relativo de MAE frente al último modelo completo que fuerza un reentrenamiento (default: 0.15)'
+        )
+        parser.add_argument(
+            '--force-full',
+            action='store_true',
+            help='Forzar reentrenamiento completo'
+        )
+        parser.add_argument(
+            '--mask-stockouts',
+            action='store_true',
+            help='Excluir del entrenamiento los días sin stock (in_stock == 0)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== ACTUALIZACIÓN DE MODELOS ML ===')
+        )
+
+        # 1. Cargar el modelo vigente
+        latest_model_path = DemandPredictor().find_latest_model()
+        trainer = MLTrainer()
+
+        if options['force_full']:
+            return self.full_rebuild(options, 'reentrenamiento forzado')
+
+        if not latest_model_path or not trainer.load_model(latest_model_path):
+            return self.full_rebuild(options, 'no existe un modelo previo')
+
+        metadata = trainer.model_metadata
+        full_training_date = metadata.get('full_training_date')
+        data_end_date = metadata.get('data_end_date')
+
+        if full_training_date is None or data_end_date is None:
+            return self.full_rebuild(options, 'el modelo no tiene metadatos de entrenamiento')
+
+        days_since_full = (datetime.now() - full_training_date).days
+        if days_since_full >= options['full_every']:
+            return self.full_rebuild(
+                options, f'último entrenamiento completo hace {days_since_full} días'
+            )
+
+        days_new = (datetime.now().date() - data_end_date).days
+        if days_new <= 0:
+            self.stdout.write('No hay datos nuevos desde el último entrenamiento')
+            return
+
+        # 2. Procesar solo la ventana reciente (más contexto para lags)
+        self.stdout.write(f'PASO 1: Procesando {days_new} días nuevos desde {data_end_date}...')
+        data_processor = DataProcessor()
+        df = data_processor.process_complete_dataset(
+            days_back=days_new + options['context_days']
+        )
+        X, y = data_processor.prepare_features_target(df, mask_stockouts=options['mask_stockouts'])
+
+        dates = df.loc[X.index, 'date'].dt.date
+        new_rows = dates > data_end_date
+        X_new, y_new = X[new_rows], y[new_rows]
+
+        if len(X_new) == 0:
+            self.stdout.write('No hay ventas nuevas para actualizar el modelo')
+            return
+
+        # 3. Drift: modelo vigente vs último modelo completo sobre datos no vistos
+        self.stdout.write('PASO 2: Midiendo drift frente al último modelo completo...')
+        current_metrics = trainer.evaluate(X_new, y_new)
+        full_metrics = self.evaluate_full_model(
+            metadata.get('full_model_path'), latest_model_path, X_new, y_new, current_metrics
+        )
+
+        if full_metrics['MAE'] > 0:
+            drift = (current_metrics['MAE'] - full_metrics['MAE']) / full_metrics['MAE']
+        else:
+            drift = 0.0
+
+        self.stdout.write(
+            f"  MAE modelo vigente: {current_metrics['MAE']} | "
+            f"MAE último completo: {full_metrics['MAE']} | Drift: {drift:+.1%}"
+        )
+
+        if drift > options['drift_threshold']:
+            self.stdout.write(
+                self.style.WARNING(f'Drift {drift:+.1%} supera el umbral {options["drift_threshold"]:.0%}')
+            )
+            return self.full_rebuild(options, 'drift de precisión')
+
+        # 4. Actualización incremental
+        self.stdout.write('PASO 3: Actualizando modelo incrementalmente...')
+        trainer.data_processor = data_processor
+        mode = trainer.update_incremental(X_new, y_new, n_new_trees=options['new_trees'])
+
+        if mode is None:
+            return self.full_rebuild(
+                options, f'{trainer.best_model_name} no admite actualización incremental'
+            )
+
+        updates = metadata.get('incremental_updates', 0) + 1
+        trainer.metrics[trainer.best_model_name] = {
+            'model_name': trainer.best_model_name,
+            'test_metrics': current_metrics
+        }
+        model_path = trainer.save_model(
+            training_mode='incremental',
+            extra_metadata={
+                'full_model_path': metadata.get('full_model_path'),
+                'full_training_date': full_training_date,
+                'full_model_metrics': full_metrics,
+                'incremental_updates': updates,
+                'drift_vs_full': round(drift, 4)
+            }
+        )
+
+        self.register_incremental_model(
+            trainer, model_path, mode, updates, len(X_new), current_metrics, full_metrics, drift
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\n¡Modelo actualizado ({mode}, actualización #{updates})!')
+        )
+
+    def full_rebuild(self, options, reason):
+        """Ejecuta un reentrenamiento completo"""
+        self.stdout.write(
+            self.style.WARNING(f'Reentrenamiento completo: {reason}')
+        )
+        call_command(
+            'train_models', days_back=options['days_back'], save_model=True,
+            mask_stockouts=options['mask_stockouts']
+        )
+
+    def evaluate_full_model(self, full_model_path, latest_model_path, X, y, current_metrics):
+        """Evalúa el último modelo completo sobre los datos nuevos"""
+        if not full_model_path or full_model_path == latest_model_path:
+            return current_metrics
+
+        if not os.path.exists(full_model_path):
+            self.stdout.write(
+                self.style.WARNING(f'No se encontró el último modelo completo: {full_model_path}')
+            )
+            return current_metrics
+
+        full_trainer = MLTrainer()
+        if not full_trainer.load_model(full_model_path):
+            return current_metrics
+
+        return full_trainer.evaluate(X, y)
+
+    def register_incremental_model(self, trainer, model_path, mode, updates, samples,
+                                   current_metrics, full_metrics, drift):
+        """Registra la versión incremental y su drift en la base de datos"""
+        try:
+            admin_user = User.objects.filter(is_superuser=True).first()
+
+            ml_model = MLModel.objects.create(
+                name=f"{trainer.best_model_name}_demand_prediction",
+                model_type=trainer.best_model_name.upper(),
+                version=f"1.0-inc{updates}",
+                description=f"Actualización incremental ({mode}) con {samples} muestras nuevas",
+                model_file=model_path,
+                parameters=json.dumps({
+                    'training_mode': 'incremental',
+                    'update_mode': mode,
+                    'base_model': trainer.model_metadata.get('full_model_path'),
+                    'new_samples': samples
+                }),
+                metrics=json.dumps(current_metrics),
+                training_data_size=samples,
+                is_active=True,
+                is_default=True,
+                created_by=admin_user
+            )
+
+            ModelPerformance.objects.create(
+                model=ml_model,
+                evaluation_date=datetime.now().date(),
+                evaluation_period='DAILY',
+                mae=current_metrics['MAE'],
+                rmse=current_metrics['RMSE'],
+                mape=min(current_metrics['MAPE'], 999.99),
+                r2_score=max(min(current_metrics['R2'], 1), -9.9999),
+                predictions_count=samples,
+                notes=(
+                    f"Drift vs último modelo completo: {drift:+.1%} "
+                    f"(MAE completo: {full_metrics['MAE']})"
+                )
+            )
+
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ Versión incremental registrada en BD: {ml_model.id}')
+            )
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.WARNING(f'Error guardando en BD: {str(e)}')
+            )
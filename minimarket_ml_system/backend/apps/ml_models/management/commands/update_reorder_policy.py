@@ -0,0 +1,101 @@
+# Archivo: minimarket_ml_system/backend/apps/ml_models/management/commands/update_reorder_policy.py
+
+import time
+from django.core.management.base import BaseCommand
+from apps.ml_models.predictor import DemandPredictor
+from apps.ml_models.reorder_policy import ReorderPolicyEngine
+
+class Command(BaseCommand):
+    help = 'Recalcula la política de reposición (stock de seguridad, punto de reorden, EOQ) de todo el catálogo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days-ahead',
+            type=int,
+            default=30,
+            help='Horizonte de pronóstico en días (default: 30)'
+        )
+        parser.add_argument(
+            '--service-level',
+            type=float,
+            help='Nivel de servicio objetivo entre 0 y 1 (default: REORDER_POLICY)'
+        )
+        parser.add_argument(
+            '--lead-time',
+            type=int,
+            help='Días de reposición del proveedor (default: REORDER_POLICY)'
+        )
+        parser.add_argument(
+            '--use-recommended',
+            action='store_true',
+            help='Decidir reorden y prioridad con el punto de reorden recomendado (default: Product.reorder_point)'
+        )
+        parser.add_argument(
+            '--apply',
+            action='store_true',
+            help='Guardar reorder_point y min_stock recomendados en los productos'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Productos a mostrar en el resumen (default: 10)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== POLÍTICA DE REPOSICIÓN ===')
+        )
+
+        predictor = DemandPredictor()
+        predictor.policy_engine = ReorderPolicyEngine(
+            service_level=options['service_level'],
+            lead_time_days=options['lead_time'],
+            use_recommended_reorder_point=options['use_recommended'] or None
+        )
+
+        # 1. Pronóstico de todo el catálogo
+        self.stdout.write('PASO 1: Pronosticando demanda del catálogo...')
+        start = time.perf_counter()
+        policy = predictor.reorder_policy(days_ahead=options['days_ahead'])
+        forecast_seconds = time.perf_counter() - start
+
+        if policy.empty:
+            self.stdout.write(self.style.WARNING('No hay productos para calcular la política'))
+            return
+
+        self.stdout.write(f'✓ {len(policy)} productos pronosticados en {forecast_seconds:.2f}s')
+        self.stdout.write(
+            f'  Nivel de servicio: {predictor.policy_engine.service_level:.0%} '
+            f'(z = {predictor.policy_engine.z_score:.2f}), '
+            f'lead time: {predictor.policy_engine.lead_time_days} días'
+        )
+
+        # 2. Resumen
+        self.stdout.write('\nPASO 2: Resumen de la política')
+        for priority, count in policy['priority'].value_counts().items():
+            self.stdout.write(f'  {priority}: {count}')
+        self.stdout.write(f'  Productos a reordenar: {int(policy["needs_reorder"].sum())}')
+        self.stdout.write(f'  Unidades sugeridas: {int(policy["suggested_order_quantity"].sum())}')
+        capped = int(policy['exceeds_max_stock'].sum())
+        if capped:
+            self.stdout.write(self.style.WARNING(
+                f'  {capped} productos con punto de reorden recomendado mayor a max_stock (limitado a max_stock)'
+            ))
+
+        columns = [
+            'product_name', 'current_stock', 'reorder_point', 'recommended_reorder_point',
+            'recommended_min_stock', 'eoq', 'days_of_stock_available', 'priority'
+        ]
+        self.stdout.write(f'\nTop {options["top"]} por prioridad:')
+        self.stdout.write(policy[columns].head(options['top']).to_string(index=False))
+
+        # 3. Guardar
+        if options['apply']:
+            self.stdout.write('\nPASO 3: Actualizando productos...')
+            updated = predictor.policy_engine.apply_to_products(policy)
+            self.stdout.write(f'✓ {updated} productos actualizados (reorder_point, min_stock)')
+
+        self.stdout.write(
+            self.style.SUCCESS('\n¡Política de reposición calculada!')
+        )
@@ -2,27 +2,53 @@
 
 import pandas as pd
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import islice
 import joblib
 import os
 from django.conf import settings
-from django.db import models 
+from django.db import connection, models
+from django.db.models import Sum
 from apps.products.models import Product
-from apps.sales.models import SaleItem
-from .data_processor import DataProcessor
+from apps.sales.models import SaleItem, business_date_range
+from .data_processor import DataProcessor, holiday_flags
+from .reorder_policy import ReorderPolicyEngine
+from .intermittent import (
+    IntermittentDemandForecaster, build_demand_matrix, classify_demand, FAST_PATH_CLASSES
+)
+from apps.monitoring.tracing import span
+import logging
 import warnings
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
 class DemandPredictor:
     """Clase para realizar predicciones de demanda"""
     
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, use_intermittent_path=True):
         self.model = None
         self.model_name = None
         self.feature_names = []
         self.data_processor = DataProcessor()
         self.model_path = model_path
         
+        # Ruta rápida para productos de baja rotación (Croston/SBA/TSB)
+        self.use_intermittent_path = use_intermittent_path
+        self.intermittent_method = 'auto'
+        self.demand_profiles = {}
+        self.intermittent_forecasts = {}
+        
+        # Pipeline por bloques: la BD precarga bloques siguientes mientras se predice el actual
+        self.chunk_size = getattr(settings, 'FORECAST_CHUNK_SIZE', 50)
+        self.prefetch_chunks = getattr(settings, 'FORECAST_PREFETCH_CHUNKS', 2)
+        
+        # Stock de seguridad, punto de reorden, EOQ y prioridad para todo el catálogo
+        self.policy_engine = ReorderPolicyEngine()
+        
+    @span('predictor.load_model')
     def load_model(self, model_path=None):
         """Carga el modelo entrenado"""
         if model_path is None:
@@ -38,11 +64,11 @@ class DemandPredictor:
             self.model_name = model_data['model_name']
             self.feature_names = model_data['feature_names']
             
-            print(f"✓ Modelo cargado: {self.model_name}")
+            logger.info("Modelo cargado: %s", self.model_name)
             return True
             
         except Exception as e:
-            print(f"Error cargando modelo: {str(e)}")
+            logger.error("Error cargando modelo: %s", e)
             return False
     
     def find_latest_model(self):
@@ -61,22 +87,29 @@ class DemandPredictor:
         model_files.sort(key=lambda x: os.path.getmtime(os.path.join(models_dir, x)), reverse=True)
         
         latest_model = os.path.join(models_dir, model_files[0])
-        print(f"Modelo más reciente encontrado: {latest_model}")
+        logger.debug("Modelo más reciente encontrado: %s", latest_model)
         
         return latest_model
     
-    def prepare_prediction_features(self, product_id, start_date, days_ahead=30):
-        """Prepara las características para predicción"""
-        print(f"Preparando características para producto {product_id}...")
+    def prepare_prediction_features(self, product_id, start_date, days_ahead=30,
+                                    product=None, historical_data=None):
+        """Prepara las características para predicción
+        
+        product e historical_data pueden venir precargados (pipeline por bloques);
+        si no, se consultan aquí.
+        """
+        logger.debug("Preparando características", extra={'product_id': product_id})
         
         # Obtener información del producto
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
-            raise ValueError(f"Producto {product_id} no encontrado")
+        if product is None:
+            try:
+                product = Product.objects.select_related('category').get(id=product_id)
+            except Product.DoesNotExist:
+                raise ValueError(f"Producto {product_id} no encontrado")
         
         # Obtener datos históricos del producto (últimos 90 días para context)
-        historical_data = self.get_historical_data(product_id, days_back=90)
+        if historical_data is None:
+            historical_data = self.get_historical_data(product_id, days_back=90)
         
         # Crear fechas futuras
         dates = pd.date_range(start=start_date, periods=days_ahead, freq='D')
@@ -123,12 +156,7 @@ class DemandPredictor:
         prediction_df['season'] = prediction_df['month'].apply(get_season)
         
         # Características de feriados
-        prediction_df['is_holiday'] = prediction_df['date'].apply(
-            lambda x: 1 if x.month == 12 and x.day in [24, 25, 31] or 
-                           x.month == 1 and x.day == 1 or
-                           x.month == 7 and x.day == 28 or
-                           x.month == 8 and x.day == 30 else 0
-        )
+        prediction_df['is_holiday'] = holiday_flags(prediction_df['date'])
         
         # Características del producto
         prediction_df['cost_price'] = float(product.cost_price)
@@ -200,53 +228,283 @@ class DemandPredictor:
     
     def get_historical_data(self, product_id, days_back=90):
         """Obtiene datos históricos del producto"""
-        from django.db.models import Sum  # ← AÑADIR ESTA LÍNEA
+        return self.get_historical_data_bulk([product_id], days_back).get(product_id, pd.DataFrame())
+    
+    def get_historical_data_bulk(self, product_ids, days_back=90):
+        """Historial diario de varios productos con una sola consulta
         
+        Retorna {product_id: DataFrame(date, quantity_sold)}; los productos sin
+        ventas en el periodo no aparecen.
+        """
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days_back)
         
         sales_data = SaleItem.objects.filter(
-            product_id=product_id,
-            sale__sale_date__date__gte=start_date,
+            business_date_range(start_date, prefix='sale__'),
+            product_id__in=product_ids,
             sale__status='COMPLETED'
         ).values(
-            'sale__sale_date__date'
+            'product_id', 'sale__business_date'
         ).annotate(
             quantity_sold=Sum('quantity')
-        ).order_by('sale__sale_date__date')
+        ).order_by('product_id', 'sale__business_date')
         
-        if not sales_data:
-            return pd.DataFrame()
+        df = pd.DataFrame.from_records(
+            sales_data.values_list('product_id', 'sale__business_date', 'quantity_sold'),
+            columns=['product_id', 'date', 'quantity_sold']
+        )
+        if df.empty:
+            return {}
         
-        df = pd.DataFrame(sales_data)
-        df.columns = ['date', 'quantity_sold']
         df['date'] = pd.to_datetime(df['date'])
         
-        return df
+        return {
+            product_id: group[['date', 'quantity_sold']].reset_index(drop=True)
+            for product_id, group in df.groupby('product_id', sort=False)
+        }
     
-    def predict_demand(self, product_id, start_date=None, days_ahead=30):
-        """Predice la demanda para un producto específico"""
+    @span('predictor.fetch_chunk')
+    def fetch_chunk(self, product_ids, days_back=90):
+        """Carga productos e historial de un bloque (dos consultas)
+        
+        El historial solo se consulta para productos que pasan por el modelo ML;
+        los de demanda intermitente ya tienen su pronóstico de classify_products.
+        """
+        products = Product.objects.select_related('category').in_bulk(product_ids)
+        history_ids = [
+            pid for pid in product_ids
+            if not (self.use_intermittent_path and pid in self.intermittent_forecasts)
+        ]
+        histories = self.get_historical_data_bulk(history_ids, days_back) if history_ids else {}
+        return products, histories
+    
+    def _fetch_chunk_in_thread(self, product_ids, days_back):
+        try:
+            return self.fetch_chunk(product_ids, days_back)
+        finally:
+            # Cada hilo del pool abre su propia conexión
+            connection.close()
+    
+    def iter_prefetched_chunks(self, product_ids, days_back=90):
+        """Recorre product_ids por bloques con productos e historial ya cargados
+        
+        Un pool de hilos consulta hasta prefetch_chunks bloques por delante mientras
+        el llamador construye características y predice el bloque actual; la cola de
+        futuros es acotada, así que la memoria no crece con el tamaño del catálogo.
+        """
+        chunk_size = max(1, self.chunk_size)
+        chunks = [product_ids[i:i + chunk_size] for i in range(0, len(product_ids), chunk_size)]
+        
+        # Dentro de una transacción otros hilos no verían los cambios sin confirmar
+        if self.prefetch_chunks <= 0 or len(chunks) <= 1 or connection.in_atomic_block:
+            for chunk in chunks:
+                yield chunk, self.fetch_chunk(chunk, days_back)
+            return
+        
+        remaining = iter(chunks)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.prefetch_chunks,
+                                      thread_name_prefix='forecast-prefetch')
+        try:
+            for chunk in islice(remaining, self.prefetch_chunks):
+                pending.append((chunk, executor.submit(self._fetch_chunk_in_thread, chunk, days_back)))
+            
+            while pending:
+                chunk, future = pending.popleft()
+                chunk_data = future.result()
+                
+                for next_chunk in islice(remaining, 1):
+                    pending.append((next_chunk, executor.submit(self._fetch_chunk_in_thread, next_chunk, days_back)))
+                
+                yield chunk, chunk_data
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+    
+    @span('predictor.forecast_chunk')
+    def forecast_chunk(self, product_ids, chunk_data, start_date, days_ahead=30):
+        """Pronostica un bloque ya cargado
+        
+        Los productos intermitentes usan la ruta rápida; el resto se predice con
+        una sola llamada a model.predict para todo el bloque.
+        Retorna {product_id: DataFrame de predicción o la excepción producida}.
+        """
+        products, histories = chunk_data
+        results = {}
+        frames = []
+        
+        for product_id in product_ids:
+            product = products.get(product_id)
+            if product is None:
+                results[product_id] = ValueError(f"Producto {product_id} no encontrado")
+            elif self.use_intermittent_path and product_id in self.intermittent_forecasts:
+                results[product_id] = self.predict_intermittent(product_id, start_date, days_ahead)
+            else:
+                try:
+                    frames.append(self.prepare_prediction_features(
+                        product_id, start_date, days_ahead,
+                        product=product,
+                        historical_data=histories.get(product_id, pd.DataFrame())
+                    ))
+                except Exception as e:
+                    results[product_id] = e
+        
+        if frames:
+            self.ensure_model_loaded()
+            features_df = pd.concat(frames, ignore_index=True)
+            predictions = self.predict_features(features_df)
+            
+            offset = 0
+            for frame in frames:
+                rows = len(frame)
+                results[frame['product_id'].iat[0]] = self.build_prediction_result(
+                    frame, predictions[offset:offset + rows]
+                )
+                offset += rows
+        
+        return results
+    
+    def iter_forecast_chunks(self, product_ids, start_date=None, days_ahead=30):
+        """Genera (bloque, {id: producto}, {id: predicción o excepción}) por bloque
+        
+        Las consultas del bloque siguiente se solapan con la predicción del actual.
+        La clasificación ADI/CV² se calcula siempre: además de la ruta rápida,
+        aporta la variabilidad histórica que usa la política de reposición.
+        """
+        product_ids = list(product_ids)
+        start_date = self.resolve_start_date(start_date)
+        
+        self.classify_products(product_ids)
+        
+        for chunk, chunk_data in self.iter_prefetched_chunks(product_ids):
+            results = self.forecast_chunk(chunk, chunk_data, start_date, days_ahead)
+            yield chunk, chunk_data[0], results
+    
+    def iter_forecasts(self, product_ids, start_date=None, days_ahead=30):
+        """Genera (product_id, producto, predicción o excepción) en el orden de product_ids"""
+        for chunk, products, results in self.iter_forecast_chunks(product_ids, start_date, days_ahead):
+            for product_id in chunk:
+                yield product_id, products.get(product_id), results[product_id]
+    
+    @span('predictor.classify_products')
+    def classify_products(self, product_ids, days_back=90):
+        """Clasifica productos por ADI/CV² y pronostica en bloque los de baja rotación
+        
+        Una sola consulta construye la matriz de demanda de todos los productos; los
+        clasificados como intermitentes se pronostican juntos con Croston/SBA/TSB y
+        quedan en caché para predict_demand.
+        """
+        product_ids = [pid for pid in product_ids if pid not in self.demand_profiles]
+        if not product_ids:
+            return self.demand_profiles
+        
+        matrix, product_ids, _ = build_demand_matrix(product_ids, days_back=days_back)
+        profiles = classify_demand(matrix)
+        profiles['product_id'] = product_ids
+        
+        fast_mask = profiles['demand_class'].isin(FAST_PATH_CLASSES).to_numpy()
+        profiles['forecast_rate'] = np.nan
+        
+        if fast_mask.any():
+            forecaster = IntermittentDemandForecaster()
+            profiles.loc[fast_mask, 'forecast_rate'] = forecaster.forecast(
+                matrix[fast_mask],
+                demand_classes=profiles.loc[fast_mask, 'demand_class'].to_numpy(),
+                method=self.intermittent_method
+            )
+        
+        for profile in profiles.to_dict('records'):
+            self.demand_profiles[profile['product_id']] = profile
+            if profile['demand_class'] in FAST_PATH_CLASSES:
+                self.intermittent_forecasts[profile['product_id']] = profile
+        
+        logger.info(
+            "Productos clasificados",
+            extra={'products': len(product_ids), 'intermittent': int(fast_mask.sum())}
+        )
+        
+        return self.demand_profiles
+    
+    def predict_intermittent(self, product_id, start_date, days_ahead=30):
+        """Pronóstico de ruta rápida con el mismo formato que predict_demand"""
+        profile = self.intermittent_forecasts[product_id]
+        rate = float(profile['forecast_rate'])
+        
+        dates = pd.date_range(start=start_date, periods=days_ahead, freq='D')
+        predictions = np.full(len(dates), round(rate, 2))
+        dayofweek = dates.dayofweek
+        
+        result_df = pd.DataFrame({
+            'date': dates,
+            'predicted_quantity': predictions,
+            'day_of_week': dayofweek,
+            'is_weekend': (dayofweek >= 5).astype(int),
+            'is_holiday': holiday_flags(dates)
+        })
+        
+        # La demanda intermitente puede ser cero cualquier día
+        result_df['lower_bound'] = 0.0
+        result_df['upper_bound'] = predictions + 1.96 * float(profile['std_daily'])
+        
+        return result_df
+    
+    def resolve_start_date(self, start_date):
+        """Fecha de inicio del pronóstico (por defecto mañana)"""
+        if start_date is None:
+            return datetime.now().date() + timedelta(days=1)
+        if isinstance(start_date, str):
+            return datetime.strptime(start_date, '%Y-%m-%d').date()
+        return start_date
+    
+    def ensure_model_loaded(self):
         if self.model is None:
             success = self.load_model()
             if not success:
                 raise RuntimeError("No se pudo cargar el modelo")
+    
+    @span('predictor.predict_demand')
+    def predict_demand(self, product_id, start_date=None, days_ahead=30):
+        """Predice la demanda para un producto específico"""
+        start_date = self.resolve_start_date(start_date)
         
-        if start_date is None:
-            start_date = datetime.now().date() + timedelta(days=1)
-        elif isinstance(start_date, str):
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        # Productos de baja rotación: pronóstico intermitente sin pasar por el modelo ML
+        if self.use_intermittent_path:
+            if product_id not in self.demand_profiles:
+                self.classify_products([product_id])
+            if product_id in self.intermittent_forecasts:
+                return self.predict_intermittent(product_id, start_date, days_ahead)
+        
+        self.ensure_model_loaded()
         
-        print(f"Prediciendo demanda para producto {product_id} desde {start_date} por {days_ahead} días")
+        logger.debug(
+            "Prediciendo demanda",
+            extra={'product_id': product_id, 'start_date': start_date, 'days_ahead': days_ahead}
+        )
         
         # Preparar características
         features_df = self.prepare_prediction_features(product_id, start_date, days_ahead)
+        predictions = self.predict_features(features_df)
+        result_df = self.build_prediction_result(features_df, predictions)
         
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Predicción completada",
+                extra={'product_id': product_id, 'days': len(predictions),
+                       'avg_demand': round(float(np.mean(predictions)), 2),
+                       'total_demand': round(float(np.sum(predictions)), 2)}
+            )
+        
+        return result_df
+    
+    def predict_features(self, features_df):
+        """Aplica el modelo a un DataFrame de características (uno o varios productos)"""
         # Seleccionar solo las características que usa el modelo
         try:
             # Asegurar que tenemos todas las características necesarias
             missing_features = set(self.feature_names) - set(features_df.columns)
             if missing_features:
-                print(f"Características faltantes: {missing_features}")
+                logger.warning("Características faltantes: %s", sorted(missing_features))
                 # Añadir características faltantes con valor 0
                 for feature in missing_features:
                     features_df[feature] = 0
@@ -261,8 +519,10 @@ class DemandPredictor:
         predictions = self.model.predict(X)
         
         # Asegurar valores no negativos
-        predictions = np.maximum(predictions, 0)
-        
+        return np.maximum(predictions, 0)
+    
+    def build_prediction_result(self, features_df, predictions):
+        """Arma el DataFrame de salida de un producto con sus intervalos"""
         # Crear resultado
         result_df = pd.DataFrame({
             'date': features_df['date'],
@@ -277,12 +537,9 @@ class DemandPredictor:
         result_df['lower_bound'] = np.maximum(predictions - 1.96 * std_prediction, 0)
         result_df['upper_bound'] = predictions + 1.96 * std_prediction
         
-        print(f"✓ Predicción completada para {len(predictions)} días")
-        print(f"  Demanda promedio predicha: {np.mean(predictions):.2f}")
-        print(f"  Demanda total predicha: {np.sum(predictions):.2f}")
-        
         return result_df
     
+    @span('predictor.predict_multiple_products')
     def predict_multiple_products(self, product_ids, start_date=None, days_ahead=30):
         """Predice demanda para múltiples productos"""
         if not isinstance(product_ids, list):
@@ -290,114 +547,118 @@ class DemandPredictor:
         
         results = {}
         
-        for product_id in product_ids:
-            try:
-                prediction = self.predict_demand(product_id, start_date, days_ahead)
-                results[product_id] = prediction
-                print(f"✓ Predicción completada para producto {product_id}")
-                
-            except Exception as e:
-                print(f"✗ Error prediciendo producto {product_id}: {str(e)}")
+        for product_id, _, prediction in self.iter_forecasts(product_ids, start_date, days_ahead):
+            if isinstance(prediction, Exception):
+                logger.error("Error prediciendo producto %s: %s", product_id, prediction)
                 results[product_id] = None
+            else:
+                results[product_id] = prediction
         
         return results
     
-    def generate_reorder_recommendations(self, product_id, days_ahead=30):
-        """Genera recomendaciones de reorden basadas en predicciones"""
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
-            raise ValueError(f"Producto {product_id} no encontrado")
-        
-        # Obtener predicción
-        prediction_df = self.predict_demand(product_id, days_ahead=days_ahead)
-        
-        # Calcular métricas
-        total_predicted_demand = prediction_df['predicted_quantity'].sum()
-        avg_daily_demand = prediction_df['predicted_quantity'].mean()
-        max_daily_demand = prediction_df['predicted_quantity'].max()
+    def forecast_error_std(self, product_ids, forecasts):
+        """Desviación diaria del error de pronóstico por producto
+        
+        Es el RMSE de aplicar el pronóstico promedio a los últimos 90 días:
+        sqrt(varianza histórica + sesgo²). NaN si el producto no está clasificado.
+        """
+        profiles = [self.demand_profiles.get(product_id, {}) for product_id in product_ids]
+        mean_daily = np.array([profile.get('mean_daily', np.nan) for profile in profiles], dtype=float)
+        std_daily = np.array([profile.get('std_daily', np.nan) for profile in profiles], dtype=float)
+        bias = mean_daily - forecasts.mean(axis=1)
+        return np.sqrt(std_daily ** 2 + bias ** 2)
+    
+    def reorder_policy_from_forecasts(self, products, predictions):
+        """Aplica la política de reposición a productos con su predicción ya calculada
         
-        # Stock actual
-        current_stock = product.current_stock
+        products: lista de Product; predictions: DataFrames de predict_demand en el
+        mismo orden. Retorna un DataFrame con una fila por producto.
+        """
+        products_df = ReorderPolicyEngine.products_frame(products)
+        if products_df.empty:
+            return products_df
         
-        # Calcular días de inventario disponible
-        if avg_daily_demand > 0:
-            days_of_stock = current_stock / avg_daily_demand
-        else:
-            days_of_stock = float('inf')
+        forecasts = np.vstack([prediction['predicted_quantity'].to_numpy(dtype=float) for prediction in predictions])
+        product_ids = products_df['product_id'].tolist()
         
-        # Determinar si necesita reorden
-        needs_reorder = (
-            current_stock <= product.reorder_point or
-            days_of_stock <= 7 or
-            total_predicted_demand > current_stock
+        policy = self.policy_engine.compute(
+            products_df, forecasts, error_std=self.forecast_error_std(product_ids, forecasts)
         )
+        policy['demand_class'] = [
+            self.demand_profiles.get(product_id, {}).get('demand_class') for product_id in product_ids
+        ]
+        return policy
+    
+    def generate_reorder_recommendations(self, product_id, days_ahead=30, product=None, prediction_df=None):
+        """Genera recomendaciones de reorden basadas en predicciones"""
+        if product is None:
+            try:
+                product = Product.objects.get(id=product_id)
+            except Product.DoesNotExist:
+                raise ValueError(f"Producto {product_id} no encontrado")
         
-        # Calcular cantidad sugerida de reorden
-        if needs_reorder:
-            # Stock objetivo: cubrir demanda predicha + stock de seguridad
-            safety_stock = max_daily_demand * 7  # 7 días de stock de seguridad
-            target_stock = total_predicted_demand + safety_stock
-            suggested_order = max(0, target_stock - current_stock)
-        else:
-            suggested_order = 0
+        if product_id not in self.demand_profiles:
+            self.classify_products([product_id])
         
-        recommendation = {
-            'product_id': product_id,
-            'product_name': product.name,
-            'current_stock': current_stock,
-            'reorder_point': product.reorder_point,
-            'predicted_demand_total': round(total_predicted_demand, 2),
-            'predicted_demand_avg_daily': round(avg_daily_demand, 2),
-            'predicted_demand_max_daily': round(max_daily_demand, 2),
-            'days_of_stock_available': round(days_of_stock, 1),
-            'needs_reorder': needs_reorder,
-            'suggested_order_quantity': round(suggested_order, 2),
-            'priority': self.calculate_priority(needs_reorder, days_of_stock, current_stock, product.reorder_point)
-        }
+        # Obtener predicción
+        if prediction_df is None:
+            prediction_df = self.predict_demand(product_id, days_ahead=days_ahead)
         
-        return recommendation
+        policy = self.reorder_policy_from_forecasts([product], [prediction_df])
+        return policy.to_dict('records')[0]
     
-    def calculate_priority(self, needs_reorder, days_of_stock, current_stock, reorder_point):
-        """Calcula la prioridad de reorden"""
-        if not needs_reorder:
-            return 'LOW'
-        
-        if current_stock <= 0:
-            return 'CRITICAL'
-        elif days_of_stock <= 3:
-            return 'HIGH'
-        elif current_stock <= reorder_point:
-            return 'MEDIUM'
-        else:
-            return 'LOW'
+    def iter_reorder_recommendations(self, product_ids, days_ahead=30):
+        """Genera (product_id, recomendación o excepción) a medida que termina cada bloque
+        
+        La política se calcula por bloque como operación vectorizada. Es la base de
+        las respuestas en streaming.
+        """
+        for chunk, products, results in self.iter_forecast_chunks(product_ids, days_ahead=days_ahead):
+            ok_ids = [pid for pid in chunk if not isinstance(results[pid], Exception)]
+            recommendations = {}
+            if ok_ids:
+                policy = self.reorder_policy_from_forecasts(
+                    [products[pid] for pid in ok_ids], [results[pid] for pid in ok_ids]
+                )
+                recommendations = dict(zip(ok_ids, policy.to_dict('records')))
+            
+            for product_id in chunk:
+                yield product_id, recommendations.get(product_id, results[product_id])
     
-    def batch_reorder_recommendations(self, product_ids=None, days_ahead=30):
-        """Genera recomendaciones de reorden para múltiples productos"""
+    @span('predictor.reorder_policy')
+    def reorder_policy(self, product_ids=None, days_ahead=30):
+        """Política de reposición de todo el catálogo como DataFrame ordenado por prioridad
+        
+        Los pronósticos se reúnen en una matriz productos x días y la política se
+        calcula en una sola pasada vectorizada.
+        """
         if product_ids is None:
             # Obtener todos los productos activos
             product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True))
         
-        recommendations = []
+        products, predictions = [], []
+        for product_id, product, prediction in self.iter_forecasts(product_ids, days_ahead=days_ahead):
+            if isinstance(prediction, Exception):
+                logger.error("Error procesando producto %s: %s", product_id, prediction)
+                continue
+            products.append(product)
+            predictions.append(prediction)
         
-        print(f"Generando recomendaciones para {len(product_ids)} productos...")
+        policy = self.reorder_policy_from_forecasts(products, predictions)
+        return ReorderPolicyEngine.sort(policy) if not policy.empty else policy
+    
+    @span('predictor.batch_reorder_recommendations')
+    def batch_reorder_recommendations(self, product_ids=None, days_ahead=30):
+        """Genera recomendaciones de reorden para múltiples productos (ordenadas por prioridad)"""
+        if product_ids is None:
+            # Obtener todos los productos activos
+            product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True))
         
-        for i, product_id in enumerate(product_ids, 1):
-            try:
-                recommendation = self.generate_reorder_recommendations(product_id, days_ahead)
-                recommendations.append(recommendation)
-                
-                if i % 10 == 0:
-                    print(f"  Procesados {i}/{len(product_ids)} productos")
-                    
-            except Exception as e:
-                print(f"Error procesando producto {product_id}: {str(e)}")
+        logger.info("Generando recomendaciones", extra={'products': len(product_ids)})
         
-        # Ordenar por prioridad
-        priority_order = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
-        recommendations.sort(key=lambda x: priority_order.get(x['priority'], 4))
+        recommendations = self.reorder_policy(product_ids, days_ahead).to_dict('records')
         
-        print(f"✓ Recomendaciones generadas para {len(recommendations)} productos")
+        logger.info("Recomendaciones generadas", extra={'recommendations': len(recommendations)})
         
         return recommendations
     
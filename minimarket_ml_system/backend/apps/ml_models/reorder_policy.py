@@ -0,0 +1,206 @@
+# Archivo: minimarket_ml_system/backend/apps/ml_models/reorder_policy.py
+
+import numpy as np
+import pandas as pd
+from statistics import NormalDist
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.products.models import Product
+
+PRIORITIES = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']
+
+DEFAULT_POLICY = {
+    'SERVICE_LEVEL': 0.95,      # Probabilidad de no quebrar stock durante el lead time
+    'LEAD_TIME_DAYS': 3,        # Días entre pedir y recibir
+    'MIN_COVER_DAYS': 7,        # Reordenar si el stock cubre menos días que esto
+    'ORDER_COST': 20.0,         # Costo fijo por pedido (S/)
+    'HOLDING_COST_RATE': 0.25,  # Costo anual de mantener inventario (fracción del costo)
+    # False: needs_reorder y priority usan Product.reorder_point (como antes de la
+    # política); True: usan el punto de reorden recomendado
+    'USE_RECOMMENDED_REORDER_POINT': False,
+}
+
+PRODUCT_COLUMNS = [
+    'product_id', 'product_name', 'current_stock', 'reorder_point', 'min_stock',
+    'max_stock', 'cost_price', 'units_per_box'
+]
+
+
+class ReorderPolicyEngine:
+    """Política de reposición para todo el catálogo como operaciones de columnas
+
+    Recibe la matriz de pronósticos diarios (productos x días) y calcula stock de
+    seguridad por nivel de servicio, punto de reorden, lote económico (EOQ), días
+    de cobertura y prioridad sin recorrer productos en Python.
+
+    Los valores recomendados de reorder_point y min_stock se limitan a
+    max_stock del producto (exceeds_max_stock indica que el cálculo lo superaba).
+    """
+
+    def __init__(self, service_level=None, lead_time_days=None, min_cover_days=None,
+                 order_cost=None, holding_cost_rate=None, use_recommended_reorder_point=None):
+        policy = {**DEFAULT_POLICY, **getattr(settings, 'REORDER_POLICY', {})}
+
+        self.service_level = service_level if service_level is not None else policy['SERVICE_LEVEL']
+        self.lead_time_days = lead_time_days if lead_time_days is not None else policy['LEAD_TIME_DAYS']
+        self.min_cover_days = min_cover_days if min_cover_days is not None else policy['MIN_COVER_DAYS']
+        self.order_cost = order_cost if order_cost is not None else policy['ORDER_COST']
+        self.holding_cost_rate = holding_cost_rate if holding_cost_rate is not None else policy['HOLDING_COST_RATE']
+        self.use_recommended_reorder_point = (
+            use_recommended_reorder_point if use_recommended_reorder_point is not None
+            else policy['USE_RECOMMENDED_REORDER_POINT']
+        )
+
+        if not 0 < self.service_level < 1:
+            raise ValueError("service_level debe estar entre 0 y 1")
+
+    @property
+    def z_score(self):
+        return NormalDist().inv_cdf(self.service_level)
+
+    @staticmethod
+    def products_frame(products):
+        """DataFrame de atributos de inventario a partir de instancias de Product"""
+        return pd.DataFrame.from_records(
+            [
+                (p.id, p.name, p.current_stock, p.reorder_point, p.min_stock,
+                 p.max_stock, float(p.cost_price), p.units_per_box)
+                for p in products
+            ],
+            columns=PRODUCT_COLUMNS
+        )
+
+    def compute(self, products, forecasts, error_std=None):
+        """Calcula la política para cada fila de products
+
+        products: DataFrame con PRODUCT_COLUMNS (una fila por producto).
+        forecasts: matriz productos x días con la demanda diaria pronosticada.
+        error_std: desviación estándar diaria del error de pronóstico por producto;
+        donde falta (None o NaN) se usa la dispersión del propio pronóstico.
+        """
+        forecasts = np.atleast_2d(np.asarray(forecasts, dtype=float))
+        if len(products) != forecasts.shape[0]:
+            raise ValueError("products y forecasts deben tener la misma cantidad de filas")
+
+        fallback_std = forecasts.std(axis=1)
+        if error_std is None:
+            error_std = fallback_std
+        error_std = np.asarray(error_std, dtype=float)
+        error_std = np.where(np.isfinite(error_std), error_std, fallback_std)
+
+        stock = products['current_stock'].to_numpy(dtype=float)
+        cost_price = products['cost_price'].to_numpy(dtype=float)
+        max_stock = products['max_stock'].to_numpy(dtype=float)
+
+        horizon_total = forecasts.sum(axis=1)
+        avg_daily = forecasts.mean(axis=1)
+        max_daily = forecasts.max(axis=1)
+
+        # Demanda durante el lead time (si el horizonte es más corto se extrapola el promedio)
+        lead_time = self.lead_time_days
+        covered = min(lead_time, forecasts.shape[1])
+        lead_time_demand = forecasts[:, :covered].sum(axis=1) + avg_daily * (lead_time - covered)
+
+        # Stock de seguridad: z * sigma_error * sqrt(lead time)
+        safety_stock = np.maximum(self.z_score, 0) * error_std * np.sqrt(lead_time)
+        required_point = np.ceil(lead_time_demand + safety_stock)
+        exceeds_max_stock = required_point > max_stock
+        reorder_point = np.minimum(required_point, max_stock)
+        min_stock = np.minimum(np.ceil(safety_stock), max_stock)
+
+        # Punto de reorden que dispara el pedido
+        if self.use_recommended_reorder_point:
+            trigger_point = reorder_point
+        else:
+            trigger_point = products['reorder_point'].to_numpy(dtype=float)
+
+        # Lote económico de Wilson con demanda anualizada
+        holding_cost = cost_price * self.holding_cost_rate
+        with np.errstate(divide='ignore', invalid='ignore'):
+            eoq = np.where(
+                holding_cost > 0,
+                np.sqrt(2 * avg_daily * 365 * self.order_cost / holding_cost),
+                0.0
+            )
+            days_of_cover = np.where(avg_daily > 0, stock / avg_daily, np.inf)
+
+        needs_reorder = (
+            (stock <= trigger_point) |
+            (days_of_cover <= self.min_cover_days) |
+            (horizon_total > stock)
+        )
+
+        # Cantidad: cubrir el horizonte más el stock de seguridad, al menos un EOQ,
+        # sin pasar el stock máximo salvo que el requerimiento neto lo exija
+        net_requirement = np.maximum(horizon_total + safety_stock - stock, 0)
+        ceiling = np.maximum(max_stock - stock, net_requirement)
+        suggested = np.where(
+            needs_reorder,
+            np.ceil(np.minimum(np.maximum(net_requirement, eoq), ceiling)),
+            0.0
+        )
+
+        priority = np.select(
+            [~needs_reorder, stock <= 0, days_of_cover <= 3, stock <= trigger_point],
+            ['LOW', 'CRITICAL', 'HIGH', 'MEDIUM'],
+            default='LOW'
+        )
+
+        return pd.DataFrame({
+            'product_id': products['product_id'].to_numpy(),
+            'product_name': products['product_name'].to_numpy(),
+            'current_stock': products['current_stock'].to_numpy(),
+            'reorder_point': products['reorder_point'].to_numpy(),
+            'min_stock': products['min_stock'].to_numpy(),
+            'predicted_demand_total': np.round(horizon_total, 2),
+            'predicted_demand_avg_daily': np.round(avg_daily, 2),
+            'predicted_demand_max_daily': np.round(max_daily, 2),
+            'days_of_stock_available': np.round(days_of_cover, 1),
+            'needs_reorder': needs_reorder,
+            'suggested_order_quantity': suggested,
+            'priority': priority,
+            'lead_time_demand': np.round(lead_time_demand, 2),
+            'safety_stock': np.round(safety_stock, 2),
+            'reorder_point_used': trigger_point.astype(int),
+            'recommended_reorder_point': reorder_point.astype(int),
+            'recommended_min_stock': min_stock.astype(int),
+            'exceeds_max_stock': exceeds_max_stock,
+            'eoq': np.ceil(eoq).astype(int),
+        })
+
+    @staticmethod
+    def sort(policy):
+        """Ordena por prioridad y, dentro de cada una, por menos días de cobertura"""
+        rank = pd.Categorical(policy['priority'], categories=PRIORITIES, ordered=True)
+        return policy.assign(_rank=rank).sort_values(
+            ['_rank', 'days_of_stock_available'], kind='stable'
+        ).drop(columns='_rank').reset_index(drop=True)
+
+    def apply_to_products(self, policy, batch_size=500):
+        """Guarda reorder_point y min_stock recomendados (solo filas que cambian)
+
+        Los recomendados ya vienen limitados a max_stock, así min_stock nunca
+        supera a max_stock. Retorna la cantidad de productos actualizados.
+        """
+        changed = policy[
+            (policy['recommended_reorder_point'] != policy['reorder_point']) |
+            (policy['recommended_min_stock'] != policy['min_stock'])
+        ]
+        if changed.empty:
+            return 0
+
+        now = timezone.now()
+        products = [
+            Product(id=product_id, reorder_point=int(reorder_point), min_stock=int(min_stock), updated_at=now)
+            for product_id, reorder_point, min_stock in changed[
+                ['product_id', 'recommended_reorder_point', 'recommended_min_stock']
+            ].itertuples(index=False)
+        ]
+
+        with transaction.atomic():
+            Product.objects.bulk_update(
+                products, ['reorder_point', 'min_stock', 'updated_at'], batch_size=batch_size
+            )
+
+        return len(products)
@@ -0,0 +1,58 @@
+# Archivo: minimarket_ml_system/backend/apps/ml_models/streaming.py
+
+import json
+import logging
+import math
+import numpy as np
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def wants_stream(request):
+    """True si el cliente pidió la respuesta en streaming (?stream=1)"""
+    return request.query_params.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def _json_safe(value):
+    # JSON estricto: inf/NaN (p. ej. días de stock sin demanda) se envían como null
+    if isinstance(value, (float, np.floating)) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    return value
+
+
+def ndjson_response(records):
+    """StreamingHttpResponse con un objeto JSON por línea
+
+    records es un generador: cada registro se serializa y envía en cuanto se
+    produce, sin acumular la respuesta completa en memoria. La última línea
+    siempre es {"type": "end", "complete": ...}: como el estado HTTP 200 ya se
+    envió, un error a mitad del generador se informa ahí (con "error"), y una
+    respuesta sin esa línea quedó cortada.
+    """
+    def dumps(record):
+        return json.dumps(_json_safe(record), cls=JSONEncoder, ensure_ascii=False, allow_nan=False) + '\n'
+
+    def lines():
+        sent = 0
+        try:
+            for record in records:
+                line = dumps(record)
+                sent += 1
+                yield line
+        except Exception as e:
+            logger.exception("Error generando la respuesta NDJSON", extra={'records': sent})
+            yield dumps({'type': 'end', 'complete': False, 'records': sent, 'error': str(e)})
+            return
+        yield dumps({'type': 'end', 'complete': True, 'records': sent})
+
+    response = StreamingHttpResponse(lines(), content_type=NDJSON_CONTENT_TYPE)
+    # Evitar que proxies (nginx) acumulen la respuesta antes de enviarla
+    response['X-Accel-Buffering'] = 'no'
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -1,3 +1,200 @@
-from django.test import TestCase
+import math
+import numpy as np
+import pandas as pd
+from decimal import Decimal
+from django.test import SimpleTestCase, TestCase
+from apps.products.models import Category, Product
+from .data_processor import DataProcessor
+from .reorder_policy import ReorderPolicyEngine, PRODUCT_COLUMNS
+from .trainer import MLTrainer
 
-# Create your tests here.
+
+def policy_products(*rows):
+    """DataFrame de productos: cada fila es (current_stock, reorder_point, min_stock, max_stock, cost_price)"""
+    return pd.DataFrame.from_records(
+        [
+            (i + 1, f'Producto {i + 1}', stock, reorder_point, min_stock, max_stock, cost, 1)
+            for i, (stock, reorder_point, min_stock, max_stock, cost) in enumerate(rows)
+        ],
+        columns=PRODUCT_COLUMNS
+    )
+
+
+class ReorderPolicyEngineTests(SimpleTestCase):
+    """Cálculo vectorizado de la política de reposición"""
+
+    def engine(self, **kwargs):
+        params = {'service_level': 0.95, 'lead_time_days': 3, 'min_cover_days': 7,
+                  'order_cost': 20.0, 'holding_cost_rate': 0.25}
+        params.update(kwargs)
+        return ReorderPolicyEngine(**params)
+
+    def test_constant_demand_without_error_has_no_safety_stock(self):
+        products = policy_products((100, 20, 10, 500, 10.0))
+        policy = self.engine().compute(products, np.full((1, 30), 10.0), error_std=[0.0])
+        row = policy.iloc[0]
+
+        self.assertEqual(row['safety_stock'], 0)
+        self.assertEqual(row['lead_time_demand'], 30)
+        self.assertEqual(row['recommended_reorder_point'], 30)
+        self.assertEqual(row['recommended_min_stock'], 0)
+        self.assertEqual(row['days_of_stock_available'], 10)
+        # EOQ de Wilson: sqrt(2 * 10 * 365 * 20 / (10 * 0.25))
+        self.assertEqual(row['eoq'], math.ceil(math.sqrt(2 * 10 * 365 * 20 / 2.5)))
+        self.assertFalse(row['exceeds_max_stock'])
+
+    def test_safety_stock_uses_service_level_and_lead_time(self):
+        products = policy_products((100, 20, 10, 500, 10.0))
+        engine = self.engine()
+        policy = engine.compute(products, np.full((1, 14), 5.0), error_std=[2.0])
+        row = policy.iloc[0]
+
+        expected = engine.z_score * 2.0 * math.sqrt(3)
+        self.assertAlmostEqual(row['safety_stock'], round(expected, 2))
+        self.assertEqual(row['recommended_reorder_point'], math.ceil(15 + expected))
+        self.assertEqual(row['recommended_min_stock'], math.ceil(expected))
+
+    def test_missing_error_std_falls_back_to_forecast_dispersion(self):
+        products = policy_products((100, 20, 10, 500, 10.0), (100, 20, 10, 500, 10.0))
+        forecasts = np.array([[4.0, 6.0, 4.0, 6.0], [5.0, 5.0, 5.0, 5.0]])
+        policy = self.engine().compute(products, forecasts, error_std=[np.nan, np.nan])
+
+        self.assertGreater(policy.loc[0, 'safety_stock'], 0)
+        self.assertEqual(policy.loc[1, 'safety_stock'], 0)
+
+    def test_short_horizon_extrapolates_lead_time_demand(self):
+        products = policy_products((100, 20, 10, 500, 10.0))
+        policy = self.engine(lead_time_days=5).compute(products, [[2.0, 4.0]], error_std=[0.0])
+
+        # 2 días pronosticados + 3 días al promedio (3 unidades)
+        self.assertEqual(policy.loc[0, 'lead_time_demand'], 15)
+
+    def test_recommended_levels_are_capped_at_max_stock(self):
+        products = policy_products((100, 20, 10, 25, 10.0))
+        policy = self.engine().compute(products, np.full((1, 30), 10.0), error_std=[8.0])
+        row = policy.iloc[0]
+
+        self.assertTrue(row['exceeds_max_stock'])
+        self.assertEqual(row['recommended_reorder_point'], 25)
+        self.assertLessEqual(row['recommended_min_stock'], 25)
+
+    def test_trigger_uses_product_reorder_point_by_default(self):
+        # 4 días de 2 unidades: demanda en el lead time 6, punto recomendado 12
+        products = policy_products((12, 5, 2, 100, 10.0))
+        forecasts = np.full((1, 4), 2.0)
+
+        default = self.engine(min_cover_days=0).compute(products, forecasts, error_std=[2.0]).iloc[0]
+        self.assertEqual(default['recommended_reorder_point'], 12)
+        self.assertEqual(default['reorder_point_used'], 5)
+        self.assertFalse(default['needs_reorder'])
+        self.assertEqual(default['priority'], 'LOW')
+        self.assertEqual(default['suggested_order_quantity'], 0)
+
+        recommended = self.engine(min_cover_days=0, use_recommended_reorder_point=True).compute(
+            products, forecasts, error_std=[2.0]
+        ).iloc[0]
+        self.assertEqual(recommended['reorder_point_used'], 12)
+        self.assertTrue(recommended['needs_reorder'])
+        self.assertEqual(recommended['priority'], 'MEDIUM')
+        self.assertGreater(recommended['suggested_order_quantity'], 0)
+
+    def test_priorities(self):
+        products = policy_products(
+            (0, 5, 2, 100, 10.0),     # sin stock
+            (4, 5, 2, 100, 10.0),     # 2 días de cobertura
+            (500, 5, 2, 1000, 10.0),  # sobra stock
+        )
+        policy = self.engine().compute(products, np.full((3, 7), 2.0), error_std=[0.0, 0.0, 0.0])
+
+        self.assertEqual(list(policy['priority']), ['CRITICAL', 'HIGH', 'LOW'])
+        self.assertEqual(list(ReorderPolicyEngine.sort(policy)['product_id']), [1, 2, 3])
+
+    def test_no_demand_has_infinite_cover(self):
+        products = policy_products((10, 5, 2, 100, 10.0))
+        policy = self.engine().compute(products, np.zeros((1, 7)), error_std=[0.0])
+
+        self.assertTrue(np.isinf(policy.loc[0, 'days_of_stock_available']))
+        self.assertFalse(policy.loc[0, 'needs_reorder'])
+        self.assertEqual(policy.loc[0, 'eoq'], 0)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ReorderPolicyEngine(service_level=1)
+        with self.assertRaises(ValueError):
+            self.engine().compute(policy_products((10, 5, 2, 100, 10.0)), np.zeros((2, 7)))
+
+
+class ApplyReorderPolicyTests(TestCase):
+    """Guardado de los niveles recomendados en el catálogo"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Abarrotes')
+        self.products = [
+            Product.objects.create(
+                code=f'P{i}', name=f'Producto {i}', category=category,
+                cost_price=Decimal('10.00'), sale_price=Decimal('12.00'),
+                current_stock=50, reorder_point=20, min_stock=10, max_stock=max_stock
+            )
+            for i, max_stock in enumerate([500, 25])
+        ]
+
+    def test_apply_updates_changed_products_within_max_stock(self):
+        engine = ReorderPolicyEngine(service_level=0.95, lead_time_days=3)
+        products = ReorderPolicyEngine.products_frame(self.products)
+        policy = engine.compute(products, np.full((2, 30), 10.0), error_std=[0.0, 8.0])
+
+        self.assertEqual(engine.apply_to_products(policy), 2)
+
+        first, second = (Product.objects.get(pk=p.pk) for p in self.products)
+        self.assertEqual((first.reorder_point, first.min_stock), (30, 0))
+        self.assertEqual(second.reorder_point, 25)
+        self.assertLessEqual(second.min_stock, second.max_stock)
+
+        # Sin cambios no se vuelve a escribir
+        policy = engine.compute(
+            ReorderPolicyEngine.products_frame(Product.objects.order_by('code')),
+            np.full((2, 30), 10.0), error_std=[0.0, 8.0]
+        )
+        self.assertEqual(engine.apply_to_products(policy), 0)
+
+
+class BacktestLeakageTests(SimpleTestCase):
+    """Las características de un origen no usan información posterior al origen"""
+
+    def test_rolling_features_exclude_the_rows_own_target(self):
+        df = pd.DataFrame({
+            'product_id': 1,
+            'date': pd.date_range('2024-01-01', periods=5),
+            'quantity_sold': [1.0, 2.0, 3.0, 4.0, 100.0],
+        })
+
+        last = DataProcessor().create_lag_features(df).iloc[-1]
+
+        self.assertEqual(last['quantity_sold_lag_1'], 4)
+        self.assertEqual(last['quantity_sold_ma_7'], 2.5)
+        self.assertAlmostEqual(last['quantity_sold_trend_7'], 1.0)
+
+    def test_origin_features_freeze_history_and_recompute_stats(self):
+        # Dos productos, días 0..9; columnas de X: [lag_1, mean]
+        days = np.tile(np.arange(10), 2)
+        products = np.repeat([0, 1], 10)
+        sales = np.r_[np.arange(10.0), np.full(10, 5.0)]
+        X = np.c_[np.r_[0, sales[:-1]], np.full(20, 99.0)]
+        # El producto 1 no tiene fila el primer día del horizonte
+        kept = ~((products == 1) & (days == 6))
+        X, days, products, sales = X[kept], days[kept], products[kept], sales[kept]
+
+        X_train, X_test, test_rows = MLTrainer.origin_features(
+            X, days, 5, days <= 5, (days > 5) & (days <= 8), products,
+            stats_source=sales[:, None], stats_spec={'quantity_sold': ['mean']},
+            stats_columns={'quantity_sold_mean': 1}, history_columns=np.array([0])
+        )
+
+        self.assertEqual(list(days[test_rows]), [6, 7, 8])
+        self.assertEqual(list(products[test_rows]), [0, 0, 0])
+        # lag_1 del horizonte congelado en el del día 6 (venta del día 5)
+        self.assertEqual(list(X_test[:, 0]), [5.0, 5.0, 5.0])
+        # Promedio solo con días 0..5
+        self.assertEqual(list(X_test[:, 1]), [2.5, 2.5, 2.5])
+        self.assertEqual(set(X_train[:, 1]), {2.5, 5.0})
+        self.assertEqual(X[0, 1], 99.0)
@@ -6,18 +6,25 @@ from sklearn.model_selection import train_test_split, TimeSeriesSplit, cross_val
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.tree import DecisionTreeRegressor
-from sklearn.linear_model import LinearRegression, Ridge, Lasso
+from sklearn.linear_model import LinearRegression, Ridge, Lasso, SGDRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.pipeline import Pipeline
 import joblib
 import os
 from datetime import datetime, timedelta
+import logging
 import warnings
+from apps.monitoring.tracing import span
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
 class MLTrainer:
     """Clase para entrenar modelos de Machine Learning"""
     
+    # Límite de árboles acumulados por actualizaciones incrementales
+    MAX_INCREMENTAL_TREES = 300
+    
     def __init__(self, data_processor=None):
         self.data_processor = data_processor
         self.models = {}
@@ -26,10 +33,11 @@ class MLTrainer:
         self.scalers = {}
         self.feature_names = []
         self.metrics = {}
+        self.model_metadata = {}
         
     def prepare_models(self):
         """Inicializa los modelos a entrenar"""
-        print("Preparando modelos de Machine Learning...")
+        logger.debug("Preparando modelos de Machine Learning")
         
         self.models = {
             'linear_regression': Pipeline([
@@ -47,6 +55,19 @@ class MLTrainer:
                 ('regressor', Lasso(alpha=0.1, random_state=42, max_iter=2000))
             ]),
             
+            # Candidato lineal con partial_fit para actualizaciones incrementales
+            'sgd': Pipeline([
+                ('scaler', StandardScaler()),
+                ('regressor', SGDRegressor(
+                    loss='huber',
+                    penalty='l2',
+                    alpha=0.0001,
+                    max_iter=2000,
+                    tol=1e-3,
+                    random_state=42
+                ))
+            ]),
+            
             'decision_tree': Pipeline([
                 ('scaler', RobustScaler()),
                 ('regressor', DecisionTreeRegressor(
@@ -70,7 +91,7 @@ class MLTrainer:
             ])
         }
         
-        print(f"✓ {len(self.models)} modelos preparados")
+        logger.debug("Modelos preparados", extra={'models': len(self.models)})
     
     def calculate_metrics(self, y_true, y_pred):
         """Calcula métricas de evaluación"""
@@ -117,12 +138,91 @@ class MLTrainer:
             
             return np.mean(scores), np.std(scores)
         except Exception as e:
-            print(f"Error en validación cruzada: {e}")
+            logger.warning("Error en validación cruzada: %s", e)
             return 0, 0
     
+    @staticmethod
+    def evaluate_origin(model, X, y, day_index, cutoff_day, horizon_days, origin_features=None):
+        """Entrena con datos hasta cutoff_day y evalúa los horizon_days siguientes
+        
+        Función pura (sin acceso a la base de datos) para poder ejecutarse en
+        procesos paralelos del backtesting. origin_features(X, day_index,
+        cutoff_day, train_mask, test_mask) puede rearmar las características
+        con lo conocido en el origen; retorna (X_train, X_test, filas de test).
+        """
+        from sklearn.base import clone
+        
+        train_mask = day_index <= cutoff_day
+        test_mask = (day_index > cutoff_day) & (day_index <= cutoff_day + horizon_days)
+        
+        if train_mask.sum() == 0 or test_mask.sum() == 0:
+            return None
+        
+        if origin_features is not None:
+            X_train, X_test, test_rows = origin_features(X, day_index, cutoff_day, train_mask, test_mask)
+            if len(X_test) == 0:
+                return None
+        else:
+            X_train, X_test, test_rows = X[train_mask], X[test_mask], test_mask
+        
+        model_origin = clone(model)
+        model_origin.fit(X_train, y[train_mask])
+        predictions = np.maximum(model_origin.predict(X_test), 0)
+        
+        metrics = MLTrainer().calculate_metrics(y[test_rows], predictions)
+        metrics['train_samples'] = len(X_train)
+        metrics['test_samples'] = len(X_test)
+        return metrics
+    
+    @staticmethod
+    def origin_features(X, day_index, cutoff_day, train_mask, test_mask, products, stats_source,
+                        stats_spec, stats_columns, history_columns):
+        """Características de un origen usando solo lo conocido hasta cutoff_day
+        
+        - Estadísticas por producto (stats_spec, {columna: [agregaciones]}): se
+          recalculan con las filas de entrenamiento; el panel las trae
+          calculadas con todo el historial.
+        - Historia (lags, promedios, tendencia): en el horizonte se congelan en
+          las del primer día después del origen, como hace el predictor con el
+          historial conocido. Los productos sin esa fila no se evalúan.
+        
+        products: código 0..n-1 del producto por fila; stats_source: columnas de
+        stats_spec (en ese orden) por fila; stats_columns: {característica:
+        índice en X}; history_columns: índices en X. Retorna (X_train, X_test,
+        filas de test).
+        """
+        train_rows = np.flatnonzero(train_mask)
+        test_rows = np.flatnonzero(test_mask)
+        n_products = int(products.max()) + 1
+        
+        anchors = np.full(n_products, -1)
+        first_day = test_rows[day_index[test_rows] == cutoff_day + 1]
+        anchors[products[first_day]] = first_day
+        anchor_rows = anchors[products[test_rows]]
+        known = anchor_rows >= 0
+        test_rows, anchor_rows = test_rows[known], anchor_rows[known]
+        
+        X_train = X[train_rows]
+        X_test = X[test_rows]
+        if len(history_columns):
+            X_test[:, history_columns] = X[anchor_rows][:, history_columns]
+        
+        if stats_columns:
+            train = pd.DataFrame(stats_source[train_rows], columns=list(stats_spec))
+            train['product'] = products[train_rows]
+            stats = train.groupby('product').agg(stats_spec).round(2)
+            stats.columns = ['_'.join(col) for col in stats.columns]
+            stats = stats.reindex(np.arange(n_products)).fillna(0)
+            for name, column in stats_columns.items():
+                values = stats[name].to_numpy()
+                X_train[:, column] = values[products[train_rows]]
+                X_test[:, column] = values[products[test_rows]]
+        
+        return X_train, X_test, test_rows
+    
     def train_single_model(self, model_name, model, X_train, X_test, y_train, y_test):
         """Entrena un modelo individual"""
-        print(f"\nEntrenando {model_name}...")
+        logger.debug("Entrenando %s", model_name)
         start_time = datetime.now()
         
         try:
@@ -131,7 +231,8 @@ class MLTrainer:
                 raise ValueError("Datos de entrenamiento vacíos")
             
             # Entrenar modelo
-            model.fit(X_train, y_train)
+            with span(f'ml.fit.{model_name}'):
+                model.fit(X_train, y_train)
             
             # Predicciones
             y_train_pred = model.predict(X_train)
@@ -164,24 +265,22 @@ class MLTrainer:
                 'model': model
             }
             
-            print(f"✓ {model_name} entrenado exitosamente")
-            print(f"  MAE Test: {test_metrics['MAE']}")
-            print(f"  RMSE Test: {test_metrics['RMSE']}")
-            print(f"  MAPE Test: {test_metrics['MAPE']}%")
-            print(f"  R² Test: {test_metrics['R2']}")
+            logger.info(
+                "Modelo entrenado",
+                extra={'model': model_name, 'mae': test_metrics['MAE'], 'rmse': test_metrics['RMSE'],
+                       'mape': test_metrics['MAPE'], 'r2': test_metrics['R2'],
+                       'training_seconds': metrics['training_time']}
+            )
             
             return metrics
             
         except Exception as e:
-            print(f"✗ Error entrenando {model_name}: {str(e)}")
+            logger.error("Error entrenando %s: %s", model_name, e)
             return None
     
+    @span('ml.train_all_models')
     def train_all_models(self, X, y, test_size=0.2, random_state=42):
         """Entrena todos los modelos y selecciona el mejor"""
-        print("=" * 60)
-        print("INICIANDO ENTRENAMIENTO DE MODELOS ML")
-        print("=" * 60)
-        
         if X is None or y is None:
             raise ValueError("Datos de entrada no válidos")
         
@@ -196,7 +295,7 @@ class MLTrainer:
         
         # Verificar que tenemos suficientes datos
         if len(X) < 100:
-            print(f"⚠️ Advertencia: Pocos datos para entrenamiento ({len(X)} muestras)")
+            logger.warning("Pocos datos para entrenamiento", extra={'samples': len(X)})
         
         # Dividir datos manteniendo orden temporal
         # Para series temporales, usamos las últimas fechas como test
@@ -204,13 +303,15 @@ class MLTrainer:
         X_train, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
         y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
         
-        print(f"Datos de entrenamiento: {len(X_train)} muestras")
-        print(f"Datos de prueba: {len(X_test)} muestras")
-        print(f"Características: {len(self.feature_names)}")
+        logger.info(
+            "Iniciando entrenamiento de modelos ML",
+            extra={'train_samples': len(X_train), 'test_samples': len(X_test),
+                   'features': len(self.feature_names)}
+        )
         
         # Verificar que tenemos datos de prueba
         if len(X_test) == 0:
-            print("⚠️ No hay datos de prueba, usando validación simple")
+            logger.warning("No hay datos de prueba, usando validación simple")
             # Usar una muestra pequeña del final para testing
             test_samples = max(1, len(X_train) // 10)
             X_test = X_train.iloc[-test_samples:]
@@ -234,39 +335,26 @@ class MLTrainer:
         if not results:
             raise Exception("No se pudo entrenar ningún modelo exitosamente")
         
-        print(f"\n✓ {successful_models}/{len(self.models)} modelos entrenados exitosamente")
         
         # Seleccionar mejor modelo basado en MAE de test
         best_result = min(results, key=lambda x: x['test_metrics']['MAE'])
         self.best_model = best_result['model']
         self.best_model_name = best_result['model_name']
         
-        print("\n" + "=" * 60)
-        print("RESULTADOS DEL ENTRENAMIENTO")
-        print("=" * 60)
-        
-        # Mostrar comparación de modelos
-        print(f"{'Modelo':<20} {'MAE Test':<10} {'RMSE Test':<12} {'MAPE Test':<12} {'R² Test':<10}")
-        print("-" * 70)
-        
-        for result in sorted(results, key=lambda x: x['test_metrics']['MAE']):
-            metrics = result['test_metrics']
-            print(f"{result['model_name']:<20} {metrics['MAE']:<10.4f} "
-                  f"{metrics['RMSE']:<12.4f} {metrics['MAPE']:<12.2f}% "
-                  f"{metrics['R2']:<10.4f}")
-        
-        print("\n" + "=" * 60)
-        print(f"🏆 MEJOR MODELO: {self.best_model_name}")
         best_metrics = best_result['test_metrics']
-        print(f"   MAE: {best_metrics['MAE']}")
-        print(f"   RMSE: {best_metrics['RMSE']}")
-        print(f"   MAPE: {best_metrics['MAPE']}%")
-        print(f"   R²: {best_metrics['R2']}")
-        print("=" * 60)
+        logger.info(
+            "Entrenamiento completado",
+            extra={'trained': successful_models, 'total': len(self.models),
+                   'best_model': self.best_model_name, 'mae': best_metrics['MAE'],
+                   'rmse': best_metrics['RMSE'], 'mape': best_metrics['MAPE'],
+                   'r2': best_metrics['R2'],
+                   'ranking': [r['model_name'] for r in sorted(results, key=lambda x: x['test_metrics']['MAE'])]}
+        )
         
         return self.best_model, self.best_model_name, results
     
-    def save_model(self, model_path='data/models'):
+    @span('ml.save_model')
+    def save_model(self, model_path='data/models', training_mode='full', extra_metadata=None):
         """Guarda el mejor modelo entrenado"""
         if self.best_model is None:
             raise ValueError("No hay modelo entrenado para guardar")
@@ -276,7 +364,8 @@ class MLTrainer:
         
         # Nombre del archivo
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self.best_model_name}_{timestamp}.joblib"
+        suffix = '_inc' if training_mode == 'incremental' else ''
+        filename = f"{self.best_model_name}_{timestamp}{suffix}.joblib"
         filepath = os.path.join(model_path, filename)
         
         # Preparar datos para guardar
@@ -286,15 +375,28 @@ class MLTrainer:
             'feature_names': self.feature_names,
             'metrics': self.metrics[self.best_model_name] if self.best_model_name in self.metrics else {},
             'training_date': datetime.now(),
-            'version': '1.0'
+            'version': '1.0',
+            'training_mode': training_mode,
+            'data_end_date': self.get_data_end_date()
         }
         
+        # Un entrenamiento completo es su propia referencia para medir el drift
+        if training_mode == 'full':
+            model_data['full_model_path'] = filepath
+            model_data['full_training_date'] = model_data['training_date']
+            model_data['incremental_updates'] = 0
+        
+        if extra_metadata:
+            model_data.update(extra_metadata)
+        
         # Guardar
         joblib.dump(model_data, filepath)
+        self.model_metadata = {k: v for k, v in model_data.items() if k != 'model'}
         
-        print(f"✓ Modelo guardado en: {filepath}")
+        logger.info("Modelo guardado en %s", filepath)
         return filepath
     
+    @span('ml.load_model')
     def load_model(self, filepath):
         """Carga un modelo guardado"""
         try:
@@ -303,14 +405,89 @@ class MLTrainer:
             self.best_model = model_data['model']
             self.best_model_name = model_data['model_name']
             self.feature_names = model_data['feature_names']
+            self.metrics[self.best_model_name] = model_data.get('metrics', {})
+            self.model_metadata = {k: v for k, v in model_data.items() if k != 'model'}
             
-            print(f"✓ Modelo cargado: {self.best_model_name}")
+            logger.info("Modelo cargado: %s", self.best_model_name)
             return True
             
         except Exception as e:
-            print(f"Error cargando modelo: {str(e)}")
+            logger.error("Error cargando modelo: %s", e)
             return False
     
+    def get_data_end_date(self):
+        """Retorna la última fecha de los datos procesados usados para entrenar"""
+        if self.data_processor is None or self.data_processor.processed_data is None:
+            return None
+        
+        df = self.data_processor.processed_data
+        if df.empty or 'date' not in df.columns:
+            return None
+        
+        return pd.to_datetime(df['date'].max()).date()
+    
+    def evaluate(self, X, y, model=None):
+        """Evalúa un modelo (por defecto el mejor) sobre datos dados"""
+        model = model if model is not None else self.best_model
+        if model is None:
+            raise ValueError("No hay modelo entrenado")
+        
+        X = X.reindex(columns=self.feature_names, fill_value=0)
+        predictions = np.maximum(model.predict(X), 0)
+        
+        return self.calculate_metrics(np.asarray(y, dtype=float), predictions)
+    
+    @span('ml.update_incremental')
+    def update_incremental(self, X_new, y_new, n_new_trees=20):
+        """Actualiza el mejor modelo con datos recientes sin reentrenar desde cero
+        
+        - RandomForest: añade árboles entrenados sobre la ventana reciente (warm_start)
+        - Regresores con partial_fit (SGD): ajusta los coeficientes con los datos nuevos
+        
+        Retorna el modo aplicado, o None si el modelo no admite actualización incremental.
+        """
+        if self.best_model is None:
+            raise ValueError("No hay modelo entrenado")
+        
+        if len(X_new) == 0:
+            raise ValueError("No hay datos nuevos para actualizar el modelo")
+        
+        X_new = X_new.reindex(columns=self.feature_names, fill_value=0)
+        y_new = np.asarray(y_new, dtype=float)
+        
+        scaler = self.best_model.named_steps['scaler']
+        regressor = self.best_model.named_steps['regressor']
+        
+        # El escalador se mantiene fijo: reajustarlo invalidaría lo ya aprendido
+        X_scaled = scaler.transform(X_new)
+        
+        if isinstance(regressor, RandomForestRegressor):
+            regressor.set_params(
+                warm_start=True,
+                n_estimators=len(regressor.estimators_) + n_new_trees
+            )
+            regressor.fit(X_scaled, y_new)
+            
+            # Descartar los árboles más antiguos si se supera el límite
+            if len(regressor.estimators_) > self.MAX_INCREMENTAL_TREES:
+                regressor.estimators_ = regressor.estimators_[-self.MAX_INCREMENTAL_TREES:]
+                regressor.n_estimators = len(regressor.estimators_)
+            
+            mode = 'warm_start'
+        elif hasattr(regressor, 'partial_fit'):
+            regressor.partial_fit(X_scaled, y_new)
+            mode = 'partial_fit'
+        else:
+            logger.warning("%s no admite actualización incremental", self.best_model_name)
+            return None
+        
+        logger.info(
+            "Modelo actualizado incrementalmente",
+            extra={'model': self.best_model_name, 'mode': mode, 'samples': len(X_new)}
+        )
+        return mode
+    
+    @span('ml.predict')
     def predict(self, X):
         """Realiza predicciones con el mejor modelo"""
         if self.best_model is None:
@@ -318,7 +495,7 @@ class MLTrainer:
         
         # Verificar que las características coincidan
         if list(X.columns) != self.feature_names:
-            print("Advertencia: Las características no coinciden exactamente")
+            logger.warning("Las características no coinciden exactamente")
             # Intentar reordenar columnas
             try:
                 X = X[self.feature_names]
@@ -360,7 +537,7 @@ class MLTrainer:
                 
                 return feature_importance
         except Exception as e:
-            print(f"Error obteniendo importancia: {e}")
+            logger.warning("Error obteniendo importancia: %s", e)
         
         return None
     
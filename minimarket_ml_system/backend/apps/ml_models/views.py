@@ -7,6 +7,7 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
+import time
 
 from .models import MLModel, PredictionRequest, DemandPrediction, ModelPerformance
 from .serializers import (
@@ -16,6 +17,7 @@ from .serializers import (
 from .predictor import DemandPredictor
 from .trainer import MLTrainer
 from .data_processor import DataProcessor
+from .streaming import wants_stream, ndjson_response
 from apps.products.models import Product
 
 class MLModelViewSet(viewsets.ModelViewSet):
@@ -231,7 +233,11 @@ class PredictionRequestViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def batch_predict(self, request):
-        """Genera predicciones para múltiples productos"""
+        """Genera predicciones para múltiples productos
+        
+        Con ?stream=1 responde NDJSON: una línea por producto a medida que se
+        completa y una línea final con el resumen.
+        """
         try:
             product_ids = request.data.get('product_ids', [])
             days_ahead = request.data.get('days_ahead', 30)
@@ -251,31 +257,21 @@ class PredictionRequestViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
             
-            # Generar predicciones
-            results = predictor.predict_multiple_products(
-                product_ids=product_ids,
+            # Generar predicciones (el producto llega precargado junto con la predicción)
+            forecasts = predictor.iter_forecasts(
+                product_ids,
                 start_date=start_date,
                 days_ahead=days_ahead
             )
             
+            if wants_stream(request):
+                return ndjson_response(self.stream_batch_predictions(forecasts))
+            
             # Preparar respuesta
-            response_data = []
-            for product_id, prediction_df in results.items():
-                if prediction_df is not None:
-                    product = Product.objects.get(id=product_id)
-                    response_data.append({
-                        'product_id': product_id,
-                        'product_name': product.name,
-                        'total_predicted': float(prediction_df['predicted_quantity'].sum()),
-                        'avg_daily': float(prediction_df['predicted_quantity'].mean()),
-                        'success': True
-                    })
-                else:
-                    response_data.append({
-                        'product_id': product_id,
-                        'success': False,
-                        'error': 'Error generando predicción'
-                    })
+            response_data = [
+                self.batch_prediction_record(product_id, product, prediction_df)
+                for product_id, product, prediction_df in forecasts
+            ]
             
             return Response({
                 'success': True,
@@ -287,6 +283,45 @@ class PredictionRequestViewSet(viewsets.ModelViewSet):
                 {'error': f'Error en predicción batch: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    def batch_prediction_record(self, product_id, product, prediction_df):
+        """Resultado de batch_predict para un producto"""
+        if isinstance(prediction_df, Exception):
+            return {
+                'product_id': product_id,
+                'success': False,
+                'error': 'Error generando predicción'
+            }
+        
+        return {
+            'product_id': product_id,
+            'product_name': product.name,
+            'total_predicted': float(prediction_df['predicted_quantity'].sum()),
+            'avg_daily': float(prediction_df['predicted_quantity'].mean()),
+            'success': True
+        }
+    
+    def stream_batch_predictions(self, forecasts):
+        """Registros NDJSON de batch_predict y resumen final"""
+        start = time.perf_counter()
+        successful = failed = 0
+        
+        for product_id, product, prediction_df in forecasts:
+            record = self.batch_prediction_record(product_id, product, prediction_df)
+            if record['success']:
+                successful += 1
+            else:
+                failed += 1
+            yield dict(record, type='prediction')
+        
+        yield {
+            'type': 'summary',
+            'success': True,
+            'total': successful + failed,
+            'successful': successful,
+            'failed': failed,
+            'elapsed_seconds': round(time.perf_counter() - start, 3)
+        }
 
 class DemandPredictionViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet para consultar predicciones de demanda"""
@@ -360,7 +395,11 @@ class ReorderRecommendationViewSet(viewsets.ViewSet):
     """ViewSet para recomendaciones de reorden"""
     
     def list(self, request):
-        """Lista recomendaciones de reorden para todos los productos"""
+        """Lista recomendaciones de reorden para todos los productos
+        
+        Con ?stream=1 responde NDJSON: una línea por producto a medida que se
+        calcula (sin ordenar por prioridad) y una línea final con el resumen.
+        """
         try:
             days_ahead = int(request.query_params.get('days_ahead', 30))
             priority_filter = request.query_params.get('priority')
@@ -376,6 +415,11 @@ class ReorderRecommendationViewSet(viewsets.ViewSet):
             # Obtener productos activos
             active_products = Product.objects.filter(is_active=True).values_list('id', flat=True)
             
+            if wants_stream(request):
+                return ndjson_response(self.stream_recommendations(
+                    predictor, list(active_products), days_ahead, priority_filter
+                ))
+            
             # Generar recomendaciones
             recommendations = predictor.batch_reorder_recommendations(
                 product_ids=list(active_products),
@@ -398,6 +442,36 @@ class ReorderRecommendationViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def stream_recommendations(self, predictor, product_ids, days_ahead, priority_filter=None):
+        """Registros NDJSON de recomendaciones y resumen final"""
+        start = time.perf_counter()
+        priority_filter = priority_filter.upper() if priority_filter else None
+        by_priority = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
+        emitted = failed = 0
+        
+        for product_id, recommendation in predictor.iter_reorder_recommendations(product_ids, days_ahead):
+            if isinstance(recommendation, Exception):
+                failed += 1
+                yield {'type': 'error', 'product_id': product_id, 'error': str(recommendation)}
+                continue
+            
+            by_priority[recommendation['priority']] = by_priority.get(recommendation['priority'], 0) + 1
+            if priority_filter and recommendation['priority'] != priority_filter:
+                continue
+            
+            emitted += 1
+            yield dict(recommendation, type='recommendation')
+        
+        yield {
+            'type': 'summary',
+            'success': True,
+            'products': len(product_ids),
+            'total_recommendations': emitted,
+            'failed': failed,
+            'by_priority': by_priority,
+            'elapsed_seconds': round(time.perf_counter() - start, 3)
+        }
+    
     def retrieve(self, request, pk=None):
         """Obtiene recomendación específica para un producto"""
         try:
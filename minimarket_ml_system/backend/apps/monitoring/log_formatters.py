@@ -0,0 +1,46 @@
+# Archivo: minimarket_ml_system/backend/apps/monitoring/log_formatters.py
+
+import json
+import logging
+from datetime import datetime
+
+# Atributos estándar de LogRecord: todo lo demás proviene de extra={...}
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formatea cada registro como una línea clave=valor (o JSON con json_output=True)
+
+    Los campos pasados en extra={...} se agregan como pares adicionales.
+    """
+
+    def __init__(self, json_output=False, **kwargs):
+        super().__init__(**kwargs)
+        self.json_output = json_output
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        payload.update(
+            (key, value) for key, value in record.__dict__.items()
+            if key not in _RESERVED and not key.startswith('_')
+        )
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+
+        if self.json_output:
+            return json.dumps(payload, default=str, ensure_ascii=False)
+
+        return ' '.join(f'{key}={self._quote(value)}' for key, value in payload.items())
+
+    def _quote(self, value):
+        if isinstance(value, (dict, list, tuple)):
+            value = json.dumps(value, default=str, ensure_ascii=False)
+        text = str(value)
+        if text == '' or any(c in text for c in ' ="\n'):
+            return json.dumps(text, ensure_ascii=False)
+        return text
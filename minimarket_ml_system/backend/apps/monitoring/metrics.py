@@ -0,0 +1,232 @@
+# Archivo: minimarket_ml_system/backend/apps/monitoring/metrics.py
+
+import bisect
+import threading
+import time
+
+# Buckets por defecto (segundos) para latencias de endpoints y etapas
+DEFAULT_TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Buckets para cantidad de consultas SQL por request
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Métrica con etiquetas; cada combinación de etiquetas es una serie"""
+
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.label_names)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+        with self._lock:
+            series = sorted(self._series.items())
+            lines.extend(self._render_series(series))
+        return lines
+
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def _render_series(self, series):
+        for key, value in series:
+            yield f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}'
+
+
+class Gauge(Metric):
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), callback=None):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def render(self):
+        if self.callback is not None:
+            value = self.callback()
+            if value is None:
+                return []
+            self.set(value)
+        return super().render()
+
+    def _render_series(self, series):
+        for key, value in series:
+            yield f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}'
+
+
+class Histogram(Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_TIME_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _render_series(self, series):
+        for key, (bucket_counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ('le', _format_value(float(bound))))
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.label_names, key)
+            yield f'{self.name}_sum{labels} {_format_value(round(total, 6))}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+class MetricsRegistry:
+    """Registro en memoria de las métricas del proceso
+
+    Cada proceso (worker de gunicorn, runserver) mantiene sus propias series.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=(), callback=None):
+        return self.register(Gauge(name, documentation, labels, callback))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_TIME_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def clear(self):
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self):
+        """Exposición en formato de texto de Prometheus (versión 0.0.4)"""
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+PROCESS_START_TIME = time.time()
+
+
+def _max_rss_bytes():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    import sys
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+# Requests HTTP
+http_requests_total = registry.counter(
+    'minimarket_http_requests_total',
+    'Requests HTTP atendidos',
+    labels=('method', 'route', 'status')
+)
+http_request_duration = registry.histogram(
+    'minimarket_http_request_duration_seconds',
+    'Latencia de requests HTTP por endpoint',
+    labels=('method', 'route')
+)
+http_request_db_queries = registry.histogram(
+    'minimarket_http_request_db_queries',
+    'Consultas SQL ejecutadas por request',
+    labels=('method', 'route'),
+    buckets=QUERY_COUNT_BUCKETS
+)
+http_request_db_duration = registry.histogram(
+    'minimarket_http_request_db_duration_seconds',
+    'Tiempo en base de datos por request',
+    labels=('method', 'route')
+)
+
+# Etapas de procesamiento, entrenamiento y predicción
+stage_duration = registry.histogram(
+    'minimarket_stage_duration_seconds',
+    'Duración de etapas de DataProcessor, MLTrainer y DemandPredictor',
+    labels=('stage',)
+)
+stage_errors_total = registry.counter(
+    'minimarket_stage_errors_total',
+    'Etapas que terminaron con excepción',
+    labels=('stage',)
+)
+
+# Proceso
+registry.gauge(
+    'minimarket_process_start_time_seconds',
+    'Inicio del proceso (epoch)',
+    callback=lambda: PROCESS_START_TIME
+)
+registry.gauge(
+    'minimarket_process_max_rss_bytes',
+    'Memoria residente máxima del proceso',
+    callback=_max_rss_bytes
+)
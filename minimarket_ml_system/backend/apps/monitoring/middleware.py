@@ -0,0 +1,83 @@
+# Archivo: minimarket_ml_system/backend/apps/monitoring/middleware.py
+
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from .metrics import (
+    http_requests_total, http_request_duration,
+    http_request_db_queries, http_request_db_duration
+)
+
+logger = logging.getLogger('apps.monitoring.requests')
+
+
+class QueryCounter:
+    """execute_wrapper que cuenta consultas y su tiempo (funciona con DEBUG=False)"""
+
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """Registra latencia, consultas SQL y tiempo en BD por endpoint
+
+    La etiqueta de ruta usa el patrón de URL (p. ej. api/products/products/<pk>/)
+    para que la cantidad de series no crezca con cada ID.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - start
+        route = self.get_route(request)
+        method = request.method
+
+        http_requests_total.inc(method=method, route=route, status=str(response.status_code))
+        http_request_duration.observe(duration, method=method, route=route)
+        http_request_db_queries.observe(counter.count, method=method, route=route)
+        http_request_db_duration.observe(counter.duration, method=method, route=route)
+
+        response['Server-Timing'] = (
+            f'app;dur={duration * 1000:.1f}, db;dur={counter.duration * 1000:.1f};desc="{counter.count} queries"'
+        )
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                'request',
+                extra={'method': method, 'route': route, 'status': response.status_code,
+                       'duration_ms': round(duration * 1000, 2), 'db_queries': counter.count,
+                       'db_ms': round(counter.duration * 1000, 2)}
+            )
+
+        return response
+
+    def get_route(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unmatched'
+        return match.route or match.view_name or 'unknown'
@@ -0,0 +1,53 @@
+# Archivo: minimarket_ml_system/backend/apps/monitoring/tracing.py
+
+import functools
+import logging
+import time
+from .metrics import stage_duration, stage_errors_total
+
+logger = logging.getLogger('apps.monitoring.spans')
+
+
+class span:
+    """Mide una etapa y la registra en minimarket_stage_duration_seconds
+
+    Se usa como context manager (with span('data.extract_sales_data'):) o como
+    decorador (@span('data.extract_sales_data')). El log de la duración solo se
+    construye si el nivel DEBUG está habilitado.
+    """
+
+    __slots__ = ('name', 'fields', 'start')
+
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        stage_duration.observe(duration, stage=self.name)
+
+        if exc_type is not None:
+            stage_errors_total.inc(stage=self.name)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                'span finalizado',
+                extra={'span': self.name, 'duration_ms': round(duration * 1000, 2),
+                       'error': exc_type.__name__ if exc_type else None, **self.fields}
+            )
+        return False
+
+    def __call__(self, func):
+        name = self.name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
@@ -0,0 +1,12 @@
+# Archivo: minimarket_ml_system/backend/apps/monitoring/views.py
+
+from django.http import HttpResponse
+from .metrics import registry
+
+
+def metrics_view(request):
+    """Métricas del proceso en formato de texto de Prometheus"""
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
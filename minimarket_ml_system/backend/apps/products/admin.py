@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Supplier, Product
+from .models import Category, Supplier, Product, ProductPriceChange
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -52,4 +52,12 @@ class ProductAdmin(admin.ModelAdmin):
         return f'<span style="color: {colors.get(status, "black")}">{status}</span>'
     
     stock_status.allow_tags = True
-    stock_status.short_description = 'Estado de Stock'
\ No newline at end of file
+    stock_status.short_description = 'Estado de Stock'
+
+@admin.register(ProductPriceChange)
+class ProductPriceChangeAdmin(admin.ModelAdmin):
+    list_display = ['product', 'old_cost_price', 'new_cost_price', 'old_sale_price', 'new_sale_price', 'source', 'changed_at']
+    list_filter = ['source', 'changed_at']
+    search_fields = ['product__code', 'product__name', 'reference']
+    raw_id_fields = ['product']
+    readonly_fields = ['changed_at']
@@ -3,4 +3,10 @@ from django.apps import AppConfig
 
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.products'
\ No newline at end of file
+    name = 'apps.products'
+
+    def ready(self):
+        from . import signals
+
+        # Invalida la búsqueda del punto de venta al cambiar el catálogo
+        signals.connect()
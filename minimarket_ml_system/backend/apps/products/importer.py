@@ -0,0 +1,359 @@
+# Archivo: minimarket_ml_system/backend/apps/products/importer.py
+
+import csv
+import io
+import json
+import logging
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+from apps.monitoring.tracing import span
+from .models import Category, Supplier, Product, ProductPriceChange
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+TEXT_COLUMNS = ['code', 'barcode', 'name', 'description', 'unit', 'brand']
+DECIMAL_COLUMNS = {'cost_price': 2, 'sale_price': 2, 'weight': 3}
+INTEGER_COLUMNS = ['min_stock', 'max_stock', 'reorder_point', 'units_per_box', 'expiration_days']
+BOOLEAN_COLUMNS = ['is_active', 'is_perishable']
+
+# Columnas del archivo que se guardan en Product (category y supplier se resuelven a *_id)
+PRODUCT_COLUMNS = (
+    TEXT_COLUMNS + ['category_id', 'supplier_id'] + list(DECIMAL_COLUMNS) + INTEGER_COLUMNS + BOOLEAN_COLUMNS
+)
+REQUIRED_FOR_NEW = ['name', 'category_id', 'cost_price', 'sale_price']
+
+TRUE_VALUES = {'1', 'true', 'si', 'sí', 'yes', 'x', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+
+def parse_catalog_file(uploaded_file):
+    """Lee un catálogo CSV (delimitador detectado) o JSON (lista o {"products": [...]})"""
+    content = uploaded_file.read()
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+
+    name = getattr(uploaded_file, 'name', '') or ''
+    if name.lower().endswith('.json') or content.lstrip()[:1] in ('[', '{'):
+        data = json.loads(content)
+        if isinstance(data, dict):
+            data = data.get('products')
+        if not isinstance(data, list):
+            raise ValueError('El JSON debe ser una lista de productos o {"products": [...]}')
+        return data
+
+    try:
+        dialect = csv.Sniffer().sniff(content[:2048], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    return list(csv.DictReader(io.StringIO(content), dialect=dialect))
+
+
+class CatalogImporter:
+    """Importación masiva de productos con upsert por código
+
+    Las validaciones se hacen por columna sobre un DataFrame (to_numeric,
+    máscaras) y cada fila inválida se reporta sin detener el resto. Categorías
+    y proveedores se resuelven con una consulta cada uno (por id, nombre o RUC)
+    y los productos existentes se leen por bloques de code__in. En los
+    productos existentes las celdas vacías conservan el valor actual, así una
+    lista de precios con solo code, cost_price y sale_price es válida.
+
+    Cada bloque se guarda en su transacción con bulk_create(update_conflicts)
+    sobre code, y los cambios de costo o precio quedan en ProductPriceChange.
+    """
+
+    def __init__(self, user=None, reference='', batch_size=BATCH_SIZE):
+        self.user = user
+        self.reference = reference
+        self.batch_size = batch_size
+
+    # --- Lectura y normalización ---
+
+    @staticmethod
+    def frame(entries):
+        """DataFrame de texto con una fila por entrada, indexado por número de fila (desde 1)"""
+        df = pd.DataFrame.from_records([entry if isinstance(entry, dict) else {} for entry in entries])
+        df.index = np.arange(1, len(df) + 1)
+        df.columns = [str(column).strip().lower() for column in df.columns]
+        df = df.loc[:, ~df.columns.duplicated()]
+        for column in df.columns:
+            text = df[column].where(df[column].notna(), '').astype(str).str.strip()
+            df[column] = text.where(text != '', None)
+        return df
+
+    @staticmethod
+    def resolve(values, lookup):
+        """Mapea id, nombre (sin distinguir mayúsculas) o RUC a id; NaN si no existe"""
+        by_key = {}
+        for pk, *keys in lookup:
+            by_key[str(pk)] = pk
+            for key in keys:
+                if key:
+                    by_key[str(key).strip().lower()] = pk
+        return values.str.lower().map(by_key)
+
+    # --- Validación vectorizada ---
+
+    def validate(self, df):
+        """Convierte y valida columnas; retorna (valores, errores por fila)"""
+        errors = pd.Series(None, index=df.index, dtype=object)
+
+        def fail(mask, message):
+            mask = mask & errors.isna()
+            errors[mask] = message
+
+        def column(name):
+            return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+        values = pd.DataFrame(index=df.index)
+        present = set()
+
+        fail(column('code').isna(), 'Código requerido')
+        for name in TEXT_COLUMNS:
+            values[name] = column(name)
+            max_length = Product._meta.get_field(name).max_length
+            if max_length:
+                fail(values[name].str.len() > max_length, f'{name} excede {max_length} caracteres')
+            if name in df.columns:
+                present.add(name)
+
+        for name, places in DECIMAL_COLUMNS.items():
+            raw = column(name)
+            number = pd.to_numeric(raw.str.replace(',', '.', regex=False), errors='coerce')
+            fail(raw.notna() & number.isna(), f'{name} inválido')
+            fail(number < 0, f'{name} no puede ser negativo')
+            values[name] = number.round(places)
+            if name in df.columns:
+                present.add(name)
+
+        for name in INTEGER_COLUMNS:
+            raw = column(name)
+            number = pd.to_numeric(raw, errors='coerce')
+            fail(raw.notna() & (number.isna() | (number % 1 != 0)), f'{name} debe ser un entero')
+            fail(number < 0, f'{name} no puede ser negativo')
+            values[name] = number
+            if name in df.columns:
+                present.add(name)
+        fail(values['units_per_box'] < 1, 'units_per_box debe ser al menos 1')
+
+        for name in BOOLEAN_COLUMNS:
+            raw = column(name).str.lower()
+            flag = raw.map(lambda value: True if value in TRUE_VALUES else False if value in FALSE_VALUES else None)
+            fail(raw.notna() & flag.isna(), f'{name} debe ser verdadero/falso')
+            values[name] = flag
+            if name in df.columns:
+                present.add(name)
+
+        # Categorías y proveedores: una consulta cada uno
+        category = column('category')
+        values['category_id'] = self.resolve(category, Category.objects.values_list('id', 'name'))
+        fail(category.notna() & values['category_id'].isna(), 'Categoría no encontrada')
+        supplier = column('supplier')
+        values['supplier_id'] = self.resolve(supplier, Supplier.objects.values_list('id', 'name', 'ruc'))
+        fail(supplier.notna() & values['supplier_id'].isna(), 'Proveedor no encontrado')
+        present.update(name for name, source in (('category_id', 'category'), ('supplier_id', 'supplier'))
+                       if source in df.columns)
+
+        # Código repetido en el archivo: gana la última fila
+        fail(values['code'].notna() & values['code'].duplicated(keep='last'), 'Código repetido en el archivo (se usa la última fila)')
+
+        # Código de barras repetido en el archivo con otro código
+        barcodes = values['barcode'].notna() & errors.isna()
+        fail(barcodes & values['barcode'].where(barcodes).duplicated(keep='first'), 'Código de barras repetido en el archivo')
+
+        return values, errors, present
+
+    # --- Bloques ---
+
+    def existing(self, codes):
+        fields = ['id'] + PRODUCT_COLUMNS
+        rows = list(Product.objects.filter(code__in=codes).values(*fields))
+        return pd.DataFrame(rows, columns=fields).set_index('code', drop=False)
+
+    def merge(self, chunk, current, present):
+        """Combina el archivo con los valores actuales; retorna (filas, nuevas, errores)"""
+        errors = pd.Series(None, index=chunk.index, dtype=object)
+        is_new = ~chunk['code'].isin(current.index)
+
+        merged = chunk.copy()
+        known = current.reindex(chunk['code'])
+        known.index = chunk.index
+        for name in PRODUCT_COLUMNS:
+            # Celda vacía: valor actual (existentes) o None (nuevos, luego default del modelo)
+            if name in present:
+                merged[name] = chunk[name].where(chunk[name].notna(), known[name])
+            else:
+                merged[name] = known[name]
+        merged['id'] = known['id']
+
+        missing = merged.loc[is_new, REQUIRED_FOR_NEW].isna()
+        for row in missing.index[missing.any(axis=1)]:
+            columns = [name.replace('_id', '') for name in REQUIRED_FOR_NEW if missing.at[row, name]]
+            errors[row] = f'Faltan columnas requeridas para un producto nuevo: {", ".join(columns)}'
+
+        cost = pd.to_numeric(merged['cost_price'], errors='coerce')
+        sale = pd.to_numeric(merged['sale_price'], errors='coerce')
+        bad_price = errors.isna() & (sale <= cost)
+        errors[bad_price] = 'El precio de venta debe ser mayor al precio de costo'
+
+        defaults = {field: Product._meta.get_field(field).get_default() for field in ('min_stock', 'max_stock')}
+        min_stock = pd.to_numeric(merged['min_stock'], errors='coerce').fillna(defaults['min_stock'])
+        max_stock = pd.to_numeric(merged['max_stock'], errors='coerce').fillna(defaults['max_stock'])
+        bad_stock = errors.isna() & (min_stock > max_stock)
+        errors[bad_stock] = 'El stock mínimo no puede ser mayor al stock máximo'
+
+        # Código de barras de otro producto (una consulta por bloque)
+        barcodes = merged['barcode'].dropna()
+        if len(barcodes):
+            owners = dict(Product.objects.filter(barcode__in=barcodes.tolist()).values_list('barcode', 'code'))
+            owner = merged['barcode'].map(owners)
+            conflict = errors.isna() & owner.notna() & (owner != merged['code'])
+            errors[conflict] = 'El código de barras pertenece a otro producto'
+
+        return merged, is_new, errors
+
+    @staticmethod
+    def to_product(row):
+        data = {}
+        for name in PRODUCT_COLUMNS:
+            value = row[name]
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                continue
+            if name in DECIMAL_COLUMNS:
+                value = Decimal(f'{float(value):.{DECIMAL_COLUMNS[name]}f}')
+            elif name in INTEGER_COLUMNS or name in ('category_id', 'supplier_id'):
+                value = int(value)
+            elif name in BOOLEAN_COLUMNS:
+                value = bool(value)
+            data[name] = value
+        if not pd.isna(row['id']):
+            data['id'] = int(row['id'])
+        return Product(**data)
+
+    @staticmethod
+    def changed(merged, current):
+        """Máscara de productos existentes con alguna columna distinta"""
+        known = current.reindex(merged['code'])
+        known.index = merged.index
+        different = pd.Series(False, index=merged.index)
+        for name in PRODUCT_COLUMNS:
+            left, right = merged[name], known[name]
+            if name in DECIMAL_COLUMNS:
+                left = pd.to_numeric(left, errors='coerce').round(DECIMAL_COLUMNS[name])
+                right = pd.to_numeric(right.astype(float), errors='coerce').round(DECIMAL_COLUMNS[name])
+            elif name in INTEGER_COLUMNS or name in ('category_id', 'supplier_id'):
+                left = pd.to_numeric(left, errors='coerce')
+                right = pd.to_numeric(right, errors='coerce')
+            both_null = left.isna() & right.isna()
+            different |= ~both_null & (left != right)
+        return different
+
+    def write_chunk(self, chunk, present, dry_run):
+        current = self.existing(chunk['code'].tolist())
+        merged, is_new, errors = self.merge(chunk, current, present)
+
+        valid = errors.isna()
+        changed = self.changed(merged, current) & ~is_new
+        to_create = merged[valid & is_new]
+        to_update = merged[valid & changed]
+
+        known = current.reindex(to_update['code'])
+        old_cost = pd.to_numeric(known['cost_price'].astype(float)).round(2).to_numpy()
+        old_sale = pd.to_numeric(known['sale_price'].astype(float)).round(2).to_numpy()
+        new_cost = pd.to_numeric(to_update['cost_price']).round(2).to_numpy()
+        new_sale = pd.to_numeric(to_update['sale_price']).round(2).to_numpy()
+        price_moved = (old_cost != new_cost) | (old_sale != new_sale)
+
+        result = {
+            'created': len(to_create),
+            'updated': len(to_update),
+            'unchanged': int((valid & ~is_new & ~changed).sum()),
+            'price_changes': int(price_moved.sum()),
+            'errors': [
+                {'row': int(row), 'code': chunk.at[row, 'code'], 'error': message}
+                for row, message in errors.dropna().items()
+            ],
+        }
+        if dry_run or not (len(to_create) or len(to_update)):
+            return result
+
+        now = timezone.now()
+        products = [self.to_product(row) for _, row in pd.concat([to_create, to_update]).iterrows()]
+        update_fields = sorted(present | {'updated_at'})
+        changes = [
+            ProductPriceChange(
+                product_id=int(product_id),
+                old_cost_price=Decimal(f'{cost_before:.2f}'),
+                new_cost_price=Decimal(f'{cost_after:.2f}'),
+                old_sale_price=Decimal(f'{sale_before:.2f}'),
+                new_sale_price=Decimal(f'{sale_after:.2f}'),
+                source='IMPORT',
+                reference=self.reference[:200],
+                user=self.user,
+                changed_at=now,
+            )
+            for product_id, cost_before, cost_after, sale_before, sale_after in zip(
+                to_update['id'][price_moved], old_cost[price_moved], new_cost[price_moved],
+                old_sale[price_moved], new_sale[price_moved]
+            )
+        ]
+
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                products,
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=['code'],
+                update_fields=[field for field in update_fields if field != 'code']
+            )
+            ProductPriceChange.objects.bulk_create(changes, batch_size=self.batch_size)
+        return result
+
+    @span('products.catalog_import')
+    def run(self, entries, dry_run=False):
+        """Valida e importa las filas; retorna un resumen con los errores por fila
+
+        entries: lista de dicts con code y las columnas a crear/actualizar
+        (category y supplier por id, nombre o RUC). Con dry_run solo valida.
+        """
+        summary = {'rows': len(entries), 'created': 0, 'updated': 0, 'unchanged': 0, 'price_changes': 0, 'errors': []}
+        if not entries:
+            return summary
+
+        df = self.frame(entries)
+        values, errors, present = self.validate(df)
+        summary['errors'] = [
+            {'row': int(row), 'code': values.at[row, 'code'], 'error': message}
+            for row, message in errors.dropna().items()
+        ]
+        valid = values[errors.isna()]
+
+        for start in range(0, len(valid), self.batch_size):
+            result = self.write_chunk(valid.iloc[start:start + self.batch_size], present, dry_run)
+            for key in ('created', 'updated', 'unchanged', 'price_changes'):
+                summary[key] += result[key]
+            summary['errors'].extend(result['errors'])
+
+        summary['errors'].sort(key=lambda error: error['row'])
+        summary['dry_run'] = dry_run
+
+        if not dry_run and (summary['created'] or summary['updated']):
+            # bulk_create no emite señales: la búsqueda del punto de venta se invalida aquí
+            from .lookup import get_lookup
+            get_lookup().invalidate()
+
+        logger.info(
+            "Importación de catálogo",
+            extra={
+                'rows': summary['rows'], 'products_created': summary['created'],
+                'products_updated': summary['updated'], 'unchanged': summary['unchanged'],
+                'price_changes': summary['price_changes'], 'errors': len(summary['errors']),
+                'dry_run': dry_run,
+            }
+        )
+        return summary
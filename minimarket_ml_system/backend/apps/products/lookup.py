@@ -0,0 +1,266 @@
+# Archivo: minimarket_ml_system/backend/apps/products/lookup.py
+
+import logging
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from apps.monitoring.tracing import span
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+POS_LOOKUP = getattr(settings, 'POS_LOOKUP', {})
+CACHE_SIZE = POS_LOOKUP.get('CACHE_SIZE', 2048)      # Códigos guardados en la caché LRU
+CHECK_SECONDS = POS_LOOKUP.get('CHECK_SECONDS', 30)  # Cada cuánto se valida contra la BD
+SEARCH_LIMIT = 20
+
+# Campos que cambian los tokens del índice: si cambian se reconstruye completo
+INDEXED_FIELDS = ('code', 'barcode', 'name', 'brand', 'is_active', 'category_id')
+
+RECORD_FIELDS = [
+    'id', 'code', 'barcode', 'name', 'brand', 'category', 'category__name', 'sale_price',
+    'current_stock', 'min_stock', 'max_stock', 'unit', 'units_per_box', 'is_active',
+]
+
+
+def normalize(text):
+    """Minúsculas, sin tildes y solo letras/dígitos separados por espacios"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return ''.join(char if char.isalnum() else ' ' for char in text)
+
+
+def product_record(product, category_name):
+    """Representación del producto para la caja (mismos formatos que la API)"""
+    return {
+        'id': product.id,
+        'code': product.code,
+        'barcode': product.barcode,
+        'name': product.name,
+        'brand': product.brand,
+        'category': product.category_id,
+        'category_name': category_name,
+        'sale_price': str(product.sale_price),
+        'current_stock': product.current_stock,
+        'stock_status': product.stock_status,
+        'unit': product.unit,
+        'units_per_box': product.units_per_box,
+    }
+
+
+class ProductLookup:
+    """Búsqueda de productos para el punto de venta, en memoria del proceso
+
+    - Código exacto (escáner): caché LRU código/código de barras -> registro;
+      en un fallo se consulta la BD por los índices únicos de code/barcode.
+    - Búsqueda por prefijo: arreglo ordenado de tokens (palabras de nombre y
+      marca, y el código) con su producto; cada término se resuelve con dos
+      bisect y los términos se intersectan (AND).
+
+    Las señales de Product invalidan las entradas del proceso al confirmar. Si
+    solo cambian precio o stock el registro se actualiza en el índice; si
+    cambian nombre, marca o códigos el índice se reconstruye en la siguiente
+    búsqueda. Para cambios hechos en otros procesos (o con update/bulk_update,
+    que no emiten señales) cada CHECK_SECONDS se compara la cantidad y el
+    último updated_at de los productos con los del índice; los cambios
+    propios avanzan esa firma para no descartar la caché por ellos.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE, check_seconds=CHECK_SECONDS):
+        self.cache_size = cache_size
+        self.check_seconds = check_seconds
+        self._lock = threading.RLock()
+        self._exact = OrderedDict()
+        self._exact_keys = {}
+        self._tokens = []
+        self._token_ids = []
+        self._records = {}
+        self._names = {}
+        self._indexed = {}
+        self._categories = {}
+        self._dirty = True
+        self._signature = None
+        self._checked_at = 0.0
+
+    # --- Validación contra la BD ---
+
+    @staticmethod
+    def catalog_signature():
+        stats = Product.objects.aggregate(count=Count('id'), last=Max('updated_at'))
+        return stats['count'], stats['last']
+
+    def check_catalog(self):
+        """Descarta todo si el catálogo cambió fuera de este proceso"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_seconds:
+            return
+        self._checked_at = now
+        signature = self.catalog_signature()
+        if signature != self._signature:
+            with self._lock:
+                self._exact.clear()
+                self._exact_keys.clear()
+                self._signature = signature
+                self._dirty = True
+
+    # --- Código exacto ---
+
+    def by_code(self, code):
+        """Producto activo cuyo code o barcode es exactamente code (None si no existe)"""
+        code = (code or '').strip()
+        if not code:
+            return None
+        self.check_catalog()
+
+        with self._lock:
+            record = self._exact.get(code)
+            if record is not None:
+                self._exact.move_to_end(code)
+                return record
+
+        product = (
+            Product.objects.filter(Q(barcode=code) | Q(code=code), is_active=True)
+            .select_related('category')
+            .first()
+        )
+        if product is None:
+            return None
+
+        record = product_record(product, product.category.name)
+        with self._lock:
+            self._exact[code] = record
+            self._exact_keys.setdefault(product.id, set()).add(code)
+            while len(self._exact) > self.cache_size:
+                evicted, old = self._exact.popitem(last=False)
+                keys = self._exact_keys.get(old['id'])
+                if keys:
+                    keys.discard(evicted)
+        return record
+
+    # --- Búsqueda por prefijo ---
+
+    @span('products.lookup_index')
+    def rebuild(self):
+        """Reconstruye el índice de tokens con una sola consulta"""
+        records, names, indexed, categories, entries = {}, {}, {}, {}, []
+        products = (
+            Product.objects.filter(is_active=True)
+            .select_related('category')
+            .only(*RECORD_FIELDS)
+        )
+        signature = self.catalog_signature()
+        for product in products:
+            categories[product.category_id] = product.category.name
+            records[product.id] = product_record(product, product.category.name)
+            names[product.id] = ' '.join(normalize(product.name).split())
+            indexed[product.id] = tuple(getattr(product, field) for field in INDEXED_FIELDS)
+            for token in set(normalize(f'{product.name} {product.brand} {product.code}').split()):
+                entries.append((token, product.id))
+
+        entries.sort()
+        with self._lock:
+            self._tokens = [token for token, _ in entries]
+            self._token_ids = [product_id for _, product_id in entries]
+            self._records = records
+            self._names = names
+            self._indexed = indexed
+            self._categories = categories
+            self._signature = signature
+            self._checked_at = time.monotonic()
+            self._dirty = False
+
+        logger.debug("Índice de búsqueda reconstruido", extra={'products': len(records), 'tokens': len(entries)})
+
+    def prefix_ids(self, term):
+        start = bisect_left(self._tokens, term)
+        end = bisect_left(self._tokens, term + '\uffff', lo=start)
+        return self._token_ids[start:end]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Productos cuyo nombre, marca o código tienen palabras que empiezan con cada término"""
+        terms = normalize(query).split()
+        if not terms:
+            return []
+        self.check_catalog()
+        if self._dirty:
+            self.rebuild()
+
+        with self._lock:
+            # Se empieza por el término con menos coincidencias
+            matches = sorted((self.prefix_ids(term) for term in terms), key=len)
+            ids = set(matches[0])
+            for other in matches[1:]:
+                ids.intersection_update(other)
+                if not ids:
+                    return []
+            # Primero los que empiezan con la búsqueda completa, luego por nombre
+            phrase = ' '.join(terms)
+            ranked = sorted(
+                ids, key=lambda product_id: (not self._names[product_id].startswith(phrase), self._names[product_id])
+            )
+            return [self._records[product_id] for product_id in ranked[:limit]]
+
+    # --- Invalidación (señales) ---
+
+    def product_changed(self, product, deleted=False, created=False):
+        """Invalida las entradas del producto; actualiza el registro si no cambian los tokens"""
+        with self._lock:
+            self.advance_signature(product, deleted, created)
+            for key in self._exact_keys.pop(product.pk, ()):
+                self._exact.pop(key, None)
+
+            if self._dirty:
+                return
+            previous = self._indexed.get(product.pk)
+            current = None if deleted else tuple(getattr(product, field) for field in INDEXED_FIELDS)
+            if previous is None and (deleted or not product.is_active):
+                return
+            if previous != current or product.category_id not in self._categories:
+                self._dirty = True
+                return
+            self._records[product.pk] = product_record(product, self._categories[product.category_id])
+
+    def advance_signature(self, product, deleted, created):
+        """Lleva a la firma un cambio ya aplicado en este proceso
+
+        Sin esto la siguiente validación vería otro conteo o updated_at y
+        descartaría la caché por un cambio propio. Si se borra el producto más
+        reciente la firma no coincide y se descarta una vez (caso poco común).
+        """
+        if self._signature is None:
+            return
+        count, last = self._signature
+        count += -1 if deleted else 1 if created else 0
+        if not deleted and product.updated_at and (last is None or product.updated_at > last):
+            last = product.updated_at
+        self._signature = (count, last)
+
+    def category_changed(self, category):
+        with self._lock:
+            if self._categories.get(category.pk, category.name) != category.name:
+                self.invalidate()
+
+    def invalidate(self):
+        """Descarta la caché y el índice (cambios masivos sin señales, p. ej. importaciones)"""
+        with self._lock:
+            self._exact.clear()
+            self._exact_keys.clear()
+            self._dirty = True
+
+
+_lookup = None
+_lookup_lock = threading.Lock()
+
+
+def get_lookup():
+    """Índice compartido por el proceso (se crea en el primer uso)"""
+    global _lookup
+    if _lookup is None:
+        with _lookup_lock:
+            if _lookup is None:
+                _lookup = ProductLookup()
+    return _lookup
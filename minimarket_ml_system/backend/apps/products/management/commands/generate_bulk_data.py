@@ -0,0 +1,574 @@
+# Archivo: minimarket_ml_system/backend/apps/products/management/commands/generate_bulk_data.py
+
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+import time
+from apps.products.models import Category, Supplier, Product
+from apps.sales.models import Customer, Sale, SaleItem, DailySummary
+
+CATEGORY_NAMES = [
+    'Abarrotes', 'Bebidas', 'Lácteos', 'Panadería', 'Carnes y Embutidos',
+    'Frutas y Verduras', 'Limpieza', 'Cuidado Personal', 'Snacks', 'Congelados'
+]
+
+UNITS = ['UNIDAD', 'BOLSA', 'BOTELLA', 'CAJA', 'PAQUETE', 'LATA']
+
+PAYMENT_METHODS = np.array(['CASH', 'CARD', 'YAPE', 'PLIN', 'TRANSFER', 'CREDIT'])
+PAYMENT_WEIGHTS = np.array([0.45, 0.20, 0.18, 0.10, 0.04, 0.03])
+
+# Efecto del día de la semana (lunes a domingo)
+WEEKDAY_FACTORS = np.array([0.90, 0.85, 0.90, 0.95, 1.15, 1.30, 1.05])
+
+# Distribución horaria de tickets entre las 7am y las 10pm
+HOURS = np.arange(7, 23)
+HOUR_WEIGHTS = np.array([2, 4, 5, 6, 8, 9, 7, 5, 5, 6, 8, 9, 8, 6, 4, 2], dtype=float)
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos a gran escala (millones de items) con inserciones masivas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products',
+            type=int,
+            default=2000,
+            help='Cantidad de productos a crear (default: 2000)'
+        )
+        parser.add_argument(
+            '--customers',
+            type=int,
+            default=5000,
+            help='Cantidad de clientes a crear (default: 5000)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=730,
+            help='Días de historia de ventas (default: 730)'
+        )
+        parser.add_argument(
+            '--tickets-per-day',
+            type=int,
+            default=800,
+            help='Tickets promedio por día antes de estacionalidad (default: 800)'
+        )
+        parser.add_argument(
+            '--items-per-ticket',
+            type=float,
+            default=3.5,
+            help='Items promedio por ticket (default: 3.5)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Semilla para resultados reproducibles (default: 42)'
+        )
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=30,
+            help='Días generados e insertados por transacción (default: 30)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Filas por sentencia executemany (default: 10000)'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Eliminar ventas, clientes y productos existentes antes de generar'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== GENERACIÓN MASIVA DE DATOS SINTÉTICOS ===')
+        )
+        started = time.perf_counter()
+        self.rng = np.random.default_rng(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        if options['clear']:
+            self.clear_existing_data()
+
+        seller = self.get_seller()
+        categories = self.create_categories()
+        suppliers = self.create_suppliers(max(5, options['products'] // 200))
+        products = self.create_products(options['products'], categories, suppliers)
+        customer_ids = self.create_customers(options['customers'])
+
+        totals = self.generate_sales(
+            products, customer_ids, seller.id,
+            days=options['days'],
+            tickets_per_day=options['tickets_per_day'],
+            items_per_ticket=options['items_per_ticket'],
+            chunk_days=options['chunk_days']
+        )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n¡Datos generados en {elapsed:.1f}s! '
+                f'{totals["sales"]:,} ventas, {totals["items"]:,} items '
+                f'({totals["items"] / max(elapsed, 1e-9):,.0f} items/s)'
+            )
+        )
+
+    def clear_existing_data(self):
+        """Limpia los datos existentes"""
+        self.stdout.write('Limpiando datos existentes...')
+        from apps.inventory.models import StockMovement, PurchaseOrder, PurchaseOrderItem, StockLot, LotConsumption
+
+        DailySummary.objects.all().delete()
+        # Las tablas que referencian ventas se vacían antes del borrado directo (sin cascada)
+        LotConsumption.objects.all()._raw_delete(LotConsumption.objects.db)
+        StockLot.objects.all()._raw_delete(StockLot.objects.db)
+        SaleItem.objects.all()._raw_delete(SaleItem.objects.db)
+        Sale.objects.all()._raw_delete(Sale.objects.db)
+        Customer.objects.all().delete()
+        StockMovement.objects.all().delete()
+        PurchaseOrderItem.objects.all().delete()
+        PurchaseOrder.objects.all().delete()
+        Product.objects.all().delete()
+
+    def get_seller(self):
+        """Usuario vendedor para las ventas generadas"""
+        seller = User.objects.filter(username='admin').first() or User.objects.first()
+        if not seller:
+            self.stdout.write(self.style.WARNING('No hay usuarios. Creando usuario admin...'))
+            seller = User.objects.create_superuser('admin', 'admin@minimarket.com', 'admin123')
+        return seller
+
+    def create_categories(self):
+        """Crea (o reutiliza) las categorías típicas de un minimarket"""
+        existing = set(Category.objects.filter(name__in=CATEGORY_NAMES).values_list('name', flat=True))
+        Category.objects.bulk_create(
+            [Category(name=name) for name in CATEGORY_NAMES if name not in existing]
+        )
+        categories = list(Category.objects.filter(name__in=CATEGORY_NAMES).order_by('id'))
+        self.stdout.write(f'✓ {len(categories)} categorías disponibles')
+        return categories
+
+    def create_suppliers(self, count):
+        """Crea proveedores sintéticos con RUC único"""
+        start = (Supplier.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        Supplier.objects.bulk_create([
+            Supplier(
+                name=f'Proveedor Sintético {start + i}',
+                ruc=f'209{start + i:08d}',
+                phone=f'95{self.rng.integers(1000000, 9999999)}'
+            )
+            for i in range(count)
+        ])
+        suppliers = list(Supplier.objects.filter(id__gte=start).order_by('id'))
+        self.stdout.write(f'✓ {len(suppliers)} proveedores creados')
+        return suppliers
+
+    def create_products(self, count, categories, suppliers):
+        """Crea productos con precios, popularidad y estacionalidad por categoría"""
+        rng = self.rng
+        start = (Product.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+
+        category_idx = rng.integers(0, len(categories), count)
+        supplier_idx = rng.integers(0, len(suppliers), count)
+        cost = np.round(rng.lognormal(mean=1.3, sigma=0.7, size=count), 2).clip(0.1, 200)
+        margin = rng.uniform(1.15, 1.6, count)
+        price = np.round(cost * margin, 2)
+        is_perishable = rng.random(count) < 0.25
+        units_per_box = rng.choice([1, 6, 12, 24], count, p=[0.4, 0.25, 0.25, 0.1])
+
+        objects = [
+            Product(
+                code=f'SYN{start + i:07d}',
+                barcode=f'779{start + i:010d}',
+                name=f'{categories[category_idx[i]].name} Producto {start + i}',
+                category=categories[category_idx[i]],
+                supplier=suppliers[supplier_idx[i]],
+                cost_price=Decimal(f'{cost[i]:.2f}'),
+                sale_price=Decimal(f'{price[i]:.2f}'),
+                current_stock=int(rng.integers(0, 150)),
+                min_stock=10,
+                max_stock=150,
+                reorder_point=20,
+                unit=UNITS[i % len(UNITS)],
+                units_per_box=int(units_per_box[i]),
+                is_perishable=bool(is_perishable[i]),
+                expiration_days=int(rng.integers(5, 30)) if is_perishable[i] else None
+            )
+            for i in range(count)
+        ]
+        Product.objects.bulk_create(objects, batch_size=self.batch_size)
+
+        ids = np.array(
+            Product.objects.filter(id__gte=start).order_by('id').values_list('id', flat=True)
+        )
+
+        # Popularidad tipo Zipf: pocos productos concentran la mayoría de ventas
+        popularity = 1.0 / np.arange(1, count + 1) ** 0.9
+        rng.shuffle(popularity)
+
+        # Estacionalidad anual por categoría (amplitud y mes pico)
+        amplitude = rng.uniform(0.0, 0.4, len(categories))
+        peak_month = rng.integers(1, 13, len(categories))
+
+        self.stdout.write(f'✓ {len(ids)} productos creados')
+        return {
+            'id': ids,
+            'price_cents': np.round(price * 100).astype(np.int64),
+            'cost_cents': np.round(cost * 100).astype(np.int64),
+            'category_idx': category_idx,
+            'popularity': popularity,
+            'amplitude': amplitude,
+            'peak_month': peak_month
+        }
+
+    def create_customers(self, count):
+        """Crea clientes sintéticos con documento único"""
+        start = (Customer.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        first_names = ['Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Carmen', 'José', 'Rosa', 'Pedro', 'Lucia']
+        last_names = ['García', 'Rodriguez', 'Martinez', 'Lopez', 'Gonzalez', 'Perez', 'Sanchez', 'Ramirez', 'Torres', 'Flores']
+        first_idx = self.rng.integers(0, len(first_names), count)
+        last_idx = self.rng.integers(0, len(last_names), count)
+
+        Customer.objects.bulk_create([
+            Customer(
+                first_name=first_names[first_idx[i]],
+                last_name=last_names[last_idx[i]],
+                document_type='DNI',
+                document_number=f'{60000000 + start + i}',
+                customer_type='REGULAR'
+            )
+            for i in range(count)
+        ], batch_size=self.batch_size)
+
+        ids = np.array(
+            Customer.objects.filter(id__gte=start).order_by('id').values_list('id', flat=True)
+        )
+        self.stdout.write(f'✓ {len(ids)} clientes creados')
+        return ids
+
+    def daily_ticket_counts(self, dates, tickets_per_day):
+        """Tickets por día con tendencia, estacionalidad anual, día de semana y quincena"""
+        day_of_year = dates.dayofyear.to_numpy()
+        trend = 1 + 0.10 * np.arange(len(dates)) / 365
+        annual = 1 + 0.15 * np.cos(2 * np.pi * (day_of_year - 355) / 365)
+        weekday = WEEKDAY_FACTORS[dates.dayofweek.to_numpy()]
+        payday = np.where(np.isin(dates.day.to_numpy(), [15, 16, 30, 31, 1]), 1.10, 1.0)
+
+        expected = tickets_per_day * trend * annual * weekday * payday
+        return self.rng.poisson(expected)
+
+    def generate_sales(self, products, customer_ids, seller_id, days, tickets_per_day,
+                       items_per_ticket, chunk_days):
+        """Genera ventas e items por bloques de días, cada bloque en una transacción"""
+        self.stdout.write(f'Generando {days} días de ventas (~{tickets_per_day} tickets/día)...')
+
+        local_tz = timezone.get_current_timezone()
+        end_date = timezone.localdate(self.now)
+        dates = pd.date_range(end=end_date, periods=days, freq='D')
+        tickets = self.daily_ticket_counts(dates, tickets_per_day)
+
+        next_sale_id = (Sale.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        customer_stats = {}
+        totals = {'sales': 0, 'items': 0}
+
+        for chunk_start in range(0, days, chunk_days):
+            chunk_dates = dates[chunk_start:chunk_start + chunk_days]
+            chunk_tickets = tickets[chunk_start:chunk_start + chunk_days]
+
+            sales, items = self.build_chunk(
+                chunk_dates, chunk_tickets, products, customer_ids,
+                items_per_ticket, next_sale_id, local_tz
+            )
+
+            # Las ventas del día actual no pueden quedar en el futuro
+            sales = sales[sales['sale_date'] <= self.now]
+            items = items[items['sale_id'].isin(sales['id'])]
+
+            with transaction.atomic():
+                self.insert_sales(sales, seller_id)
+                self.insert_items(items)
+                self.create_daily_summaries(sales, items)
+
+            self.accumulate_customer_stats(sales, customer_stats)
+
+            next_sale_id += int(chunk_tickets.sum())
+            totals['sales'] += len(sales)
+            totals['items'] += len(items)
+            self.stdout.write(
+                f'  {chunk_dates[-1].date()}: {totals["sales"]:,} ventas, {totals["items"]:,} items'
+            )
+
+        self.reset_sequences()
+        self.update_customers(customer_stats)
+        return totals
+
+    def build_chunk(self, dates, tickets, products, customer_ids, items_per_ticket,
+                    first_sale_id, local_tz):
+        """Muestreo vectorizado de ventas e items para un bloque de días"""
+        rng = self.rng
+        n_sales = int(tickets.sum())
+        sale_ids = np.arange(first_sale_id, first_sale_id + n_sales)
+        sale_day = np.repeat(np.arange(len(dates)), tickets)
+
+        # Fecha y hora local de cada ticket
+        hours = rng.choice(HOURS, n_sales, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+        seconds = rng.integers(0, 3600, n_sales)
+        local_dt = (
+            dates[sale_day]
+            + pd.to_timedelta(hours, unit='h')
+            + pd.to_timedelta(seconds, unit='s')
+        )
+        sale_date = local_dt.tz_localize(local_tz, ambiguous='NaT', nonexistent='shift_forward')
+
+        has_customer = rng.random(n_sales) < 0.7
+        customer = np.where(
+            has_customer, customer_ids[rng.integers(0, len(customer_ids), n_sales)], -1
+        )
+        payment = rng.choice(PAYMENT_METHODS, n_sales, p=PAYMENT_WEIGHTS)
+        status = np.where(rng.random(n_sales) < 0.01, 'CANCELLED', 'COMPLETED')
+        sale_discount = rng.choice([0, 0, 0, 5, 10], n_sales)
+
+        # Items por ticket y productos según popularidad y estacionalidad del mes
+        n_items = 1 + rng.poisson(items_per_ticket - 1, n_sales)
+        item_sale = np.repeat(np.arange(n_sales), n_items)
+        item_month = dates[sale_day[item_sale]].month.to_numpy()
+
+        item_product = np.empty(len(item_sale), dtype=np.int64)
+        for month in np.unique(item_month):
+            mask = item_month == month
+            season = 1 + products['amplitude'] * np.cos(
+                2 * np.pi * (month - products['peak_month']) / 12
+            )
+            weights = products['popularity'] * season[products['category_idx']]
+            item_product[mask] = rng.choice(
+                len(weights), int(mask.sum()), p=weights / weights.sum()
+            )
+
+        quantity = 1 + rng.poisson(0.6, len(item_sale))
+        item_discount = rng.choice([0, 0, 0, 5, 10], len(item_sale))
+
+        # Montos en céntimos para evitar errores de redondeo
+        unit_price = products['price_cents'][item_product]
+        unit_cost = products['cost_cents'][item_product]
+        total_price = np.round(unit_price * quantity * (100 - item_discount) / 100).astype(np.int64)
+        total_cost = unit_cost * quantity
+
+        subtotal = np.bincount(item_sale, weights=total_price, minlength=n_sales)
+        discount_amount = np.round(subtotal * sale_discount / 100)
+        tax = np.round((subtotal - discount_amount) * 0.18)
+        total = subtotal - discount_amount + tax
+
+        sales = pd.DataFrame({
+            'id': sale_ids,
+            'sale_date': sale_date,
+            'customer_id': customer,
+            'payment_method': payment,
+            'status': status,
+            'subtotal': subtotal / 100,
+            'discount_percentage': sale_discount,
+            'discount_amount': discount_amount / 100,
+            'tax': tax / 100,
+            'total': total / 100
+        })
+        sales = sales[sales['sale_date'].notna()]
+
+        items = pd.DataFrame({
+            'sale_id': sale_ids[item_sale],
+            'product_id': products['id'][item_product],
+            'quantity': quantity,
+            'unit_price': unit_price / 100,
+            'discount_percentage': item_discount,
+            'total_price': total_price / 100,
+            'unit_cost': unit_cost / 100,
+            'total_cost': total_cost / 100,
+            'profit': (total_price - total_cost) / 100
+        })
+
+        return sales, items
+
+    def insert_rows(self, model, columns, rows):
+        """INSERT masivo con executemany en lotes"""
+        meta = model._meta
+        table = connection.ops.quote_name(meta.db_table)
+        column_sql = ', '.join(
+            connection.ops.quote_name(meta.get_field(name).column) for name in columns
+        )
+        placeholders = ', '.join(['%s'] * len(columns))
+        sql = f'INSERT INTO {table} ({column_sql}) VALUES ({placeholders})'
+
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                cursor.executemany(sql, rows[start:start + self.batch_size])
+
+    def insert_sales(self, sales, seller_id):
+        """Inserta las ventas con ID explícito para enlazar sus items sin consultas"""
+        adapt = connection.ops.adapt_datetimefield_value
+        now = adapt(self.now)
+        sale_dates = [adapt(dt) for dt in sales['sale_date'].dt.tz_convert('UTC').dt.to_pydatetime()]
+        local_dates = sales['sale_date'].dt.tz_convert(timezone.get_current_timezone())
+        business_dates = [connection.ops.adapt_datefield_value(d) for d in local_dates.dt.date]
+        customers = [None if c < 0 else c for c in sales['customer_id'].tolist()]
+
+        rows = list(zip(
+            sales['id'].tolist(),
+            [f'G{sale_id:09d}' for sale_id in sales['id'].tolist()],
+            customers,
+            [seller_id] * len(sales),
+            sales['payment_method'].tolist(),
+            sales['status'].tolist(),
+            sales['subtotal'].round(2).tolist(),
+            sales['discount_percentage'].tolist(),
+            sales['discount_amount'].round(2).tolist(),
+            sales['tax'].round(2).tolist(),
+            sales['total'].round(2).tolist(),
+            [''] * len(sales),
+            [''] * len(sales),
+            sale_dates,
+            [now] * len(sales),
+            [now] * len(sales),
+            business_dates,
+            local_dates.dt.hour.tolist()
+        ))
+
+        self.insert_rows(Sale, [
+            'id', 'sale_number', 'customer', 'seller', 'payment_method', 'status',
+            'subtotal', 'discount_percentage', 'discount_amount', 'tax', 'total',
+            'notes', 'invoice_number', 'sale_date', 'created_at', 'updated_at',
+            'business_date', 'business_hour'
+        ], rows)
+
+    def insert_items(self, items):
+        """Inserta los items de venta (sin pasar por SaleItem.save)"""
+        rows = list(zip(
+            items['sale_id'].tolist(),
+            items['product_id'].tolist(),
+            items['quantity'].tolist(),
+            items['unit_price'].round(2).tolist(),
+            items['discount_percentage'].tolist(),
+            items['total_price'].round(2).tolist(),
+            items['unit_cost'].round(2).tolist(),
+            items['total_cost'].round(2).tolist(),
+            items['profit'].round(2).tolist(),
+            [''] * len(items)
+        ))
+
+        self.insert_rows(SaleItem, [
+            'sale', 'product', 'quantity', 'unit_price', 'discount_percentage',
+            'total_price', 'unit_cost', 'total_cost', 'profit', 'notes'
+        ], rows)
+
+    def create_daily_summaries(self, sales, items):
+        """Resúmenes diarios calculados en memoria a partir de los datos generados"""
+        completed = sales[sales['status'] == 'COMPLETED'].copy()
+        if completed.empty:
+            return
+
+        local_dt = completed['sale_date'].dt.tz_convert(timezone.get_current_timezone())
+        completed['date'] = local_dt.dt.date
+        completed['hour'] = local_dt.dt.hour
+        completed['wallet'] = completed['payment_method'].isin(['YAPE', 'PLIN'])
+
+        completed_items = items.merge(completed[['id', 'date']], left_on='sale_id', right_on='id')
+        item_stats = completed_items.groupby('date').agg(
+            products_sold=('quantity', 'sum'),
+            unique_products=('product_id', 'nunique'),
+            item_count=('product_id', 'size'),
+            total_cost=('total_cost', 'sum'),
+            total_profit=('profit', 'sum')
+        )
+
+        by_method = completed.pivot_table(
+            index='date', columns='payment_method', values='total', aggfunc='sum', fill_value=0
+        )
+        peak = (
+            completed.groupby(['date', 'hour'])['total'].sum()
+            .reset_index().sort_values('total').groupby('date').last()
+        )
+
+        def money(value):
+            return Decimal(f'{value:.2f}')
+
+        summaries = []
+        for date, day in completed.groupby('date'):
+            total_sales = day['total'].sum()
+            sale_count = len(day)
+            stats = item_stats.loc[date]
+            methods = by_method.loc[date]
+
+            summaries.append(DailySummary(
+                date=date,
+                total_sales=money(total_sales),
+                sale_count=sale_count,
+                products_sold=int(stats['products_sold']),
+                unique_products=int(stats['unique_products']),
+                cash_sales=money(methods.get('CASH', 0)),
+                card_sales=money(methods.get('CARD', 0)),
+                transfer_sales=money(methods.get('TRANSFER', 0)),
+                credit_sales=money(methods.get('CREDIT', 0)),
+                digital_wallet_sales=money(day.loc[day['wallet'], 'total'].sum()),
+                total_cost=money(stats['total_cost']),
+                total_profit=money(stats['total_profit']),
+                profit_margin=money(stats['total_profit'] / total_sales * 100) if total_sales > 0 else 0,
+                average_sale=money(total_sales / sale_count),
+                average_items_per_sale=money(stats['item_count'] / sale_count),
+                unique_customers=int(day.loc[day['customer_id'] >= 0, 'customer_id'].nunique()),
+                peak_hour=int(peak.loc[date, 'hour']),
+                peak_hour_sales=money(peak.loc[date, 'total'])
+            ))
+
+        # Si ya existe un resumen para la fecha se conserva el existente
+        DailySummary.objects.bulk_create(summaries, ignore_conflicts=True)
+
+    def accumulate_customer_stats(self, sales, customer_stats):
+        """Acumula totales por cliente para actualizarlos una sola vez al final"""
+        completed = sales[(sales['status'] == 'COMPLETED') & (sales['customer_id'] >= 0)]
+        grouped = completed.groupby('customer_id').agg(
+            total=('total', 'sum'),
+            count=('id', 'size'),
+            last=('sale_date', 'max')
+        )
+
+        for customer_id, row in grouped.iterrows():
+            stats = customer_stats.setdefault(customer_id, [0.0, 0, None])
+            stats[0] += row['total']
+            stats[1] += int(row['count'])
+            stats[2] = row['last'] if stats[2] is None else max(stats[2], row['last'])
+
+    def update_customers(self, customer_stats):
+        """Actualiza estadísticas de compra y tipo de cliente con bulk_update"""
+        customers = list(Customer.objects.filter(id__in=list(customer_stats.keys())))
+        for customer in customers:
+            total, count, last = customer_stats[customer.id]
+            customer.total_purchases += Decimal(f'{total:.2f}')
+            customer.purchase_count += count
+            customer.last_purchase_date = last.to_pydatetime()
+            if customer.purchase_count >= 200:
+                customer.customer_type = 'VIP'
+            elif customer.purchase_count >= 50:
+                customer.customer_type = 'FREQUENT'
+
+        Customer.objects.bulk_update(
+            customers,
+            ['total_purchases', 'purchase_count', 'last_purchase_date', 'customer_type'],
+            batch_size=1000
+        )
+        self.stdout.write(f'✓ {len(customers)} clientes actualizados')
+
+    def reset_sequences(self):
+        """Sincroniza las secuencias de ID tras insertar ventas con ID explícito"""
+        statements = connection.ops.sequence_reset_sql(no_style(), [Sale, SaleItem])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -7,7 +7,7 @@ import string
 from decimal import Decimal
 from apps.products.models import Category, Supplier, Product
 from apps.inventory.models import StockMovement, PurchaseOrder, PurchaseOrderItem
-from apps.sales.models import Customer, Sale, SaleItem, DailySummary
+from apps.sales.models import Customer, Sale, SaleItem, DailySummary, business_date_range
 
 class Command(BaseCommand):
     help = 'Genera datos de muestra para el sistema (2 años de historia)'
@@ -143,14 +143,15 @@ class Command(BaseCommand):
             {'name': 'Galletas Casino', 'category': 'Snacks', 'cost': 0.80, 'price': 1.20, 'unit': 'PAQUETE'},
         ]
         
-        # Crear productos
+        # Crear productos (una sola inserción)
+        products = []
         for i, prod_data in enumerate(products_data):
             category = categories[prod_data.pop('category')]
             cost_price = Decimal(str(prod_data.pop('cost')))
             sale_price = Decimal(str(prod_data.pop('price')))
             is_perishable = prod_data.pop('perishable', False)
             
-            product = Product.objects.create(
+            products.append(Product(
                 code=f'PROD{str(i+1).zfill(4)}',
                 barcode=f'775{str(random.randint(1000000000, 9999999999))}',
                 name=prod_data['name'],
@@ -165,8 +166,9 @@ class Command(BaseCommand):
                 unit=prod_data['unit'],
                 is_perishable=is_perishable,
                 expiration_days=random.randint(7, 30) if is_perishable else None
-            )
+            ))
         
+        Product.objects.bulk_create(products)
         self.stdout.write(f'✓ {Product.objects.count()} productos creados')
     
     def create_customers(self):
@@ -286,7 +288,7 @@ class Command(BaseCommand):
         """Crea el resumen diario de ventas"""
         from django.db.models import Sum, Count, Avg
         
-        sales = Sale.objects.filter(sale_date__date=date, status='COMPLETED')
+        sales = Sale.objects.filter(business_date_range(date, date), status='COMPLETED')
         
         if sales.exists():
             summary = DailySummary.objects.create(date=date)
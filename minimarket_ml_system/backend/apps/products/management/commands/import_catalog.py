@@ -0,0 +1,63 @@
+# Archivo: minimarket_ml_system/backend/apps/products/management/commands/import_catalog.py
+
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from apps.products.importer import CatalogImporter, parse_catalog_file, BATCH_SIZE
+
+MAX_ERRORS_SHOWN = 20
+
+class Command(BaseCommand):
+    help = 'Importa el catálogo de productos desde un CSV o JSON (crea o actualiza por código)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo CSV o JSON con el catálogo')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo validar, sin guardar cambios'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Productos por transacción (default: {BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== IMPORTACIÓN DE CATÁLOGO ===')
+        )
+
+        path = options['path']
+        try:
+            with open(path, 'rb') as uploaded:
+                entries = parse_catalog_file(uploaded)
+        except OSError as e:
+            raise CommandError(f'No se pudo abrir el archivo: {e}')
+        except (UnicodeDecodeError, ValueError) as e:
+            raise CommandError(f'No se pudo leer el archivo: {e}')
+
+        start = time.perf_counter()
+        importer = CatalogImporter(reference=os.path.basename(path), batch_size=options['batch_size'])
+        result = importer.run(entries, dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Modo validación: no se guardaron cambios'))
+        self.stdout.write(f'✓ {result["rows"]} filas leídas')
+        self.stdout.write(f'✓ {result["created"]} productos creados, {result["updated"]} actualizados, '
+                          f'{result["unchanged"]} sin cambios')
+        self.stdout.write(f'✓ {result["price_changes"]} cambios de precio registrados')
+
+        errors = result['errors']
+        if errors:
+            self.stdout.write(self.style.WARNING(f'{len(errors)} filas con errores:'))
+            for error in errors[:MAX_ERRORS_SHOWN]:
+                self.stdout.write(f'  Fila {error["row"]} ({error["code"] or "sin código"}): {error["error"]}')
+            if len(errors) > MAX_ERRORS_SHOWN:
+                self.stdout.write(f'  ... y {len(errors) - MAX_ERRORS_SHOWN} más')
+        self.stdout.write(f'✓ Completado en {time.perf_counter() - start:.2f}s')
+
+        self.stdout.write(
+            self.style.SUCCESS('\n¡Importación de catálogo completada!')
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0002_product_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPriceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_cost_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Costo anterior')),
+                ('new_cost_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Costo nuevo')),
+                ('old_sale_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio anterior')),
+                ('new_sale_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio nuevo')),
+                ('source', models.CharField(choices=[('IMPORT', 'Importación de catálogo'), ('MANUAL', 'Edición manual')], default='MANUAL', max_length=20, verbose_name='Origen')),
+                ('reference', models.CharField(blank=True, max_length=200, verbose_name='Referencia')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha del cambio')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_changes', to='products.product', verbose_name='Producto')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Cambio de precio',
+                'verbose_name_plural': 'Cambios de precio',
+                'ordering': ['-changed_at'],
+                'indexes': [models.Index(fields=['product', '-changed_at'], name='products_pr_product_420baa_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
@@ -93,6 +94,7 @@ class Product(models.Model):
             models.Index(fields=['code']),
             models.Index(fields=['barcode']),
             models.Index(fields=['category']),
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
@@ -120,4 +122,32 @@ class Product(models.Model):
     @property
     def needs_reorder(self):
         """Indica si el producto necesita reorden"""
-        return self.current_stock <= self.reorder_point
\ No newline at end of file
+        return self.current_stock <= self.reorder_point
+
+class ProductPriceChange(models.Model):
+    """Historial de cambios de precio (importaciones de catálogo y ediciones)"""
+    SOURCES = [
+        ('IMPORT', 'Importación de catálogo'),
+        ('MANUAL', 'Edición manual'),
+    ]
+    
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_changes', verbose_name="Producto")
+    old_cost_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Costo anterior")
+    new_cost_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Costo nuevo")
+    old_sale_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Precio anterior")
+    new_sale_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Precio nuevo")
+    source = models.CharField(max_length=20, choices=SOURCES, default='MANUAL', verbose_name="Origen")
+    reference = models.CharField(max_length=200, blank=True, verbose_name="Referencia")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Usuario")
+    changed_at = models.DateTimeField(default=timezone.now, verbose_name="Fecha del cambio")
+    
+    class Meta:
+        verbose_name = "Cambio de precio"
+        verbose_name_plural = "Cambios de precio"
+        ordering = ['-changed_at']
+        indexes = [
+            models.Index(fields=['product', '-changed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.code}: {self.old_sale_price} -> {self.new_sale_price}"
@@ -1,7 +1,7 @@
 # Archivo: minimarket_ml_system/backend/apps/products/serializers.py
 
 from rest_framework import serializers
-from .models import Category, Supplier, Product
+from .models import Category, Supplier, Product, ProductPriceChange
 
 class CategorySerializer(serializers.ModelSerializer):
     """Serializer para categorías"""
@@ -60,6 +60,12 @@ class ProductSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'profit_margin', 'stock_status', 'needs_reorder']
+        # Columnas que leen las propiedades (para ?fields=)
+        field_dependencies = {
+            'profit_margin': ['cost_price', 'sale_price'],
+            'stock_status': ['current_stock', 'min_stock', 'max_stock'],
+            'needs_reorder': ['current_stock', 'reorder_point'],
+        }
     
     def validate(self, data):
         if data.get('cost_price', 0) < 0:
@@ -93,4 +99,17 @@ class ProductSummarySerializer(serializers.ModelSerializer):
         fields = [
             'id', 'code', 'name', 'category_name', 'sale_price',
             'current_stock', 'stock_status', 'is_active'
-        ]
\ No newline at end of file
+        ]
+
+class ProductPriceChangeSerializer(serializers.ModelSerializer):
+    """Serializer para el historial de precios"""
+    source_display = serializers.CharField(source='get_source_display', read_only=True)
+    user_name = serializers.CharField(source='user.username', read_only=True, default=None)
+    
+    class Meta:
+        model = ProductPriceChange
+        fields = [
+            'id', 'product', 'old_cost_price', 'new_cost_price', 'old_sale_price',
+            'new_sale_price', 'source', 'source_display', 'reference', 'user_name', 'changed_at'
+        ]
+        read_only_fields = fields
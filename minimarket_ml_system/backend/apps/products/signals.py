@@ -0,0 +1,36 @@
+# Archivo: minimarket_ml_system/backend/apps/products/signals.py
+
+import copy
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from .models import Category, Product
+
+
+def product_saved(sender, instance, created=False, **kwargs):
+    """Invalida la búsqueda del punto de venta para el producto guardado
+
+    El índice se actualiza al confirmar la transacción (una reversión no deja
+    valores no guardados) con una copia del producto tal como se guardó.
+    """
+    from .lookup import get_lookup
+    product = copy.copy(instance)
+    transaction.on_commit(lambda: get_lookup().product_changed(product, created=created))
+
+
+def product_deleted(sender, instance, **kwargs):
+    from .lookup import get_lookup
+    # Copia: al terminar el borrado Django deja instance.pk en None
+    product = copy.copy(instance)
+    transaction.on_commit(lambda: get_lookup().product_changed(product, deleted=True))
+
+
+def category_saved(sender, instance, **kwargs):
+    from .lookup import get_lookup
+    category = copy.copy(instance)
+    transaction.on_commit(lambda: get_lookup().category_changed(category))
+
+
+def connect():
+    post_save.connect(product_saved, sender=Product, dispatch_uid='products_lookup_save')
+    post_delete.connect(product_deleted, sender=Product, dispatch_uid='products_lookup_delete')
+    post_save.connect(category_saved, sender=Category, dispatch_uid='products_lookup_category')
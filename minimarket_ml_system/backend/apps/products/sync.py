@@ -0,0 +1,148 @@
+# Archivo: minimarket_ml_system/backend/apps/products/sync.py
+
+import gzip
+import hashlib
+import json
+import logging
+from datetime import timedelta, timezone as dt_timezone
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from apps.monitoring.tracing import span
+from .models import Category, Product
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TIMEOUT = 60 * 60  # Segundos que se conserva un snapshot en caché
+# updated_at se fija al guardar, no al confirmar: la marca high_water retrocede
+# este margen para que la siguiente consulta vea los cambios confirmados tarde
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Columnas que descargan las terminales del punto de venta
+SYNC_FIELDS = [
+    'id', 'code', 'barcode', 'name', 'brand', 'category_id', 'sale_price',
+    'current_stock', 'unit', 'units_per_box', 'is_active', 'updated_at',
+]
+DECIMAL_FIELDS = {'sale_price'}
+
+
+def format_timestamp(value):
+    """ISO 8601 en UTC con sufijo Z (se puede enviar tal cual en ?since=)"""
+    if value is None:
+        return None
+    return value.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class CatalogSync:
+    """Catálogo para las terminales: snapshot completo y cambios desde una marca
+
+    El formato es columnar ({columna: [valores]}): una sola lista de nombres de
+    campo y valores sin repetir claves por producto. El snapshot contiene los
+    productos activos y se guarda comprimido con gzip en la caché, identificado
+    por la firma del catálogo (cantidad y último updated_at de productos y
+    categorías); mientras no cambie se sirve desde la caché sin consultar los
+    productos. Los cambios incluyen también los productos desactivados para
+    que la terminal los quite.
+    """
+
+    @staticmethod
+    def signature():
+        products = Product.objects.aggregate(
+            count=Count('id'), active=Count('id', filter=Q(is_active=True)), last=Max('updated_at')
+        )
+        categories = Category.objects.aggregate(count=Count('id'), last=Max('updated_at'))
+        last_modified = max(
+            (value for value in (products['last'], categories['last']) if value is not None),
+            default=None
+        )
+        return {
+            'products': products['count'],
+            'active': products['active'],
+            'products_updated_at': products['last'],
+            'categories': categories['count'],
+            'categories_updated_at': categories['last'],
+            'last_modified': last_modified,
+        }
+
+    @staticmethod
+    def etag(signature, *extra):
+        parts = [str(signature[key]) for key in sorted(signature)] + [str(value) for value in extra]
+        return 'W/"%s"' % hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    @staticmethod
+    def columns(queryset):
+        """Columnas {campo: [valores]} y último updated_at, con una sola consulta values_list"""
+        rows = list(queryset.order_by('id').values_list(*SYNC_FIELDS))
+        data = dict(zip(SYNC_FIELDS, map(list, zip(*rows)))) if rows else {field: [] for field in SYNC_FIELDS}
+        last = max(data['updated_at'], default=None)
+        for field in DECIMAL_FIELDS:
+            data[field] = [str(value) for value in data[field]]
+        data['updated_at'] = [format_timestamp(value) for value in data['updated_at']]
+        return len(rows), data, last
+
+    @staticmethod
+    def categories():
+        return {str(pk): name for pk, name in Category.objects.values_list('id', 'name')}
+
+    @span('products.catalog_snapshot')
+    def snapshot(self, signature=None):
+        """Snapshot comprimido (bytes gzip) del catálogo activo; se arma solo si cambió"""
+        signature = signature or self.signature()
+        etag = self.etag(signature)
+        key = f'products:catalog_snapshot:{etag}'
+        body = cache.get(key)
+        if body is not None:
+            return body, etag
+
+        count, data, _ = self.columns(Product.objects.filter(is_active=True))
+        payload = {
+            'generated_at': format_timestamp(timezone.now()),
+            'high_water': format_timestamp(self.high_water(signature['products_updated_at'])),
+            'count': count,
+            'categories': self.categories(),
+            'fields': SYNC_FIELDS,
+            'data': data,
+        }
+        body = gzip.compress(json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode())
+        cache.set(key, body, SNAPSHOT_TIMEOUT)
+        logger.info("Snapshot de catálogo generado", extra={'products': count, 'bytes': len(body)})
+        return body, etag
+
+    @staticmethod
+    def high_water(last, since=None):
+        """Marca para la siguiente consulta: último updated_at menos SYNC_OVERLAP
+
+        Una transacción que guardó antes de last pero confirmó después no
+        aparecía con updated_at >= last; con el margen se vuelve a pedir. Nunca
+        retrocede más allá de since.
+        """
+        if last is None:
+            return since
+        mark = last - SYNC_OVERLAP
+        return max(mark, since) if since is not None else mark
+
+    def changes(self, since, signature=None):
+        """Productos (activos o no) con updated_at >= since
+
+        La marca es inclusiva y retrocede SYNC_OVERLAP: los productos de ese
+        margen se repiten en la siguiente consulta y la terminal los
+        sobrescribe por id, así no se pierden cambios confirmados después de
+        guardarse. Si la cantidad de activos de la terminal no coincide con
+        'active' (productos eliminados), debe volver a descargar el snapshot.
+        """
+        signature = signature or self.signature()
+        count, data, last = self.columns(Product.objects.filter(updated_at__gte=since))
+
+        categories_changed = (
+            signature['categories_updated_at'] is not None and signature['categories_updated_at'] >= since
+        )
+        return {
+            'since': format_timestamp(since),
+            'high_water': format_timestamp(self.high_water(last, since)),
+            'count': count,
+            'active': signature['active'],
+            'categories': self.categories() if categories_changed else None,
+            'fields': SYNC_FIELDS,
+            'data': data,
+        }
+
@@ -1,3 +1,297 @@
+import gzip
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .importer import CatalogImporter, parse_catalog_file
+from .lookup import ProductLookup
+from .sync import SYNC_OVERLAP, format_timestamp
+from .models import Category, Supplier, Product, ProductPriceChange
 
-# Create your tests here.
+
+class CatalogImporterTests(TestCase):
+    """Importación masiva: upsert por código, validación por fila e historial de precios"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Lácteos')
+        self.supplier = Supplier.objects.create(name='Gloria S.A.', ruc='20100190797')
+        self.milk = Product.objects.create(
+            code='LECHE-1', barcode='7750000000017', name='Leche Gloria 1L', category=self.category,
+            supplier=self.supplier, cost_price=Decimal('3.50'), sale_price=Decimal('4.20'),
+            current_stock=30, brand='Gloria'
+        )
+
+    def test_creates_new_products_resolving_category_and_supplier(self):
+        result = CatalogImporter().run([
+            {'code': 'YOG-1', 'name': 'Yogurt fresa', 'category': 'lácteos', 'supplier': '20100190797',
+             'cost_price': '2,10', 'sale_price': '2.90', 'is_perishable': 'sí', 'expiration_days': '20'},
+        ])
+
+        self.assertEqual((result['created'], result['updated'], result['errors']), (1, 0, []))
+        product = Product.objects.get(code='YOG-1')
+        self.assertEqual((product.category, product.supplier), (self.category, self.supplier))
+        self.assertEqual((product.cost_price, product.sale_price), (Decimal('2.10'), Decimal('2.90')))
+        self.assertTrue(product.is_perishable)
+        # Columnas ausentes toman el default del modelo
+        self.assertEqual((product.min_stock, product.max_stock, product.unit), (10, 100, 'UNIDAD'))
+
+    def test_price_list_updates_existing_product_and_keeps_other_columns(self):
+        result = CatalogImporter(reference='lista.csv').run([
+            {'code': 'LECHE-1', 'cost_price': '3.80', 'sale_price': '4.50'},
+        ])
+
+        self.assertEqual((result['updated'], result['price_changes']), (1, 1))
+        self.milk.refresh_from_db()
+        self.assertEqual((self.milk.cost_price, self.milk.sale_price), (Decimal('3.80'), Decimal('4.50')))
+        self.assertEqual((self.milk.name, self.milk.brand, self.milk.current_stock), ('Leche Gloria 1L', 'Gloria', 30))
+
+        change = ProductPriceChange.objects.get(product=self.milk)
+        self.assertEqual((change.old_sale_price, change.new_sale_price), (Decimal('4.20'), Decimal('4.50')))
+        self.assertEqual((change.source, change.reference), ('IMPORT', 'lista.csv'))
+
+    def test_reimport_without_changes_writes_nothing(self):
+        entries = [{'code': 'LECHE-1', 'name': 'Leche Gloria 1L', 'cost_price': '3.50', 'sale_price': '4.20'}]
+
+        result = CatalogImporter().run(entries)
+
+        self.assertEqual((result['updated'], result['unchanged'], result['price_changes']), (0, 1, 0))
+        self.assertFalse(ProductPriceChange.objects.exists())
+
+    def test_invalid_rows_are_reported_without_stopping_the_rest(self):
+        entries = [
+            {'code': '', 'name': 'Sin código'},
+            {'code': 'A', 'name': 'Precio malo', 'category': 'Lácteos', 'cost_price': 'abc', 'sale_price': '2'},
+            {'code': 'B', 'name': 'Negativo', 'category': 'Lácteos', 'cost_price': '1', 'sale_price': '2',
+             'min_stock': '-1'},
+            {'code': 'C', 'name': 'Categoría', 'category': 'No existe', 'cost_price': '1', 'sale_price': '2'},
+            {'code': 'D', 'name': 'Margen', 'category': 'Lácteos', 'cost_price': '5', 'sale_price': '4'},
+            {'code': 'E', 'name': 'Incompleto'},
+            {'code': 'F', 'name': 'Barras', 'category': 'Lácteos', 'cost_price': '1', 'sale_price': '2',
+             'barcode': '7750000000017'},
+            {'code': 'G', 'name': 'N' * 201, 'category': 'Lácteos', 'cost_price': '1', 'sale_price': '2'},
+            {'code': 'H' * 51, 'name': 'Código largo', 'category': 'Lácteos', 'cost_price': '1', 'sale_price': '2'},
+            {'code': 'I', 'name': 'Unidad', 'category': 'Lácteos', 'cost_price': '1', 'sale_price': '2',
+             'unit': 'U' * 21, 'description': 'D' * 500},
+            {'code': 'OK', 'name': 'Válido', 'category': 'Lácteos', 'cost_price': '1', 'sale_price': '2'},
+        ]
+
+        result = CatalogImporter(batch_size=3).run(entries)
+
+        errors = {error['row']: error['error'] for error in result['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
+        self.assertEqual(errors[1], 'Código requerido')
+        self.assertEqual(errors[2], 'cost_price inválido')
+        self.assertEqual(errors[3], 'min_stock no puede ser negativo')
+        self.assertEqual(errors[4], 'Categoría no encontrada')
+        self.assertEqual(errors[5], 'El precio de venta debe ser mayor al precio de costo')
+        self.assertIn('Faltan columnas requeridas', errors[6])
+        self.assertEqual(errors[7], 'El código de barras pertenece a otro producto')
+        self.assertEqual(errors[8], 'name excede 200 caracteres')
+        self.assertEqual(errors[9], 'code excede 50 caracteres')
+        self.assertEqual(errors[10], 'unit excede 20 caracteres')
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(set(Product.objects.values_list('code', flat=True)), {'LECHE-1', 'OK'})
+
+    def test_repeated_code_uses_last_row(self):
+        result = CatalogImporter().run([
+            {'code': 'LECHE-1', 'sale_price': '9.00'},
+            {'code': 'LECHE-1', 'sale_price': '4.60'},
+        ])
+
+        self.assertEqual([error['row'] for error in result['errors']], [1])
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.sale_price, Decimal('4.60'))
+
+    def test_dry_run_validates_without_saving(self):
+        result = CatalogImporter().run([
+            {'code': 'LECHE-1', 'cost_price': '3.80', 'sale_price': '4.50'},
+            {'code': 'NUEVO', 'name': 'Nuevo', 'category': 'Lácteos', 'cost_price': '1', 'sale_price': '2'},
+        ], dry_run=True)
+
+        self.assertEqual((result['created'], result['updated'], result['price_changes']), (1, 1, 1))
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.sale_price, Decimal('4.20'))
+        self.assertFalse(Product.objects.filter(code='NUEVO').exists())
+        self.assertFalse(ProductPriceChange.objects.exists())
+
+    def test_parse_csv_and_json(self):
+        csv_file = io.BytesIO('\ufeffcode;sale_price\nLECHE-1;4,50\n'.encode('utf-8'))
+        csv_file.name = 'lista.csv'
+        self.assertEqual(parse_catalog_file(csv_file), [{'code': 'LECHE-1', 'sale_price': '4,50'}])
+
+        json_file = io.BytesIO(b'{"products": [{"code": "LECHE-1", "sale_price": 4.5}]}')
+        self.assertEqual(parse_catalog_file(json_file), [{'code': 'LECHE-1', 'sale_price': 4.5}])
+
+        with self.assertRaises(ValueError):
+            parse_catalog_file(io.BytesIO(b'{"items": []}'))
+
+
+class ProductLookupTests(TestCase):
+    """Búsqueda del punto de venta: invalidación al confirmar y firma del catálogo"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Lácteos')
+        self.milk = Product.objects.create(
+            code='LECHE-1', name='Leche Gloria 1L', category=category,
+            cost_price=Decimal('3.50'), sale_price=Decimal('4.20'), current_stock=30
+        )
+        self.bread = Product.objects.create(
+            code='PAN-1', name='Pan de molde', category=category,
+            cost_price=Decimal('5.00'), sale_price=Decimal('6.50'), current_stock=10
+        )
+        self.lookup = ProductLookup(check_seconds=0)
+        patcher = mock.patch('apps.products.lookup._lookup', self.lookup)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.lookup.search('leche')
+
+    def price(self):
+        return self.lookup.search('leche')[0]['sale_price']
+
+    def test_rolled_back_save_does_not_reach_the_index(self):
+        self.lookup.by_code('LECHE-1')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.milk.sale_price = Decimal('9.99')
+                    self.milk.save()
+                    raise RuntimeError('falla')
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.price(), '4.20')
+        self.assertEqual(self.lookup.by_code('LECHE-1')['sale_price'], '4.20')
+
+    def test_committed_price_change_updates_record_without_rebuild(self):
+        self.lookup.by_code('LECHE-1')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.milk.sale_price = Decimal('4.50')
+            self.milk.save()
+
+        self.assertFalse(self.lookup._dirty)
+        self.assertEqual(self.price(), '4.50')
+        self.assertEqual(self.lookup.by_code('LECHE-1')['sale_price'], '4.50')
+
+    def test_local_changes_keep_signature_and_cache(self):
+        self.lookup.by_code('PAN-1')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.milk.current_stock = 25
+            self.milk.save()
+        self.assertEqual(self.lookup._signature, ProductLookup.catalog_signature())
+        self.lookup.check_catalog()
+        self.assertFalse(self.lookup._dirty)
+        self.assertIn('PAN-1', self.lookup._exact)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            extra = Product.objects.create(
+                code='YOG-1', name='Yogurt', category=self.milk.category,
+                cost_price=Decimal('2.00'), sale_price=Decimal('2.90')
+            )
+        self.assertEqual(self.lookup._signature, ProductLookup.catalog_signature())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.milk.delete()
+        self.assertEqual(self.lookup._signature, ProductLookup.catalog_signature())
+        self.lookup.search('yogurt')
+        self.lookup.check_catalog()
+        self.assertFalse(self.lookup._dirty)
+        self.assertEqual([record['id'] for record in self.lookup.search('yogurt')], [extra.pk])
+
+    def test_changes_without_signals_are_detected(self):
+        self.lookup.by_code('PAN-1')
+        Product.objects.filter(pk=self.bread.pk).update(sale_price=Decimal('7.00'), updated_at=timezone.now())
+
+        self.lookup.check_catalog()
+
+        self.assertTrue(self.lookup._dirty)
+        self.assertEqual(self.lookup.by_code('PAN-1')['sale_price'], '7.00')
+
+
+class CatalogSyncTests(TestCase):
+    """Sincronización de terminales: snapshot, cambios desde high_water y respuestas 304"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.t0 = timezone.now().replace(microsecond=0) - timedelta(hours=1)
+        category = Category.objects.create(name='Lácteos')
+        self.milk = Product.objects.create(
+            code='LECHE-1', name='Leche Gloria 1L', category=category,
+            cost_price=Decimal('3.50'), sale_price=Decimal('4.20'), current_stock=30
+        )
+        self.bread = Product.objects.create(
+            code='PAN-1', name='Pan de molde', category=category,
+            cost_price=Decimal('5.00'), sale_price=Decimal('6.50'), current_stock=10
+        )
+        self.touch(self.milk, 0)
+        self.touch(self.bread, 10)
+
+    def touch(self, product, seconds):
+        Product.objects.filter(pk=product.pk).update(updated_at=self.t0 + timedelta(seconds=seconds))
+
+    def changes(self, since, **headers):
+        return self.client.get('/api/products/catalog/changes/', {'since': since}, **headers)
+
+    def test_snapshot_is_gzip_columnar_and_revalidates_with_etag(self):
+        response = self.client.get('/api/products/catalog/snapshot/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        payload = json.loads(gzip.decompress(response.content))
+        self.assertEqual(payload['count'], 2)
+        self.assertEqual(payload['data']['code'], ['LECHE-1', 'PAN-1'])
+        self.assertEqual(payload['data']['sale_price'], ['4.20', '6.50'])
+        self.assertEqual(payload['high_water'], format_timestamp(self.t0 + timedelta(seconds=10) - SYNC_OVERLAP))
+
+        etag = response['ETag']
+        response = self.client.get('/api/products/catalog/snapshot/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.content), (304, b''))
+
+        self.milk.sale_price = Decimal('4.50')
+        self.milk.save()
+        response = self.client.get('/api/products/catalog/snapshot/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(json.loads(response.content)['data']['sale_price'], ['4.50', '6.50'])
+
+    def test_changes_since_high_water_include_late_commits(self):
+        response = self.changes(format_timestamp(self.t0 + timedelta(seconds=1)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['code'], ['PAN-1'])
+        high_water = response.data['high_water']
+        self.assertEqual(high_water, format_timestamp(self.t0 + timedelta(seconds=10) - SYNC_OVERLAP))
+
+        # Guardado antes que PAN-1 pero confirmado después de la consulta anterior
+        self.touch(self.milk, 8)
+        response = self.changes(high_water)
+        self.assertEqual(response.data['data']['code'], ['LECHE-1', 'PAN-1'])
+
+        # Sin cambios nuevos la marca no retrocede más allá de since
+        response = self.changes(format_timestamp(self.t0 + timedelta(seconds=9)))
+        self.assertEqual(response.data['high_water'], format_timestamp(self.t0 + timedelta(seconds=9)))
+
+    def test_changes_include_deactivated_products_and_answer_304(self):
+        self.bread.is_active = False
+        self.bread.save()
+        since = format_timestamp(self.t0 + timedelta(seconds=30))
+
+        response = self.changes(since)
+        self.assertEqual(response.data['data']['is_active'], [False])
+        self.assertEqual(response.data['active'], 1)
+
+        response = self.changes(since, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_require_since(self):
+        with self.assertLogs('django.request', level='WARNING'):
+            response = self.client.get('/api/products/catalog/changes/')
+        self.assertEqual(response.status_code, 400)
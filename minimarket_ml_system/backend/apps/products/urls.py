@@ -3,7 +3,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from django.http import JsonResponse
-from .views import CategoryViewSet, SupplierViewSet, ProductViewSet
+from .views import CategoryViewSet, SupplierViewSet, ProductViewSet, CatalogSyncViewSet
 
 def products_test(request):
     return JsonResponse({
@@ -12,6 +12,11 @@ def products_test(request):
             'categories': '/api/products/categories/',
             'suppliers': '/api/products/suppliers/',
             'products': '/api/products/products/',
+            'lookup': '/api/products/products/lookup/',
+            'bulk_import': '/api/products/products/bulk_import/',
+            'price_history': '/api/products/products/{id}/price_history/',
+            'catalog_snapshot': '/api/products/catalog/snapshot/',
+            'catalog_changes': '/api/products/catalog/changes/?since=',
             'low_stock': '/api/products/products/low_stock/',
             'by_category': '/api/products/products/by_category/',
             'dashboard_stats': '/api/products/products/dashboard_stats/'
@@ -24,6 +29,7 @@ router = DefaultRouter()
 router.register(r'categories', CategoryViewSet)
 router.register(r'suppliers', SupplierViewSet)
 router.register(r'products', ProductViewSet)
+router.register(r'catalog', CatalogSyncViewSet, basename='catalog')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -5,16 +5,28 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q, Count, Sum, Avg
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from datetime import datetime, timedelta
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from datetime import timedelta
+import gzip
+import logging
 
-from .models import Category, Supplier, Product
+from apps.common.fieldsets import SparseFieldsetMixin
+from .models import Category, Supplier, Product, ProductPriceChange
+from .sync import CatalogSync
+from .importer import CatalogImporter, parse_catalog_file
 from .serializers import (
     CategorySerializer, SupplierSerializer, ProductSerializer,
-    ProductStockUpdateSerializer, ProductSummarySerializer
+    ProductStockUpdateSerializer, ProductSummarySerializer, ProductPriceChangeSerializer
 )
 
-class CategoryViewSet(viewsets.ModelViewSet):
+logger = logging.getLogger(__name__)
+
+class CategoryViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet para categorías"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -27,21 +39,17 @@ class CategoryViewSet(viewsets.ModelViewSet):
         is_active = self.request.query_params.get('is_active')
         search = self.request.query_params.get('search')
         
-        print(f"🔍 Filtros de categorías recibidos: search={search}, is_active={is_active}")
-        
         if is_active and is_active.strip() and is_active.lower() not in ['all', 'todos', '']:
             is_active_bool = is_active.lower() == 'true'
             queryset = queryset.filter(is_active=is_active_bool)
-            print(f"  ✅ Filtrado por is_active: {is_active_bool}")
-        else:
-            print(f"  ➡️ Sin filtro is_active (mostrando todas las categorías)")
         
         if search:
             queryset = queryset.filter(
                 Q(name__icontains=search) |
                 Q(description__icontains=search)
             )
-            print(f"  ✅ Filtrado por búsqueda: '{search}'")
+        
+        logger.debug('Filtros de categorías', extra={'search': search, 'is_active': is_active})
         
         return queryset.order_by('name')
     
@@ -58,7 +66,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
             'products': serializer.data
         })
 
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet para proveedores"""
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
@@ -71,14 +79,9 @@ class SupplierViewSet(viewsets.ModelViewSet):
         is_active = self.request.query_params.get('is_active')
         search = self.request.query_params.get('search')
         
-        print(f"🔍 Filtros de proveedores recibidos: search={search}, is_active={is_active}")
-        
         if is_active and is_active.strip() and is_active.lower() not in ['all', 'todos', '']:
             is_active_bool = is_active.lower() == 'true'
             queryset = queryset.filter(is_active=is_active_bool)
-            print(f"  ✅ Filtrado por is_active: {is_active_bool}")
-        else:
-            print(f"  ➡️ Sin filtro is_active (mostrando todos los proveedores)")
         
         if search:
             queryset = queryset.filter(
@@ -86,7 +89,8 @@ class SupplierViewSet(viewsets.ModelViewSet):
                 Q(ruc__icontains=search) |
                 Q(email__icontains=search)
             )
-            print(f"  ✅ Filtrado por búsqueda: '{search}'")
+        
+        logger.debug('Filtros de proveedores', extra={'search': search, 'is_active': is_active})
         
         return queryset.order_by('name')
     
@@ -103,7 +107,7 @@ class SupplierViewSet(viewsets.ModelViewSet):
             'products': serializer.data
         })
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet para productos - CORREGIDO"""
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
@@ -120,39 +124,26 @@ class ProductViewSet(viewsets.ModelViewSet):
         search = self.request.query_params.get('search')
         needs_reorder = self.request.query_params.get('needs_reorder')
         
-        print(f"🔍 Filtros recibidos en backend:")
-        print(f"  - category: {category}")
-        print(f"  - supplier: {supplier}")
-        print(f"  - is_active: {is_active}")
-        print(f"  - stock_status: {stock_status}")
-        print(f"  - search: {search}")
-        print(f"  - needs_reorder: {needs_reorder}")
-        
         # FILTRO POR CATEGORÍA
         if category and category.strip():
             try:
                 category_id = int(category)
                 queryset = queryset.filter(category_id=category_id)
-                print(f"  ✅ Filtrado por categoría: {category_id}")
             except (ValueError, TypeError):
-                print(f"  ❌ ID de categoría inválido: {category}")
+                logger.debug('ID de categoría inválido', extra={'category': category})
         
         # FILTRO POR PROVEEDOR
         if supplier and supplier.strip():
             try:
                 supplier_id = int(supplier)
                 queryset = queryset.filter(supplier_id=supplier_id)
-                print(f"  ✅ Filtrado por proveedor: {supplier_id}")
             except (ValueError, TypeError):
-                print(f"  ❌ ID de proveedor inválido: {supplier}")
+                logger.debug('ID de proveedor inválido', extra={'supplier': supplier})
         
         # FILTRO POR ESTADO ACTIVO - CORREGIDO
         if is_active and is_active.strip() and is_active.lower() not in ['all', 'todos', '']:
             is_active_bool = is_active.lower() == 'true'
             queryset = queryset.filter(is_active=is_active_bool)
-            print(f"  ✅ Filtrado por is_active: {is_active_bool}")
-        else:
-            print(f"  ➡️ Sin filtro is_active (mostrando todos los productos)")
         
         # FILTRO POR BÚSQUEDA
         if search and search.strip():
@@ -164,7 +155,6 @@ class ProductViewSet(viewsets.ModelViewSet):
                 Q(description__icontains=search_term) |
                 Q(brand__icontains=search_term)
             )
-            print(f"  ✅ Filtrado por búsqueda: '{search_term}'")
         
         # FILTRO POR ESTADO DE STOCK - MEJORADO
         if stock_status and stock_status.strip():
@@ -178,7 +168,6 @@ class ProductViewSet(viewsets.ModelViewSet):
                     products_ids.append(product.id)
             
             queryset = queryset.filter(id__in=products_ids)
-            print(f"  ✅ Filtrado por stock_status: {stock_status} ({len(products_ids)} productos)")
         
         # FILTRO POR NECESIDAD DE REORDEN - MEJORADO
         if needs_reorder and needs_reorder.strip():
@@ -192,13 +181,105 @@ class ProductViewSet(viewsets.ModelViewSet):
                     products_ids.append(product.id)
             
             queryset = queryset.filter(id__in=products_ids)
-            print(f"  ✅ Filtrado por needs_reorder: {needs_reorder_bool} ({len(products_ids)} productos)")
         
-        final_count = queryset.count()
-        print(f"  📊 Total productos después de filtros: {final_count}")
+        # El conteo extra solo se ejecuta con nivel DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                'Filtros de productos',
+                extra={'category': category, 'supplier': supplier, 'is_active': is_active,
+                       'stock_status': stock_status, 'search': search,
+                       'needs_reorder': needs_reorder, 'count': queryset.count()}
+            )
         
         return queryset.order_by('name')
     
+    def get_request_user(self):
+        user = getattr(self.request, 'user', None)
+        return user if user is not None and user.is_authenticated else None
+    
+    def perform_update(self, serializer):
+        """Guarda el producto y registra el cambio de costo o precio de venta"""
+        product = serializer.instance
+        old_cost, old_sale = product.cost_price, product.sale_price
+        product = serializer.save()
+        if (old_cost, old_sale) != (product.cost_price, product.sale_price):
+            ProductPriceChange.objects.create(
+                product=product,
+                old_cost_price=old_cost,
+                new_cost_price=product.cost_price,
+                old_sale_price=old_sale,
+                new_sale_price=product.sale_price,
+                source='MANUAL',
+                user=self.get_request_user()
+            )
+    
+    @action(detail=False, methods=['post'])
+    def bulk_import(self, request):
+        """Crear/actualizar productos en bloque por código (upsert)
+        
+        Acepta un archivo CSV o JSON en 'file' o una lista JSON en 'products'.
+        Columnas: code (requerida), name, category (id o nombre), supplier
+        (id, nombre o RUC), cost_price, sale_price y el resto de campos del
+        producto. En productos existentes las celdas vacías no se modifican.
+        Con ?dry_run=true solo valida. Las filas con error se reportan sin
+        detener la importación.
+        """
+        reference = ''
+        if 'file' in request.FILES:
+            uploaded = request.FILES['file']
+            reference = uploaded.name
+            try:
+                entries = parse_catalog_file(uploaded)
+            except (UnicodeDecodeError, ValueError) as e:
+                return Response(
+                    {'error': f'No se pudo leer el archivo: {str(e)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            entries = request.data.get('products')
+        
+        if not isinstance(entries, list) or not entries:
+            return Response(
+                {'error': 'Se requiere un archivo (file) o una lista de products'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'si')
+        importer = CatalogImporter(user=self.get_request_user(), reference=reference or 'API')
+        result = importer.run(entries, dry_run=dry_run)
+        return Response({'success': True, **result})
+    
+    @action(detail=True, methods=['get'])
+    def price_history(self, request, pk=None):
+        """Historial de cambios de costo y precio de venta"""
+        product = self.get_object()
+        changes = product.price_changes.select_related('user')
+        page = self.paginate_queryset(changes)
+        if page is not None:
+            return self.get_paginated_response(ProductPriceChangeSerializer(page, many=True).data)
+        return Response(ProductPriceChangeSerializer(changes, many=True).data)
+    
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """Búsqueda para el punto de venta: ?code= (escáner, exacto) o ?q= (prefijo en nombre/marca/código)"""
+        from .lookup import get_lookup, SEARCH_LIMIT
+        index = get_lookup()
+        
+        code = request.query_params.get('code')
+        if code is not None:
+            record = index.by_code(code)
+            if record is None:
+                return Response({'error': 'Producto no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(record)
+        
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', SEARCH_LIMIT)), 100)
+        except ValueError:
+            limit = SEARCH_LIMIT
+        results = index.search(query, limit=limit)
+        return Response({'count': len(results), 'results': results})
+    
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
         """Productos con stock bajo"""
@@ -330,20 +411,20 @@ class ProductViewSet(viewsets.ModelViewSet):
         product = self.get_object()
         days = int(request.query_params.get('days', 30))
         
-        from apps.sales.models import SaleItem
+        from apps.sales.models import SaleItem, business_date_range
         from django.db.models import Sum, Count
         
-        start_date = datetime.now() - timedelta(days=days)
+        start_date = timezone.localdate() - timedelta(days=days)
         
         sales_data = SaleItem.objects.filter(
+            business_date_range(start_date, prefix='sale__'),
             product=product,
-            sale__sale_date__gte=start_date,
             sale__status='COMPLETED'
-        ).values('sale__sale_date__date').annotate(
+        ).values('sale__business_date').annotate(
             quantity_sold=Sum('quantity'),
             sales_count=Count('sale', distinct=True),
             revenue=Sum('total_price')
-        ).order_by('sale__sale_date__date')
+        ).order_by('sale__business_date')
         
         total_sold = sum(item['quantity_sold'] for item in sales_data)
         total_revenue = sum(item['revenue'] for item in sales_data)
@@ -354,4 +435,73 @@ class ProductViewSet(viewsets.ModelViewSet):
             'total_sold': total_sold,
             'total_revenue': float(total_revenue),
             'daily_sales': list(sales_data)
-        })
\ No newline at end of file
+        })
+
+class CatalogSyncViewSet(viewsets.ViewSet):
+    """Sincronización del catálogo para las terminales del punto de venta
+    
+    snapshot/ entrega el catálogo activo completo (JSON columnar, gzip) y
+    changes/?since= solo los productos modificados desde la marca high_water
+    de la respuesta anterior. Ambos responden ETag y Last-Modified; con
+    If-None-Match o If-Modified-Since vigentes responden 304 sin cuerpo.
+    """
+    permission_classes = []
+    
+    @staticmethod
+    def conditional(request, etag, signature):
+        last_modified = signature['last_modified']
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return get_conditional_response(request, etag=etag, last_modified=timestamp), timestamp
+    
+    @staticmethod
+    def set_validators(response, etag, timestamp):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        # La terminal puede guardar la respuesta pero debe revalidarla siempre
+        response['Cache-Control'] = 'no-cache'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def snapshot(self, request):
+        """Catálogo activo completo; se arma una vez por versión del catálogo"""
+        sync = CatalogSync()
+        signature = sync.signature()
+        etag = sync.etag(signature)
+        
+        not_modified, timestamp = self.conditional(request, etag, signature)
+        if not_modified is not None:
+            return self.set_validators(not_modified, etag, timestamp)
+        
+        body, etag = sync.snapshot(signature)
+        response = HttpResponse(content_type='application/json')
+        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response.content = body
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response.content = gzip.decompress(body)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return self.set_validators(response, etag, timestamp)
+    
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Productos modificados desde ?since= (high_water de la respuesta anterior)"""
+        since_param = request.query_params.get('since', '').strip().replace(' ', '+')
+        since = parse_datetime(since_param) if since_param else None
+        if since is None:
+            return Response(
+                {'error': 'Parámetro since requerido (ISO 8601, p. ej. high_water del snapshot)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if since.tzinfo is None:
+            since = timezone.make_aware(since)
+        
+        sync = CatalogSync()
+        signature = sync.signature()
+        etag = sync.etag(signature, since.isoformat())
+        
+        not_modified, timestamp = self.conditional(request, etag, signature)
+        if not_modified is not None:
+            return self.set_validators(not_modified, etag, timestamp)
+        
+        return self.set_validators(Response(sync.changes(since, signature)), etag, timestamp)
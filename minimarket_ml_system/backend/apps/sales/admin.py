@@ -10,10 +10,11 @@ class SaleItemInline(admin.TabularInline):
 
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
-    list_display = ['full_name', 'document_number', 'phone', 'customer_type', 'total_purchases', 'last_purchase_date']
-    list_filter = ['customer_type', 'is_active', 'created_at']
+    list_display = ['full_name', 'document_number', 'phone', 'customer_type', 'segment', 'total_purchases', 'last_purchase_date']
+    list_filter = ['customer_type', 'segment', 'is_active', 'created_at']
     search_fields = ['first_name', 'last_name', 'document_number', 'email', 'phone']
-    readonly_fields = ['total_purchases', 'purchase_count', 'last_purchase_date', 'average_purchase', 'available_credit']
+    readonly_fields = ['total_purchases', 'purchase_count', 'last_purchase_date', 'average_purchase', 'available_credit',
+                       'rfm_score', 'segment', 'segmented_at']
     
     fieldsets = (
         ('Información Personal', {
@@ -28,6 +29,9 @@ class CustomerAdmin(admin.ModelAdmin):
         ('Estadísticas', {
             'fields': ('total_purchases', 'purchase_count', 'average_purchase', 'last_purchase_date')
         }),
+        ('Segmentación', {
+            'fields': ('rfm_score', 'segment', 'segmented_at')
+        }),
         ('Estado', {
             'fields': ('is_active', 'created_at', 'updated_at')
         }),
@@ -0,0 +1,171 @@
+# Archivo: minimarket_ml_system/backend/apps/sales/customers.py
+
+import logging
+import numpy as np
+import pandas as pd
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from apps.monitoring.tracing import span
+from .models import Customer, Sale
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+# Segmento según puntajes R (recencia), F (frecuencia) y M (monto) de 1 a 5.
+# Se evalúan en orden; el primero que cumple gana.
+SEGMENT_RULES = [
+    ('CHAMPIONS', lambda r, f, m: (r >= 4) & (f >= 4) & (m >= 4)),
+    ('LOYAL', lambda r, f, m: (r >= 3) & (f >= 4)),
+    ('NEW', lambda r, f, m: (r >= 4) & (f <= 2)),
+    ('AT_RISK', lambda r, f, m: (r <= 2) & (f >= 3)),
+    ('LOST', lambda r, f, m: (r <= 2)),
+]
+DEFAULT_SEGMENT = 'POTENTIAL'
+
+# Tipo de cliente al que se promueve cada segmento (solo se sube de nivel)
+SEGMENT_PROMOTIONS = {'CHAMPIONS': 'VIP', 'LOYAL': 'FREQUENT'}
+TYPE_RANK = {'REGULAR': 0, 'FREQUENT': 1, 'VIP': 2}
+
+
+def record_customer_sale(sale, sign=1):
+    """Actualiza las estadísticas del cliente de una venta con un UPDATE atómico
+
+    sign=1 al completar la venta y sign=-1 al anularla. Los acumulados se
+    incrementan con expresiones F (sin leer el cliente, sin carreras entre
+    cajas); al anular, la última compra se recalcula con una subconsulta.
+    """
+    if not sale.customer_id:
+        return
+
+    updates = {
+        'total_purchases': F('total_purchases') + Value(sign * sale.total),
+        'purchase_count': F('purchase_count') + sign,
+    }
+    if sign > 0:
+        updates['last_purchase_date'] = Greatest(
+            Coalesce('last_purchase_date', Value(sale.sale_date)), Value(sale.sale_date)
+        )
+    else:
+        updates['last_purchase_date'] = Subquery(
+            Sale.objects.filter(customer=OuterRef('pk'), status='COMPLETED')
+            .order_by('-sale_date')
+            .values('sale_date')[:1]
+        )
+
+    Customer.objects.filter(pk=sale.customer_id).update(**updates)
+
+
+def rfm_scores(values, ascending=True, bins=5):
+    """Puntaje 1..bins por percentil (empates reciben el mismo puntaje)"""
+    if values.empty:
+        return values.astype(int)
+    pct = values.rank(method='average', ascending=ascending, pct=True)
+    return np.ceil(pct * bins).clip(1, bins).astype(int)
+
+
+class CustomerSegmenter:
+    """Segmentación RFM de todos los clientes
+
+    Una consulta agrupada sobre las ventas completadas da recencia, frecuencia
+    y monto por cliente; los puntajes y segmentos se calculan vectorizados con
+    pandas y se guardan con bulk_update. La misma corrida re-sincroniza
+    total_purchases, purchase_count y last_purchase_date (corrige cualquier
+    deriva de las actualizaciones incrementales) y, con promote=True, sube el
+    customer_type a FREQUENT o VIP según el segmento.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def frame(self, now):
+        """DataFrame por cliente con estadísticas de compra y días desde la última"""
+        customers = pd.DataFrame(
+            list(Customer.objects.values_list('id', 'customer_type')),
+            columns=['id', 'customer_type']
+        ).set_index('id')
+
+        stats = pd.DataFrame(
+            list(
+                Sale.objects.filter(status='COMPLETED', customer__isnull=False)
+                .values('customer_id')
+                .annotate(frequency=Count('id'), monetary=Sum('total'), last_purchase=Max('sale_date'))
+                .values_list('customer_id', 'frequency', 'monetary', 'last_purchase')
+            ),
+            columns=['id', 'frequency', 'monetary', 'last_purchase']
+        ).set_index('id')
+
+        df = customers.join(stats, how='left')
+        df['frequency'] = df['frequency'].fillna(0).astype(int)
+        df['monetary'] = df['monetary'].fillna(Decimal('0'))
+        df['last_purchase'] = pd.to_datetime(df['last_purchase'], utc=True)
+        df['recency'] = (pd.Timestamp(now) - df['last_purchase']).dt.days
+        return df
+
+    def score(self, df):
+        """Agrega puntajes R, F, M, rfm_score y segment (solo clientes con compras)"""
+        df['rfm_score'] = ''
+        df['segment'] = ''
+        buyers = df['frequency'] > 0
+        if not buyers.any():
+            return df
+
+        active = df[buyers]
+        r = rfm_scores(active['recency'], ascending=False)
+        f = rfm_scores(active['frequency'])
+        m = rfm_scores(active['monetary'].astype(float))
+
+        conditions = [rule(r, f, m) for _, rule in SEGMENT_RULES]
+        choices = [segment for segment, _ in SEGMENT_RULES]
+        df.loc[buyers, 'segment'] = np.select(conditions, choices, default=DEFAULT_SEGMENT)
+        df.loc[buyers, 'rfm_score'] = r.astype(str) + f.astype(str) + m.astype(str)
+        return df
+
+    def promotions(self, df):
+        """Nuevo customer_type por cliente: solo sube de nivel y nunca toca WHOLESALE"""
+        target = df['segment'].map(SEGMENT_PROMOTIONS)
+        current_rank = df['customer_type'].map(TYPE_RANK)
+        target_rank = target.map(TYPE_RANK)
+        promote = target.notna() & current_rank.notna() & (target_rank > current_rank)
+        return df['customer_type'].where(~promote, target)
+
+    @span('customers.segment')
+    def run(self, promote=False):
+        """Recalcula estadísticas y segmentos; retorna un resumen de la corrida"""
+        now = timezone.now()
+        df = self.score(self.frame(now))
+        new_types = self.promotions(df) if promote else df['customer_type']
+
+        customers = [
+            Customer(
+                id=row.Index,
+                total_purchases=row.monetary,
+                purchase_count=row.frequency,
+                last_purchase_date=row.last_purchase.to_pydatetime() if pd.notna(row.last_purchase) else None,
+                rfm_score=row.rfm_score,
+                segment=row.segment,
+                segmented_at=now,
+                customer_type=customer_type,
+            )
+            for row, customer_type in zip(df.itertuples(), new_types)
+        ]
+
+        fields = ['total_purchases', 'purchase_count', 'last_purchase_date', 'rfm_score', 'segment', 'segmented_at']
+        if promote:
+            fields.append('customer_type')
+
+        with transaction.atomic():
+            Customer.objects.bulk_update(customers, fields, batch_size=self.batch_size)
+
+        segments = df.loc[df['segment'] != '', 'segment'].value_counts()
+        result = {
+            'customers': len(customers),
+            'buyers': int((df['frequency'] > 0).sum()),
+            'promoted': int((new_types != df['customer_type']).sum()),
+            'segments': {segment: int(count) for segment, count in segments.items()},
+        }
+        logger.info("Segmentación de clientes actualizada", extra=result)
+        return result
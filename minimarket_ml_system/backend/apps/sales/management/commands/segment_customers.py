@@ -0,0 +1,34 @@
+# Archivo: minimarket_ml_system/backend/apps/sales/management/commands/segment_customers.py
+
+import time
+from django.core.management.base import BaseCommand
+from apps.sales.customers import CustomerSegmenter
+
+class Command(BaseCommand):
+    help = 'Segmentación RFM de clientes: re-sincroniza estadísticas de compra y asigna segmentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--promote',
+            action='store_true',
+            help='Subir customer_type a FREQUENT/VIP según el segmento (nunca baja de nivel)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('=== SEGMENTACIÓN DE CLIENTES ===')
+        )
+
+        start = time.perf_counter()
+        result = CustomerSegmenter().run(promote=options['promote'])
+
+        self.stdout.write(f'✓ {result["customers"]} clientes actualizados ({result["buyers"]} con compras)')
+        for segment, count in result['segments'].items():
+            self.stdout.write(f'  {segment}: {count}')
+        if options['promote']:
+            self.stdout.write(f'✓ {result["promoted"]} clientes promovidos')
+        self.stdout.write(f'✓ Completado en {time.perf_counter() - start:.2f}s')
+
+        self.stdout.write(
+            self.style.SUCCESS('\n¡Segmentación de clientes actualizada!')
+        )
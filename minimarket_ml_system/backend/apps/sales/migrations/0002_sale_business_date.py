@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:54
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_business_date(apps, schema_editor):
+    """Completa business_date y business_hour de las ventas existentes"""
+    Sale = apps.get_model('sales', 'Sale')
+    batch = []
+
+    for sale in Sale.objects.only('id', 'sale_date').iterator(chunk_size=5000):
+        local_date = timezone.localtime(sale.sale_date)
+        sale.business_date = local_date.date()
+        sale.business_hour = local_date.hour
+        batch.append(sale)
+
+        if len(batch) >= 5000:
+            Sale.objects.bulk_update(batch, ['business_date', 'business_hour'])
+            batch = []
+
+    if batch:
+        Sale.objects.bulk_update(batch, ['business_date', 'business_hour'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='business_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Fecha comercial'),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='business_hour',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Hora comercial'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['business_date'], name='sales_sale_busines_89fc33_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['status', 'business_date'], name='sales_sale_status_0589e3_idx'),
+        ),
+        migrations.RunPython(backfill_business_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_sale_business_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='rfm_score',
+            field=models.CharField(blank=True, max_length=3, verbose_name='Puntaje RFM'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='segment',
+            field=models.CharField(blank=True, choices=[('CHAMPIONS', 'Campeones'), ('LOYAL', 'Leales'), ('POTENTIAL', 'Potenciales'), ('NEW', 'Nuevos'), ('AT_RISK', 'En riesgo'), ('LOST', 'Perdidos')], max_length=20, verbose_name='Segmento'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='segmented_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fecha de segmentación'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['segment'], name='sales_custo_segment_7d24cd_idx'),
+        ),
+    ]
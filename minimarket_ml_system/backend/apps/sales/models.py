@@ -1,9 +1,25 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from datetime import timedelta
 from apps.products.models import Product
 
+def business_date_range(start=None, end=None, prefix=''):
+    """Filtro de rango de fechas locales sobre la columna indexada business_date
+
+    Equivale a sale_date__date__gte=start y sale_date__date__lte=end, pero como
+    rango semiabierto [start, end + 1 día) que no convierte cada fila a hora local.
+    Usar prefix='sale__' para filtrar desde SaleItem.
+    """
+    conditions = Q()
+    if start is not None:
+        conditions &= Q(**{f'{prefix}business_date__gte': start})
+    if end is not None:
+        conditions &= Q(**{f'{prefix}business_date__lt': end + timedelta(days=1)})
+    return conditions
+
 class Customer(models.Model):
     """Modelo para clientes"""
     CUSTOMER_TYPES = [
@@ -13,6 +29,15 @@ class Customer(models.Model):
         ('WHOLESALE', 'Mayorista'),
     ]
     
+    SEGMENTS = [
+        ('CHAMPIONS', 'Campeones'),
+        ('LOYAL', 'Leales'),
+        ('POTENTIAL', 'Potenciales'),
+        ('NEW', 'Nuevos'),
+        ('AT_RISK', 'En riesgo'),
+        ('LOST', 'Perdidos'),
+    ]
+    
     # Información básica
     first_name = models.CharField(max_length=100, verbose_name="Nombres")
     last_name = models.CharField(max_length=100, verbose_name="Apellidos")
@@ -34,6 +59,11 @@ class Customer(models.Model):
     purchase_count = models.IntegerField(default=0, verbose_name="Cantidad de compras")
     last_purchase_date = models.DateTimeField(null=True, blank=True, verbose_name="Última compra")
     
+    # Segmentación RFM (recalculada por el comando segment_customers)
+    rfm_score = models.CharField(max_length=3, blank=True, verbose_name="Puntaje RFM")
+    segment = models.CharField(max_length=20, choices=SEGMENTS, blank=True, verbose_name="Segmento")
+    segmented_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de segmentación")
+    
     # Estado y fechas
     is_active = models.BooleanField(default=True, verbose_name="Activo")
     birth_date = models.DateField(null=True, blank=True, verbose_name="Fecha de nacimiento")
@@ -44,6 +74,9 @@ class Customer(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(fields=['segment']),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.document_number}"
@@ -105,6 +138,10 @@ class Sale(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
     
+    # Fecha y hora locales (TIME_ZONE) de sale_date, guardadas para reportes indexados
+    business_date = models.DateField(null=True, blank=True, editable=False, verbose_name="Fecha comercial")
+    business_hour = models.PositiveSmallIntegerField(null=True, blank=True, editable=False, verbose_name="Hora comercial")
+    
     class Meta:
         verbose_name = "Venta"
         verbose_name_plural = "Ventas"
@@ -113,11 +150,31 @@ class Sale(models.Model):
             models.Index(fields=['sale_date']),
             models.Index(fields=['customer']),
             models.Index(fields=['status']),
+            models.Index(fields=['business_date']),
+            models.Index(fields=['status', 'business_date']),
         ]
     
     def __str__(self):
         return f"{self.sale_number} - {self.total}"
     
+    def save(self, *args, **kwargs):
+        self.set_business_date()
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'sale_date' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'business_date', 'business_hour'}
+        
+        super().save(*args, **kwargs)
+    
+    def set_business_date(self):
+        """Calcula business_date y business_hour a partir de sale_date"""
+        if self.sale_date is None:
+            return
+        
+        local_date = timezone.localtime(self.sale_date) if timezone.is_aware(self.sale_date) else self.sale_date
+        self.business_date = local_date.date()
+        self.business_hour = local_date.hour
+    
     def calculate_totals(self):
         """Calcula los totales de la venta basado en sus items"""
         from decimal import Decimal
@@ -232,7 +289,7 @@ class DailySummary(models.Model):
         from django.db.models import Sum, Count, Avg
         
         sales = Sale.objects.filter(
-            sale_date__date=self.date,
+            business_date_range(self.date, self.date),
             status='COMPLETED'
         )
         
@@ -270,10 +327,9 @@ class DailySummary(models.Model):
             self.unique_customers = sales.exclude(customer=None).values('customer').distinct().count()
             
             # Hora pico (la hora con más ventas)
-            from django.db.models.functions import ExtractHour
-            peak_hour_data = sales.annotate(
-                hour=ExtractHour('sale_date')
-            ).values('hour').annotate(
+            peak_hour_data = sales.values(
+                hour=models.F('business_hour')
+            ).annotate(
                 total=Sum('total')
             ).order_by('-total').first()
             
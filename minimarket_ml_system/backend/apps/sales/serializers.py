@@ -1,8 +1,16 @@
 # Archivo: minimarket_ml_system/backend/apps/sales/serializers.py
 
 from rest_framework import serializers
+from django.db import transaction
+import logging
 from .models import Customer, Sale, SaleItem, DailySummary
+from .customers import record_customer_sale
 from apps.products.models import Product
+from apps.inventory.ledger import record_sale_stock
+from apps.inventory.lots import LotAllocator
+from apps.analytics.kpis import KPIEngine
+
+logger = logging.getLogger(__name__)
 
 class CustomerSerializer(serializers.ModelSerializer):
     """Serializer para clientes"""
@@ -17,13 +25,21 @@ class CustomerSerializer(serializers.ModelSerializer):
             'document_number', 'phone', 'email', 'address', 'customer_type',
             'credit_limit', 'current_debt', 'available_credit', 'total_purchases',
             'purchase_count', 'average_purchase', 'last_purchase_date',
+            'rfm_score', 'segment', 'segmented_at',
             'is_active', 'birth_date', 'created_at', 'updated_at'
         ]
         read_only_fields = [
             'id', 'full_name', 'available_credit', 'total_purchases',
             'purchase_count', 'average_purchase', 'last_purchase_date',
+            'rfm_score', 'segment', 'segmented_at',
             'created_at', 'updated_at'
         ]
+        # Columnas que leen las propiedades (para ?fields=)
+        field_dependencies = {
+            'full_name': ['first_name', 'last_name'],
+            'available_credit': ['credit_limit', 'current_debt'],
+            'average_purchase': ['total_purchases', 'purchase_count'],
+        }
     
     def validate_document_number(self, value):
         document_type = self.initial_data.get('document_type', 'DNI')
@@ -108,23 +124,40 @@ class SaleCreateSerializer(serializers.ModelSerializer):
                 if created:
                     seller.set_password('admin123')
                     seller.save()
-                    print(f"✅ Usuario admin creado en serializer: {seller.username}")
+                    logger.info('Usuario admin creado', extra={'username': seller.username})
         
-        print(f"🔍 Serializer usando seller: {seller}")
+        logger.debug('Serializer usando seller', extra={'seller': str(seller)})
         
         # NO generar número aquí, se hace en perform_create del ViewSet
         # validated_data['sale_number'] = sale_number  ← COMENTAR ESTA LÍNEA
         validated_data['seller'] = seller
         
-        sale = Sale.objects.create(**validated_data)
-        
-        # Crear items
-        for item_data in items_data:
-            SaleItem.objects.create(sale=sale, **item_data)
-        
-        # Calcular totales
-        sale.calculate_totals()
-        sale.save()
+        # La venta y sus efectos (stock, lotes, cliente) se guardan juntos o nada
+        with transaction.atomic():
+            sale = Sale.objects.create(**validated_data)
+            
+            # Crear items
+            for item_data in items_data:
+                SaleItem.objects.create(sale=sale, **item_data)
+            
+            # Calcular totales
+            sale.calculate_totals()
+            sale.save()
+            
+            if sale.status == 'COMPLETED':
+                # Descontar stock con un movimiento de salida por producto
+                record_sale_stock(sale, user=seller)
+                
+                # Descontar de los lotes (FEFO) en bloque
+                without_lot = LotAllocator().consume_sale(sale)
+                if without_lot:
+                    logger.debug('Unidades vendidas sin lote registrado', extra={'sale': sale.pk, 'products': without_lot})
+                
+                # Estadísticas del cliente con un UPDATE atómico
+                record_customer_sale(sale)
+                
+                # KPIs en tiempo real por delta (sin recalcular), solo si la venta se confirma
+                transaction.on_commit(lambda: KPIEngine().record_sale(sale), robust=True)
         
         return sale
 
@@ -148,6 +181,9 @@ class SaleSerializer(serializers.ModelSerializer):
             'id', 'sale_number', 'seller', 'subtotal', 'discount_amount',
             'tax', 'total', 'created_at', 'updated_at'
         ]
+        # items se agrega a una respuesta con ?fields= solo con ?expand=items
+        expandable_fields = ['items']
+        field_dependencies = {'items_count': ['items']}
     
     def get_items_count(self, obj):
         return obj.items.count()
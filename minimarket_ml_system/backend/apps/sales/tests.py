@@ -1,3 +1,185 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+import pandas as pd
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.inventory.models import LotConsumption, StockLot, StockMovement
+from apps.products.models import Category, Product
+from .customers import CustomerSegmenter, record_customer_sale, rfm_scores
+from .models import Customer, Sale
 
-# Create your tests here.
+
+def create_product(code, current_stock=0, **kwargs):
+    category, _ = Category.objects.get_or_create(name='Abarrotes')
+    return Product.objects.create(
+        code=code, name=f'Producto {code}', category=category,
+        cost_price=Decimal('2.00'), sale_price=Decimal('3.00'),
+        current_stock=current_stock, **kwargs
+    )
+
+
+class SaleLifecycleTests(TestCase):
+    """Crear y anular ventas por la API con sus efectos en stock, lotes y cliente"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@minimarket.com', 'admin123'))
+        self.product = create_product('ARROZ', current_stock=20)
+        self.lot = StockLot.objects.create(
+            product=self.product, initial_quantity=20, quantity=20,
+            expiration_date=timezone.localdate() + timedelta(days=30)
+        )
+        self.customer = Customer.objects.create(first_name='Ana', last_name='Quispe', document_number='12345678')
+
+    def create_sale(self, quantity=4):
+        return self.client.post('/api/sales/sales/', {
+            'customer': self.customer.pk,
+            'payment_method': 'CASH',
+            'items': [{'product': self.product.pk, 'quantity': quantity, 'unit_price': '3.00'}],
+        }, format='json')
+
+    def refresh(self):
+        for instance in (self.product, self.lot, self.customer):
+            instance.refresh_from_db()
+
+    def test_create_discounts_stock_lots_and_customer_stats(self):
+        response = self.create_sale()
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.refresh()
+        self.assertEqual(self.product.current_stock, 16)
+        self.assertEqual(self.lot.quantity, 16)
+        self.assertEqual(self.customer.purchase_count, 1)
+        self.assertEqual(StockMovement.objects.filter(reason='SALE').count(), 1)
+
+    def test_cancel_reverts_every_effect_once(self):
+        self.create_sale()
+        sale = Sale.objects.get()
+
+        response = self.client.post(f'/api/sales/sales/{sale.pk}/cancel/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.refresh()
+        self.assertEqual((self.product.current_stock, self.lot.quantity), (20, 20))
+        self.assertEqual((self.customer.purchase_count, self.customer.total_purchases), (0, 0))
+        self.assertFalse(LotConsumption.objects.exists())
+
+        with self.assertLogs('django.request', level='WARNING'):
+            response = self.client.post(f'/api/sales/sales/{sale.pk}/cancel/')
+        self.assertEqual(response.status_code, 400)
+        self.refresh()
+        self.assertEqual((self.product.current_stock, self.lot.quantity), (20, 20))
+        self.assertEqual(StockMovement.objects.filter(reason='RETURN_CUSTOMER').count(), 1)
+
+    def test_failed_side_effect_rolls_back_the_sale(self):
+        with mock.patch('apps.sales.serializers.record_customer_sale', side_effect=RuntimeError('falla')):
+            with self.assertRaises(RuntimeError), self.assertLogs('django.request', level='ERROR'):
+                self.create_sale()
+
+        self.refresh()
+        self.assertFalse(Sale.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertEqual((self.product.current_stock, self.lot.quantity), (20, 20))
+
+
+class CustomerStatsTests(TestCase):
+    """Estadísticas incrementales del cliente al vender y anular"""
+
+    def setUp(self):
+        self.customer = Customer.objects.create(first_name='Luis', last_name='Rojas', document_number='87654321')
+        self.now = timezone.now()
+
+    def sale(self, number, total, days_ago):
+        return Sale.objects.create(
+            sale_number=number, customer=self.customer, payment_method='CASH',
+            total=Decimal(total), sale_date=self.now - timedelta(days=days_ago)
+        )
+
+    def test_record_and_revert_sale(self):
+        older = self.sale('V-1', '10.00', 5)
+        newer = self.sale('V-2', '20.00', 1)
+        record_customer_sale(newer)
+        record_customer_sale(older)
+
+        self.customer.refresh_from_db()
+        self.assertEqual((self.customer.purchase_count, self.customer.total_purchases), (2, Decimal('30.00')))
+        self.assertEqual(self.customer.last_purchase_date, newer.sale_date)
+
+        Sale.objects.filter(pk=newer.pk).update(status='CANCELLED')
+        record_customer_sale(newer, sign=-1)
+
+        self.customer.refresh_from_db()
+        self.assertEqual((self.customer.purchase_count, self.customer.total_purchases), (1, Decimal('10.00')))
+        self.assertEqual(self.customer.last_purchase_date, older.sale_date)
+
+    def test_sale_without_customer_is_ignored(self):
+        sale = Sale.objects.create(sale_number='V-3', payment_method='CASH', total=Decimal('5.00'))
+        record_customer_sale(sale)
+
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.purchase_count, 0)
+
+
+class RFMScoreTests(TestCase):
+    """Puntajes RFM por percentil y segmentación"""
+
+    def test_scores_by_percentile(self):
+        values = pd.Series([10, 20, 30, 40, 50])
+
+        self.assertEqual(list(rfm_scores(values)), [1, 2, 3, 4, 5])
+        self.assertEqual(list(rfm_scores(values, ascending=False)), [5, 4, 3, 2, 1])
+        self.assertEqual(rfm_scores(pd.Series([7, 7, 7, 7])).nunique(), 1)
+        self.assertEqual(list(rfm_scores(pd.Series([1, 5, 5, 9]))), [2, 4, 4, 5])
+        self.assertTrue(rfm_scores(pd.Series([], dtype=float)).empty)
+
+    def test_promotions_only_move_up_and_skip_wholesale(self):
+        df = pd.DataFrame({
+            'customer_type': ['REGULAR', 'VIP', 'WHOLESALE', 'REGULAR', 'FREQUENT'],
+            'segment': ['CHAMPIONS', 'LOYAL', 'CHAMPIONS', 'LOST', 'CHAMPIONS'],
+        })
+
+        self.assertEqual(
+            list(CustomerSegmenter().promotions(df)), ['VIP', 'VIP', 'WHOLESALE', 'REGULAR', 'VIP']
+        )
+
+    def test_run_segments_customers_and_resyncs_stats(self):
+        now = timezone.now()
+        # (nombre, ventas, monto por venta, días desde la última compra)
+        profiles = [
+            ('Campeon', 10, '50.00', 1),
+            ('Nuevo', 1, '10.00', 2),
+            ('Potencial', 8, '50.00', 3),
+            ('Riesgo', 9, '50.00', 40),
+            ('Perdido', 2, '10.00', 50),
+        ]
+        customers = {}
+        for i, (name, sales, total, days_ago) in enumerate(profiles):
+            customer = Customer.objects.create(
+                first_name=name, last_name='Test', document_number=f'1000000{i}', purchase_count=99
+            )
+            customers[name] = customer
+            for n in range(sales):
+                Sale.objects.create(
+                    sale_number=f'{name}-{n}', customer=customer, payment_method='CASH',
+                    total=Decimal(total), sale_date=now - timedelta(days=days_ago + n)
+                )
+        idle = Customer.objects.create(first_name='Sin', last_name='Compras', document_number='20000000')
+
+        result = CustomerSegmenter().run(promote=True)
+
+        self.assertEqual((result['customers'], result['buyers'], result['promoted']), (6, 5, 1))
+        segments = dict(Customer.objects.values_list('first_name', 'segment'))
+        self.assertEqual(segments, {
+            'Campeon': 'CHAMPIONS', 'Nuevo': 'NEW', 'Potencial': 'POTENTIAL',
+            'Riesgo': 'AT_RISK', 'Perdido': 'LOST', 'Sin': '',
+        })
+
+        champion = Customer.objects.get(pk=customers['Campeon'].pk)
+        self.assertEqual(champion.rfm_score, '555')
+        self.assertEqual(champion.customer_type, 'VIP')
+        self.assertEqual((champion.purchase_count, champion.total_purchases), (10, Decimal('500.00')))
+
+        idle.refresh_from_db()
+        self.assertEqual((idle.purchase_count, idle.rfm_score), (0, ''))
@@ -14,7 +14,9 @@ def sales_test(request):
             'daily_summaries': '/api/sales/daily-summaries/',
             'dashboard_stats': '/api/sales/sales/dashboard_stats/',
             'sales_by_period': '/api/sales/sales/sales_by_period/',
-            'top_customers': '/api/sales/customers/top_customers/'
+            'top_customers': '/api/sales/customers/top_customers/',
+            'customer_segments': '/api/sales/customers/segments/',
+            'compute_segments': '/api/sales/customers/compute_segments/'
         }
     })
 
@@ -4,17 +4,22 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Sum, Count, Avg
+from django.db import transaction
+from django.db.models import Q, Sum, Count, Avg, Max
 from django.db.models.functions import TruncDate, TruncMonth
 from datetime import datetime, timedelta
+import logging
 
-from .models import Customer, Sale, SaleItem, DailySummary
+from apps.common.fieldsets import SparseFieldsetMixin
+from .models import Customer, Sale, SaleItem, DailySummary, business_date_range
 from .serializers import (
     CustomerSerializer, SaleSerializer, SaleCreateSerializer,
     SaleItemSerializer, DailySummarySerializer, SaleSummarySerializer
 )
 
-class CustomerViewSet(viewsets.ModelViewSet):
+logger = logging.getLogger(__name__)
+
+class CustomerViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet para clientes"""
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
@@ -25,28 +30,23 @@ class CustomerViewSet(viewsets.ModelViewSet):
         
         # Filtros opcionales
         customer_type = self.request.query_params.get('customer_type')
+        segment = self.request.query_params.get('segment')
         is_active = self.request.query_params.get('is_active')
         search = self.request.query_params.get('search')
         has_credit = self.request.query_params.get('has_credit')
         
-        print(f"🔍 Filtros de clientes recibidos:")
-        print(f"  - customer_type: {customer_type}")
-        print(f"  - is_active: {is_active}")
-        print(f"  - search: {search}")
-        print(f"  - has_credit: {has_credit}")
-        
         # FILTRO POR TIPO DE CLIENTE
         if customer_type and customer_type.strip() and customer_type.lower() not in ['todos', 'all', '']:
             queryset = queryset.filter(customer_type=customer_type)
-            print(f"  ✅ Filtrado por customer_type: {customer_type}")
+        
+        # FILTRO POR SEGMENTO RFM
+        if segment and segment.strip() and segment.lower() not in ['todos', 'all', '']:
+            queryset = queryset.filter(segment=segment)
         
         # FILTRO POR ESTADO ACTIVO
         if is_active and is_active.strip() and is_active.lower() not in ['todos', 'all', '']:
             is_active_bool = is_active.lower() == 'true'
             queryset = queryset.filter(is_active=is_active_bool)
-            print(f"  ✅ Filtrado por is_active: {is_active_bool}")
-        else:
-            print(f"  ➡️ Sin filtro is_active (mostrando todos los clientes)")
         
         # FILTRO POR CRÉDITO
         if has_credit and has_credit.strip() and has_credit.lower() not in ['todos', 'all', '']:
@@ -54,7 +54,6 @@ class CustomerViewSet(viewsets.ModelViewSet):
                 queryset = queryset.filter(credit_limit__gt=0)
             else:
                 queryset = queryset.filter(credit_limit=0)
-            print(f"  ✅ Filtrado por has_credit: {has_credit}")
         
         # FILTRO POR BÚSQUEDA
         if search and search.strip():
@@ -66,10 +65,14 @@ class CustomerViewSet(viewsets.ModelViewSet):
                 Q(email__icontains=search_term) |
                 Q(phone__icontains=search_term)
             )
-            print(f"  ✅ Filtrado por búsqueda: '{search_term}'")
         
-        final_count = queryset.count()
-        print(f"  📊 Total clientes después de filtros: {final_count}")
+        # El conteo extra solo se ejecuta con nivel DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                'Filtros de clientes',
+                extra={'customer_type': customer_type, 'segment': segment, 'is_active': is_active,
+                       'search': search, 'has_credit': has_credit, 'count': queryset.count()}
+            )
         
         return queryset.order_by('last_name', 'first_name')
     
@@ -84,15 +87,18 @@ class CustomerViewSet(viewsets.ModelViewSet):
             customer=customer,
             sale_date__gte=start_date,
             status='COMPLETED'
-        ).order_by('-sale_date')
+        ).select_related('customer').order_by('-sale_date')
         
+        # Conteo y monto del período en una sola consulta; los acumulados
+        # históricos ya están en el cliente (total_purchases, purchase_count)
+        period = sales.aggregate(count=Count('id'), total=Sum('total'))
         serializer = SaleSummarySerializer(sales, many=True)
         
         return Response({
             'customer': CustomerSerializer(customer).data,
             'period_days': days,
-            'sales_count': sales.count(),
-            'total_spent': sales.aggregate(total=Sum('total'))['total'] or 0,
+            'sales_count': period['count'],
+            'total_spent': period['total'] or 0,
             'sales': serializer.data
         })
     
@@ -108,8 +114,34 @@ class CustomerViewSet(viewsets.ModelViewSet):
         
         serializer = CustomerSerializer(customers, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def segments(self, request):
+        """Resumen por segmento RFM (una consulta agrupada)"""
+        rows = (
+            Customer.objects.filter(is_active=True)
+            .exclude(segment='')
+            .values('segment')
+            .annotate(customers=Count('id'), total_purchases=Sum('total_purchases'), purchase_count=Sum('purchase_count'))
+            .order_by('segment')
+        )
+        labels = dict(Customer.SEGMENTS)
+        last_run = Customer.objects.aggregate(last=Max('segmented_at'))['last']
+        
+        return Response({
+            'segmented_at': last_run,
+            'segments': [dict(row, label=labels.get(row['segment'], row['segment'])) for row in rows]
+        })
+    
+    @action(detail=False, methods=['post'])
+    def compute_segments(self, request):
+        """Recalcula la segmentación RFM (?promote=1 sube customer_type a FREQUENT/VIP)"""
+        from .customers import CustomerSegmenter
+        promote = request.query_params.get('promote', '').lower() in ['1', 'true', 'yes']
+        result = CustomerSegmenter().run(promote=promote)
+        return Response(result)
 
-class SaleViewSet(viewsets.ModelViewSet):
+class SaleViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet para ventas"""
     queryset = Sale.objects.all()
     permission_classes = []
@@ -143,19 +175,17 @@ class SaleViewSet(viewsets.ModelViewSet):
             try:
                 from datetime import datetime
                 date_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-                queryset = queryset.filter(sale_date__date__gte=date_obj)
-                print(f"  ✅ Filtrado desde: {date_obj}")
+                queryset = queryset.filter(business_date_range(start=date_obj))
             except ValueError:
-                print(f"  ❌ Fecha inválida date_from: {date_from}")
+                logger.debug('Fecha inválida', extra={'date_from': date_from})
 
         if date_to and date_to.strip():
             try:
                 from datetime import datetime
                 date_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-                queryset = queryset.filter(sale_date__date__lte=date_obj)
-                print(f"  ✅ Filtrado hasta: {date_obj}")
+                queryset = queryset.filter(business_date_range(end=date_obj))
             except ValueError:
-                print(f"  ❌ Fecha inválida date_to: {date_to}")
+                logger.debug('Fecha inválida', extra={'date_to': date_to})
         
         if search:
             queryset = queryset.filter(
@@ -199,9 +229,9 @@ class SaleViewSet(viewsets.ModelViewSet):
                 if created:
                     seller.set_password('admin123')
                     seller.save()
-                    print(f"✅ Usuario admin creado: {seller.username}")
+                    logger.info('Usuario admin creado', extra={'username': seller.username})
         
-        print(f"🔍 Creando venta con seller: {seller}")
+        logger.debug('Creando venta', extra={'seller': str(seller)})
         
         serializer.save(
             sale_number=sale_number,
@@ -217,7 +247,7 @@ class SaleViewSet(viewsets.ModelViewSet):
         
         # Ventas de hoy
         today_sales = Sale.objects.filter(
-            sale_date__date=today,
+            business_date_range(today, today),
             status='COMPLETED'
         ).aggregate(
             count=Count('id'),
@@ -226,7 +256,7 @@ class SaleViewSet(viewsets.ModelViewSet):
         
         # Ventas de ayer
         yesterday_sales = Sale.objects.filter(
-            sale_date__date=yesterday,
+            business_date_range(yesterday, yesterday),
             status='COMPLETED'
         ).aggregate(
             count=Count('id'),
@@ -235,7 +265,7 @@ class SaleViewSet(viewsets.ModelViewSet):
         
         # Ventas del mes
         month_sales = Sale.objects.filter(
-            sale_date__date__gte=this_month,
+            business_date_range(this_month),
             status='COMPLETED'
         ).aggregate(
             count=Count('id'),
@@ -244,7 +274,7 @@ class SaleViewSet(viewsets.ModelViewSet):
         
         # Métodos de pago más usados
         payment_methods = Sale.objects.filter(
-            sale_date__date__gte=today - timedelta(days=30),
+            business_date_range(today - timedelta(days=30)),
             status='COMPLETED'
         ).values('payment_method').annotate(
             count=Count('id'),
@@ -307,48 +337,46 @@ class SaleViewSet(viewsets.ModelViewSet):
         """Cancela una venta"""
         sale = self.get_object()
         
-        if sale.status != 'COMPLETED':
-            return Response(
-                {'error': 'Solo se pueden cancelar ventas completadas'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Cambiar estado
-        sale.status = 'CANCELLED'
-        sale.save()
+        from apps.analytics.kpis import KPIEngine
+        from apps.inventory.ledger import release_sale_stock
+        from apps.inventory.lots import LotAllocator
+        from .customers import record_customer_sale
         
-        # Revertir stock de productos
-        for item in sale.items.all():
-            product = item.product
-            product.current_stock += item.quantity
-            product.save()
+        user_for_movement = request.user if request.user.is_authenticated else None
+        if not user_for_movement:
+            from django.contrib.auth.models import User
+            user_for_movement = User.objects.filter(is_superuser=True).first()
+        
+        # El cambio de estado y sus efectos se guardan juntos o nada
+        with transaction.atomic():
+            # Bloquear la venta: dos cancelaciones simultáneas no revierten dos veces
+            sale = Sale.objects.select_for_update().get(pk=sale.pk)
+            if sale.status != 'COMPLETED':
+                return Response(
+                    {'error': 'Solo se pueden cancelar ventas completadas'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            # CORRECCIÓN: Manejar usuario para movimientos de stock
-            user_for_movement = request.user if request.user.is_authenticated else None
-            if not user_for_movement:
-                from django.contrib.auth.models import User
-                user_for_movement = User.objects.filter(is_superuser=True).first()
+            # Cambiar estado
+            sale.status = 'CANCELLED'
+            sale.save()
             
-            # Crear movimiento de stock
-            from apps.inventory.models import StockMovement
-            StockMovement.objects.create(
-                product=product,
-                movement_type='IN',
-                reason='RETURN_CUSTOMER',
-                quantity=item.quantity,
-                stock_before=product.current_stock - item.quantity,
-                stock_after=product.current_stock,
-                notes=f'Cancelación de venta {sale.sale_number}',
-                user=user_for_movement,
-                reference_document=sale.sale_number
-            )
+            # Devolver las unidades a los lotes de donde salieron
+            LotAllocator().release_sale(sale)
+            
+            record_customer_sale(sale, sign=-1)
+            
+            # Revertir stock de productos (lo que descontaron los movimientos de la venta)
+            release_sale_stock(sale, user=user_for_movement)
+            
+            transaction.on_commit(lambda: KPIEngine().record_sale(sale, sign=-1), robust=True)
         
         return Response({
             'success': True,
             'message': f'Venta {sale.sale_number} cancelada exitosamente'
         })
 
-class DailySummaryViewSet(viewsets.ReadOnlyModelViewSet):
+class DailySummaryViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet para resúmenes diarios"""
     queryset = DailySummary.objects.all()
     serializer_class = DailySummarySerializer
@@ -361,30 +389,21 @@ class DailySummaryViewSet(viewsets.ReadOnlyModelViewSet):
         date_from = self.request.query_params.get('date_from')
         date_to = self.request.query_params.get('date_to')
         
-        print(f"🔍 Filtros de resúmenes diarios:")
-        print(f"  - date_from: {date_from}")
-        print(f"  - date_to: {date_to}")
-        
         if date_from and date_from.strip():
             try:
                 from datetime import datetime
                 date_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
                 queryset = queryset.filter(date__gte=date_obj)
-                print(f"  ✅ Filtrado desde: {date_obj}")
             except ValueError:
-                print(f"  ❌ Fecha inválida date_from: {date_from}")
+                logger.debug('Fecha inválida', extra={'date_from': date_from})
 
         if date_to and date_to.strip():
             try:
                 from datetime import datetime
                 date_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
                 queryset = queryset.filter(date__lte=date_obj)
-                print(f"  ✅ Filtrado hasta: {date_obj}")
             except ValueError:
-                print(f"  ❌ Fecha inválida date_to: {date_to}")
-        
-        final_count = queryset.count()
-        print(f"  📊 Total resúmenes después de filtros: {final_count}")
+                logger.debug('Fecha inválida', extra={'date_to': date_to})
         
         return queryset.order_by('-date')
     
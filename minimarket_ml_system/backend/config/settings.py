@@ -33,11 +33,14 @@ LOCAL_APPS = [
     'apps.sales.apps.SalesConfig',
     'apps.ml_models.apps.MlModelsConfig',
     'apps.analytics.apps.AnalyticsConfig',
+    'apps.benchmarks.apps.BenchmarksConfig',
+    'apps.monitoring.apps.MonitoringConfig',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.monitoring.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -122,8 +125,9 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # JSONRenderer con orjson (misma salida; vuelve al de DRF si orjson no está instalado)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'apps.common.renderers.FastJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
@@ -142,32 +146,84 @@ ML_MODELS_PATH = BASE_DIR / 'data' / 'models'
 DATA_PATH = BASE_DIR / 'data'
 RAW_DATA_PATH = BASE_DIR / 'data' / 'raw'
 PROCESSED_DATA_PATH = BASE_DIR / 'data' / 'processed'
+BENCHMARKS_PATH = BASE_DIR / 'data' / 'benchmarks'
+
+# Pronóstico por lotes: productos por bloque y bloques precargados en paralelo
+FORECAST_CHUNK_SIZE = 50
+FORECAST_PREFETCH_CHUNKS = 2
+
+# Política de reposición (stock de seguridad por nivel de servicio, EOQ)
+REORDER_POLICY = {
+    'SERVICE_LEVEL': 0.95,
+    'LEAD_TIME_DAYS': 3,
+    'MIN_COVER_DAYS': 7,
+    'ORDER_COST': 20.0,
+    'HOLDING_COST_RATE': 0.25,
+    'USE_RECOMMENDED_REORDER_POINT': False,
+}
+
+# Motor de alertas (comando generate_alerts; SIGNALS reevalúa stock al guardar productos)
+ALERT_ENGINE = {
+    'EXPIRY_DAYS': 7,
+    'OVERSTOCK_CRITICAL': 1.5,
+    'ANOMALY_WINDOW_DAYS': 28,
+    'ANOMALY_Z': 3.0,
+    'ANOMALY_MIN_UNITS': 5,
+    'SIGNALS': os.environ.get('ALERT_SIGNALS', '0') == '1',
+}
+
+# Búsqueda del punto de venta (caché LRU por proceso; validación contra la BD cada CHECK_SECONDS)
+POS_LOOKUP = {
+    'CACHE_SIZE': 2048,
+    'CHECK_SECONDS': 30,
+}
 
 # Create directories if they don't exist
 os.makedirs(ML_MODELS_PATH, exist_ok=True)
 os.makedirs(RAW_DATA_PATH, exist_ok=True)
 os.makedirs(PROCESSED_DATA_PATH, exist_ok=True)
+os.makedirs(BENCHMARKS_PATH, exist_ok=True)
 os.makedirs(BASE_DIR / 'static', exist_ok=True)
 os.makedirs(BASE_DIR / 'media', exist_ok=True)
 os.makedirs(BASE_DIR / 'templates', exist_ok=True)
 
 # Logging configuration
+# Nivel de logs de la aplicación (DEBUG muestra filtros, spans y requests)
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_JSON = os.environ.get('LOG_JSON', '0') == '1'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {
+            '()': 'apps.monitoring.log_formatters.StructuredFormatter',
+            'json_output': LOG_JSON,
+        },
+    },
     'handlers': {
         'file': {
-            'level': 'INFO',
+            'level': 'DEBUG',
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'debug.log',
+            'formatter': 'structured',
         },
         'console': {
-            'level': 'INFO',
+            'level': 'DEBUG',
             'class': 'logging.StreamHandler',
+            'formatter': 'structured',
         },
     },
     'root': {
         'handlers': ['console', 'file'],
         'level': 'INFO',
     },
-}
\ No newline at end of file
+    'loggers': {
+        'apps': {
+            'level': LOG_LEVEL,
+        },
+    },
+}
+
+# Métricas por request y endpoint /metrics (formato Prometheus)
+METRICS_ENABLED = True
\ No newline at end of file
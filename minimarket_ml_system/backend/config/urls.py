@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
+from apps.monitoring.views import metrics_view
 
 def api_root(request):
     return JsonResponse({
@@ -16,6 +17,7 @@ def api_root(request):
             'sales': '/api/sales/',
             'ml_models': '/api/ml/',
             'analytics': '/api/analytics/',
+            'metrics': '/metrics',
         }
     })
 
@@ -33,6 +35,9 @@ urlpatterns = [
     path('api/ml/', include('apps.ml_models.urls')),
     path('api/analytics/', include('apps.analytics.urls')),
     
+    # Métricas (Prometheus)
+    path('metrics', metrics_view, name='metrics'),
+    
     # API Documentation (Django REST Framework)
     path('api-auth/', include('rest_framework.urls')),
 ]
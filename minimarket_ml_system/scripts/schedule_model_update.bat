@@ -0,0 +1,12 @@
+@echo off
+echo ======================================
+echo  PROGRAMAR ACTUALIZACION DIARIA DEL MODELO ML
+echo ======================================
+cd /d "%~dp0..\backend"
+echo Registrando tarea diaria (02:00) en el Programador de tareas...
+schtasks /Create /F /SC DAILY /ST 02:00 /TN "MinimarketML_UpdateModels" /TR "cmd /c cd /d %CD% && ..\venv\Scripts\python.exe manage.py update_models >> ..\backend\update_models.log 2>&1"
+echo ======================================
+echo Tarea programada: actualizacion incremental diaria
+echo con reentrenamiento completo cada 7 dias
+echo ======================================
+pause